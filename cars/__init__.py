@@ -26,6 +26,9 @@ import os
 import sys
 from importlib.metadata import PackageNotFoundError, version
 
+# CARS imports
+from cars.core.numba_cache import setup_numba_cache
+
 try:
     __version__ = version("cars")
 except PackageNotFoundError:
@@ -52,16 +55,26 @@ os.environ["DASK_CONFIG"] = str(dask_config_path)
 
 # Force monothread for child workers
 os.environ["PANDORA_NUMBA_PARALLEL"] = str(False)
-os.environ["PANDORA_NUMBA_CACHE"] = str(False)
+# numba functions are cached on disk, by CARS version and CPU
+os.environ["PANDORA_NUMBA_CACHE"] = str(True)
 os.environ["SHARELOC_NUMBA_PARALLEL"] = str(False)
 os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["MKL_NUM_THREADS"] = "1"
-os.environ["NUMBA_NUM_THREADS"] = "1"
+# numba threads are launched for all available CPUs: each task uses
+# the number of threads given by the cluster (see task_threads)
+os.environ["NUMBA_NUM_THREADS"] = str(
+    len(os.sched_getaffinity(0))
+    if hasattr(os, "sched_getaffinity")
+    else os.cpu_count()
+)
 os.environ["GDAL_NUM_THREADS"] = "1"
 
 # Limit GDAL cache per worker to 500MB
 os.environ["GDAL_CACHEMAX"] = "500"
 
+# Set numba cache directory before numba is imported
+setup_numba_cache(__version__)
+
 
 def import_plugins() -> None:
     """
@@ -22,17 +22,31 @@
 CARS application module init file
 """
 
-# Imports needed in order to register application for Application factory
-from . import dem_generation  # noqa: F401
-from . import dense_match_filling  # noqa: F401
-from . import dense_matching  # noqa: F401
-from . import dsm_filling  # noqa: F401
-from . import grid_generation  # noqa: F401
-from . import hole_detection  # noqa: F401
-from . import point_cloud_denoising  # noqa: F401
-from . import point_cloud_fusion  # noqa: F401
-from . import point_cloud_outlier_removal  # noqa: F401
-from . import rasterization  # noqa: F401
-from . import resampling  # noqa: F401
-from . import sparse_matching  # noqa: F401
-from . import triangulation  # noqa: F401
+# Applications are imported when first used, in order to register them for
+# Application factory: see Application.lazy_applications
+import importlib
+
+SUBMODULES = [
+    "dem_generation",
+    "dense_match_filling",
+    "dense_matching",
+    "dsm_filling",
+    "grid_generation",
+    "hole_detection",
+    "point_cloud_denoising",
+    "point_cloud_fusion",
+    "point_cloud_outlier_removal",
+    "rasterization",
+    "resampling",
+    "sparse_matching",
+    "triangulation",
+]
+
+
+def __getattr__(name):
+    """
+    Import application submodules on first access
+    """
+    if name in SUBMODULES:
+        return importlib.import_module("{}.{}".format(__name__, name))
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
@@ -24,6 +24,7 @@ This module contains class application factory.
 """
 
 # Standard imports
+import importlib
 import logging
 
 # CARS imports
@@ -42,6 +43,26 @@ class Application:
     # applications
     available_applications = {}
 
+    # Dict (application_name:str, module:str) containing CARS applications,
+    # whose module is imported when the application is first used
+    lazy_applications = {
+        "dem_generation": "cars.applications.dem_generation",
+        "dense_match_filling": "cars.applications.dense_match_filling",
+        "dense_matching": "cars.applications.dense_matching",
+        "dsm_filling": "cars.applications.dsm_filling",
+        "grid_generation": "cars.applications.grid_generation",
+        "hole_detection": "cars.applications.hole_detection",
+        "pc_denoising": "cars.applications.point_cloud_denoising",
+        "point_cloud_fusion": "cars.applications.point_cloud_fusion",
+        "point_cloud_outlier_removal": (
+            "cars.applications.point_cloud_outlier_removal"
+        ),
+        "point_cloud_rasterization": "cars.applications.rasterization",
+        "resampling": "cars.applications.resampling",
+        "sparse_matching": "cars.applications.sparse_matching",
+        "triangulation": "cars.applications.triangulation",
+    }
+
     def __new__(
         cls,
         app_name: str,
@@ -73,6 +94,9 @@ class Application:
 
         app = None
 
+        if name not in cls.available_applications:
+            cls.import_application(name)
+
         try:
             app_class = cls.available_applications[name]
         except KeyError:
@@ -88,9 +112,23 @@ class Application:
         Print all registered applications
         """
 
-        for app_name in cls.available_applications:
+        for app_name in sorted(
+            set(cls.available_applications) | set(cls.lazy_applications)
+        ):
             print(app_name)
 
+    @classmethod
+    def import_application(cls, app_name: str):
+        """
+        Import the module of a CARS application, registering it
+
+        :param app_name: name of the application.
+        :type app_name: str
+        """
+
+        if app_name in cls.lazy_applications:
+            importlib.import_module(cls.lazy_applications[app_name])
+
     @classmethod
     def register(cls, app_name: str):
         """
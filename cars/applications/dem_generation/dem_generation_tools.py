@@ -112,3 +112,400 @@ def triangulate_sparse_matches(
     pd_cloud.attrs["epsg"] = epsg
 
     return pd_cloud
+
+
+def generate_ranges(
+    pd_pc, resolution, xmin=None, xmax=None, ymin=None, ymax=None
+):
+    """
+    Generate regular grid coordinates along x and y
+
+    :param pd_pc: point cloud
+    :type pd_pc: Pandas Dataframe
+    :param resolution: resolution in meter
+    :type resolution: float
+    :param xmin: x min position in metric system
+    :type xmin: float
+    :param xmax: x max position in metric system
+    :type xmax: float
+    :param ymin: y min position in metric system
+    :type ymin: float
+    :param ymax: y max position in metric system
+    :type ymax: float
+
+    :return: x range, y range
+    :rtype: tuple(numpy array, numpy array)
+
+    """
+
+    if None in (xmin, xmax, ymin, ymax):
+        mins = pd_pc.min(skipna=True)
+        maxs = pd_pc.max(skipna=True)
+        xmin = mins["x"]
+        ymin = mins["y"]
+        xmax = maxs["x"]
+        ymax = maxs["y"]
+
+    nb_x = int((xmax - xmin) / resolution)
+    x_range = np.linspace(xmin, xmax, nb_x)
+    nb_y = int((ymax - ymin) / resolution)
+
+    y_range = np.linspace(ymin, ymax, nb_y)
+
+    return x_range, y_range
+
+
+def generate_grid(
+    pd_pc, resolution, xmin=None, xmax=None, ymin=None, ymax=None
+):
+    """
+    Generate regular grid
+
+    :param pd_pc: point cloud
+    :type pd_pc: Pandas Dataframe
+    :param resolution: resolution in meter
+    :type resolution: float
+    :param xmin: x min position in metric system
+    :type xmin: float
+    :param xmax: x max position in metric system
+    :type xmax: float
+    :param ymin: y min position in metric system
+    :type ymin: float
+    :param ymax: y max position in metric system
+    :type ymax: float
+
+    :return: regular grid
+    :rtype: numpy array
+
+    """
+
+    x_range, y_range = generate_ranges(
+        pd_pc, resolution, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax
+    )
+    x_grid, y_grid = np.meshgrid(x_range, y_range)  # 2D grid for interpolation
+
+    return x_grid, y_grid
+
+
+def split_range(range_min, range_max):
+    """
+    Split range in two halves, as done at each level of the dichotomy
+
+    :param range_min: range min
+    :type range_min: int
+    :param range_max: range max
+    :type range_max: int
+
+    :return: list of sub ranges (range_min, range_max)
+    :rtype: list(tuple(int, int))
+    """
+
+    if range_max - range_min >= 2:
+        med = int((range_max + range_min) / 2)
+        return [(range_min, med), (med, range_max)]
+
+    return [(range_min, range_max)]
+
+
+def get_dichotomic_ranges(range_min, range_max, depth):
+    """
+    Get ranges of the dichotomy at given depth
+
+    :param range_min: range min
+    :type range_min: int
+    :param range_max: range max
+    :type range_max: int
+    :param depth: depth of dichotomy
+    :type depth: int
+
+    :return: list of sub ranges (range_min, range_max)
+    :rtype: list(tuple(int, int))
+    """
+
+    ranges = [(range_min, range_max)]
+    for _ in range(depth):
+        ranges = [
+            sub_range
+            for current_range in ranges
+            for sub_range in split_range(*current_range)
+        ]
+
+    return ranges
+
+
+def get_tiling_depth(nb_rows, nb_cols, tile_size):
+    """
+    Get the first depth of dichotomy where cells are smaller than tile_size
+
+    :param nb_rows: number of rows of grid
+    :type nb_rows: int
+    :param nb_cols: number of columns of grid
+    :type nb_cols: int
+    :param tile_size: maximum size of tile
+    :type tile_size: int
+
+    :return: depth
+    :rtype: int
+    """
+
+    depth = 0
+    while any(
+        range_max - range_min > tile_size
+        for nb_elements in (nb_rows, nb_cols)
+        for range_min, range_max in get_dichotomic_ranges(0, nb_elements, depth)
+    ):
+        depth += 1
+
+    return depth
+
+
+def compute_cell_values(
+    pd_pc, list_fun, x_values, y_values, min_number_matches, overlap
+):
+    """
+    Compute values of given functions on the matches of a cell
+
+    :param pd_pc: point cloud
+    :type pd_pc: Pandas Dataframe
+    :param list_fun: list of functions
+    :type list_fun: list(function)
+    :param x_values: x positions of cell
+    :type x_values: numpy array
+    :param y_values: y positions of cell
+    :type y_values: numpy array
+    :param min_number_matches: minimum of matches: stop condition
+    :type min_number_matches: int
+    :param overlap: overlap to use for include condition
+    :type overlap: float
+
+    :return: matches of cell, values of functions. Values are None
+        if there is not enough matches, and nan if matches are not
+        centered on cell
+    :rtype: tuple(Pandas Dataframe, list(float))
+    """
+
+    xmin = np.nanmin(x_values)
+    ymin = np.nanmin(y_values)
+    xmax = np.nanmax(x_values)
+    ymax = np.nanmax(y_values)
+    xcenter = (xmax + xmin) / 2
+    ycenter = (ymax + ymin) / 2
+
+    # find points
+    tile_pc = pd_pc.loc[
+        (pd_pc["x"] >= xmin - overlap)
+        & (pd_pc["x"] < xmax + overlap)
+        & (pd_pc["y"] >= ymin - overlap)
+        & (pd_pc["y"] < ymax + overlap)
+    ]
+
+    nb_matches = tile_pc.shape[0]
+
+    if nb_matches <= min_number_matches:
+        return tile_pc, None
+
+    values = []
+    for fun in list_fun:
+        if (
+            np.abs(xcenter - np.median(tile_pc["x"])) < overlap
+            and np.abs(ycenter - np.median(tile_pc["y"])) < overlap
+        ):
+            if isinstance(fun, tuple):
+                # percentile
+                values.append(fun[0](tile_pc["z"], fun[1]))
+            else:
+                values.append(fun(tile_pc["z"]))
+        else:
+            values.append(np.nan)
+
+    return tile_pc, values
+
+
+def split_matches_rec(
+    pd_pc,
+    list_fun,
+    x_range,
+    y_range,
+    tiles_matches,
+    tiles_values,
+    row_min,
+    row_max,
+    col_min,
+    col_max,
+    depth,
+    min_number_matches,
+    overlap,
+    values=None,
+):
+    """
+    Recursive function computing the first levels of multi_res_rec,
+    until given depth, and sharing matches between cells of this depth.
+    Cells of this depth are the tiles computed with multi_res_rec.
+
+    :param pd_pc: point cloud
+    :type pd_pc: Pandas Dataframe
+    :param list_fun: list of functions
+    :type list_fun: list(function)
+    :param x_range: x positions of grid columns
+    :type x_range: numpy array
+    :param y_range: y positions of grid rows
+    :type y_range: numpy array
+    :param tiles_matches: matches of tiles to compute, filled with
+        (row_min, col_min) keys
+    :type tiles_matches: dict
+    :param tiles_values: values of functions inherited by tiles, filled
+        with (row_min, col_min) keys
+    :type tiles_values: dict
+    :param row_min: row min
+    :type row_min: int
+    :param row_max: row max
+    :type row_max: int
+    :param col_min: col min
+    :type col_min: int
+    :param col_max: col max
+    :type col_max: int
+    :param depth: remaining depth until tiles
+    :type depth: int
+    :param min_number_matches: minimum of matches: stop condition
+    :type min_number_matches: int
+    :param overlap: overlap to use for include condition
+    :type overlap: float
+    :param values: values of functions inherited from upper levels
+    :type values: list(float)
+
+    """
+
+    if pd_pc.shape[0] < min_number_matches:
+        raise RuntimeError("Not enough matches")
+
+    if values is None:
+        values = [np.nan] * len(list_fun)
+
+    tile_pc, cell_values = compute_cell_values(
+        pd_pc,
+        list_fun,
+        x_range[col_min:col_max],
+        y_range[row_min:row_max],
+        min_number_matches,
+        overlap,
+    )
+
+    if depth == 0:
+        # tile is computed with multi_res_rec, from its matches
+        tiles_matches[(row_min, col_min)] = tile_pc
+        tiles_values[(row_min, col_min)] = values
+    elif cell_values is None:
+        # dichotomy stops: sub tiles keep current values
+        for row_min_tile, _ in get_dichotomic_ranges(row_min, row_max, depth):
+            for col_min_tile, _ in get_dichotomic_ranges(
+                col_min, col_max, depth
+            ):
+                tiles_values[(row_min_tile, col_min_tile)] = values
+    else:
+        for row_min_tile, row_max_tile in split_range(row_min, row_max):
+            for col_min_tile, col_max_tile in split_range(col_min, col_max):
+                split_matches_rec(
+                    tile_pc,
+                    list_fun,
+                    x_range,
+                    y_range,
+                    tiles_matches,
+                    tiles_values,
+                    row_min_tile,
+                    row_max_tile,
+                    col_min_tile,
+                    col_max_tile,
+                    depth - 1,
+                    min_number_matches,
+                    overlap,
+                    values=cell_values,
+                )
+
+
+def multi_res_rec(
+    pd_pc,
+    list_fun,
+    x_grid,
+    y_grid,
+    list_z_grid,
+    row_min,
+    row_max,
+    col_min,
+    col_max,
+    min_number_matches,
+    overlap,
+):
+    """
+    Recursive function to fill grid with results of given functions
+
+    :param pd_pc: point cloud
+    :type pd_pc: Pandas Dataframe
+    :param list_fun: list of functions
+    :type list_fun: list(function)
+    :param x_grid: x grid
+    :type x_grid: numpy array
+    :param y_grid: y grid
+    :type y_grid: numpy array
+    :param list_z_grid: list of z grid computed with functions
+    :type list_z_grid: list(numpy array)
+    :param row_min: row min
+    :type row_min: int
+    :param row_max: row max
+    :type row_max: int
+    :param col_min: col min
+    :type col_min: int
+    :param col_max: col max
+    :type col_max: int
+    :param min_number_matches: minimum of matches: stop condition
+    :type min_number_matches: int
+    :param overlap: overlap to use for include condition
+    :type overlap: float
+
+    """
+
+    if pd_pc.shape[0] < min_number_matches:
+        raise RuntimeError("Not enough matches")
+
+    if len(list_fun) != len(list_z_grid):
+        raise RuntimeError(
+            "Number of functions must match the number of z layers"
+        )
+
+    tile_pc, values = compute_cell_values(
+        pd_pc,
+        list_fun,
+        x_grid[row_min:row_max, col_min:col_max],
+        y_grid[row_min:row_max, col_min:col_max],
+        min_number_matches,
+        overlap,
+    )
+
+    if (
+        values is not None
+        and (row_max - row_min > 0)
+        and (col_max - col_min > 0)
+    ):
+        # apply global value
+        for value, z_grid in zip(values, list_z_grid):  # noqa: B905
+            z_grid[row_min:row_max, col_min:col_max] = value
+
+        list_row = split_range(row_min, row_max)
+        list_col = split_range(col_min, col_max)
+
+        # if not ( len(list_row) == 1 and len(list_col) == 1):
+        if len(list_row) + len(list_col) > 2:
+            for row_min_tile, row_max_tile in list_row:
+                for col_min_tile, col_max_tile in list_col:
+                    multi_res_rec(
+                        tile_pc,
+                        list_fun,
+                        x_grid,
+                        y_grid,
+                        list_z_grid,
+                        row_min_tile,
+                        row_max_tile,
+                        col_min_tile,
+                        col_max_tile,
+                        min_number_matches,
+                        overlap,
+                    )
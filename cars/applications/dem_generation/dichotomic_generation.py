@@ -22,7 +22,6 @@
 this module contains the dichotomic dem generation application class.
 """
 
-
 # Standard imports
 import collections
 import logging
@@ -40,6 +39,9 @@ from cars.applications import application_constants
 from cars.applications.dem_generation import (
     dem_generation_constants as dem_gen_cst,
 )
+from cars.applications.dem_generation import (
+    dem_generation_tools as dem_gen_tools,
+)
 from cars.applications.dem_generation.dem_generation import DemGeneration
 from cars.applications.triangulation import triangulation_tools
 
@@ -85,6 +87,7 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         ]
         self.min_dem = self.used_config["min_dem"]
         self.max_dem = self.used_config["max_dem"]
+        self.tile_size = self.used_config["tile_size"]
 
         # Init orchestrator
         self.orchestrator = None
@@ -125,6 +128,7 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         overloaded_conf["fillnodata_max_search_distance"] = conf.get(
             "fillnodata_max_search_distance", 5
         )
+        overloaded_conf["tile_size"] = conf.get("tile_size", 500)
 
         overloaded_conf[application_constants.SAVE_INTERMEDIATE_DATA] = (
             conf.get(application_constants.SAVE_INTERMEDIATE_DATA, False)
@@ -140,6 +144,7 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
             "min_dem": And(Or(int, float), lambda x: x < 0),
             "max_dem": And(Or(int, float), lambda x: x > 0),
             "fillnodata_max_search_distance": And(int, lambda x: x > 0),
+            "tile_size": And(int, lambda x: x > 0),
             application_constants.SAVE_INTERMEDIATE_DATA: bool,
         }
 
@@ -156,10 +161,16 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         output_dir,
         geoid_path,
         dem_roi_to_use=None,
+        orchestrator=None,
     ):
         """
         Run dichotomic dem generation using matches
 
+        The dichotomic grid is split in tiles of at most tile_size pixels,
+        following the subdivisions of the dichotomy: the first levels are
+        computed on the whole scene, then each tile is computed on the
+        cluster with its own matches, and filled with its neighbours
+
         :param triangulated_matches_list: list of triangulated matches
             positions must be in a metric system
         :type triangulated_matches_list: list(pandas.Dataframe)
@@ -167,6 +178,7 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         :type output_dir: str
         :param geoid_path: geoid path
         :param dem_roi_to_use: dem roi polygon to use as roi
+        :param orchestrator: orchestrator used
 
         :return: dem data computed with mean, min and max.
             dem is also saved in disk, and paths are available in attributes.
@@ -174,10 +186,15 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         :rtype: CarsDataset
         """
 
-        # Create sequential orchestrator for savings
-        self.orchestrator = ocht.Orchestrator(
-            orchestrator_conf={"mode": "sequential"}
-        )
+        # Default orchestrator
+        if orchestrator is None:
+            # Create default sequential orchestrator for current application
+            # be aware, no out_json will be shared between orchestrators
+            self.orchestrator = ocht.Orchestrator(
+                orchestrator_conf={"mode": "sequential"}
+            )
+        else:
+            self.orchestrator = orchestrator
 
         # Generate point cloud
         epsg = 4326
@@ -231,7 +248,7 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         ymax = ymax + self.margin
 
         # Generate regular grid
-        xnew, ynew = generate_grid(
+        x_range, y_range = dem_gen_tools.generate_ranges(
             merged_point_cloud,
             self.resolution,
             xmin=xmin,
@@ -247,98 +264,62 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
             (np.percentile, 100 - self.percentile),
         ]
 
-        list_z_grid = []
-        for _ in range(len(funcs)):
-            list_z_grid.append(np.full_like(xnew, np.nan))
-
-        row_min = 0
-        col_min = 0
-        row_max = list_z_grid[0].shape[0]
-        col_max = list_z_grid[0].shape[1]
+        row_max = len(y_range)
+        col_max = len(x_range)
 
         # use 100% overlap for dem
         overlap = 1 * self.resolution
 
-        # Modify output grids
-        multi_res_rec(
+        # Compute first levels of dichotomy, until cells fit in tiles
+        depth = dem_gen_tools.get_tiling_depth(row_max, col_max, self.tile_size)
+        row_ranges = dem_gen_tools.get_dichotomic_ranges(0, row_max, depth)
+        col_ranges = dem_gen_tools.get_dichotomic_ranges(0, col_max, depth)
+        tiles_matches = {}
+        tiles_values = {}
+        dem_gen_tools.split_matches_rec(
             merged_point_cloud,
             funcs,
-            xnew,
-            ynew,
-            list_z_grid,
-            row_min,
+            x_range,
+            y_range,
+            tiles_matches,
+            tiles_values,
+            0,
             row_max,
-            col_min,
+            0,
             col_max,
+            depth,
             self.min_number_matches,
             overlap,
         )
 
-        # Generate dense dataset with z = 0
-        alti_zeros_dataset = xr.Dataset(
-            {
-                cst.X: (["row", "col"], xnew),
-                cst.Y: (["row", "col"], ynew),
-                cst.Z: (["row", "col"], np.zeros(xnew.shape)),
-            },
-            coords={
-                "row": np.arange(xnew.shape[0]),
-                "col": np.arange(xnew.shape[1]),
-            },
-        )
-        alti_zeros_dataset.attrs[cst.EPSG] = epsg
-        # Transform to lon lat
-        projection.point_cloud_conversion_dataset(alti_zeros_dataset, 4326)
-
-        geoid_offset = triangulation_tools.geoid_offset(
-            alti_zeros_dataset, geoid_path
+        # Generate CarsDatasets
+        # raw dem, before filling, in dichotomic grid geometry (y up)
+        raw_dem = cars_dataset.CarsDataset("arrays", name="raw_dem_generation")
+        raw_dem.tiling_grid = np.array(
+            [
+                [
+                    [row_min_tile, row_max_tile, col_min_tile, col_max_tile]
+                    for col_min_tile, col_max_tile in col_ranges
+                ]
+                for row_min_tile, row_max_tile in row_ranges
+            ]
         )
-
-        # fillnodata
-        valid = np.isfinite(list_z_grid[0])
-        msd = self.fillnodata_max_search_distance
-        for idx in range(3):
-            list_z_grid[idx] = rasterio.fill.fillnodata(
-                list_z_grid[idx], mask=valid, max_search_distance=msd
-            )
-            list_z_grid[idx] += geoid_offset[cst.Z].values
-            list_z_grid[idx] = np.nan_to_num(list_z_grid[idx])
-
-        dem_median = list_z_grid[0]
-        dem_min = list_z_grid[1]
-        dem_max = list_z_grid[2]
-
-        if np.any((dem_max - dem_min) < 0):
-            logging.error("dem min > dem max")
-            raise RuntimeError("dem min > dem max")
-
-        # apply height margin
-        dem_min -= self.min_height_margin
-        dem_max += self.max_height_margin
-
-        # Convert to int
-        dem_median = dem_median.astype(int)
-        dem_min = np.floor(dem_min).astype(int)
-        dem_max = np.ceil(dem_max).astype(int)
-
-        dem_min = np.where(
-            dem_median - dem_min < self.min_dem,
-            dem_median + self.min_dem,
-            dem_min,
-        )
-        dem_max = np.where(
-            dem_max - dem_median > self.max_dem,
-            dem_median + self.max_dem,
-            dem_max,
-        )
-
-        # Generate CarsDataset
-
+        # dem, in raster geometry (y down)
         dem = cars_dataset.CarsDataset("arrays", name="dem_generation")
-
-        # Compute tiling grid
-        # Only one tile
-        dem.tiling_grid = np.array([[[0, row_max, 0, col_max]]])
+        dem.tiling_grid = np.array(
+            [
+                [
+                    [
+                        row_max - row_max_tile,
+                        row_max - row_min_tile,
+                        col_min_tile,
+                        col_max_tile,
+                    ]
+                    for col_min_tile, col_max_tile in col_ranges
+                ]
+                for row_min_tile, row_max_tile in reversed(row_ranges)
+            ]
+        )
 
         # saving infos
         # dem mean
@@ -401,34 +382,82 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
             }
         )
 
-        # Generate dataset
-        dem_tile = xr.Dataset(
-            data_vars={
-                "dem_median": (["row", "col"], np.flip(dem_median, axis=0)),
-                "dem_min": (["row", "col"], np.flip(dem_min, axis=0)),
-                "dem_max": (["row", "col"], np.flip(dem_max, axis=0)),
-            },
-            coords={
-                "row": np.arange(0, row_max),
-                "col": np.arange(0, col_max),
-            },
-        )
-
         [saving_info] = (  # pylint: disable=unbalanced-tuple-unpacking
             self.orchestrator.get_saving_infos([dem])
         )
-        saving_info = ocht.update_saving_infos(saving_info, row=0, col=0)
-        window = cars_dataset.window_array_to_dict(dem.tiling_grid[0, 0])
-        cars_dataset.fill_dataset(
-            dem_tile,
-            saving_info=saving_info,
-            window=window,
-            profile=raster_profile,
-            attributes=None,
-            overlaps=None,
-        )
 
-        dem[0, 0] = dem_tile
+        # Compute dichotomy in each tile
+        for row in range(raw_dem.shape[0]):
+            for col in range(raw_dem.shape[1]):
+                row_min_tile, row_max_tile, col_min_tile, col_max_tile = (
+                    raw_dem.tiling_grid[row, col]
+                )
+                raw_dem[row, col] = self.orchestrator.cluster.create_task(
+                    dichotomic_tile_wrapper
+                )(
+                    tiles_matches.get((row_min_tile, col_min_tile)),
+                    funcs,
+                    x_range[col_min_tile:col_max_tile],
+                    y_range[row_min_tile:row_max_tile],
+                    tiles_values[(row_min_tile, col_min_tile)],
+                    row_min_tile,
+                    col_min_tile,
+                    self.min_number_matches,
+                    overlap,
+                )
+
+        # Fill each tile with its neighbours, up to fillnodata distance
+        margin = self.fillnodata_max_search_distance + 1
+        for row in range(raw_dem.shape[0]):
+            for col in range(raw_dem.shape[1]):
+                row_min_tile, row_max_tile, col_min_tile, col_max_tile = (
+                    raw_dem.tiling_grid[row, col]
+                )
+                fill_window = [
+                    max(0, row_min_tile - margin),
+                    min(row_max, row_max_tile + margin),
+                    max(0, col_min_tile - margin),
+                    min(col_max, col_max_tile + margin),
+                ]
+                neighbour_tiles = [
+                    raw_dem[row_neigh, col_neigh]
+                    for row_neigh, (row_min_neigh, row_max_neigh) in enumerate(
+                        row_ranges
+                    )
+                    for col_neigh, (col_min_neigh, col_max_neigh) in enumerate(
+                        col_ranges
+                    )
+                    if row_min_neigh < fill_window[1]
+                    and row_max_neigh > fill_window[0]
+                    and col_min_neigh < fill_window[3]
+                    and col_max_neigh > fill_window[2]
+                ]
+
+                dem_row = raw_dem.shape[0] - 1 - row
+                full_saving_info = ocht.update_saving_infos(
+                    saving_info, row=dem_row, col=col
+                )
+                dem[dem_row, col] = self.orchestrator.cluster.create_task(
+                    fill_dem_tile_wrapper
+                )(
+                    neighbour_tiles,
+                    x_range[col_min_tile:col_max_tile],
+                    y_range[row_min_tile:row_max_tile],
+                    raw_dem.tiling_grid[row, col],
+                    fill_window,
+                    epsg,
+                    geoid_path,
+                    self.fillnodata_max_search_distance,
+                    self.min_height_margin,
+                    self.max_height_margin,
+                    self.min_dem,
+                    self.max_dem,
+                    window=cars_dataset.window_array_to_dict(
+                        dem.tiling_grid[dem_row, col]
+                    ),
+                    profile=raster_profile,
+                    saving_info=full_saving_info,
+                )
 
         # Save
         self.orchestrator.breakpoint()
@@ -436,167 +465,249 @@ class DichotomicGeneration(DemGeneration, short_name="dichotomic"):
         return dem
 
 
-def generate_grid(
-    pd_pc, resolution, xmin=None, xmax=None, ymin=None, ymax=None
-):
-    """
-    Generate regular grid
-
-    :param pd_pc: point cloud
-    :type pd_pc: Pandas Dataframe
-    :param resolution: resolution in meter
-    :type resolution: float
-    :param xmin: x min position in metric system
-    :type xmin: float
-    :param xmax: x max position in metric system
-    :type xmax: float
-    :param ymin: y min position in metric system
-    :type ymin: float
-    :param ymax: y max position in metric system
-    :type ymax: float
-
-    :return: regular grid
-    :rtype: numpy array
-
-    """
-
-    if None in (xmin, xmax, ymin, ymax):
-        mins = pd_pc.min(skipna=True)
-        maxs = pd_pc.max(skipna=True)
-        xmin = mins["x"]
-        ymin = mins["y"]
-        xmax = maxs["x"]
-        ymax = maxs["y"]
-
-    nb_x = int((xmax - xmin) / resolution)
-    x_range = np.linspace(xmin, xmax, nb_x)
-    nb_y = int((ymax - ymin) / resolution)
-
-    y_range = np.linspace(ymin, ymax, nb_y)
-    x_grid, y_grid = np.meshgrid(x_range, y_range)  # 2D grid for interpolation
-
-    return x_grid, y_grid
-
-
-def multi_res_rec(
-    pd_pc,
+def dichotomic_tile_wrapper(
+    tile_pc,
     list_fun,
-    x_grid,
-    y_grid,
-    list_z_grid,
+    x_range,
+    y_range,
+    values,
     row_min,
-    row_max,
     col_min,
-    col_max,
     min_number_matches,
     overlap,
 ):
     """
-    Recursive function to fill grid with results of given functions
+    Compute the dichotomy of a dem tile, without filling
 
-    :param pd_pc: point cloud
-    :type pd_pc: Pandas Dataframe
+    :param tile_pc: matches of tile, None if dichotomy stopped before tile
+    :type tile_pc: Pandas Dataframe
     :param list_fun: list of functions
     :type list_fun: list(function)
-    :param x_grid: x grid
-    :type x_grid: numpy array
-    :param y_grid: y grid
-    :type y_grid: numpy array
-    :param list_z_grid: list of z grid computed with functions
-    :type list_z_grid: list(numpy array)
-    :param row_min: row min
+    :param x_range: x positions of tile columns
+    :type x_range: numpy array
+    :param y_range: y positions of tile rows
+    :type y_range: numpy array
+    :param values: values of functions inherited from upper levels
+    :type values: list(float)
+    :param row_min: first row of tile in dichotomic grid
     :type row_min: int
-    :param row_max: row max
-    :type row_max: int
-    :param col_min: col min
+    :param col_min: first column of tile in dichotomic grid
     :type col_min: int
-    :param col_max: col max
-    :type col_max: int
     :param min_number_matches: minimum of matches: stop condition
     :type min_number_matches: int
     :param overlap: overlap to use for include condition
     :type overlap: float
 
+    :return: raw dem tile, with dem_median, dem_min and dem_max, in
+        dichotomic grid geometry
+    :rtype: xr.Dataset
     """
 
-    if pd_pc.shape[0] < min_number_matches:
-        raise RuntimeError("Not enough matches")
+    x_grid, y_grid = np.meshgrid(x_range, y_range)
 
-    if len(list_fun) != len(list_z_grid):
-        raise RuntimeError(
-            "Number of functions must match the number of z layers"
+    list_z_grid = [np.full(x_grid.shape, value) for value in values]
+
+    if tile_pc is not None and tile_pc.shape[0] > min_number_matches:
+        dem_gen_tools.multi_res_rec(
+            tile_pc,
+            list_fun,
+            x_grid,
+            y_grid,
+            list_z_grid,
+            0,
+            x_grid.shape[0],
+            0,
+            x_grid.shape[1],
+            min_number_matches,
+            overlap,
         )
 
-    x_values = x_grid[row_min:row_max, col_min:col_max]
-    y_values = y_grid[row_min:row_max, col_min:col_max]
-    xmin = np.nanmin(x_values)
-    ymin = np.nanmin(y_values)
-    xmax = np.nanmax(x_values)
-    ymax = np.nanmax(y_values)
-    xcenter = (xmax + xmin) / 2
-    ycenter = (ymax + ymin) / 2
-
-    # find points
-    tile_pc = pd_pc.loc[
-        (pd_pc["x"] >= xmin - overlap)
-        & (pd_pc["x"] < xmax + overlap)
-        & (pd_pc["y"] >= ymin - overlap)
-        & (pd_pc["y"] < ymax + overlap)
-    ]
-
-    nb_matches = tile_pc.shape[0]
-
-    if (
-        nb_matches > min_number_matches
-        and (row_max - row_min > 0)
-        and (col_max - col_min > 0)
-    ):
-        # apply global value
-        for fun, z_grid in zip(list_fun, list_z_grid):  # noqa: B905
-            if (
-                np.abs(xcenter - np.median(tile_pc["x"])) < overlap
-                and np.abs(ycenter - np.median(tile_pc["y"])) < overlap
-            ):
-                if isinstance(fun, tuple):
-                    # percentile
-                    z_grid[row_min:row_max, col_min:col_max] = fun[0](
-                        tile_pc["z"], fun[1]
-                    )
-                else:
-                    z_grid[row_min:row_max, col_min:col_max] = fun(tile_pc["z"])
-            else:
-                z_grid[row_min:row_max, col_min:col_max] = np.nan
-
-        list_row = []
-        if row_max - row_min >= 2:
-            med = int((row_max + row_min) / 2)
-            list_row.append((row_min, med))
-            list_row.append((med, row_max))
-        else:
-            list_row.append((row_min, row_max))
+    return xr.Dataset(
+        data_vars={
+            dem_gen_cst.DEM_MEDIAN: (["row", "col"], list_z_grid[0]),
+            dem_gen_cst.DEM_MIN: (["row", "col"], list_z_grid[1]),
+            dem_gen_cst.DEM_MAX: (["row", "col"], list_z_grid[2]),
+        },
+        coords={
+            "row": np.arange(row_min, row_min + x_grid.shape[0]),
+            "col": np.arange(col_min, col_min + x_grid.shape[1]),
+        },
+    )
+
+
+def fill_dem_tile_wrapper(
+    raw_tiles,
+    x_range,
+    y_range,
+    tile_window,
+    fill_window,
+    epsg,
+    geoid_path,
+    fillnodata_max_search_distance,
+    min_height_margin,
+    max_height_margin,
+    min_dem,
+    max_dem,
+    window=None,
+    profile=None,
+    saving_info=None,
+):
+    """
+    Fill dem tile with fillnodata, apply geoid offset and height margins
+
+    :param raw_tiles: raw dem tiles intersecting fill window
+    :type raw_tiles: list(xr.Dataset)
+    :param x_range: x positions of tile columns
+    :type x_range: numpy array
+    :param y_range: y positions of tile rows
+    :type y_range: numpy array
+    :param tile_window: tile [row_min, row_max, col_min, col_max]
+        in dichotomic grid
+    :type tile_window: list(int)
+    :param fill_window: [row_min, row_max, col_min, col_max] window
+        in dichotomic grid, used for fillnodata
+    :type fill_window: list(int)
+    :param epsg: epsg of grid
+    :type epsg: int
+    :param geoid_path: geoid path
+    :type geoid_path: str
+    :param fillnodata_max_search_distance: max search distance for fillnodata
+    :type fillnodata_max_search_distance: int
+    :param min_height_margin: height margin applied to dem min
+    :type min_height_margin: float
+    :param max_height_margin: height margin applied to dem max
+    :type max_height_margin: float
+    :param min_dem: min value that has to be reached by dem min
+    :type min_dem: float
+    :param max_dem: max value that has to be reached by dem max
+    :type max_dem: float
+    :param window: window of tile in dem raster
+    :type window: dict
+    :param profile: rasterio profile of dem
+    :type profile: dict
+    :param saving_info: saving infos
+    :type saving_info: dict
+
+    :return: dem tile, with dem_median, dem_min and dem_max
+    :rtype: xr.Dataset
+    """
 
-        list_col = []
-        if col_max - col_min >= 2:
-            med = int((col_max + col_min) / 2)
-            list_col.append((col_min, med))
-            list_col.append((med, col_max))
-        else:
-            list_col.append((col_min, col_max))
-
-        # if not ( len(list_row) == 1 and len(list_col) == 1):
-        if len(list_row) + len(list_col) > 2:
-            for row_min_tile, row_max_tile in list_row:
-                for col_min_tile, col_max_tile in list_col:
-                    multi_res_rec(
-                        tile_pc,
-                        list_fun,
-                        x_grid,
-                        y_grid,
-                        list_z_grid,
-                        row_min_tile,
-                        row_max_tile,
-                        col_min_tile,
-                        col_max_tile,
-                        min_number_matches,
-                        overlap,
-                    )
+    # Assemble raw tiles in fill window
+    list_z_grid = []
+    for key in [
+        dem_gen_cst.DEM_MEDIAN,
+        dem_gen_cst.DEM_MIN,
+        dem_gen_cst.DEM_MAX,
+    ]:
+        z_grid = np.full(
+            (
+                fill_window[1] - fill_window[0],
+                fill_window[3] - fill_window[2],
+            ),
+            np.nan,
+        )
+        for raw_tile in raw_tiles:
+            sub_tile = raw_tile[key].sel(
+                row=slice(fill_window[0], fill_window[1] - 1),
+                col=slice(fill_window[2], fill_window[3] - 1),
+            )
+            first_row = sub_tile["row"].values[0] - fill_window[0]
+            first_col = sub_tile["col"].values[0] - fill_window[2]
+            z_grid[
+                first_row : first_row + sub_tile.shape[0],
+                first_col : first_col + sub_tile.shape[1],
+            ] = sub_tile.values
+        list_z_grid.append(z_grid)
+
+    # Generate dense dataset with z = 0
+    x_grid, y_grid = np.meshgrid(x_range, y_range)
+    alti_zeros_dataset = xr.Dataset(
+        {
+            cst.X: (["row", "col"], x_grid),
+            cst.Y: (["row", "col"], y_grid),
+            cst.Z: (["row", "col"], np.zeros(x_grid.shape)),
+        },
+        coords={
+            "row": np.arange(x_grid.shape[0]),
+            "col": np.arange(x_grid.shape[1]),
+        },
+    )
+    alti_zeros_dataset.attrs[cst.EPSG] = epsg
+    # Transform to lon lat
+    projection.point_cloud_conversion_dataset(alti_zeros_dataset, 4326)
+
+    geoid_offset = triangulation_tools.geoid_offset(
+        alti_zeros_dataset, geoid_path
+    )
+
+    # fillnodata, and crop to tile
+    valid = np.isfinite(list_z_grid[0])
+    tile_rows = slice(
+        tile_window[0] - fill_window[0], tile_window[1] - fill_window[0]
+    )
+    tile_cols = slice(
+        tile_window[2] - fill_window[2], tile_window[3] - fill_window[2]
+    )
+    for idx in range(3):
+        list_z_grid[idx] = rasterio.fill.fillnodata(
+            list_z_grid[idx],
+            mask=valid,
+            max_search_distance=fillnodata_max_search_distance,
+        )[tile_rows, tile_cols]
+        list_z_grid[idx] += geoid_offset[cst.Z].values
+        list_z_grid[idx] = np.nan_to_num(list_z_grid[idx])
+
+    dem_median = list_z_grid[0]
+    dem_min = list_z_grid[1]
+    dem_max = list_z_grid[2]
+
+    if np.any((dem_max - dem_min) < 0):
+        logging.error("dem min > dem max")
+        raise RuntimeError("dem min > dem max")
+
+    # apply height margin
+    dem_min -= min_height_margin
+    dem_max += max_height_margin
+
+    # Convert to int
+    dem_median = dem_median.astype(int)
+    dem_min = np.floor(dem_min).astype(int)
+    dem_max = np.ceil(dem_max).astype(int)
+
+    dem_min = np.where(
+        dem_median - dem_min < min_dem,
+        dem_median + min_dem,
+        dem_min,
+    )
+    dem_max = np.where(
+        dem_max - dem_median > max_dem,
+        dem_median + max_dem,
+        dem_max,
+    )
+
+    # Generate dataset, with rows from top to bottom
+    dem_tile = xr.Dataset(
+        data_vars={
+            dem_gen_cst.DEM_MEDIAN: (
+                ["row", "col"],
+                np.flip(dem_median, axis=0),
+            ),
+            dem_gen_cst.DEM_MIN: (["row", "col"], np.flip(dem_min, axis=0)),
+            dem_gen_cst.DEM_MAX: (["row", "col"], np.flip(dem_max, axis=0)),
+        },
+        coords={
+            "row": np.arange(window["row_min"], window["row_max"]),
+            "col": np.arange(window["col_min"], window["col_max"]),
+        },
+    )
+
+    cars_dataset.fill_dataset(
+        dem_tile,
+        saving_info=saving_info,
+        window=window,
+        profile=profile,
+        attributes=None,
+        overlaps=None,
+    )
+
+    return dem_tile
@@ -35,7 +35,7 @@ import math
 import matplotlib.pyplot as plt
 import numpy as np
 import xarray as xr
-from numba import njit
+from numba import njit, prange
 from rasterio.fill import fillnodata
 from scipy.linalg import lstsq
 from scipy.ndimage import (
@@ -46,8 +46,10 @@ from scipy.ndimage import (
     measurements,
     median_filter,
 )
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from scipy.spatial.distance import cdist
-from shapely import affinity
+from shapely import STRtree, affinity, union_all
 from skimage.segmentation import find_boundaries
 
 # Cars import
@@ -129,7 +131,11 @@ def fill_central_area_using_plane(  # noqa: C901
 
         # Create Polygon of current mask
         mask_polys = hole_detection_tools.get_roi_coverage_as_poly_with_margins(
-            roi_msk, row_offset=row_min, col_offset=col_min, margin=0
+            roi_msk,
+            row_offset=row_min,
+            col_offset=col_min,
+            margin=0,
+            exact_polygons=True,
         )
         # Clean mask polygons, remove artefacts
         cleaned_mask_poly = []
@@ -480,7 +486,7 @@ def make_raster_interpolation(
     return interpol_raster
 
 
-@njit()
+@njit(parallel=True, cache=True)
 def fill_disp_pandora(
     disp: np.ndarray, msk_fill_disp: np.ndarray, nb_directions: int
 ):
@@ -512,7 +518,6 @@ def fill_disp_pandora(
     # Output disparity map and validity mask
     out_disp = np.copy(disp)
     out_msk = np.copy(msk_fill_disp)
-    ncol, nrow = disp.shape
     if nb_directions == 8:
         # 8 directions : [row, col]
         dirs = np.array(
@@ -549,20 +554,20 @@ def fill_disp_pandora(
                 [0.5, 1.0],
             ]
         )
-    for col in range(ncol):
-        for row in range(nrow):
-            if msk_fill_disp[col, row]:
-                valid_neighbors = find_valid_neighbors(
-                    dirs, disp, msk_fill_disp, row, col, nb_directions
-                )
-                # Median of the 8/16 pixels
-                out_disp[col, row] = np.nanmedian(valid_neighbors)
-                # Update the validity mask : Information : filled disp
-                out_msk[col, row] = False
+    pix_cols, pix_rows, valid_neighbors = find_all_valid_neighbors(
+        dirs, disp, msk_fill_disp, nb_directions
+    )
+    for pix in prange(len(pix_cols)):  # pylint: disable=not-an-iterable
+        # Median of the 8/16 pixels
+        out_disp[pix_cols[pix], pix_rows[pix]] = np.nanmedian(
+            valid_neighbors[pix]
+        )
+        # Update the validity mask : Information : filled disp
+        out_msk[pix_cols[pix], pix_rows[pix]] = False
     return out_disp, out_msk
 
 
-@njit()
+@njit(cache=True)
 def find_valid_neighbors(
     dirs: np.ndarray,
     disp: np.ndarray,
@@ -621,6 +626,68 @@ def find_valid_neighbors(
     return valid_neighbors
 
 
+@njit(parallel=True, cache=True)
+def find_all_valid_neighbors(
+    dirs: np.ndarray,
+    disp: np.ndarray,
+    valid: np.ndarray,
+    nb_directions: int,
+):
+    """
+    Find valid neighbors along directions, for all pixels to fill
+
+    Same search as find_valid_neighbors, in parallel over pixels
+
+    :param dirs: directions
+    :type dirs: 2D np.array (row, col)
+    :param disp: disparity map
+    :type disp: 2D np.array (row, col)
+    :param valid: validity mask, True on pixels to fill
+    :type valid: 2D np.array (row, col)
+    :param nb_directions: nb directions to explore
+    :type nb_directions: int
+
+    :return: first and second indexes of pixels to fill, and their
+        valid neighbors
+    :rtype: tuple(1D np.array, 1D np.array, 2D np.array (pixel, direction))
+    """
+    ncol, nrow = disp.shape
+    # Maximum path length
+    max_path_length = max(nrow, ncol)
+
+    # Path offsets, for each direction
+    offsets = np.zeros((nb_directions, max_path_length, 2), dtype=np.int64)
+    for direction in range(nb_directions):
+        for i in range(1, max_path_length):
+            offsets[direction, i, 0] = int(dirs[direction][0] * i)
+            offsets[direction, i, 1] = int(dirs[direction][1] * i)
+
+    pix_cols, pix_rows = np.nonzero(valid)
+    valid_neighbors = np.zeros((len(pix_cols), nb_directions), dtype=np.float32)
+    for pix in prange(len(pix_cols)):  # pylint: disable=not-an-iterable
+        for direction in range(nb_directions):
+            # Find the first valid pixel in the current path
+            for i in range(1, max_path_length):
+                tmp_row = pix_rows[pix] + offsets[direction, i, 0]
+                tmp_col = pix_cols[pix] + offsets[direction, i, 1]
+                # Edge of the image reached:
+                # there is no valid pixel in the current path
+                if (
+                    (tmp_col < 0)
+                    | (tmp_col >= ncol)
+                    | (tmp_row < 0)
+                    | (tmp_row >= nrow)
+                ):
+                    valid_neighbors[pix, direction] = np.nan
+                    break
+                # First valid pixel
+                if not valid[tmp_col, tmp_row] and disp[tmp_col, tmp_row] != 0:
+                    valid_neighbors[pix, direction] = disp[tmp_col, tmp_row]
+                    break
+
+    return pix_cols, pix_rows, valid_neighbors
+
+
 def estimate_poly_with_disp(poly, dmin=0, dmax=0):
     """
     Estimate new polygone using disparity range
@@ -648,7 +715,7 @@ def estimate_poly_with_disp(poly, dmin=0, dmax=0):
     return poly
 
 
-def get_corresponding_holes(tile_poly, holes_poly_list):
+def get_corresponding_holes(tile_poly, holes_poly_list, holes_tree=None):
     """
     Get list of holes situated in tile
 
@@ -656,6 +723,8 @@ def get_corresponding_holes(tile_poly, holes_poly_list):
     :type tile_poly: Polygon
     :param holes_poly_list: envelop of holes
     :type holes_poly_list: list(Polygon)
+    :param holes_tree: spatial index of holes_poly_list, built if None
+    :type holes_tree: STRtree
 
 
     :return: list of holes envelops
@@ -663,40 +732,45 @@ def get_corresponding_holes(tile_poly, holes_poly_list):
 
     """
 
-    corresponding_holes = []
-    for poly in holes_poly_list:
-        if tile_poly.intersects(poly):
-            corresponding_holes.append(poly)
+    if holes_tree is None:
+        holes_tree = STRtree(holes_poly_list)
 
-    return corresponding_holes
+    holes_indexes = np.sort(holes_tree.query(tile_poly, predicate="intersects"))
 
+    return [holes_poly_list[index] for index in holes_indexes]
 
-def get_corresponding_tiles(tiles_polygones, corresponding_holes, epi_disp_map):
+
+def get_corresponding_tiles(
+    tiles_polygones, corresponding_holes, epi_disp_map, tiles_tree=None
+):
     """
     Get list of tiles intersecting with holes
 
     :param tiles_polygones: envelop of tiles
-    :type tiles_polygones: list(Polygon)
+    :type tiles_polygones: dict((row, col): Polygon)
     :param corresponding_holes: envelop of holes
     :type corresponding_holes: list(Polygon)
     :param epi_disp_map: disparity map cars dataset
     :type epi_disp_map: CarsDataset
+    :param tiles_tree: spatial index of tiles_polygones values, built if None
+    :type tiles_tree: STRtree
 
 
     :return: list of tiles to use (window, overlap, xr.Dataset)
     :rtype: list(tuple)
 
     """
-    corresponding_tiles_row_col = []
-    corresponding_tiles = []
+    if tiles_tree is None:
+        tiles_tree = STRtree(list(tiles_polygones.values()))
 
-    for key_tile, poly_tile in tiles_polygones.items():
-        for poly_hole in corresponding_holes:
-            if poly_tile.intersects(poly_hole):
-                if key_tile not in corresponding_tiles_row_col:
-                    corresponding_tiles_row_col.append(key_tile)
+    tiles_keys = list(tiles_polygones.keys())
+    _, tiles_indexes = tiles_tree.query(
+        np.array(corresponding_holes, dtype=object), predicate="intersects"
+    )
 
-    for row, col in corresponding_tiles_row_col:
+    corresponding_tiles = []
+    for tile_index in np.unique(tiles_indexes):
+        row, col = tiles_keys[tile_index]
         corresponding_tiles.append(
             (
                 epi_disp_map.tiling_grid[row, col],
@@ -737,6 +811,9 @@ def merge_intersecting_polygones(list_poly):
     """
     Merge polygons that intersects each other
 
+    Polygons are merged by connected components of the intersection graph,
+    queried with a spatial index.
+
     :param list_poly: list of holes
     :type list_poly: list(Polygon)
 
@@ -745,31 +822,32 @@ def merge_intersecting_polygones(list_poly):
     :rtype: list(Polygon)
     """
 
-    new_list_poly = list_poly
-
-    merged_list = []
+    if len(list_poly) == 0:
+        return []
 
-    while len(new_list_poly) > 0:
-        current_poly = new_list_poly[0]
-
-        new_poly = current_poly
-        to_delete = [0]
-
-        for element_id in range(1, len(new_list_poly)):
-            if new_poly.intersects(new_list_poly[element_id]):
-                # Delete from list
-                to_delete.append(element_id)
-                # Merge with current
-                new_poly = new_poly.union(new_list_poly[element_id])
+    # intersection graph
+    first_poly, second_poly = STRtree(list_poly).query(
+        list_poly, predicate="intersects"
+    )
+    nb_poly = len(list_poly)
+    _, labels = connected_components(
+        coo_matrix(
+            (np.ones(len(first_poly), dtype=bool), (first_poly, second_poly)),
+            shape=(nb_poly, nb_poly),
+        ),
+        directed=False,
+    )
 
-        # Add new poly to merged list
-        merged_list.append(new_poly)
+    # components are labeled in order of their first polygon
+    order = np.argsort(labels, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
 
-        # Delete element
-        for _ in range(len(to_delete)):
-            # Start with last ones
-            pos = to_delete.pop()
-            new_list_poly.pop(pos)
+    merged_list = []
+    for group in groups:
+        if len(group) == 1:
+            merged_list.append(list_poly[group[0]])
+        else:
+            merged_list.append(union_all([list_poly[index] for index in group]))
 
     return merged_list
 
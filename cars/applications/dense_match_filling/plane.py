@@ -30,6 +30,7 @@ import logging
 
 # Third party imports
 from json_checker import Checker, Or
+from shapely import STRtree
 from shapely.geometry import Polygon
 
 # CARS imports
@@ -42,6 +43,7 @@ from cars.applications.dense_match_filling.dense_match_filling import (
 )
 from cars.core import constants as cst
 from cars.data_structures import cars_dataset, corresponding_tiles_tools
+from cars.orchestrator.cluster.task_threads import get_available_cpus
 
 
 class PlaneFill(
@@ -305,6 +307,10 @@ class PlaneFill(
                             ]
                         )
 
+                # Spatial indexes of holes and tiles
+                holes_tree = STRtree(merged_poly_list)
+                tiles_tree = STRtree(list(tiles_polygones.values()))
+
                 # Generate disparity maps
                 for col in range(epipolar_disparity_map.shape[1]):
                     for row in range(epipolar_disparity_map.shape[0]):
@@ -313,7 +319,9 @@ class PlaneFill(
                             # Get intersecting holes poly
                             corresponding_holes = (
                                 fd_tools.get_corresponding_holes(
-                                    tile_poly, merged_poly_list
+                                    tile_poly,
+                                    merged_poly_list,
+                                    holes_tree=holes_tree,
                                 )
                             )
 
@@ -324,6 +332,7 @@ class PlaneFill(
                                     tiles_polygones,
                                     corresponding_holes,
                                     epipolar_disparity_map,
+                                    tiles_tree=tiles_tree,
                                 )
                             )
 
@@ -358,7 +367,9 @@ class PlaneFill(
                                 (
                                     new_epipolar_disparity_map[row, col]
                                 ) = self.orchestrator.cluster.create_task(
-                                    fill_disparity_plane_wrapper
+                                    fill_disparity_plane_wrapper,
+                                    # interpolation is a numba parallel loop
+                                    nb_threads=get_available_cpus(),
                                 )(
                                     corresponding_tiles,
                                     corresponding_holes,
@@ -21,6 +21,7 @@
 """
 this module contains the dense_matching application class.
 """
+
 # pylint: disable=too-many-lines
 import collections
 
@@ -58,9 +59,12 @@ from cars.core import constants_disparity as cst_disp
 from cars.core import inputs, projection
 from cars.core.projection import point_cloud_conversion
 from cars.core.utils import safe_makedirs
-from cars.data_structures import cars_dataset
+from cars.data_structures import cars_dataset, corresponding_tiles_tools
 from cars.orchestrator.cluster.log_wrapper import cars_profile
 
+# Tiles are not subdivided in sub tiles smaller than this size (pixels)
+MIN_SUBDIVIDED_TILE_SIZE = 50
+
 
 class CensusMccnnSgm(
     DenseMatching, short_name=["census_sgm", "mccnn_sgm"]
@@ -109,6 +113,8 @@ class CensusMccnnSgm(
             "disp_range_propagation_filter_size"
         ]
         self.use_cross_validation = self.used_config["use_cross_validation"]
+        # Subdivision of tiles exceeding memory
+        self.tile_subdivision = self.used_config["tile_subdivision"]
         # Saving files
         self.save_intermediate_data = self.used_config["save_intermediate_data"]
 
@@ -186,6 +192,11 @@ class CensusMccnnSgm(
             "disp_range_propagation_filter_size", 300
         )
 
+        # Subdivision of tiles exceeding memory
+        overloaded_conf["tile_subdivision"] = conf.get(
+            "tile_subdivision", False
+        )
+
         # Saving files
         overloaded_conf["save_intermediate_data"] = conf.get(
             "save_intermediate_data", False
@@ -249,6 +260,7 @@ class CensusMccnnSgm(
             "disp_range_propagation_filter_size": And(
                 Or(int, float), lambda x: x >= 0
             ),
+            "tile_subdivision": bool,
             "loader_conf": Or(dict, collections.OrderedDict, str, None),
             "loader": str,
         }
@@ -1216,6 +1228,18 @@ class CensusMccnnSgm(
                 disp_range_grid
             )
 
+            # Tiles exceeding memory of workers are subdivided, tiles
+            # timed out or lost with their worker are retried subdivided
+            max_ram_per_worker = None
+            retry_kwargs = None
+            if self.tile_subdivision:
+                max_ram_per_worker = (
+                    self.orchestrator.cluster.checked_conf_cluster[
+                        "max_ram_per_worker"
+                    ]
+                )
+                retry_kwargs = {"force_subdivision": True}
+
             # Generate disparity maps
             for col in range(epipolar_disparity_map.shape[1]):
                 for row in range(epipolar_disparity_map.shape[0]):
@@ -1254,7 +1278,8 @@ class CensusMccnnSgm(
                         (
                             epipolar_disparity_map[row, col]
                         ) = self.orchestrator.cluster.create_task(
-                            compute_disparity_wrapper
+                            compute_disparity_wrapper,
+                            retry_kwargs=retry_kwargs,
                         )(
                             epipolar_images_left[row, col],
                             epipolar_images_right[row, col],
@@ -1270,6 +1295,7 @@ class CensusMccnnSgm(
                             ),
                             disp_to_alt_ratio=disp_to_alt_ratio,
                             crop_with_range=crop_with_range,
+                            max_ram_per_worker=max_ram_per_worker,
                         )
 
         else:
@@ -1291,6 +1317,8 @@ def compute_disparity_wrapper(
     perf_ambiguity_threshold=0.6,
     disp_to_alt_ratio=None,
     crop_with_range=None,
+    max_ram_per_worker=None,
+    force_subdivision=False,
 ) -> Dict[str, Tuple[xr.Dataset, xr.Dataset]]:
     """
     Compute disparity maps from image objects.
@@ -1328,6 +1356,12 @@ def compute_disparity_wrapper(
     :type disp_to_alt_ratio: float
     :param crop_with_range: range length to crop disparity range with
     :type crop_with_range: float
+    :param max_ram_per_worker: if given, tiles exceeding this memory (MiB)
+        are subdivided
+    :type max_ram_per_worker: int
+    :param force_subdivision: compute tile as 2x2 sub tiles, as done
+        when its task is retried
+    :type force_subdivision: bool
     :return: Left to right disparity dataset
         Returned dataset is composed of :
 
@@ -1335,6 +1369,267 @@ def compute_disparity_wrapper(
         - cst_disp.VALID
         - cst.EPI_COLOR
 
+    """
+    disp_dataset = compute_disparity_tile(
+        left_image_object,
+        right_image_object,
+        corr_cfg,
+        disp_range_grid,
+        compute_disparity_masks=compute_disparity_masks,
+        generate_performance_map=generate_performance_map,
+        perf_ambiguity_threshold=perf_ambiguity_threshold,
+        disp_to_alt_ratio=disp_to_alt_ratio,
+        crop_with_range=crop_with_range,
+        max_ram_per_worker=max_ram_per_worker,
+        force_subdivision=force_subdivision,
+    )
+
+    # Fill with attributes
+    cars_dataset.fill_dataset(
+        disp_dataset,
+        saving_info=saving_info,
+        window=cars_dataset.get_window_dataset(left_image_object),
+        profile=cars_dataset.get_profile_rasterio(left_image_object),
+        attributes=None,
+        overlaps=None,  # overlaps are removed
+    )
+
+    return disp_dataset
+
+
+def compute_disparity_tile(
+    left_image_object: xr.Dataset,
+    right_image_object: xr.Dataset,
+    corr_cfg: dict,
+    disp_range_grid,
+    compute_disparity_masks=False,
+    generate_performance_map=False,
+    perf_ambiguity_threshold=0.6,
+    disp_to_alt_ratio=None,
+    crop_with_range=None,
+    max_ram_per_worker=None,
+    force_subdivision=False,
+) -> xr.Dataset:
+    """
+    Compute disparity map of tile.
+    If max_ram_per_worker is given, a tile with an estimated memory
+    exceeding it, or raising a MemoryError, is computed as 2x2 sub tiles.
+    Tiles timed out or lost with their worker are retried by the
+    orchestrator with force_subdivision
+
+    :param left_image_object: tiled Left image
+    :type left_image_object: xr.Dataset
+    :param right_image_object: tiled Right image
+    :type right_image_object: xr.Dataset
+    :param corr_cfg: Correlator configuration
+    :type corr_cfg: dict
+    :param disp_range_grid: minimum and maximum disparity grid
+    :type disp_range_grid: np.ndarray
+    :param compute_disparity_masks: Compute all the disparity \
+                        pandora masks(disable by default)
+    :type compute_disparity_masks: bool
+    :param generate_performance_map: True if generate performance map
+    :type generate_performance_map: bool
+    :param perf_ambiguity_threshold: ambiguity threshold used for
+         performance map
+    :type perf_ambiguity_threshold: float
+    :param disp_to_alt_ratio: disp to alti ratio used for performance map
+    :type disp_to_alt_ratio: float
+    :param crop_with_range: range length to crop disparity range with
+    :type crop_with_range: float
+    :param max_ram_per_worker: if given, tiles exceeding this memory (MiB)
+        are subdivided
+    :type max_ram_per_worker: int
+    :param force_subdivision: compute tile as 2x2 sub tiles
+    :type force_subdivision: bool
+    :return: Left to right disparity dataset
+    """
+    roi = left_image_object.attrs[cst.ROI]
+    subdivisible = (
+        min(roi[2] - roi[0], roi[3] - roi[1]) >= 2 * MIN_SUBDIVIDED_TILE_SIZE
+    )
+    subdivision = max_ram_per_worker is not None and subdivisible
+
+    if force_subdivision and subdivisible:
+        logging.info("Tile {} is subdivided on retry".format(list(roi)))
+        return compute_subdivided_disparity(
+            left_image_object,
+            right_image_object,
+            corr_cfg,
+            disp_range_grid,
+            compute_disparity_masks=compute_disparity_masks,
+            generate_performance_map=generate_performance_map,
+            perf_ambiguity_threshold=perf_ambiguity_threshold,
+            disp_to_alt_ratio=disp_to_alt_ratio,
+            crop_with_range=crop_with_range,
+            max_ram_per_worker=max_ram_per_worker,
+        )
+
+    if subdivision:
+        tile_memory = dm_tools.tile_memory_pandora_plugin_libsgm(
+            left_image_object.sizes[cst.ROW],
+            left_image_object.sizes[cst.COL],
+            left_image_object.attrs[cst.EPI_DISP_MIN],
+            left_image_object.attrs[cst.EPI_DISP_MAX],
+        )
+        if tile_memory > max_ram_per_worker:
+            logging.info(
+                "Tile {} is subdivided: estimated memory {:.0f} MiB "
+                "exceeds {} MiB".format(
+                    list(roi), tile_memory, max_ram_per_worker
+                )
+            )
+            return compute_subdivided_disparity(
+                left_image_object,
+                right_image_object,
+                corr_cfg,
+                disp_range_grid,
+                compute_disparity_masks=compute_disparity_masks,
+                generate_performance_map=generate_performance_map,
+                perf_ambiguity_threshold=perf_ambiguity_threshold,
+                disp_to_alt_ratio=disp_to_alt_ratio,
+                crop_with_range=crop_with_range,
+                max_ram_per_worker=max_ram_per_worker,
+            )
+
+    try:
+        disp_dataset = compute_disparity_single_tile(
+            left_image_object,
+            right_image_object,
+            corr_cfg,
+            disp_range_grid,
+            compute_disparity_masks=compute_disparity_masks,
+            generate_performance_map=generate_performance_map,
+            perf_ambiguity_threshold=perf_ambiguity_threshold,
+            disp_to_alt_ratio=disp_to_alt_ratio,
+            crop_with_range=crop_with_range,
+        )
+    except MemoryError:
+        if not subdivision:
+            raise
+        logging.warning(
+            "Tile {} ran out of memory, it is subdivided".format(list(roi))
+        )
+        disp_dataset = compute_subdivided_disparity(
+            left_image_object,
+            right_image_object,
+            corr_cfg,
+            disp_range_grid,
+            compute_disparity_masks=compute_disparity_masks,
+            generate_performance_map=generate_performance_map,
+            perf_ambiguity_threshold=perf_ambiguity_threshold,
+            disp_to_alt_ratio=disp_to_alt_ratio,
+            crop_with_range=crop_with_range,
+            max_ram_per_worker=max_ram_per_worker,
+        )
+
+    return disp_dataset
+
+
+def compute_subdivided_disparity(
+    left_image_object: xr.Dataset,
+    right_image_object: xr.Dataset,
+    corr_cfg: dict,
+    disp_range_grid,
+    max_ram_per_worker=None,
+    **kwargs,
+) -> xr.Dataset:
+    """
+    Compute disparity map of tile as 2x2 sub tiles, with the margins
+    needed by the dense matching steps, and stitch them back
+
+    :param left_image_object: tiled Left image
+    :type left_image_object: xr.Dataset
+    :param right_image_object: tiled Right image
+    :type right_image_object: xr.Dataset
+    :param corr_cfg: Correlator configuration
+    :type corr_cfg: dict
+    :param disp_range_grid: minimum and maximum disparity grid
+    :type disp_range_grid: np.ndarray
+    :param max_ram_per_worker: if given, sub tiles exceeding this memory
+        (MiB) are subdivided again
+    :type max_ram_per_worker: int
+    :param kwargs: other arguments of compute_disparity_tile
+    :return: Left to right disparity dataset
+    """
+    margins = dm_tools.get_margins(
+        left_image_object.attrs[cst.EPI_DISP_MIN],
+        left_image_object.attrs[cst.EPI_DISP_MAX],
+        corr_cfg,
+    )
+    left_margins = list(margins["left_margin"].data)
+    right_margins = list(margins["right_margin"].data)
+
+    roi = left_image_object.attrs[cst.ROI]
+    window = [roi[1], roi[3], roi[0], roi[2]]
+    no_overlap = [0, 0, 0, 0]
+
+    sub_tiles = []
+    for sub_window in corresponding_tiles_tools.split_window(window):
+        sub_roi = [sub_window[2], sub_window[0], sub_window[3], sub_window[1]]
+        sub_disp_dataset = compute_disparity_tile(
+            dm_tools.crop_epipolar_tile(
+                left_image_object, sub_roi, left_margins
+            ),
+            dm_tools.crop_epipolar_tile(
+                right_image_object, sub_roi, right_margins
+            ),
+            corr_cfg,
+            disp_range_grid,
+            max_ram_per_worker=max_ram_per_worker,
+            **kwargs,
+        )
+        sub_tiles.append((sub_window, no_overlap, sub_disp_dataset))
+
+    disp_dataset, _, _ = corresponding_tiles_tools.reconstruct_data(
+        sub_tiles, sub_tiles[0][0], no_overlap
+    )
+
+    # Restore attributes lost in reconstruction
+    first_sub_dataset = sub_tiles[0][2]
+    for tag, sub_data_array in first_sub_dataset.items():
+        disp_dataset[tag].attrs = sub_data_array.attrs
+    disp_dataset.attrs = first_sub_dataset.attrs.copy()
+    disp_dataset.attrs[cst.ROI] = roi
+
+    return disp_dataset
+
+
+def compute_disparity_single_tile(
+    left_image_object: xr.Dataset,
+    right_image_object: xr.Dataset,
+    corr_cfg: dict,
+    disp_range_grid,
+    compute_disparity_masks=False,
+    generate_performance_map=False,
+    perf_ambiguity_threshold=0.6,
+    disp_to_alt_ratio=None,
+    crop_with_range=None,
+) -> xr.Dataset:
+    """
+    Compute disparity map of tile, in one pandora run
+
+    :param left_image_object: tiled Left image
+    :type left_image_object: xr.Dataset
+    :param right_image_object: tiled Right image
+    :type right_image_object: xr.Dataset
+    :param corr_cfg: Correlator configuration
+    :type corr_cfg: dict
+    :param disp_range_grid: minimum and maximum disparity grid
+    :type disp_range_grid: np.ndarray
+    :param compute_disparity_masks: Compute all the disparity \
+                        pandora masks(disable by default)
+    :type compute_disparity_masks: bool
+    :param generate_performance_map: True if generate performance map
+    :type generate_performance_map: bool
+    :param perf_ambiguity_threshold: ambiguity threshold used for
+         performance map
+    :type perf_ambiguity_threshold: float
+    :param disp_to_alt_ratio: disp to alti ratio used for performance map
+    :type disp_to_alt_ratio: float
+    :param crop_with_range: range length to crop disparity range with
+    :type crop_with_range: float
+    :return: Left to right disparity dataset
     """
     # Generate disparity grids
     (
@@ -1391,14 +1686,4 @@ def compute_disparity_wrapper(
         cropped_range=mask_crop,
     )
 
-    # Fill with attributes
-    cars_dataset.fill_dataset(
-        disp_dataset,
-        saving_info=saving_info,
-        window=cars_dataset.get_window_dataset(left_image_object),
-        profile=cars_dataset.get_profile_rasterio(left_image_object),
-        attributes=None,
-        overlaps=None,  # overlaps are removed
-    )
-
     return disp_dataset
@@ -21,6 +21,7 @@
 This module is responsible for the dense matching algorithms:
 - thus it creates a disparity map from a pair of images
 """
+
 # pylint: disable=too-many-lines
 
 # Standard imports
@@ -53,6 +54,10 @@ from cars.applications.dense_matching import (
 from cars.conf import mask_cst as msk_cst
 from cars.core import constants as cst
 from cars.core import constants_disparity as cst_disp
+from cars.core import tiling
+
+# Memory used by imports, in MiB (pandora_plugin_libsgm)
+IMPORT_MEMORY_PANDORA_PLUGIN_LIBSGM = 200
 
 
 def get_margins(disp_min, disp_max, corr_cfg):
@@ -70,6 +75,45 @@ def get_margins(disp_min, disp_max, corr_cfg):
     return pandora.marge.get_margins(disp_min, disp_max, corr_cfg["pipeline"])
 
 
+def crop_epipolar_tile(image_object, roi, margins):
+    """
+    Crop tiled epipolar image to a sub roi, with the margins
+    needed by the dense matching steps, within the margins of the tile
+
+    :param image_object: tiled epipolar image
+    :type image_object: xr.Dataset
+    :param roi: sub roi [xmin, ymin, xmax, ymax], in the roi of tile
+    :type roi: list
+    :param margins: margins needed [left, up, right, down]
+    :type margins: list
+
+    :return: cropped epipolar image
+    :rtype: xr.Dataset
+    """
+    region = list(image_object.attrs[cst.ROI_WITH_MARGINS])
+    sub_region = tiling.crop(tiling.pad(list(roi), margins), region)
+
+    sub_image_object = image_object.isel(
+        {
+            cst.ROW: slice(
+                sub_region[1] - region[1], sub_region[3] - region[1]
+            ),
+            cst.COL: slice(
+                sub_region[0] - region[0], sub_region[2] - region[0]
+            ),
+        }
+    )
+
+    sub_image_object.attrs = image_object.attrs.copy()
+    sub_image_object.attrs[cst.ROI] = np.array(roi)
+    sub_image_object.attrs[cst.ROI_WITH_MARGINS] = np.array(sub_region)
+    sub_image_object.attrs[cst.EPI_MARGINS] = np.array(sub_region) - np.array(
+        roi
+    )
+
+    return sub_image_object
+
+
 def get_masks_from_pandora(
     disp: xr.Dataset, compute_disparity_masks: bool
 ) -> Dict[str, np.ndarray]:
@@ -446,7 +490,7 @@ def add_crop_info(disp_ds, cropped_range):
     return disp_ds
 
 
-@njit
+@njit(cache=True)
 def estimate_right_classif_on_left(
     right_classif, disp_map, disp_mask, disp_min, disp_max
 ):
@@ -505,7 +549,7 @@ def estimate_right_classif_on_left(
     return left_from_right_classif
 
 
-@njit
+@njit(cache=True)
 def mask_left_classif_from_right_mask(
     left_classif, right_mask, disp_min, disp_max
 ):
@@ -911,7 +955,7 @@ def compute_disparity(
     return disp_dataset
 
 
-@njit()
+@njit(cache=True)
 def estimate_right_grid_disp(disp_min_grid, disp_max_grid):
     """
     Estimate right grid min and max.
@@ -960,6 +1004,46 @@ def estimate_right_grid_disp(disp_min_grid, disp_max_grid):
     return disp_min_right_grid, disp_max_right_grid
 
 
+def pixel_memory_pandora_plugin_libsgm(disp: int) -> int:
+    """
+    Compute estimated memory usage of one pixel (pandora_plugin_libsgm)
+
+    :param disp: Size of disparity range to explore
+    :returns: memory usage of one pixel, in bits
+    """
+    image = 32 * 2
+    disp_ref = 32
+    validity_mask_ref = 16
+    confidence = 32
+    cv_ = disp * 32
+    nan_ = disp * 8
+    cv_uint = disp * 8
+    penal = 8 * 32 * 2
+    img_crop = 32 * 2
+
+    tot = image + disp_ref + validity_mask_ref
+    tot += confidence + 2 * cv_ + nan_ + cv_uint + penal + img_crop
+
+    return tot
+
+
+def tile_memory_pandora_plugin_libsgm(
+    nb_rows: int, nb_cols: int, disp_min: int, disp_max: int
+) -> float:
+    """
+    Compute estimated memory usage of a tile (pandora_plugin_libsgm)
+
+    :param nb_rows: Number of rows of tile, margins included
+    :param nb_cols: Number of columns of tile, margins included
+    :param disp_min: Minimum disparity to explore
+    :param disp_max: Maximum disparity to explore
+    :returns: memory usage of tile, in MiB
+    """
+    tot = pixel_memory_pandora_plugin_libsgm(disp_max - disp_min)
+
+    return IMPORT_MEMORY_PANDORA_PLUGIN_LIBSGM + nb_rows * nb_cols * tot / 2**23
+
+
 def optimal_tile_size_pandora_plugin_libsgm(
     disp_min: int,
     disp_max: int,
@@ -989,19 +1073,8 @@ def optimal_tile_size_pandora_plugin_libsgm(
     memory = max_ram_per_worker
     disp = disp_max - disp_min
 
-    image = 32 * 2
-    disp_ref = 32
-    validity_mask_ref = 16
-    confidence = 32
-    cv_ = disp * 32
-    nan_ = disp * 8
-    cv_uint = disp * 8
-    penal = 8 * 32 * 2
-    img_crop = 32 * 2
-
-    tot = image + disp_ref + validity_mask_ref
-    tot += confidence + 2 * cv_ + nan_ + cv_uint + penal + img_crop
-    import_ = 200  # MiB
+    tot = pixel_memory_pandora_plugin_libsgm(disp)
+    import_ = IMPORT_MEMORY_PANDORA_PLUGIN_LIBSGM
 
     row_or_col = float(((memory - import_) * 2**23)) / tot
 
@@ -31,17 +31,20 @@ import numpy as np
 import rasterio as rio
 import yaml
 from bulldozer.pipeline.bulldozer_pipeline import dsm_to_dtm
-from json_checker import Checker
+from json_checker import And, Checker
 from rasterio.enums import Resampling
 from rasterio.windows import Window
 from shapely import Polygon
 from shareloc.dtm_reader import interpolate_geoid_height
 
-from cars.core import projection
+from cars.core import outputs, projection
 
 from . import dsm_filling_tools as dft
 from .dsm_filling import DsmFilling
 
+# step of the coarse grid on which geoid offsets are computed, in pixels
+GRID_STEP = 32
+
 
 class BulldozerFilling(DsmFilling, short_name="bulldozer"):
     """
@@ -61,6 +64,7 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
         self.used_method = self.used_config["method"]
         self.activated = self.used_config["activated"]
         self.save_intermediate_data = self.used_config["save_intermediate_data"]
+        self.tile_size = self.used_config["tile_size"]
 
         # Init orchestrator
         self.orchestrator = None
@@ -80,11 +84,13 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
         overloaded_conf["save_intermediate_data"] = conf.get(
             "save_intermediate_data", False
         )
+        overloaded_conf["tile_size"] = conf.get("tile_size", 2048)
 
         rectification_schema = {
             "method": str,
             "activated": bool,
             "save_intermediate_data": bool,
+            "tile_size": And(int, lambda x: x > 0),
         }
 
         # Check conf
@@ -108,7 +114,7 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
         Run dsm filling using initial elevation and the current dsm
         Replaces dsm.tif by the filled dsm. Adds a new band
         to filling.tif if it exists.
-        The old dsm is saved in dump_dir.
+        The old dsm is saved in dump_dir if save_intermediate_data.
 
         roi_poly can any of these objects :
             - a list of Shapely Polygons
@@ -131,7 +137,9 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
         temp_dsm_path = os.path.join(
             dump_dir, "dsm_filled_with_dem_not_smoothed.tif"
         )
-        final_dsm_path = dsm_path
+        # filled rasters are written next to the outputs, then renamed
+        # over them once complete
+        tmp_dsm_path = get_temporary_path(dsm_path)
 
         # create the config for the bulldozer execution
         bull_conf_path = os.path.join(
@@ -144,9 +152,10 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
         bull_conf["output_dir"] = os.path.join(dump_dir, "bulldozer")
 
         if orchestrator is not None:
-            if (
-                orchestrator.get_conf()["mode"] == "multiprocessing"
-                or orchestrator.get_conf()["mode"] == "local_dask"
+            if orchestrator.get_conf()["mode"] in (
+                "multiprocessing",
+                "local_dask",
+                "threads",
             ):
                 bull_conf["nb_max_workers"] = orchestrator.get_conf()[
                     "nb_workers"
@@ -158,10 +167,8 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
 
         dtm_path = os.path.join(bull_conf["output_dir"], "dtm.tif")
 
-        # get dsm to be filled and its metadata
+        # get dsm metadata
         with rio.open(dsm_path) as in_dsm:
-            dsm = in_dsm.read()
-            dsm_msk = in_dsm.read_masks()
             dsm_tr = in_dsm.transform
             dsm_crs = in_dsm.crs
             dsm_tr_mat = np.array(
@@ -172,34 +179,16 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
                 ]
             )
             dsm_meta = in_dsm.meta
+            dsm_is_cog = is_cog(in_dsm)
 
-        roi_raster = np.ones(dsm[0].shape)
-
-        if isinstance(roi_polys, list):
-            roi_polys_outepsg = []
-            for poly in roi_polys:
-                if isinstance(poly, Polygon):
-                    roi_poly_outepsg = projection.polygon_projection(
-                        poly, roi_epsg, dsm_crs.to_epsg()
-                    )
-                    roi_polys_outepsg.append(roi_poly_outepsg)
-
-            roi_raster = rio.features.rasterize(
-                roi_polys_outepsg, out_shape=roi_raster.shape, transform=dsm_tr
-            )
-        elif isinstance(roi_polys, Polygon):
-            roi_poly_outepsg = projection.polygon_projection(
-                roi_polys, roi_epsg, dsm_crs.to_epsg()
-            )
-            roi_raster = rio.features.rasterize(
-                [roi_poly_outepsg], out_shape=roi_raster.shape, transform=dsm_tr
-            )
-
-        # get the initial elevation
-        with rio.open(initial_elevation.dem) as in_elev:
+        dsm_shape = (dsm_meta["height"], dsm_meta["width"])
+        windows = dft.generate_windows(*dsm_shape, self.tile_size)
 
+        # fill nodata of dsm with initial elevation, window by window
+        with rio.open(dsm_path) as in_dsm, rio.open(
+            initial_elevation.dem
+        ) as in_elev, rio.open(temp_dsm_path, "w", **dsm_meta) as out_dsm:
             elev_tr = in_elev.transform
-            elev_crs = in_elev.crs
             elev_tr_mat = np.array(
                 [
                     [elev_tr[0], elev_tr[1], elev_tr[2]],
@@ -209,11 +198,11 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
             )
             elev_tr_inv_mat = np.linalg.inv(elev_tr_mat)
 
-            # get reading window
+            # get reading window of the whole dsm
             ijs_window = np.array(
                 [
                     [0, 0],
-                    [dsm.shape[1], dsm.shape[2]],
+                    [dsm_shape[0], dsm_shape[1]],
                 ]
             )
             # third: project elev crs to elev pixel coords
@@ -223,55 +212,31 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
                     # first: project dsm pixel coords to dsm crs
                     dft.project(ijs_window[:, [1, 0]], dsm_tr_mat),
                     dsm_crs.to_epsg(),
-                    elev_crs.to_epsg(),
+                    in_elev.crs.to_epsg(),
                 ),
                 elev_tr_inv_mat,
             )[:, [1, 0]]
-
-            # get initial elevation
-            elev = in_elev.read(
-                out_shape=(1,) + dsm.shape[1:],
-                window=Window.from_slices(
-                    (ijs_window_dem[0, 0], ijs_window_dem[1, 0]),
-                    (ijs_window_dem[0, 1], ijs_window_dem[1, 1]),
-                ),
-                resampling=Resampling.bilinear,
-            )
-
-        temp_filled_dsm = dsm.copy()
-        temp_filled_dsm[dsm_msk == 0] = elev[dsm_msk == 0]
-
-        # apply offset to project on geoid if needed
-        if output_geoid is not True:
-            to_fill_ijs = np.argwhere(dsm_msk[0] == 0)
-            to_fill_xys = dft.project(to_fill_ijs[:, [1, 0]], dsm_tr_mat)
-
-            applied_offset = np.zeros(len(to_fill_ijs))  # (n,)
-            pts_to_project_on_geoid = projection.point_cloud_conversion(
-                to_fill_xys, dsm_crs.to_epsg(), 4326
+            elev_window = Window.from_slices(
+                (ijs_window_dem[0, 0], ijs_window_dem[1, 0]),
+                (ijs_window_dem[0, 1], ijs_window_dem[1, 1]),
             )
 
-            if isinstance(output_geoid, bool) and output_geoid is False:
-                # out geoid is ellipsoid: add geoid-ellipsoid distance
-                applied_offset += interpolate_geoid_height(
-                    initial_elevation.geoid, pts_to_project_on_geoid
-                )
-            elif isinstance(output_geoid, str):
-                # out geoid is a new geoid whose path is in output_geoid:
-                # add carsgeoid-ellipsoid distance then add ellipsoid-outgeoid
-                applied_offset += interpolate_geoid_height(
-                    initial_elevation.geoid, pts_to_project_on_geoid
-                )
-                applied_offset -= interpolate_geoid_height(
-                    output_geoid, pts_to_project_on_geoid
-                )
-
-            temp_filled_dsm[
-                0, to_fill_ijs[:, 0], to_fill_ijs[:, 1]
-            ] += applied_offset
-
-        with rio.open(temp_dsm_path, "w", **dsm_meta) as out_dsm:
-            out_dsm.write(temp_filled_dsm)
+            for window in windows:
+                dsm = in_dsm.read(window=window)
+                dsm_msk = in_dsm.read_masks(window=window)
+                if np.any(dsm_msk == 0):
+                    elev = get_filling_elevation(
+                        window,
+                        elev_window,
+                        dsm_shape,
+                        dsm_tr_mat,
+                        dsm_crs.to_epsg(),
+                        in_elev,
+                        initial_elevation.geoid,
+                        output_geoid,
+                    )
+                    dsm = np.where(dsm_msk == 0, elev, dsm).astype(dsm.dtype)
+                out_dsm.write(dsm, window=window)
 
         try:
             try:
@@ -297,34 +262,91 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
                 + " The DSM could not be filled."
             )
         else:
-            with rio.open(dtm_path) as in_dtm:
-                dtm = in_dtm.read()
-
-            with rio.open(old_dsm_path, "w", **dsm_meta) as out_dsm:
-                out_dsm.write(dsm)
-
-            filling_mask = np.logical_and(dsm_msk == 0, roi_raster > 0)
-            dsm[filling_mask] = dtm[filling_mask]
-
-            with rio.open(final_dsm_path, "w", **dsm_meta) as out_dsm:
-                out_dsm.write(dsm)
+            roi_polys_outepsg = None
+            if isinstance(roi_polys, list):
+                roi_polys_outepsg = [
+                    projection.polygon_projection(
+                        poly, roi_epsg, dsm_crs.to_epsg()
+                    )
+                    for poly in roi_polys
+                    if isinstance(poly, Polygon)
+                ]
+            elif isinstance(roi_polys, Polygon):
+                roi_polys_outepsg = [
+                    projection.polygon_projection(
+                        roi_polys, roi_epsg, dsm_crs.to_epsg()
+                    )
+                ]
 
+            tmp_fill_path = None
+            fill_meta = None
+            fill_descriptions = None
+            fill_is_cog = False
             if filling_file_name is not None:
-
+                # previous bands are copied in a new filling file
+                tmp_fill_path = get_temporary_path(filling_file_name)
                 with rio.open(filling_file_name, "r") as src:
                     fill_meta = src.meta
-                    bands = [src.read(i + 1) for i in range(src.count)]
-                    bands_desc = [src.descriptions[i] for i in range(src.count)]
-
-                fill_meta["count"] += 1
-
-                bands.append(filling_mask[0].astype(np.uint8))
-                bands_desc.append("filling_bulldozer")
+                    fill_meta["count"] += 1
+                    fill_descriptions = list(src.descriptions) + [
+                        "filling_bulldozer"
+                    ]
+                    fill_is_cog = is_cog(src)
+
+            with contextlib.ExitStack() as stack:
+                in_dsm = stack.enter_context(rio.open(dsm_path))
+                in_dtm = stack.enter_context(rio.open(dtm_path))
+                out_dsm = stack.enter_context(
+                    outputs.open_georaster_writer(
+                        tmp_dsm_path, dsm_meta, cog=dsm_is_cog
+                    )
+                )
+                if filling_file_name is not None:
+                    in_fill = stack.enter_context(rio.open(filling_file_name))
+                    out_fill = stack.enter_context(
+                        outputs.open_georaster_writer(
+                            tmp_fill_path,
+                            fill_meta,
+                            cog=fill_is_cog,
+                            descriptions=fill_descriptions,
+                        )
+                    )
 
-                with rio.open(filling_file_name, "w", **fill_meta) as out:
-                    for i, band in enumerate(bands):
-                        out.write(band, i + 1)
-                        out.set_band_description(i + 1, bands_desc[i])
+                for window in windows:
+                    dsm = in_dsm.read(window=window)
+                    filling_mask = in_dsm.read_masks(window=window) == 0
+                    if roi_polys_outepsg is not None:
+                        roi_raster = rio.features.rasterize(
+                            roi_polys_outepsg,
+                            out_shape=dsm.shape[1:],
+                            transform=in_dsm.window_transform(window),
+                        )
+                        filling_mask = np.logical_and(
+                            filling_mask, roi_raster > 0
+                        )
+
+                    dsm[filling_mask] = in_dtm.read(window=window)[filling_mask]
+                    out_dsm.write(dsm, window=window)
+
+                    if filling_file_name is not None:
+                        out_fill.write(
+                            in_fill.read(window=window),
+                            indexes=list(range(1, fill_meta["count"])),
+                            window=window,
+                        )
+                        out_fill.write(
+                            filling_mask[0].astype(np.uint8),
+                            indexes=fill_meta["count"],
+                            window=window,
+                        )
+
+            # keep the dsm not filled with intermediate data
+            if self.save_intermediate_data:
+                shutil.copy(dsm_path, old_dsm_path)
+
+            os.replace(tmp_dsm_path, dsm_path)
+            if tmp_fill_path is not None:
+                os.replace(tmp_fill_path, filling_file_name)
 
             # reason for this to be indented: don't remove intermediate
             # files if bulldozer failed twice (for the logs)
@@ -339,3 +361,109 @@ class BulldozerFilling(DsmFilling, short_name="bulldozer"):
                         + f"an error occured: {exception_rmtree}."
                     )
                     logging.info(logging_msg)
+
+
+def get_filling_elevation(
+    window,
+    elev_window,
+    dsm_shape,
+    dsm_tr_mat,
+    dsm_epsg,
+    in_elev,
+    geoid,
+    output_geoid,
+):
+    """
+    Get initial elevation on the pixels of a dsm window, on output geoid.
+
+    Initial elevation is resampled from the part of elev_window
+    corresponding to the dsm window. Geoid offsets are computed on
+    a coarse grid of the window, then bilinearly upsampled to its pixels.
+
+    :param window: dsm window
+    :type window: rasterio.windows.Window
+    :param elev_window: initial elevation window covering the whole dsm
+    :type elev_window: rasterio.windows.Window
+    :param dsm_shape: dsm height and width
+    :param dsm_tr_mat: dsm transform, as a (3, 3) matrix
+    :param dsm_epsg: dsm epsg code
+    :param in_elev: opened initial elevation
+    :type in_elev: rasterio dataset
+    :param geoid: geoid of initial elevation
+    :param output_geoid: output geoid: True for initial geoid, False for
+        ellipsoid, or path of another geoid
+    :return: elevation, of shape (1, window.height, window.width)
+    """
+
+    # get initial elevation
+    row_scale = elev_window.height / dsm_shape[0]
+    col_scale = elev_window.width / dsm_shape[1]
+    elev = in_elev.read(
+        out_shape=(1, window.height, window.width),
+        window=Window(
+            elev_window.col_off + window.col_off * col_scale,
+            elev_window.row_off + window.row_off * row_scale,
+            window.width * col_scale,
+            window.height * row_scale,
+        ),
+        resampling=Resampling.bilinear,
+    ).astype(np.float64)
+
+    # apply offset to project on geoid if needed
+    if output_geoid is False or isinstance(output_geoid, str):
+        # coarse grid of pixels, in dsm crs
+        node_rows = dft.get_coarse_nodes(
+            window.row_off, window.height, GRID_STEP
+        )
+        node_cols = dft.get_coarse_nodes(
+            window.col_off, window.width, GRID_STEP
+        )
+        nodes_col, nodes_row = np.meshgrid(node_cols, node_rows)
+        node_lonlats = projection.point_cloud_conversion(
+            dft.project(
+                np.stack([nodes_col.ravel(), nodes_row.ravel()], axis=1),
+                dsm_tr_mat,
+            ),
+            dsm_epsg,
+            4326,
+        )
+
+        # out geoid is ellipsoid: add geoid-ellipsoid distance
+        offsets = interpolate_geoid_height(geoid, node_lonlats)
+        if isinstance(output_geoid, str):
+            # out geoid is a new geoid whose path is in output_geoid:
+            # add carsgeoid-ellipsoid distance then add ellipsoid-outgeoid
+            offsets -= interpolate_geoid_height(output_geoid, node_lonlats)
+
+        elev[0] += dft.upsample_coarse_grid(
+            offsets.reshape(nodes_row.shape),
+            node_rows,
+            node_cols,
+            window.row_off + np.arange(window.height),
+            window.col_off + np.arange(window.width),
+        )
+
+    return elev
+
+
+def get_temporary_path(raster_file):
+    """
+    Get the path of a temporary raster, in the directory of raster_file,
+    so that it can be renamed over raster_file
+
+    :param raster_file: raster file to replace
+    :return: temporary raster file path
+    """
+    directory, file_name = os.path.split(raster_file)
+    return os.path.join(directory, "tmp_" + file_name)
+
+
+def is_cog(dataset):
+    """
+    Check if an opened raster is a Cloud Optimized GeoTIFF, as written by
+    COGWriter: tiled with overviews
+
+    :param dataset: rasterio dataset
+    :return: True if dataset is a COG
+    """
+    return dataset.profile.get("tiled", False) and len(dataset.overviews(1)) > 0
@@ -21,7 +21,9 @@
 """
 this module contains tools for the dsm filling applications
 """
+
 import numpy as np
+from rasterio.windows import Window
 
 
 def project(points, matrix):
@@ -34,3 +36,81 @@ def project(points, matrix):
     tr_points = tr_pts_homo[:, :2] / tr_pts_homo[:, 2][:, np.newaxis]
 
     return tr_points
+
+
+def generate_windows(height, width, tile_size):
+    """
+    Generate the windows of a raster, by square tiles
+
+    :param height: raster height
+    :param width: raster width
+    :param tile_size: size of tiles, in pixels
+    :return: list of rasterio windows
+    """
+    return [
+        Window(
+            col_off,
+            row_off,
+            min(tile_size, width - col_off),
+            min(tile_size, height - row_off),
+        )
+        for row_off in range(0, height, tile_size)
+        for col_off in range(0, width, tile_size)
+    ]
+
+
+def get_coarse_nodes(start, size, step):
+    """
+    Get positions of coarse grid nodes covering the pixels
+    of [start, start + size[, every step pixels
+
+    :param start: first pixel
+    :param size: number of pixels
+    :param step: step between nodes, in pixels
+    :return: positions of nodes, first and last pixels included
+    """
+    return np.append(np.arange(start, start + size - 1, step), start + size - 1)
+
+
+def linear_weights(positions, nodes):
+    """
+    Compute weights of the linear interpolation of positions
+    between sorted nodes. Positions outside nodes are extrapolated.
+
+    :param positions: positions to interpolate, of shape (n,)
+    :param nodes: positions of nodes, of shape (m,)
+    :return: weights, of shape (n, m)
+    """
+    weights = np.zeros((len(positions), len(nodes)))
+    if len(nodes) == 1:
+        weights[:, 0] = 1
+        return weights
+
+    index = np.clip(
+        np.searchsorted(nodes, positions, side="right") - 1, 0, len(nodes) - 2
+    )
+    ratio = (positions - nodes[index]) / (nodes[index + 1] - nodes[index])
+    lines = np.arange(len(positions))
+    weights[lines, index] = 1 - ratio
+    weights[lines, index + 1] = ratio
+
+    return weights
+
+
+def upsample_coarse_grid(values, node_rows, node_cols, rows, cols):
+    """
+    Bilinear interpolation of values known on coarse grid nodes,
+    at all pixels of a window
+
+    :param values: values on nodes, of shape (len(node_rows), len(node_cols))
+    :param node_rows: row positions of nodes
+    :param node_cols: col positions of nodes
+    :param rows: row positions of pixels
+    :param cols: col positions of pixels
+    :return: values on pixels, of shape (len(rows), len(cols))
+    """
+    return (
+        linear_weights(rows, node_rows)
+        @ values
+        @ linear_weights(cols, node_cols).T
+    )
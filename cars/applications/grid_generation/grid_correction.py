@@ -32,12 +32,11 @@ import os
 # Third party imports
 import numpy as np
 import pandas
-from scipy.interpolate import LinearNDInterpolator
-from scipy.spatial import Delaunay  # pylint: disable=E0611
 
 import cars.orchestrator.orchestrator as ocht
 from cars.applications import application_constants
 from cars.applications.grid_generation import grid_constants, grids
+from cars.core import grid_interpolation
 from cars.core.utils import safe_makedirs
 
 # CARS imports
@@ -222,18 +221,9 @@ def estimate_right_grid_correction(
     origin = grid_right.attributes["grid_origin"]
     spacing = grid_right.attributes["grid_spacing"]
 
-    # Form 3D array with grid positions
-    x_values_1d = np.arange(
-        origin[0],
-        origin[0] + right_grid.shape[0] * spacing[0],
-        spacing[0],
-    )
-    y_values_1d = np.arange(
-        origin[1],
-        origin[1] + right_grid.shape[1] * spacing[1],
-        spacing[1],
-    )
-    x_values_2d, y_values_2d = np.meshgrid(y_values_1d, x_values_1d)
+    # Grid positions: first coordinate along columns of grid
+    grid_origin = (origin[1], origin[0])
+    grid_spacing = (spacing[1], spacing[0])
 
     # Compute corresponding point in sensor geometry (grid encodes (x_sensor -
     # x_epi,y_sensor - y__epi)
@@ -245,24 +235,19 @@ def estimate_right_grid_correction(
     matches_y2 = matches[:, 3]
 
     # Map real matches to sensor geometry
-    points = np.column_stack((np.ravel(x_values_2d), np.ravel(y_values_2d)))
-
-    triangulation = Delaunay(points)
-
-    values = np.ravel(source_points[:, :, 0])
-
-    interpolator = LinearNDInterpolator(triangulation, values)
-    sensor_matches_raw_x = interpolator(matches_x2, matches_y2)
+    sensor_matches_raw = grid_interpolation.bilinear_interpolation(
+        source_points, grid_origin, grid_spacing, matches_x2, matches_y2
+    )
+    sensor_matches_raw_x = sensor_matches_raw[:, 0]
+    sensor_matches_raw_y = sensor_matches_raw[:, 1]
 
     # Simulate matches that have no epipolar error (i.e. y2 == y1) and map
     # them to sensor geometry
-    sensor_matches_perfect_x = interpolator(matches_x2, matches_y1)
-
-    values = np.ravel(source_points[:, :, 1])
-    interpolator = LinearNDInterpolator(triangulation, values)
-    sensor_matches_raw_y = interpolator(matches_x2, matches_y2)
-
-    sensor_matches_perfect_y = interpolator(matches_x2, matches_y1)
+    sensor_matches_perfect = grid_interpolation.bilinear_interpolation(
+        source_points, grid_origin, grid_spacing, matches_x2, matches_y1
+    )
+    sensor_matches_perfect_x = sensor_matches_perfect[:, 0]
+    sensor_matches_perfect_y = sensor_matches_perfect[:, 1]
 
     # Compute epipolar error in sensor geometry in both direction
     epipolar_error_x = sensor_matches_perfect_x - sensor_matches_raw_x
@@ -367,21 +352,15 @@ def estimate_right_grid_correction(
     )
 
     # Map corrected matches to epipolar geometry
-    points = np.column_stack(
-        (np.ravel(source_points[:, :, 0]), np.ravel(source_points[:, :, 1]))
-    )
-    triangulation = Delaunay(points)
-
-    values = np.ravel(x_values_2d)
-    interpolator = LinearNDInterpolator(triangulation, values)
-    epipolar_matches_corrected_x = interpolator(
-        sensor_matches_corrected_x, sensor_matches_corrected_y
-    )
-
-    values = np.ravel(y_values_2d)
-    interpolator = LinearNDInterpolator(triangulation, values)
-    epipolar_matches_corrected_y = interpolator(
-        sensor_matches_corrected_x, sensor_matches_corrected_y
+    (
+        epipolar_matches_corrected_x,
+        epipolar_matches_corrected_y,
+    ) = grid_interpolation.inverse_bilinear_interpolation(
+        source_points,
+        grid_origin,
+        grid_spacing,
+        sensor_matches_corrected_x,
+        sensor_matches_corrected_y,
     )
 
     corrected_matches = np.copy(matches)
@@ -33,14 +33,18 @@ import rasterio
 import rasterio.features
 import xarray as xr
 from affine import Affine
-from scipy.ndimage import binary_dilation, generate_binary_structure, label
-from shapely.geometry import Polygon
+from scipy.ndimage import distance_transform_cdt, find_objects, label
+from shapely.geometry import Polygon, box
 
 from cars.core import constants as cst
 
 
 def get_roi_coverage_as_poly_with_margins(
-    msk_values: np.ndarray, row_offset=0, col_offset=0, margin=0
+    msk_values: np.ndarray,
+    row_offset=0,
+    col_offset=0,
+    margin=0,
+    exact_polygons=False,
 ) -> List[Polygon]:
     """
     Finds all roi existing in binary msk and stores their coverage as
@@ -56,6 +60,9 @@ def get_roi_coverage_as_poly_with_margins(
         localized at tile border (to ensure later disparity values
         at mask border extraction)
     :type margin: int
+    :param exact_polygons: return pixel outlines of regions instead of
+        their bounding boxes
+    :type exact_polygons: bool
 
     :return: list of polygon
 
@@ -64,19 +71,31 @@ def get_roi_coverage_as_poly_with_margins(
     bbox = []
     coord_shapes = []
     # Check if at least one masked area in roi
-    if np.sum(msk_values) != 0:
+    if np.any(msk_values):
         msk_values_dil = msk_values
         if margin != 0:
             # Dilates areas in mask according to parameter 'margin' in order
-            # to get enough disparity values if region is near a tile border
-            # 1. Generates a structuring element that will consider features
-            # connected even if they touch diagonally
-            struct = generate_binary_structure(2, 2)
-            # 2. Dilation operation
-            msk_values_dil = binary_dilation(
-                msk_values, structure=struct, iterations=margin
+            # to get enough disparity values if region is near a tile border:
+            # features are connected even if they touch diagonally, so the
+            # dilated mask is the chessboard distance to mask <= margin
+            msk_values_dil = (
+                distance_transform_cdt(
+                    np.logical_not(msk_values), metric="chessboard"
+                )
+                <= margin
             )
         labeled_array, __ = label(np.array(msk_values_dil).astype("int"))
+        if not exact_polygons:
+            for rows, cols in find_objects(labeled_array):
+                bbox.append(
+                    box(
+                        rows.start + row_offset,
+                        cols.start + col_offset,
+                        rows.stop + row_offset,
+                        cols.stop + col_offset,
+                    )
+                )
+            return bbox
         shapes = rasterio.features.shapes(
             labeled_array,
             transform=Affine(1.0, 0.0, 0.0, 0.0, 1.0, 0.0),
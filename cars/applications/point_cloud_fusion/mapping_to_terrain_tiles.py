@@ -266,7 +266,6 @@ class MappingToTerrainTiles(
                 # Add epipolar_points_min and epipolar_points_max used
                 #  in point_cloud_fusion
                 # , to get corresponding tiles (terrain)
-                # TODO change method for corresponding tiles
                 list_points_min = []
                 list_points_max = []
                 for point_cloud in list_epipolar_point_clouds:
@@ -280,6 +279,17 @@ class MappingToTerrainTiles(
                     list_points_min.append(points_min)
                     list_points_max.append(points_max)
 
+                # Get required point clouds of all terrain tiles
+                (
+                    terrain_regions,
+                    corresponding_point_clouds,
+                ) = tiling.get_corresponding_tiles(
+                    terrain_tiling_grid,
+                    list_epipolar_point_clouds,
+                    list_points_min,
+                    list_points_max,
+                )
+
             # Add infos to orchestrator.out_json
             updating_dict = {
                 application_constants.APPLICATION_TAG: {
@@ -370,19 +380,10 @@ class MappingToTerrainTiles(
                         "points",
                     ):
                         # Get required point clouds
-                        (
-                            terrain_region,
-                            required_point_clouds,
-                            _rank,
-                            _pos,
-                        ) = tiling.get_corresponding_tiles_row_col(
-                            terrain_tiling_grid,
-                            row,
-                            col,
-                            list_epipolar_point_clouds,
-                            list_points_min,
-                            list_points_max,
-                        )
+                        terrain_region = terrain_regions[row, col]
+                        required_point_clouds = corresponding_point_clouds[row][
+                            col
+                        ]
                     else:
                         # Get correspondances previously computed
                         terrain_region = corresponding_tiles_cars_ds[row, col][
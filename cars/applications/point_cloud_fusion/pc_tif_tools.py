@@ -26,7 +26,9 @@ point clouds from .tif files.
 # pylint: disable=C0302
 
 # Standard imports
+import json
 import logging
+import os
 
 # Third party imports
 import numpy as np
@@ -42,6 +44,10 @@ from cars.core import inputs, preprocessing, projection, tiling
 # CARS imports
 from cars.data_structures import cars_dataset, cars_dict
 
+# Suffix of the index of x y min max of depth map windows, written next to
+# the X file of the depth map
+BOUNDS_INDEX_SUFFIX = "_bounds_index.json"
+
 
 def create_polygon_from_list_points(list_points):
     """
@@ -178,21 +184,11 @@ def get_min_max_band(
         in which the point cloud is projected
     """
     cloud_data = {}
-    with rio.open(image_path_x) as image_x:
-        with rio.open(image_path_y) as image_y:
-            with rio.open(image_path_z) as image_z:
-                if window is None:
-                    band_x = image_x.read(1)
-                    band_y = image_y.read(1)
-                    band_z = image_z.read(1)
-                else:
-                    band_x = image_x.read(1, window=window)
-                    band_y = image_y.read(1, window=window)
-                    band_z = image_z.read(1, window=window)
-
-                cloud_data[cst.X] = np.ravel(band_x)
-                cloud_data[cst.Y] = np.ravel(band_y)
-                cloud_data[cst.Z] = np.ravel(band_z)
+    for key, image_path in zip(  # noqa: B905
+        [cst.X, cst.Y, cst.Z], [image_path_x, image_path_y, image_path_z]
+    ):
+        with inputs.rasterio_open_cached(image_path) as image:
+            cloud_data[key] = np.ravel(image.read(1, window=window))
 
     pd_cloud = pd.DataFrame(cloud_data, columns=[cst.X, cst.Y, cst.Z])
 
@@ -441,13 +437,13 @@ def read_band(
         or cst.POINT_CLOUD_FILLING_KEY_ROOT in band_name
     ):
         band_type = "boolean"
-    with rio.open(band_path) as band_file:
+    with inputs.rasterio_open_cached(band_path) as band_file:
         if band_file.count == 1:
             cloud_data_bands.append(band_name)
             cloud_data_types.append(band_type)
             cloud_data[band_name] = np.ravel(band_file.read(1, window=window))
         else:
-            descriptions = inputs.get_descriptions_bands(band_path)
+            descriptions = band_file.descriptions
             for id_band, band_desc in enumerate(descriptions):
                 band_full_name = "{}_{}".format(band_name, band_desc)
                 cloud_data_bands.append(band_full_name)
@@ -537,7 +533,7 @@ def read_image_full(band_path, window=None, squeeze=False):
     :return array
     """
 
-    with rio.open(band_path) as desc_band:
+    with inputs.rasterio_open_cached(band_path) as desc_band:
         data = desc_band.read(window=window)
     if squeeze:
         data = np.squeeze(data)
@@ -545,6 +541,31 @@ def read_image_full(band_path, window=None, squeeze=False):
     return data
 
 
+def read_window_layers(layer_paths, window=None):
+    """
+    Read all layers of a window, each layer file being kept open by the
+    worker for the next windows
+
+    :param layer_paths: paths of layers by name, None paths are ignored
+    :type layer_paths: dict
+    :param window: window
+    :type window: rasterio window
+
+    :return: data (band, row, col) and band descriptions of layers, by name
+    :rtype: dict
+    """
+    layers = {}
+    for name, path in layer_paths.items():
+        if path is not None:
+            with inputs.rasterio_open_cached(path) as desc_band:
+                layers[name] = (
+                    desc_band.read(window=window),
+                    list(desc_band.descriptions),
+                )
+
+    return layers
+
+
 def generate_pc_wrapper(  # noqa: C901
     cloud, window, color_type=None, cloud_id=None, list_cloud_ids=None
 ):
@@ -562,10 +583,21 @@ def generate_pc_wrapper(  # noqa: C901
     """
 
     list_keys = cloud.keys()
+
+    # Read all layers of window
+    layer_paths = {
+        key: path
+        for key, path in cloud.items()
+        if isinstance(path, str) and key != cst.PC_EPSG
+    }
+    if isinstance(cloud.get(cst.EPI_CONFIDENCE_KEY_ROOT), dict):
+        layer_paths.update(cloud[cst.EPI_CONFIDENCE_KEY_ROOT])
+    layers = read_window_layers(layer_paths, window=window)
+
     # x y z
-    data_x = read_image_full(cloud["x"], window=window, squeeze=True)
-    data_y = read_image_full(cloud["y"], window=window, squeeze=True)
-    data_z = read_image_full(cloud["z"], window=window, squeeze=True)
+    data_x = np.squeeze(layers["x"][0])
+    data_y = np.squeeze(layers["y"][0])
+    data_z = np.squeeze(layers["z"][0])
 
     shape = data_x.shape
 
@@ -588,14 +620,10 @@ def generate_pc_wrapper(  # noqa: C901
         elif key in ["x", "y", "z"]:
             pass
         elif key == "intervals_z_inf":
-            data_z_inf = read_image_full(
-                cloud["intervals_z_inf"], window=window, squeeze=True
-            )
+            data_z_inf = np.squeeze(layers["intervals_z_inf"][0])
             values[cst.Z_INF] = ([cst.ROW, cst.COL], data_z_inf)
         elif key == "intervals_z_sup":
-            data_z_sup = read_image_full(
-                cloud["intervals_z_sup"], window=window, squeeze=True
-            )
+            data_z_sup = np.squeeze(layers["intervals_z_sup"][0])
             values[cst.Z_SUP] = ([cst.ROW, cst.COL], data_z_sup)
         elif key == "point_cloud_epsg":
             attributes["epsg"] = cloud[key]
@@ -603,12 +631,11 @@ def generate_pc_wrapper(  # noqa: C901
             if cloud[key] is None:
                 data = ~np.isnan(data_x) * 255
             else:
-                data = read_image_full(cloud[key], window=window, squeeze=True)
+                data = np.squeeze(layers[key][0])
             values[cst.POINT_CLOUD_CORR_MSK] = ([cst.ROW, cst.COL], data)
 
         elif key == cst.EPI_CLASSIFICATION:
-            data = read_image_full(cloud[key], window=window, squeeze=False)
-            descriptions = list(inputs.get_descriptions_bands(cloud[key]))
+            data, descriptions = layers[key]
             values[cst.EPI_CLASSIFICATION] = (
                 [cst.BAND_CLASSIF, cst.ROW, cst.COL],
                 data,
@@ -617,8 +644,7 @@ def generate_pc_wrapper(  # noqa: C901
                 coords[cst.BAND_CLASSIF] = descriptions
 
         elif key == cst.EPI_COLOR:
-            data = read_image_full(cloud[key], window=window, squeeze=False)
-            descriptions = list(inputs.get_descriptions_bands(cloud[key]))
+            data, descriptions = layers[key]
             attributes["color_type"] = color_type
             values[cst.EPI_COLOR] = ([cst.BAND_IM, cst.ROW, cst.COL], data)
 
@@ -627,14 +653,11 @@ def generate_pc_wrapper(  # noqa: C901
 
         elif key == cst.EPI_CONFIDENCE_KEY_ROOT:
             for sub_key in cloud[key].keys():
-                data = read_image_full(
-                    cloud[key][sub_key], window=window, squeeze=True
-                )
+                data = np.squeeze(layers[sub_key][0])
                 values[sub_key] = ([cst.ROW, cst.COL], data)
 
         elif key == cst.EPI_FILLING:
-            data = read_image_full(cloud[key], window=window, squeeze=False)
-            descriptions = list(inputs.get_descriptions_bands(cloud[key]))
+            data, descriptions = layers[key]
             values[cst.EPI_FILLING] = (
                 [cst.BAND_FILLING, cst.ROW, cst.COL],
                 data,
@@ -643,8 +666,8 @@ def generate_pc_wrapper(  # noqa: C901
                 coords[cst.BAND_FILLING] = descriptions
 
         elif key == cst.EPI_PERFORMANCE_MAP:
-            data = read_image_full(cloud[key], window=window, squeeze=True)
-            descriptions = list(inputs.get_descriptions_bands(cloud[key]))
+            data = np.squeeze(layers[key][0])
+            descriptions = layers[key][1]
             values[cst.EPI_PERFORMANCE_MAP] = (
                 [cst.ROW, cst.COL],
                 data,
@@ -653,7 +676,7 @@ def generate_pc_wrapper(  # noqa: C901
                 coords[cst.BAND_PERFORMANCE_MAP] = descriptions
 
         else:
-            data = read_image_full(cloud[key], window=window, squeeze=True)
+            data = np.squeeze(layers[key][0])
             if data.shape == 2:
                 values[key] = ([cst.ROW, cst.COL], data)
             else:
@@ -665,18 +688,211 @@ def generate_pc_wrapper(  # noqa: C901
     return xr_cloud
 
 
+def get_window_key(window):
+    """
+    Get key of window in bounds index
+
+    :param window: window
+    :type window: rasterio window
+
+    :return: "row_min_row_max_col_min_col_max"
+    :rtype: str
+    """
+    (row_min, row_max), (col_min, col_max) = window.toranges()
+
+    return "{}_{}_{}_{}".format(
+        *(int(round(value)) for value in [row_min, row_max, col_min, col_max])
+    )
+
+
+def get_bounds_index_path(point_cloud):
+    """
+    Get path of the bounds index of a depth map, next to its X file
+
+    :param point_cloud: depth map
+    :type point_cloud: dict
+
+    :return: path of bounds index
+    :rtype: str
+    """
+    return os.path.splitext(point_cloud[cst.X])[0] + BOUNDS_INDEX_SUFFIX
+
+
+def get_bounds_index_files(point_cloud):
+    """
+    Get path, modification time and size of the X, Y and Z files of a
+    depth map, used to check that the bounds index is up to date
+
+    :param point_cloud: depth map
+    :type point_cloud: dict
+
+    :return: files keys, None if a file is not on local disk
+    :rtype: list
+    """
+    files = []
+    for key in [cst.X, cst.Y, cst.Z]:
+        file_key = inputs.get_raster_metadata_key(point_cloud[key])
+        if file_key is None:
+            return None
+        files.append(list(file_key))
+
+    return files
+
+
+def read_bounds_index(point_cloud):
+    """
+    Read the bounds index of a depth map
+
+    :param point_cloud: depth map
+    :type point_cloud: dict
+
+    :return: x y min max of windows, by epsg and window key, empty if the
+        index does not exist or is outdated
+    :rtype: dict
+    """
+    files = get_bounds_index_files(point_cloud)
+    if files is None:
+        return {}
+
+    try:
+        with open(
+            get_bounds_index_path(point_cloud), "r", encoding="utf-8"
+        ) as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+    if (
+        not isinstance(index, dict)
+        or index.get("files") != files
+        or index.get("point_cloud_epsg") != point_cloud[cst.PC_EPSG]
+    ):
+        return {}
+
+    return index.get("bounds", {})
+
+
+def load_windows_bounds(point_cloud, epsg):
+    """
+    Load the x y min max of depth map windows, converted to epsg,
+    already computed by a previous run
+
+    :param point_cloud: depth map
+    :type point_cloud: dict
+    :param epsg: epsg of x y min max
+    :type epsg: int
+
+    :return: x y min max [xmin, xmax, ymin, ymax], by window key
+    :rtype: dict
+    """
+    windows_bounds = read_bounds_index(point_cloud).get(str(epsg), {})
+
+    return {
+        window_key: [
+            np.nan if value is None else value for value in x_y_min_max
+        ]
+        for window_key, x_y_min_max in windows_bounds.items()
+    }
+
+
+def save_windows_bounds(point_cloud, epsg, windows_bounds):
+    """
+    Save the x y min max of depth map windows, converted to epsg, in the
+    bounds index next to the depth map, to be reused by next runs.
+    Nothing is saved if the index can't be written.
+
+    :param point_cloud: depth map
+    :type point_cloud: dict
+    :param epsg: epsg of x y min max
+    :type epsg: int
+    :param windows_bounds: x y min max [xmin, xmax, ymin, ymax],
+        by window key
+    :type windows_bounds: dict
+    """
+    files = get_bounds_index_files(point_cloud)
+    if files is None:
+        return
+
+    bounds = read_bounds_index(point_cloud)
+    epsg_bounds = bounds.setdefault(str(epsg), {})
+    for window_key, x_y_min_max in windows_bounds.items():
+        epsg_bounds[window_key] = [
+            None if np.isnan(value) else float(value) for value in x_y_min_max
+        ]
+
+    index = {
+        "files": files,
+        "point_cloud_epsg": point_cloud[cst.PC_EPSG],
+        "bounds": bounds,
+    }
+
+    index_path = get_bounds_index_path(point_cloud)
+    tmp_index_path = "{}.{}.tmp".format(index_path, os.getpid())
+    try:
+        with open(tmp_index_path, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+        os.replace(tmp_index_path, index_path)
+    except (OSError, TypeError) as write_error:
+        logging.info(
+            "Bounds index {} not written: {}".format(index_path, write_error)
+        )
+        if os.path.exists(tmp_index_path):
+            os.remove(tmp_index_path)
+
+
+def get_windows_x_y_min_max(point_cloud, epsg, windows):
+    """
+    Get the x y min max of depth map windows, converted to epsg.
+    Windows missing in the bounds index of depth map are computed and
+    added to it.
+
+    :param point_cloud: depth map
+    :type point_cloud: dict
+    :param epsg: epsg of x y min max
+    :type epsg: int
+    :param windows: windows
+    :type windows: list(rasterio window)
+
+    :return: x y min max [xmin, xmax, ymin, ymax] of each window
+    :rtype: list
+    """
+    windows_bounds = load_windows_bounds(point_cloud, epsg)
+
+    missing_windows_bounds = {}
+    for window in windows:
+        window_key = get_window_key(window)
+        if window_key not in windows_bounds:
+            missing_windows_bounds[window_key] = get_min_max_band(
+                point_cloud[cst.X],
+                point_cloud[cst.Y],
+                point_cloud[cst.Z],
+                point_cloud[cst.PC_EPSG],
+                epsg,
+                window=window,
+            )
+
+    if len(missing_windows_bounds) > 0:
+        save_windows_bounds(point_cloud, epsg, missing_windows_bounds)
+        windows_bounds.update(missing_windows_bounds)
+
+    return [windows_bounds[get_window_key(window)] for window in windows]
+
+
 def get_bounds(
     list_epipolar_point_clouds,
     epsg,
     roi_poly=None,
+    tile_size=1000,
 ):
     """
-    Get bounds of clouds
+    Get bounds of clouds, from the x y min max of their windows
 
     :param list_epipolar_point_clouds: list of clouds
     :type list_epipolar_point_clouds: dict
     :param epsg: epsg of wanted roi
     :param roi_poly: crop with given roi
+    :param tile_size: size of windows
+    :type tile_size: int
 
     :return bounds
     """
@@ -686,19 +902,27 @@ def get_bounds(
     ymax_list = []
 
     for _, point_cloud in list_epipolar_point_clouds.items():
-
-        local_x_y_min_max = get_min_max_band(
-            point_cloud[cst.X],
-            point_cloud[cst.Y],
-            point_cloud[cst.Z],
-            point_cloud[cst.PC_EPSG],
-            epsg,
+        size_x, size_y = inputs.rasterio_get_size(point_cloud[cst.X])
+        grid = tiling.generate_tiling_grid(
+            0, 0, size_y, size_x, tile_size, tile_size
         )
+        windows = [
+            rio.windows.Window.from_slices(
+                (grid[row, col, 0], grid[row, col, 1]),
+                (grid[row, col, 2], grid[row, col, 3]),
+            )
+            for row in range(grid.shape[0])
+            for col in range(grid.shape[1])
+        ]
 
-        xmin_list.append(local_x_y_min_max[0])
-        xmax_list.append(local_x_y_min_max[1])
-        ymin_list.append(local_x_y_min_max[2])
-        ymax_list.append(local_x_y_min_max[3])
+        for local_x_y_min_max in get_windows_x_y_min_max(
+            point_cloud, epsg, windows
+        ):
+            if np.all(np.isfinite(local_x_y_min_max)):
+                xmin_list.append(local_x_y_min_max[0])
+                xmax_list.append(local_x_y_min_max[1])
+                ymin_list.append(local_x_y_min_max[2])
+                ymax_list.append(local_x_y_min_max[3])
 
     # Define a terrain tiling from the terrain bounds (in terrain epsg)
     global_xmin = min(xmin_list)
@@ -767,6 +991,9 @@ def transform_input_pc(
     ymin_list = []
     ymax_list = []
     for pair_key, items in list_epipolar_point_clouds.items():
+        # Get x y min max computed by previous runs
+        windows_bounds = load_windows_bounds(items, epsg)
+
         # Generate CarsDataset
         epi_pc = cars_dataset.CarsDataset("dict")
         tif_size = inputs.rasterio_get_size(items[cst.X])
@@ -812,6 +1039,7 @@ def transform_input_pc(
                     items,
                     epsg,
                     window,
+                    x_y_min_max=windows_bounds.get(get_window_key(window)),
                     saving_info=full_saving_info_pc,
                 )
         epi_pc.attributes["source_pc_name"] = pair_key
@@ -825,11 +1053,16 @@ def transform_input_pc(
     # Get all local min and max
     for computed_epi_pc in list_epipolar_point_clouds_by_tiles:
         pc_xmin_list, pc_ymin_list, pc_xmax_list, pc_ymax_list = [], [], [], []
+        computed_windows_bounds = {}
         for row in range(computed_epi_pc.shape[0]):
             for col in range(computed_epi_pc.shape[1]):
                 local_x_y_min_max = computed_epi_pc[row, col].data[
                     "x_y_min_max"
                 ]
+                if not computed_epi_pc[row, col].data["from_bounds_index"]:
+                    computed_windows_bounds[
+                        get_window_key(computed_epi_pc[row, col].data["window"])
+                    ] = local_x_y_min_max
 
                 if np.all(np.isfinite(local_x_y_min_max)):
                     # Add for global
@@ -846,6 +1079,16 @@ def transform_input_pc(
                 # Simplify data
                 computed_epi_pc[row, col] = computed_epi_pc[row, col].data
 
+        # Save computed x y min max for next runs
+        if len(computed_windows_bounds) > 0:
+            save_windows_bounds(
+                list_epipolar_point_clouds[
+                    computed_epi_pc.attributes["source_pc_name"]
+                ],
+                epsg,
+                computed_windows_bounds,
+            )
+
         # Add min max for current point cloud CarsDataset
         computed_epi_pc.attributes["xmin"] = min(pc_xmin_list)
         computed_epi_pc.attributes["ymin"] = min(pc_ymin_list)
@@ -968,7 +1211,9 @@ def compute_average_distance(list_epipolar_point_clouds_by_tiles):
     return max(list_average_dist)
 
 
-def compute_x_y_min_max_wrapper(items, epsg, window, saving_info=None):
+def compute_x_y_min_max_wrapper(
+    items, epsg, window, x_y_min_max=None, saving_info=None
+):
     """
     Compute bounds from item and create CarsDict filled with point cloud
     information: file paths, bounds, epsg, window
@@ -979,6 +1224,8 @@ def compute_x_y_min_max_wrapper(items, epsg, window, saving_info=None):
     :type epsg: int
     :param window: window to use
     :type window: dict
+    :param x_y_min_max: bounds read from bounds index, computed if None
+    :type x_y_min_max: list
     :param saving_info: saving infos
     :type saving_info: dict
 
@@ -986,14 +1233,16 @@ def compute_x_y_min_max_wrapper(items, epsg, window, saving_info=None):
     :rtype: CarsDict
 
     """
-    x_y_min_max = get_min_max_band(
-        items[cst.X],
-        items[cst.Y],
-        items[cst.Z],
-        items[cst.PC_EPSG],
-        epsg,
-        window=window,
-    )
+    from_bounds_index = x_y_min_max is not None
+    if not from_bounds_index:
+        x_y_min_max = get_min_max_band(
+            items[cst.X],
+            items[cst.Y],
+            items[cst.Z],
+            items[cst.PC_EPSG],
+            epsg,
+            window=window,
+        )
 
     data_dict = {
         cst.X: items[cst.X],
@@ -1028,6 +1277,7 @@ def compute_x_y_min_max_wrapper(items, epsg, window, saving_info=None):
     tile = {
         "data": data_dict,
         "x_y_min_max": x_y_min_max,
+        "from_bounds_index": from_bounds_index,
         "window": window,
         "cloud_epsg": items[cst.PC_EPSG],
     }
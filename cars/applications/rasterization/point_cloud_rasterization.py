@@ -142,6 +142,7 @@ class PointCloudRasterization(ApplicationTemplate, metaclass=ABCMeta):
         filling_file_name=None,
         color_dtype=None,
         dump_dir=None,
+        cog=False,
     ):
         """
         Run PointCloudRasterisation application.
@@ -173,6 +174,8 @@ class PointCloudRasterization(ApplicationTemplate, metaclass=ABCMeta):
         :type color_dtype: str (numpy type)
         :param dump_dir: directory used for outputs with no associated filename
         :type dump_dir: str
+        :param cog: save product rasters as Cloud Optimized GeoTIFF
+        :type cog: bool
 
         :return: raster DSM
         :rtype: CarsDataset filled with xr.Dataset
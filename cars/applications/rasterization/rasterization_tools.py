@@ -29,7 +29,7 @@ TODO: refactor in several files and remove too-many-lines
 
 # Standard imports
 import logging
-from typing import List, Tuple, Union
+from typing import Dict, List, Tuple, Union
 
 # Third party imports
 import numpy as np
@@ -38,6 +38,7 @@ import pandas
 # cars-rasterize
 import rasterize as crasterize  # pylint:disable=E0401
 import xarray as xr
+from numba import njit
 
 # CARS imports
 from cars.core import constants as cst
@@ -79,6 +80,62 @@ def compute_xy_starts_and_sizes(
     return x_start, y_start, x_size, y_size
 
 
+# Layers fed to the rasterizer, in order: (layer name, point cloud tag,
+# always computed). Layers not always computed are rasterized only if their
+# tag is found in the list of computed layers.
+RASTERIZED_LAYERS = [
+    ("hgt", cst.Z, True),
+    ("color", cst.POINT_CLOUD_CLR_KEY_ROOT, True),
+    ("confidences", cst.POINT_CLOUD_CONFIDENCE_KEY_ROOT, False),
+    ("interval", cst.POINT_CLOUD_INTERVALS_KEY_ROOT, False),
+    ("msk", cst.POINT_CLOUD_MSK, False),
+    ("classif", cst.POINT_CLOUD_CLASSIF_KEY_ROOT, False),
+    ("filling", cst.POINT_CLOUD_FILLING_KEY_ROOT, False),
+    ("performance_map", cst.POINT_CLOUD_PERFORMANCE_MAP, False),
+]
+
+
+class RasterizationPlan:  # pylint: disable=R0903
+    """
+    Rasterization plan: selection of the layers to rasterize,
+    built once per run from the list of computed layers
+    and applied to each point cloud tile
+    """
+
+    def __init__(self, list_computed_layers: List[str] = None):
+        """
+        Init function of RasterizationPlan
+
+        :param list_computed_layers: list of computed output data,
+            all layers are computed if None
+        """
+        self.layers = [
+            (name, tag)
+            for (name, tag, always_computed) in RASTERIZED_LAYERS
+            if always_computed
+            or list_computed_layers is None
+            or substring_in_list(list_computed_layers, tag)
+        ]
+        self.source_pc = list_computed_layers is None or substring_in_list(
+            list_computed_layers, cst.POINT_CLOUD_SOURCE_KEY_ROOT
+        )
+
+    def get_bands(self, cloud: pandas.DataFrame) -> Dict[str, List[str]]:
+        """
+        Get the point cloud columns to rasterize for each selected layer
+
+        :param cloud: Combined cloud
+        :return: dict with layer name as key and list of columns as value
+        """
+        bands = {}
+        for name, tag in self.layers:
+            if tag == cst.Z:
+                bands[name] = [cst.Z] if cst.Z in cloud else []
+            else:
+                bands[name] = find_indexes_in_point_cloud(cloud, tag)
+        return bands
+
+
 def simple_rasterization_dataset_wrapper(
     cloud: pandas.DataFrame,
     resolution: float,
@@ -94,6 +151,7 @@ def simple_rasterization_dataset_wrapper(
     msk_no_data: int = 255,
     list_computed_layers: List[str] = None,
     source_pc_names: List[str] = None,
+    rasterization_plan: RasterizationPlan = None,
 ) -> xr.Dataset:
     """
     Wrapper of simple_rasterization
@@ -122,6 +180,8 @@ def simple_rasterization_dataset_wrapper(
     :param list_computed_layers: list of computed output data
     :param source_pc_names: list of names of point cloud before merging :
         name of sensors pair or name of point cloud file
+    :param rasterization_plan: plan of layers to rasterize, built from
+        list_computed_layers if None
     :return: Rasterized cloud
     """
 
@@ -159,6 +219,7 @@ def simple_rasterization_dataset_wrapper(
         msk_no_data=msk_no_data,
         list_computed_layers=list_computed_layers,
         source_pc_names=source_pc_names,
+        rasterization_plan=rasterization_plan,
     )
 
     return raster
@@ -222,6 +283,97 @@ def find_indexes_in_point_cloud(
     return indexes
 
 
+def compute_source_pc_bit_raster(
+    points: np.ndarray,
+    global_id: np.ndarray,
+    number_of_pc: int,
+    x_start: float,
+    y_start: float,
+    x_size: int,
+    y_size: int,
+    resolution: float,
+    radius: int,
+) -> np.ndarray:
+    """
+    Compute which source point clouds contribute to each cell,
+    as a packed bit raster: bit (pc_id % 8) of byte (pc_id // 8)
+    is set if at least one point of point cloud pc_id lies in the
+    rasterization disc of the cell.
+
+    The disc is the one used by crasterize.pc_to_dsm: all points at a
+    distance lower than (radius + 0.5) * resolution of the cell center.
+
+    :param points: X and Y coordinates of points, shape (2, nb_points)
+    :param global_id: source point cloud id of each point
+    :param number_of_pc: number of source point clouds
+    :param x_start: x start of the rasterization grid
+    :param y_start: y start of the rasterization grid
+    :param x_size: x size of the rasterization grid
+    :param y_size: y size of the rasterization grid
+    :param resolution: Resolution of rasterized cells,
+        expressed in cloud CRS units
+    :param radius: Radius for hole filling.
+    :return: packed bit raster, of shape
+        (ceil(number_of_pc / 8), y_size * x_size) and dtype uint8
+    """
+    nb_bytes = (number_of_pc + 7) // 8
+    packed = np.zeros((nb_bytes, y_size * x_size), dtype=np.uint8)
+
+    valid = np.logical_and(
+        np.all(np.isfinite(points), axis=0), np.isfinite(global_id)
+    )
+    pos_x = points[0, valid]
+    pos_y = points[1, valid]
+    pc_id = global_id[valid].astype(np.int64)
+
+    byte_index = pc_id // 8
+    bit_value = np.left_shift(1, pc_id % 8).astype(np.uint8)
+
+    col = np.floor((pos_x - x_start) / resolution).astype(np.int64)
+    row = np.floor((y_start - pos_y) / resolution).astype(np.int64)
+    max_dist = (radius + 0.5) * resolution
+
+    for row_offset in range(-radius, radius + 1):
+        for col_offset in range(-radius, radius + 1):
+            cell_row = row + row_offset
+            cell_col = col + col_offset
+            in_disc = (
+                (cell_row >= 0)
+                & (cell_row < y_size)
+                & (cell_col >= 0)
+                & (cell_col < x_size)
+                & (
+                    np.hypot(
+                        pos_x - (x_start + (cell_col + 0.5) * resolution),
+                        pos_y - (y_start - (cell_row + 0.5) * resolution),
+                    )
+                    <= max_dist
+                )
+            )
+            cell_index = cell_row[in_disc] * x_size + cell_col[in_disc]
+            np.bitwise_or.at(
+                packed,
+                (byte_index[in_disc], cell_index),
+                bit_value[in_disc],
+            )
+
+    return packed
+
+
+def unpack_source_pc_bit_raster(
+    packed: np.ndarray, number_of_pc: int
+) -> np.ndarray:
+    """
+    Unpack a source point cloud bit raster
+    as computed by compute_source_pc_bit_raster
+
+    :param packed: packed bit raster, shape (nb_bytes, ...)
+    :param number_of_pc: number of source point clouds
+    :return: binary raster of shape (number_of_pc, ...) and dtype uint8
+    """
+    return np.unpackbits(packed, axis=0, count=number_of_pc, bitorder="little")
+
+
 def compute_vector_raster_and_stats(
     cloud: pandas.DataFrame,
     x_start: float,
@@ -232,6 +384,7 @@ def compute_vector_raster_and_stats(
     sigma: float,
     radius: int,
     list_computed_layers: List[str] = None,
+    rasterization_plan: RasterizationPlan = None,
 ) -> Tuple[
     np.ndarray,
     np.ndarray,
@@ -245,6 +398,9 @@ def compute_vector_raster_and_stats(
     """
     Compute vectorized raster and its statistics.
 
+    Rasterized layers are returned as (band, row, col) views
+    of a single output array.
+
     :param cloud: Combined cloud
         as returned by the create_combined_cloud function
     :param x_start: x start of the rasterization grid
@@ -255,98 +411,32 @@ def compute_vector_raster_and_stats(
         expressed in cloud CRS units or None.
     :param sigma: Sigma for gaussian interpolation. If None, set to resolution
     :param radius: Radius for hole filling.
-    :param list_computed_layers: list of computed output data
+    :param list_computed_layers: list of computed output data,
+        used if rasterization_plan is None
+    :param rasterization_plan: plan of layers to rasterize
     :return: a tuple with rasterization results and statistics.
     """
+    if rasterization_plan is None:
+        rasterization_plan = RasterizationPlan(list_computed_layers)
+
     # get points corresponding to (X, Y positions) + data_valid
     points = cloud.loc[:, [cst.X, cst.Y]].values.T
     nb_points = points.shape[1]
-    valid = np.ones((1, nb_points))
-    # create values: 1. altitudes and colors, 2. confidences, 3. masks
-    # split_indexes allows to keep indexes separating values
-    split_indexes = []
-
-    # 1. altitudes and colors
-    values_bands = [cst.Z] if cst.Z in cloud else []
-
-    clr_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_CLR_KEY_ROOT
-    )
-    values_bands.extend(clr_indexes)
-    split_indexes.append(len(values_bands))
-
-    # 2. confidences
-    confidences_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_CONFIDENCE_KEY_ROOT, list_computed_layers
-    )
-    values_bands.extend(confidences_indexes)
-    split_indexes.append(len(confidences_indexes))
-
-    # 3. confidence interval
-    interval_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_INTERVALS_KEY_ROOT, list_computed_layers
-    )
-    values_bands.extend(interval_indexes)
-    split_indexes.append(len(interval_indexes))
-
-    # 4. mask
-    msk_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_MSK, list_computed_layers
-    )
-    values_bands.extend(msk_indexes)
-    split_indexes.append(len(msk_indexes))
-
-    # 5. classification
-    classif_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_CLASSIF_KEY_ROOT, list_computed_layers
-    )
-
-    values_bands.extend(classif_indexes)
-    split_indexes.append(len(classif_indexes))
-
-    # 6. source point cloud
-    # Fill the dataframe with additional columns :
-    # each column refers to a point cloud id
-    number_of_pc = cars_dataset.get_attributes_dataframe(cloud)["number_of_pc"]
-    if cst.POINT_CLOUD_GLOBAL_ID in cloud.columns and (
-        (list_computed_layers is None)
-        or substring_in_list(
-            list_computed_layers, cst.POINT_CLOUD_SOURCE_KEY_ROOT
-        )
-    ):
-        for pc_id in range(number_of_pc):
-            # Create binary list that indicates from each point whether it comes
-            # from point cloud number "pc_id"
-            point_is_from_pc = list(
-                map(int, cloud[cst.POINT_CLOUD_GLOBAL_ID] == pc_id)
-            )
-            pc_key = "{}{}".format(cst.POINT_CLOUD_SOURCE_KEY_ROOT, pc_id)
-            cloud[pc_key] = point_is_from_pc
-
-    source_pc_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_SOURCE_KEY_ROOT, list_computed_layers
-    )
-    values_bands.extend(source_pc_indexes)
-    split_indexes.append(len(source_pc_indexes))
-
-    # 7. filling
-    filling_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_FILLING_KEY_ROOT, list_computed_layers
-    )
-    values_bands.extend(filling_indexes)
-    split_indexes.append(len(filling_indexes))
-
-    # 8. Performance map
-    performance_map_indexes = find_indexes_in_point_cloud(
-        cloud, cst.POINT_CLOUD_PERFORMANCE_MAP, list_computed_layers
-    )
-    values_bands.extend(performance_map_indexes)
-
-    values = (
-        cloud.loc[:, values_bands].values.T
-        if len(values_bands) > 0
-        else np.empty((0, nb_points))
-    )
+    valid = np.ones((1, nb_points), dtype=np.int32)
+
+    # fill values directly in the array given to the rasterizer,
+    # keeping the position of each layer
+    bands = rasterization_plan.get_bands(cloud)
+    values_bands = [band for layer in bands.values() for band in layer]
+    values = np.empty((len(values_bands), nb_points), dtype=np.float64)
+    for index, band in enumerate(values_bands):
+        values[index] = cloud[band].values
+
+    layer_slices = {}
+    start = 0
+    for name, layer in bands.items():
+        layer_slices[name] = slice(start, start + len(layer))
+        start += len(layer)
 
     (out, weights_sum, mean, stdev, nb_pts_in_disc, nb_pts_in_cell) = (
         crasterize.pc_to_dsm(
@@ -362,51 +452,87 @@ def compute_vector_raster_and_stats(
             sigma,
         )
     )
+    # values are not needed anymore: release memory before next steps
+    del values
+
+    # write all layers as (band, row, col) in a preallocated array:
+    # each layer is then a contiguous view of it
+    raster = np.empty((len(values_bands), y_size, x_size), dtype=out.dtype)
+    raster[...] = np.moveaxis(
+        out.reshape((y_size, x_size, len(values_bands))), 2, 0
+    )
 
-    # pylint: disable=unbalanced-tuple-unpacking
-    (
-        out,
-        confidences,
-        interval,
-        msk,
-        classif,
-        source_pc,
-        filling,
-        performance_map,
-    ) = np.split(out, np.cumsum(split_indexes), axis=-1)
+    def get_layer(name):
+        """
+        Get view of rasterized layer, or None if not rasterized
+        """
+        if name not in bands or len(bands[name]) == 0:
+            return None
+        return raster[layer_slices[name]]
+
+    def get_ceil_layer(name):
+        """
+        Get rasterized layer, rounded to upper integer in place
+        """
+        layer = get_layer(name)
+        if layer is not None:
+            np.ceil(layer, out=layer)
+        return layer
+
+    # height and colors
+    out = raster[: layer_slices["color"].stop]
+    clr_indexes = bands["color"]
 
     confidences_out = None
-    if len(confidences_indexes) > 0:
-        confidences_out = {}
-        for k, key in enumerate(confidences_indexes):
-            confidences_out[key] = confidences[..., k]
+    if get_layer("confidences") is not None:
+        confidences_out = {
+            key: raster[layer_slices["confidences"].start + k]
+            for k, key in enumerate(bands["confidences"])
+        }
 
-    interval_out = None
+    interval_out = get_layer("interval")
     interval_stat_index = None
-    if len(interval_indexes) > 0:
-        interval_out = interval
-        interval_stat_index = [
-            values_bands.index(int_ind) for int_ind in interval_indexes
-        ]
+    if interval_out is not None:
+        interval_stat_index = list(
+            range(layer_slices["interval"].start, layer_slices["interval"].stop)
+        )
 
-    msk_out = None
-    if len(msk_indexes) > 0:
-        msk_out = np.ceil(msk)
+    msk_out = get_ceil_layer("msk")
+    if msk_out is not None:
+        msk_out = msk_out[0]
 
-    classif_out = None
-    if len(classif_indexes) > 0:
-        classif_out = np.ceil(classif)
+    classif_out = get_ceil_layer("classif")
+    classif_indexes = bands.get("classif", [])
 
-    source_pc_out = None
-    if len(source_pc_indexes) > 0:
-        source_pc_out = np.ceil(source_pc)
+    filling_out = get_ceil_layer("filling")
+    filling_indexes = bands.get("filling", [])
 
-    filling_out = None
-    if len(filling_indexes) > 0:
-        filling_out = np.ceil(filling)
+    performance_map = get_layer("performance_map")
+    if performance_map is not None:
+        performance_map = performance_map[0]
 
-    if len(performance_map_indexes) == 0:
-        performance_map = None
+    # source point cloud
+    # Contribution of each point cloud is computed separately from global_id
+    # as a packed bit raster, without adding one column per point cloud
+    source_pc_out = None
+    if (
+        cst.POINT_CLOUD_GLOBAL_ID in cloud.columns
+        and rasterization_plan.source_pc
+    ):
+        number_of_pc = cars_dataset.get_attributes_dataframe(cloud)[
+            "number_of_pc"
+        ]
+        source_pc_out = compute_source_pc_bit_raster(
+            points,
+            cloud[cst.POINT_CLOUD_GLOBAL_ID].values,
+            number_of_pc,
+            x_start,
+            y_start,
+            x_size,
+            y_size,
+            resolution,
+            radius,
+        )
 
     return (
         out,
@@ -461,6 +587,8 @@ def create_raster_dataset(
     """
     Create final raster xarray dataset
 
+    Rasterized layers are not copied: no data values are set in place.
+
     :param raster: height and colors
     :param x_start: x start of the rasterization grid
     :param y_start: y start of the rasterization grid
@@ -482,7 +610,8 @@ def create_raster_dataset(
     :param interval: raster containing intervals inf and sup
     :param interval_stat_index: list containing index of
         intervals in mean and stdev rasters
-    :param source_pc: binary raster with source point cloud information
+    :param source_pc: binary raster with source point cloud information,
+        nodata already set
     :param source_pc_names: list of names of point cloud before merging :
         name of sensors pair or name of point cloud file
     :param performance_map: raster containing the performance map
@@ -494,7 +623,7 @@ def create_raster_dataset(
         x_start, y_start, x_size, y_size, resolution
     )
     raster_coords = {cst.X: x_values_1d, cst.Y: y_values_1d}
-    hgt = np.nan_to_num(raster[0], nan=hgt_no_data)
+    hgt = np.nan_to_num(raster[0], nan=hgt_no_data, copy=False)
     raster_out = xr.Dataset(
         {
             cst.RASTER_HGT: ([cst.Y, cst.X], hgt),
@@ -504,7 +633,7 @@ def create_raster_dataset(
     )
 
     if raster.shape[0] > 1:  # rasterizer produced color output
-        color = np.nan_to_num(raster[1:], nan=color_no_data)
+        color = np.nan_to_num(raster[1:], nan=color_no_data, copy=False)
         for idx, band_name in enumerate(band_im):
             band_im[idx] = band_name.replace(
                 cst.POINT_CLOUD_CLR_KEY_ROOT + "_", ""
@@ -553,11 +682,11 @@ def create_raster_dataset(
     )
 
     if msk is not None:  # rasterizer produced mask output
-        msk = np.nan_to_num(msk, nan=msk_no_data)
+        msk = np.nan_to_num(msk, nan=msk_no_data, copy=False)
         raster_out[cst.RASTER_MSK] = xr.DataArray(msk, dims=raster_dims)
 
     if classif is not None:  # rasterizer produced classif output
-        classif = np.nan_to_num(classif, nan=msk_no_data)
+        classif = np.nan_to_num(classif, nan=msk_no_data, copy=False)
         for idx, band_name in enumerate(band_classif):
             band_classif[idx] = band_name.replace(
                 cst.POINT_CLOUD_CLASSIF_KEY_ROOT + "_", ""
@@ -579,11 +708,11 @@ def create_raster_dataset(
             raster_out[key] = xr.DataArray(confidences[key], dims=raster_dims)
 
     if interval is not None:
-        hgt_inf = np.nan_to_num(interval[0], nan=hgt_no_data)
+        hgt_inf = np.nan_to_num(interval[0], nan=hgt_no_data, copy=False)
         raster_out[cst.RASTER_HGT_INF] = xr.DataArray(
             hgt_inf, coords=raster_coords, dims=raster_dims
         )
-        hgt_sup = np.nan_to_num(interval[1], nan=hgt_no_data)
+        hgt_sup = np.nan_to_num(interval[1], nan=hgt_no_data, copy=False)
         raster_out[cst.RASTER_HGT_SUP] = xr.DataArray(
             hgt_sup, coords=raster_coords, dims=raster_dims
         )
@@ -613,7 +742,6 @@ def create_raster_dataset(
         )
 
     if source_pc is not None and source_pc_names is not None:
-        source_pc = np.nan_to_num(source_pc, nan=msk_no_data)
         source_pc_out = xr.Dataset(
             {
                 cst.RASTER_SOURCE_PC: (
@@ -627,7 +755,7 @@ def create_raster_dataset(
         raster_out = xr.merge((raster_out, source_pc_out))
 
     if filling is not None:  # rasterizer produced filling info output
-        filling = np.nan_to_num(filling, nan=msk_no_data)
+        filling = np.nan_to_num(filling, nan=msk_no_data, copy=False)
         for idx, band_name in enumerate(band_filling):
             band_filling[idx] = band_name.replace(
                 cst.POINT_CLOUD_FILLING_KEY_ROOT + "_", ""
@@ -645,7 +773,9 @@ def create_raster_dataset(
         raster_out = xr.merge((raster_out, filling_out))
 
     if performance_map is not None:
-        performance_map = np.nan_to_num(performance_map, nan=msk_no_data)
+        performance_map = np.nan_to_num(
+            performance_map, nan=msk_no_data, copy=False
+        )
         raster_out[cst.RASTER_PERFORMANCE_MAP] = xr.DataArray(
             performance_map, dims=raster_dims
         )
@@ -668,6 +798,7 @@ def rasterize(
     msk_no_data: int = 255,
     list_computed_layers: List[str] = None,
     source_pc_names: List[str] = None,
+    rasterization_plan: RasterizationPlan = None,
 ) -> Union[xr.Dataset, None]:
     """
     Rasterize a point cloud with its color bands to a Dataset
@@ -688,6 +819,10 @@ def rasterize(
     :param color_no_data: no data value to use for color
     :param msk_no_data: no data value to use in the final mask image
     :param list_computed_layers: list of computed output data
+    :param source_pc_names: list of names of point cloud before merging :
+        name of sensors pair or name of point cloud file
+    :param rasterization_plan: plan of layers to rasterize, built from
+        list_computed_layers if None
     :return: Rasterized cloud color and statistics.
     """
 
@@ -733,48 +868,28 @@ def rasterize(
         sigma,
         radius,
         list_computed_layers,
+        rasterization_plan,
     )
 
-    # reshape data as a 2d grid.
+    # reshape statistics as a 2d grid,
+    # rasterized layers are already (band, row, col) arrays
     shape_out = (y_size, x_size)
-    out = out.reshape(shape_out + (-1,))
     mean = mean.reshape(shape_out + (-1,))
     stdev = stdev.reshape(shape_out + (-1,))
     n_pts = n_pts.reshape(shape_out)
     n_in_cell = n_in_cell.reshape(shape_out)
-
-    out = out.reshape(shape_out + (-1,))
-    out = np.moveaxis(out, 2, 0)
-
     weights_sum = weights_sum.reshape(shape_out)
 
-    if classif is not None:
-        classif = classif.reshape(shape_out + (-1,))
-        classif = np.moveaxis(classif, 2, 0)
-
-    if msk is not None:
-        msk = msk.reshape(shape_out)
-    else:
+    if msk is None:
         msk = np.isnan(out[0, :, :])
 
-    if confidences is not None:
-        for key in confidences:
-            confidences[key] = confidences[key].reshape(shape_out)
-
-    if interval is not None:
-        interval = interval.reshape(shape_out + (-1,))
-        interval = np.moveaxis(interval, 2, 0)
-
     if source_pc is not None:
-        source_pc = source_pc.reshape(shape_out + (-1,))
-        source_pc = np.moveaxis(source_pc, 2, 0)
-
-    if filling is not None:
-        filling = filling.reshape(shape_out + (-1,))
-        filling = np.moveaxis(filling, 2, 0)
-
-    if performance_map is not None:
-        performance_map = performance_map.reshape(shape_out)
+        source_pc = unpack_source_pc_bit_raster(
+            source_pc,
+            cars_dataset.get_attributes_dataframe(cloud)["number_of_pc"],
+        ).reshape((-1,) + shape_out)
+        # cells without any point in their disc are nodata
+        source_pc[:, n_pts == 0] = msk_no_data
 
     # build output dataset
     raster_out = create_raster_dataset(
@@ -822,91 +937,115 @@ def update_weights(old_weights, weights):
 
     new_weights = weights
     if old_weights is not None:
-        current_nan = weights == 0
-        old_nan = old_weights == 0
-        weights[current_nan] = 0
-        old_weights[old_nan] = 0
-        new_weights = old_weights + weights
+        new_weights = np.add(np.reshape(old_weights, weights.shape), weights)
 
     return new_weights
 
 
+# Methods available to merge data in update_data
+MERGE_METHODS = {"basic": 0, "bool": 1, "sum": 2}
+
+
 def update_data(
     old_data, current_data, weights, old_weights, nodata, method="basic"
 ):
     """
     Update current data with old data and weigths
 
+    Merge is done in place in current data when possible, on all bands
+    at once, and current data type is preserved.
+
     :param old_data: old data
     :param current_data: current data
     :param weights: current weights
     :param old_weights: old weights
     :param nodata: nodata associated to tag
+    :param method: merging method: "basic", "bool" or "sum"
 
     :return: updated current data
     """
     new_data = current_data
     if old_data is not None:
-        old_data = np.squeeze(old_data)
-        old_weights = np.squeeze(old_weights)
-        shape = old_data.shape
-        if len(old_data.shape) == 3:
-            old_weights = np.repeat(
-                np.expand_dims(old_weights, axis=0), old_data.shape[0], axis=0
-            )
-
-        current_data = np.squeeze(current_data)
-        weights = np.squeeze(weights)
-        if len(current_data.shape) == 3:
-            weights = np.repeat(
-                np.expand_dims(weights, axis=0), current_data.shape[0], axis=0
-            )
-
-        # compute masks
-        current_valid = weights != 0
-        old_valid = old_weights != 0
-
-        both_valid = np.logical_and(current_valid, old_valid)
-        total_weights = np.zeros(shape)
-        total_weights[both_valid] = (
-            weights[both_valid] + old_weights[both_valid]
-        )
-
-        # current factor
-        current_factor = np.zeros(shape)
-        current_factor[current_valid] = 1
-        current_factor[both_valid] = (
-            weights[both_valid] / total_weights[both_valid]
-        )
-
-        # old factor
-        old_factor = np.zeros(shape)
-        old_factor[old_valid] = 1
-        old_factor[both_valid] = (
-            old_weights[both_valid] / total_weights[both_valid]
+        if method not in MERGE_METHODS:
+            raise RuntimeError("Unknown merging method {}".format(method))
+
+        if nodata is None:
+            nodata = np.nan
+
+        # flatten data as (bands, pixels) arrays, sharing weights
+        nb_pixels = np.size(weights)
+        new_data = np.ascontiguousarray(current_data)
+        if not new_data.flags.writeable:
+            new_data = new_data.copy()
+        new_data = new_data.reshape((-1, nb_pixels))
+
+        merge_data(
+            np.ascontiguousarray(old_data).reshape((-1, nb_pixels)),
+            new_data,
+            np.ravel(weights),
+            np.ravel(old_weights),
+            float(nodata),
+            MERGE_METHODS[method],
+            np.issubdtype(new_data.dtype, np.integer),
         )
+        new_data = new_data.reshape(current_data.shape)
 
-        # assign old weights
-        new_data = np.zeros(shape)
-        if method == "basic":
-            new_data[old_valid] = old_data[old_valid] * old_factor[old_valid]
-            new_data[current_valid] += (
-                current_data[current_valid] * current_factor[current_valid]
-            )
-        elif method == "bool":
-            new_data[old_valid] = old_data[old_valid]
-            new_data[current_valid] = np.logical_or(
-                current_data[current_valid], new_data[current_valid]
-            )
-        elif method == "sum":
-            new_data[old_valid] = old_data[old_valid]
-            new_data[current_valid] += current_data[current_valid]
+    return new_data
 
-        # round result if saved as integer
-        if np.issubdtype(current_data.dtype, np.integer):
-            new_data = np.round(new_data).astype(current_data.dtype)
 
-        # set nodata
-        all_nodata = (current_valid + old_valid) == 0
-        new_data[all_nodata] = nodata
-    return new_data
+@njit(cache=True)
+def merge_data(
+    old_data, current_data, weights, old_weights, nodata, method, round_result
+):
+    """
+    Merge old data in current data, in place, according to weights
+
+    :param old_data: old data, shape (bands, pixels)
+    :type old_data: np ndarray
+    :param current_data: current data, shape (bands, pixels), updated
+    :type current_data: np ndarray
+    :param weights: current weights, shape (pixels)
+    :type weights: np ndarray
+    :param old_weights: old weights, shape (pixels)
+    :type old_weights: np ndarray
+    :param nodata: nodata to set where both weights are null
+    :type nodata: float
+    :param method: merging method, value of MERGE_METHODS
+    :type method: int
+    :param round_result: round result, for integer current data
+    :type round_result: bool
+    """
+    nb_bands, nb_pixels = current_data.shape
+    for pix in range(nb_pixels):
+        current_valid = weights[pix] != 0
+        old_valid = old_weights[pix] != 0
+
+        if not current_valid and not old_valid:
+            for band in range(nb_bands):
+                current_data[band, pix] = nodata
+            continue
+
+        current_factor = 1.0
+        old_factor = 1.0
+        if current_valid and old_valid:
+            total_weights = weights[pix] + old_weights[pix]
+            current_factor = weights[pix] / total_weights
+            old_factor = old_weights[pix] / total_weights
+
+        for band in range(nb_bands):
+            value = 0.0
+            if old_valid:
+                value = old_data[band, pix]
+                if method == 0:
+                    value *= old_factor
+            if current_valid:
+                if method == 0:
+                    value += current_data[band, pix] * current_factor
+                elif method == 1:
+                    if value != 0 or current_data[band, pix] != 0:
+                        value = 1.0
+                else:
+                    value += current_data[band, pix]
+            if round_result:
+                value = np.rint(value)
+            current_data[band, pix] = value
@@ -217,6 +217,7 @@ class SimpleGaussian(
         filling_file_name=None,
         color_dtype=None,
         dump_dir=None,
+        cog=False,
     ):
         """
         Run PointCloudRasterisation application.
@@ -271,6 +272,8 @@ class SimpleGaussian(
         :type color_dtype: str (numpy type)
         :param dump_dir: directory used for outputs with no associated filename
         :type dump_dir: str
+        :param cog: save product rasters as Cloud Optimized GeoTIFF
+        :type cog: bool
 
         :return: raster DSM. CarsDataset contains:
 
@@ -413,6 +416,7 @@ class SimpleGaussian(
                 dtype=np.float32,
                 nodata=self.dsm_no_data,
                 cars_ds_name="dsm",
+                cog=cog and dsm_file_name is not None,
             )
             out_weights_file_name = os.path.join(out_dump_dir, "weights.tif")
             self.orchestrator.add_to_save_lists(
@@ -448,6 +452,7 @@ class SimpleGaussian(
                 dtype=self.color_dtype,
                 nodata=self.color_no_data,
                 cars_ds_name="color",
+                cog=cog and color_file_name is not None,
             )
 
         out_classif_file_name = classif_file_name
@@ -476,6 +481,7 @@ class SimpleGaussian(
                 dtype=np.uint8,
                 nodata=self.msk_no_data,
                 cars_ds_name="dsm_classif",
+                cog=cog and classif_file_name is not None,
                 optional_data=True,
             )
 
@@ -501,6 +507,7 @@ class SimpleGaussian(
                 dtype=np.uint8,
                 nodata=self.msk_no_data,
                 cars_ds_name="dsm_mask",
+                cog=cog and mask_file_name is not None,
                 optional_data=True,
             )
 
@@ -530,6 +537,7 @@ class SimpleGaussian(
                 dtype=np.float32,
                 nodata=self.msk_no_data,
                 cars_ds_name="performance_map",
+                cog=cog and performance_map_file_name is not None,
                 optional_data=True,
             )
 
@@ -557,6 +565,7 @@ class SimpleGaussian(
                 dtype=np.uint8,
                 nodata=self.msk_no_data,
                 cars_ds_name="source_pc",
+                cog=cog and contributing_pair_file_name is not None,
                 optional_data=True,
             )
 
@@ -578,6 +587,7 @@ class SimpleGaussian(
                 dtype=np.uint8,
                 nodata=self.msk_no_data,
                 cars_ds_name="filling",
+                cog=cog and filling_file_name is not None,
                 optional_data=True,
             )
 
@@ -714,6 +724,11 @@ class SimpleGaussian(
         # Get saving infos in order to save tiles when they are computed
         [saving_info] = self.orchestrator.get_saving_infos([terrain_raster])
 
+        # Select layers to rasterize once for all tiles
+        rasterization_plan = rasterization_step.RasterizationPlan(
+            list_computed_layers
+        )
+
         # Generate profile
         geotransform = (
             bounds[0],
@@ -798,7 +813,8 @@ class SimpleGaussian(
                         terrain_raster[
                             row, col
                         ] = self.orchestrator.cluster.create_task(
-                            rasterization_wrapper
+                            rasterization_wrapper,
+                            retry_kwargs={"force_subdivision": True},
                         )(
                             point_clouds[pc_row, pc_col],
                             resolution,
@@ -807,6 +823,7 @@ class SimpleGaussian(
                             window=window,
                             terrain_region=terrain_region,
                             list_computed_layers=list_computed_layers,
+                            rasterization_plan=rasterization_plan,
                             saving_info=full_saving_info,
                             radius=self.dsm_radius,
                             sigma=self.sigma,
@@ -834,7 +851,8 @@ class SimpleGaussian(
                             terrain_raster[
                                 0, ind_tile
                             ] = self.orchestrator.cluster.create_task(
-                                rasterization_wrapper
+                                rasterization_wrapper,
+                                retry_kwargs={"force_subdivision": True},
                             )(
                                 point_cloud[row_pc, col_pc],
                                 resolution,
@@ -844,6 +862,7 @@ class SimpleGaussian(
                                 terrain_region=None,
                                 terrain_full_roi=bounds,
                                 list_computed_layers=list_computed_layers,
+                                rasterization_plan=rasterization_plan,
                                 saving_info=full_saving_info,
                                 radius=self.dsm_radius,
                                 sigma=self.sigma,
@@ -869,6 +888,7 @@ def rasterization_wrapper(
     terrain_region=None,
     terrain_full_roi=None,
     list_computed_layers: List[str] = None,
+    rasterization_plan=None,
     saving_info=None,
     sigma: float = None,
     radius: int = 1,
@@ -877,6 +897,7 @@ def rasterization_wrapper(
     color_dtype: str = "float32",
     msk_no_data: int = 255,
     source_pc_names=None,
+    force_subdivision=False,
 ):
     """
     Wrapper for rasterization step :
@@ -899,6 +920,8 @@ def rasterization_wrapper(
     :type margin: int
     :param  profile: rasterio profile
     :param list_computed_layers: list of computed output data
+    :param rasterization_plan: plan of layers to rasterize
+    :type rasterization_plan: RasterizationPlan
     :type profile: dict
     :param saving_info: information about CarsDataset ID.
     :type saving_info: dict
@@ -910,6 +933,9 @@ def rasterization_wrapper(
     :param msk_no_data: no data value to use in the final mask image
     :param source_pc_names: list of names of point cloud before merging :
         name of sensors pair or name of point cloud file
+    :param force_subdivision: rasterize terrain region as 2x2 sub regions,
+        as done when its task is retried
+    :type force_subdivision: bool
     :return: digital surface model + projected colors
     :rtype: xr.Dataset
     """
@@ -1014,23 +1040,42 @@ def rasterization_wrapper(
 
         window = cars_dataset.window_array_to_dict(window)
 
-    # Call simple_rasterization
-    raster = rasterization_step.simple_rasterization_dataset_wrapper(
-        cloud,
-        resolution,
-        epsg,
-        xstart=xstart,
-        ystart=ystart,
-        xsize=xsize,
-        ysize=ysize,
-        sigma=sigma,
-        radius=radius,
-        dsm_no_data=dsm_no_data,
-        color_no_data=color_no_data,
-        msk_no_data=msk_no_data,
-        list_computed_layers=list_computed_layers,
-        source_pc_names=source_pc_names,
-    )
+    rasterization_kwargs = {
+        "sigma": sigma,
+        "radius": radius,
+        "dsm_no_data": dsm_no_data,
+        "color_no_data": color_no_data,
+        "msk_no_data": msk_no_data,
+        "list_computed_layers": list_computed_layers,
+        "source_pc_names": source_pc_names,
+        "rasterization_plan": rasterization_plan,
+    }
+    if force_subdivision and min(xsize, ysize) >= 2:
+        logging.info(
+            "Terrain region {} is subdivided on retry".format(terrain_region)
+        )
+        raster = compute_subdivided_rasterization(
+            cloud,
+            resolution,
+            epsg,
+            xstart,
+            ystart,
+            xsize,
+            ysize,
+            **rasterization_kwargs,
+        )
+    else:
+        # Call simple_rasterization
+        raster = rasterization_step.simple_rasterization_dataset_wrapper(
+            cloud,
+            resolution,
+            epsg,
+            xstart=xstart,
+            ystart=ystart,
+            xsize=xsize,
+            ysize=ysize,
+            **rasterization_kwargs,
+        )
 
     # Fill raster
     attributes = {"color_type": color_dtype}
@@ -1047,6 +1092,81 @@ def rasterization_wrapper(
     return raster
 
 
+def compute_subdivided_rasterization(
+    cloud,
+    resolution,
+    epsg,
+    xstart,
+    ystart,
+    xsize,
+    ysize,
+    radius: int = 1,
+    **kwargs,
+):
+    """
+    Rasterize terrain region as 2x2 sub regions, each one from the points
+    contributing to its cells, and stitch them back
+
+    :param cloud: combined cloud
+    :type cloud: pandas.DataFrame
+    :param resolution: Produced DSM resolution (meter, degree [EPSG dependent])
+    :type resolution: float
+    :param epsg: epsg code for the CRS of the output DSM
+    :type epsg: int
+    :param xstart: xstart of the rasterization grid
+    :param ystart: ystart of the rasterization grid
+    :param xsize: xsize of the rasterization grid
+    :param ysize: ysize of the rasterization grid
+    :param radius: Radius for hole filling.
+    :param kwargs: other arguments of simple_rasterization_dataset_wrapper
+    :return: digital surface model + projected colors
+    :rtype: xr.Dataset
+    """
+    # points contribute to cells closer than (radius + 0.5) * resolution
+    margin = (radius + 1) * resolution
+    rows = [0, ysize // 2, ysize]
+    cols = [0, xsize // 2, xsize]
+
+    row_rasters = []
+    for row_start, row_end in zip(rows[:-1], rows[1:]):  # noqa: B905
+        sub_rasters = []
+        for col_start, col_end in zip(cols[:-1], cols[1:]):  # noqa: B905
+            sub_xstart = xstart + col_start * resolution
+            sub_ystart = ystart - row_start * resolution
+            in_sub_region = (
+                (cloud["x"] >= sub_xstart - margin)
+                & (cloud["x"] <= xstart + col_end * resolution + margin)
+                & (cloud["y"] <= sub_ystart + margin)
+                & (cloud["y"] >= ystart - row_end * resolution - margin)
+            )
+            sub_cloud = cloud[in_sub_region]
+            if sub_cloud.empty:
+                # any point out of the sub region gives its empty raster
+                sub_cloud = cloud.iloc[:1]
+            sub_rasters.append(
+                rasterization_step.simple_rasterization_dataset_wrapper(
+                    sub_cloud,
+                    resolution,
+                    epsg,
+                    xstart=sub_xstart,
+                    ystart=sub_ystart,
+                    xsize=col_end - col_start,
+                    ysize=row_end - row_start,
+                    radius=radius,
+                    **kwargs,
+                )
+            )
+        row_rasters.append(xarray.concat(sub_rasters, dim=cst.X))
+    raster = xarray.concat(row_rasters, dim=cst.Y)
+
+    # coordinates of the whole region
+    x_values_1d, y_values_1d = rasterization_step.compute_values_1d(
+        xstart, ystart, xsize, ysize, resolution
+    )
+
+    return raster.assign_coords({cst.X: x_values_1d, cst.Y: y_values_1d})
+
+
 def raster_final_function(orchestrator, future_object):
     """
     Apply function to current object, reading already rasterized data
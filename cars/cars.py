@@ -24,7 +24,7 @@ user main argparse wrapper to CARS 3D pipelines submodules
 """
 
 # Standard imports
-# TODO refactor but keep local functions for performance and remove pylint
+# Heavy imports are local to keep the command line interface fast
 # pylint: disable=import-outside-toplevel
 import argparse
 import json
@@ -36,7 +36,6 @@ import warnings
 # CARS imports
 from cars import __version__
 from cars.core import cars_logging
-from cars.orchestrator.cluster import log_wrapper
 
 
 def cars_parser() -> argparse.ArgumentParser:
@@ -52,7 +51,15 @@ def cars_parser() -> argparse.ArgumentParser:
         "cars", description="CARS: CNES Algorithms to Reconstruct Surface"
     )
 
-    parser.add_argument("conf", type=str, help="Inputs Configuration File")
+    parser.add_argument(
+        "conf", type=str, nargs="?", help="Inputs Configuration File"
+    )
+
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Compile CARS numba functions in cache before running workers",
+    )
 
     parser.add_argument(
         "--loglevel",
@@ -80,11 +87,10 @@ def main_cli(args, dry_run=False):  # noqa: C901
     :param dry_run: activate only arguments checking
     """
 
-    # TODO : refactor in order to avoid a slow argparse
-    # Don't move the local function imports for now
+    from cars.orchestrator.cluster import log_wrapper
+    from cars.pipelines.pipeline import Pipeline
 
     # Main try/except to catch all program exceptions
-    from cars.pipelines.pipeline import Pipeline
 
     try:
         # Transform conf file to dict
@@ -161,6 +167,24 @@ def main_cli(args, dry_run=False):  # noqa: C901
         sys.exit(1)
 
 
+def warmup_cli():
+    """
+    Compile CARS numba functions, in the cache used by workers
+    """
+    from cars.core import numba_cache
+
+    cars_logging.setup_logging("PROGRESS")
+    cars_logging.add_progress_message(
+        "Compile numba functions in {}".format(
+            os.environ[numba_cache.NUMBA_CACHE_DIR]
+        )
+    )
+    for name, duration in numba_cache.warmup().items():
+        cars_logging.add_progress_message(
+            "{} ready in {:.2f} s".format(name, duration)
+        )
+
+
 def main():
     """
     Main initial cars cli entry point
@@ -169,6 +193,12 @@ def main():
     # CARS parser
     parser = cars_parser()
     args = parser.parse_args(args=None if sys.argv[1:] else ["--help"])
+    if args.warmup:
+        warmup_cli()
+        if args.conf is None:
+            return
+    elif args.conf is None:
+        parser.error("the following arguments are required: conf")
     main_cli(args)
 
 
@@ -30,13 +30,12 @@ import numpy as np
 import rasterio as rio
 import xarray as xr
 from scipy import interpolate
-from scipy.interpolate import LinearNDInterpolator
 from shapely.geometry import Polygon
 from shareloc import proj_utils
 
 from cars.core import constants as cst
 from cars.core import constants_disparity as cst_disp
-from cars.core import inputs, outputs
+from cars.core import grid_interpolation, inputs, outputs
 from cars.data_structures import cars_dataset
 
 
@@ -416,28 +415,20 @@ class AbstractGeometry(metaclass=ABCMeta):
         sensor_interp_pos = AbstractGeometry.sensor_position_from_grid(
             grid, full_epi_pos
         )
-        interp_row = LinearNDInterpolator(
-            list(
-                zip(  # noqa: B905
-                    sensor_interp_pos[:, 0], sensor_interp_pos[:, 1]
-                )
-            ),
-            epi_grid_row.flatten(),
-        )
-        epi_interp_row = interp_row(
-            sensor_positions[:, 0], sensor_positions[:, 1]
-        )
-
-        interp_col = LinearNDInterpolator(
-            list(
-                zip(  # noqa: B905
-                    sensor_interp_pos[:, 0], sensor_interp_pos[:, 1]
-                )
-            ),
-            epi_grid_col.flatten(),
+        # regular grid of sensor positions, first epipolar coordinate
+        # along columns
+        sensor_interp_grid = np.transpose(
+            sensor_interp_pos.reshape(epi_grid_row.shape + (2,)), (1, 0, 2)
         )
-        epi_interp_col = interp_col(
-            sensor_positions[:, 0], sensor_positions[:, 1]
+        (
+            epi_interp_row,
+            epi_interp_col,
+        ) = grid_interpolation.inverse_bilinear_interpolation(
+            sensor_interp_grid,
+            (0, 0),
+            (step, step),
+            sensor_positions[:, 0],
+            sensor_positions[:, 1],
         )
 
         epipolar_positions = np.stack(
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Grid interpolation module:
+contains functions interpolating values defined on the nodes of a regular
+grid, such as epipolar grids, and inverting such interpolations
+"""
+
+# Standard imports
+from typing import Tuple
+
+# Third party imports
+import numpy as np
+from scipy.ndimage import distance_transform_edt
+
+# Maximum number of Newton iterations of inverse interpolation
+NEWTON_ITERATIONS = 20
+# Convergence of Newton iterations, in grid cells
+NEWTON_TOLERANCE = 1e-6
+
+
+def bilinear_interpolation(
+    grid: np.ndarray,
+    origin: Tuple[float, float],
+    spacing: Tuple[float, float],
+    pos_x: np.ndarray,
+    pos_y: np.ndarray,
+    extrapolate: bool = False,
+) -> np.ndarray:
+    """
+    Interpolate bilinearly the values of a regular grid at given positions.
+    Node [row, col] of grid is at position
+    (origin[0] + col * spacing[0], origin[1] + row * spacing[1]).
+
+    :param grid: values of grid nodes, of shape (nb_rows, nb_cols, nb_values)
+    :param origin: position of first node (x, y)
+    :param spacing: spacing between nodes (x, y)
+    :param pos_x: x positions to interpolate
+    :param pos_y: y positions to interpolate
+    :param extrapolate: extrapolate outside the grid, nan is returned
+        otherwise
+
+    :return: interpolated values, of shape (nb_positions, nb_values)
+    """
+    cols = (np.ravel(pos_x) - origin[0]) / spacing[0]
+    rows = (np.ravel(pos_y) - origin[1]) / spacing[1]
+
+    values, _, _ = interpolate_cells(grid, rows, cols)
+
+    if not extrapolate:
+        values[~is_in_grid(grid, rows, cols)] = np.nan
+
+    return values
+
+
+def inverse_bilinear_interpolation(
+    grid: np.ndarray,
+    origin: Tuple[float, float],
+    spacing: Tuple[float, float],
+    target_x: np.ndarray,
+    target_y: np.ndarray,
+    nb_iterations: int = NEWTON_ITERATIONS,
+    tolerance: float = NEWTON_TOLERANCE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find positions whose bilinear interpolation in grid equals targets,
+    with Newton iterations seeded from a lookup table of grid nodes.
+
+    :param grid: target positions (x, y) of grid nodes,
+        of shape (nb_rows, nb_cols, 2)
+    :param origin: position of first node (x, y)
+    :param spacing: spacing between nodes (x, y)
+    :param target_x: x of targets
+    :param target_y: y of targets
+    :param nb_iterations: maximum number of Newton iterations
+    :param tolerance: convergence of Newton iterations, in grid cells
+
+    :return: x and y positions, nan for targets outside the grid or where
+        iterations did not converge
+    """
+    targets = np.stack((np.ravel(target_x), np.ravel(target_y)), axis=-1)
+    rows, cols = get_lookup_table_seeds(grid, targets[:, 0], targets[:, 1])
+
+    converged = np.zeros(rows.shape, dtype=bool)
+    for _ in range(nb_iterations):
+        values, d_col, d_row = interpolate_cells(grid, rows, cols)
+        residuals = values - targets
+
+        # solve jacobian . delta = residuals
+        determinant = d_col[:, 0] * d_row[:, 1] - d_row[:, 0] * d_col[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta_col = (
+                d_row[:, 1] * residuals[:, 0] - d_row[:, 0] * residuals[:, 1]
+            ) / determinant
+            delta_row = (
+                d_col[:, 0] * residuals[:, 1] - d_col[:, 1] * residuals[:, 0]
+            ) / determinant
+
+        cols -= delta_col
+        rows -= delta_row
+
+        converged = np.maximum(np.abs(delta_col), np.abs(delta_row)) < tolerance
+        if np.all(converged | np.isnan(delta_col) | np.isnan(delta_row)):
+            break
+
+    valid = converged & is_in_grid(grid, rows, cols, margin=tolerance)
+    pos_x = np.where(valid, origin[0] + cols * spacing[0], np.nan)
+    pos_y = np.where(valid, origin[1] + rows * spacing[1], np.nan)
+
+    return pos_x, pos_y
+
+
+def interpolate_cells(
+    grid: np.ndarray, rows: np.ndarray, cols: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Interpolate bilinearly grid at fractional node coordinates, using the
+    nearest cell of the grid for coordinates outside it
+
+    :param grid: values of grid nodes, of shape (nb_rows, nb_cols, nb_values)
+    :param rows: fractional row coordinates
+    :param cols: fractional column coordinates
+
+    :return: values, and their derivatives along columns and rows,
+        each of shape (nb_positions, nb_values)
+    """
+    nb_rows, nb_cols = grid.shape[:2]
+    row_0 = np.clip(np.floor(np.nan_to_num(rows)), 0, nb_rows - 2).astype(int)
+    col_0 = np.clip(np.floor(np.nan_to_num(cols)), 0, nb_cols - 2).astype(int)
+    frac_row = (rows - row_0)[:, np.newaxis]
+    frac_col = (cols - col_0)[:, np.newaxis]
+
+    top_left = grid[row_0, col_0]
+    top_right = grid[row_0, col_0 + 1]
+    bottom_left = grid[row_0 + 1, col_0]
+    bottom_right = grid[row_0 + 1, col_0 + 1]
+
+    top = top_left + frac_col * (top_right - top_left)
+    bottom = bottom_left + frac_col * (bottom_right - bottom_left)
+    values = top + frac_row * (bottom - top)
+
+    d_col = (1 - frac_row) * (top_right - top_left) + frac_row * (
+        bottom_right - bottom_left
+    )
+    d_row = bottom - top
+
+    return values, d_col, d_row
+
+
+def is_in_grid(
+    grid: np.ndarray, rows: np.ndarray, cols: np.ndarray, margin: float = 0
+) -> np.ndarray:
+    """
+    Check fractional node coordinates are inside grid
+
+    :param grid: values of grid nodes, of shape (nb_rows, nb_cols, nb_values)
+    :param rows: fractional row coordinates
+    :param cols: fractional column coordinates
+    :param margin: margin around grid, in grid cells
+
+    :return: mask of coordinates inside grid
+    """
+    nb_rows, nb_cols = grid.shape[:2]
+    with np.errstate(invalid="ignore"):
+        return (
+            (rows >= -margin)
+            & (rows <= nb_rows - 1 + margin)
+            & (cols >= -margin)
+            & (cols <= nb_cols - 1 + margin)
+        )
+
+
+def get_lookup_table_seeds(
+    grid: np.ndarray, target_x: np.ndarray, target_y: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get node coordinates of grid nodes whose values are near targets,
+    using a coarse lookup table of the values of grid nodes
+
+    :param grid: target positions (x, y) of grid nodes,
+        of shape (nb_rows, nb_cols, 2)
+    :param target_x: x of targets
+    :param target_y: y of targets
+
+    :return: row and column coordinates of nodes, nan for nan targets
+    """
+    nb_rows, nb_cols = grid.shape[:2]
+    node_rows, node_cols = np.mgrid[0:nb_rows, 0:nb_cols]
+    node_x = np.ravel(grid[:, :, 0])
+    node_y = np.ravel(grid[:, :, 1])
+    valid_nodes = ~np.isnan(node_x) & ~np.isnan(node_y)
+    node_x = node_x[valid_nodes]
+    node_y = node_y[valid_nodes]
+
+    # lookup table covering the bounding box of node values,
+    # with as many cells as grid
+    x_min, x_max = np.min(node_x), np.max(node_x)
+    y_min, y_max = np.min(node_y), np.max(node_y)
+    scale_x = (nb_cols - 1) / max(x_max - x_min, np.finfo(float).eps)
+    scale_y = (nb_rows - 1) / max(y_max - y_min, np.finfo(float).eps)
+
+    def lookup_cells(pos_x, pos_y):
+        """
+        Get lookup table cells of positions
+        """
+        lut_cols = np.clip(
+            np.round(np.nan_to_num(pos_x - x_min) * scale_x), 0, nb_cols - 1
+        ).astype(int)
+        lut_rows = np.clip(
+            np.round(np.nan_to_num(pos_y - y_min) * scale_y), 0, nb_rows - 1
+        ).astype(int)
+        return lut_rows, lut_cols
+
+    lookup_table = np.full((nb_rows, nb_cols), -1, dtype=int)
+    lookup_table[lookup_cells(node_x, node_y)] = np.flatnonzero(valid_nodes)
+
+    # empty cells get the node of the nearest filled cell
+    _, (nearest_rows, nearest_cols) = distance_transform_edt(
+        lookup_table == -1, return_indices=True
+    )
+    lookup_table = lookup_table[nearest_rows, nearest_cols]
+
+    nodes = lookup_table[lookup_cells(target_x, target_y)]
+    nan_targets = np.isnan(target_x) | np.isnan(target_y)
+    rows = np.where(nan_targets, np.nan, np.ravel(node_rows)[nodes])
+    cols = np.where(nan_targets, np.nan, np.ravel(node_cols)[nodes])
+
+    return rows.astype(float), cols.astype(float)
@@ -28,7 +28,11 @@ import logging
 # Standard imports
 import os
 import warnings
-from typing import Dict, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock, current_thread, local
+from typing import Dict, List, Tuple
 
 # Third party imports
 import fiona
@@ -45,6 +49,18 @@ from shapely.geometry import shape
 # Filter rasterio warning when image is not georeferenced
 warnings.filterwarnings("ignore", category=rio.errors.NotGeoreferencedWarning)
 
+# Metadata of raster files read during the run, by path, modification time
+# and size of file
+RASTER_METADATA = {}
+RASTER_METADATA_LOCK = Lock()
+
+# Raster datasets kept open by each thread of the current process, by path
+OPEN_RASTERS = local()
+MAX_OPEN_RASTERS = 32
+# Open raster datasets of all threads, with their process and thread
+ALL_OPEN_RASTERS = []
+ALL_OPEN_RASTERS_LOCK = Lock()
+
 
 def read_vector(path_to_file):
     """
@@ -119,6 +135,170 @@ def rasterio_get_values(raster_file: str, x_list, y_list, proj_function):
         return z_list[:, 0]
 
 
+def get_raster_metadata_key(raster_file: str):
+    """
+    Get key of raster file in metadata cache, None if the file is not on
+    local disk (GDAL virtual file systems)
+
+    :param raster_file: Image file
+    :return: path, modification time and size of file
+    """
+    try:
+        stat = os.stat(raster_file)
+    except (OSError, TypeError, ValueError):
+        return None
+
+    return (os.path.abspath(raster_file), stat.st_mtime_ns, stat.st_size)
+
+
+def rasterio_get_metadata(raster_file: str) -> Dict:
+    """
+    Get the metadata of an image file, read once per run:
+    size, number of bands, band types, band nbits, transform, crs and bounds
+
+    :param raster_file: Image file
+    :return: The metadata of the given image
+    """
+    key = get_raster_metadata_key(raster_file)
+    with RASTER_METADATA_LOCK:
+        if key is not None and key in RASTER_METADATA:
+            return RASTER_METADATA[key]
+
+    with rio.open(raster_file, "r") as descriptor:
+        nbits = []
+        for bidx in range(1, descriptor.count + 1):
+            img_structure_band = descriptor.tags(
+                ns="IMAGE_STRUCTURE", bidx=bidx
+            )
+            if "NBITS" in img_structure_band:
+                nbits.append(int(img_structure_band["NBITS"]))
+
+        metadata = {
+            "size": (descriptor.width, descriptor.height),
+            "nb_bands": descriptor.count,
+            "dtypes": descriptor.dtypes,
+            "nbits": tuple(nbits),
+            "transform": descriptor.transform,
+            "crs": descriptor.crs,
+            "bounds": tuple(descriptor.bounds),
+            "descriptions": descriptor.descriptions,
+        }
+
+    if key is not None:
+        with RASTER_METADATA_LOCK:
+            RASTER_METADATA[key] = metadata
+
+    return metadata
+
+
+def get_open_rasters() -> OrderedDict:
+    """
+    Get the raster datasets kept open by the current thread, emptied when
+    the process is forked (datasets handles are not shared between processes)
+
+    :return: open datasets and their metadata key, by path, least recently
+        used first
+    """
+    if getattr(OPEN_RASTERS, "pid", None) != os.getpid():
+        OPEN_RASTERS.pid = os.getpid()
+        OPEN_RASTERS.datasets = OrderedDict()
+        with ALL_OPEN_RASTERS_LOCK:
+            ALL_OPEN_RASTERS.append(
+                (os.getpid(), current_thread(), OPEN_RASTERS.datasets)
+            )
+
+    return OPEN_RASTERS.datasets
+
+
+@contextmanager
+def rasterio_open_cached(raster_file: str):
+    """
+    Open an image file for reading, the dataset being kept open by the
+    current thread for the next reads, until the file is modified.
+    Files not on local disk are opened at each call.
+
+    :param raster_file: Image file
+    :return: rasterio dataset, must not be closed by caller
+    """
+    key = get_raster_metadata_key(raster_file)
+    if key is None:
+        with rio.open(raster_file, "r") as descriptor:
+            yield descriptor
+        return
+
+    open_rasters = get_open_rasters()
+    cached_key, descriptor = open_rasters.pop(key[0], (None, None))
+    if cached_key != key:
+        if descriptor is not None:
+            descriptor.close()
+        descriptor = rio.open(raster_file, "r")
+
+    open_rasters[key[0]] = (key, descriptor)
+    while len(open_rasters) > MAX_OPEN_RASTERS:
+        _, (_, oldest_descriptor) = open_rasters.popitem(last=False)
+        oldest_descriptor.close()
+
+    yield descriptor
+
+
+def close_cached_rasters(ended_threads=False):
+    """
+    Close the raster datasets kept open by the current thread
+
+    :param ended_threads: also close the datasets of the threads of the
+        process that ended
+    """
+    open_rasters_list = [get_open_rasters()]
+    if ended_threads:
+        with ALL_OPEN_RASTERS_LOCK:
+            running = []
+            for pid, thread, open_rasters in ALL_OPEN_RASTERS:
+                if pid != os.getpid():
+                    continue
+                if thread.is_alive():
+                    running.append((pid, thread, open_rasters))
+                else:
+                    open_rasters_list.append(open_rasters)
+            ALL_OPEN_RASTERS[:] = running
+
+    for open_rasters in open_rasters_list:
+        while len(open_rasters) > 0:
+            _, (_, descriptor) = open_rasters.popitem()
+            descriptor.close()
+
+
+def prefetch_rasters_metadata(raster_files: List[str]):
+    """
+    Read the metadata of image files in parallel threads, each file being
+    opened once, and keep it for the run
+
+    :param raster_files: Image files, None values are ignored
+    """
+    raster_files = list(
+        dict.fromkeys(
+            raster_file
+            for raster_file in raster_files
+            if raster_file is not None
+        )
+    )
+    if len(raster_files) == 0:
+        return
+
+    def prefetch(raster_file):
+        """
+        Read metadata of image file, errors are raised by later checks
+        """
+        try:
+            rasterio_get_metadata(raster_file)
+        except Exception as read_error:  # pylint: disable=broad-except
+            logging.debug(
+                "Impossible to read file {}: {}".format(raster_file, read_error)
+            )
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(prefetch, raster_files))
+
+
 def rasterio_get_nb_bands(raster_file: str) -> int:
     """
     Get the number of bands in an image file
@@ -126,8 +306,7 @@ def rasterio_get_nb_bands(raster_file: str) -> int:
     :param raster_file: Image file
     :return: The number of bands
     """
-    with rio.open(raster_file, "r") as descriptor:
-        return descriptor.count
+    return rasterio_get_metadata(raster_file)["nb_bands"]
 
 
 def rasterio_get_image_type(raster_file: str) -> list:
@@ -138,9 +317,7 @@ def rasterio_get_image_type(raster_file: str) -> list:
     :return: The image type
     """
 
-    image_types = None
-    with rio.open(raster_file, "r") as descriptor:
-        image_types = descriptor.dtypes
+    image_types = rasterio_get_metadata(raster_file)["dtypes"]
 
     # Check if each color bands have the same type
     image_type_set = set(image_types)
@@ -159,16 +336,7 @@ def rasterio_get_nbits(raster_file):
     :param raster_file: Image file
     :return: The band nbits list
     """
-    nbits = []
-    with rio.open(raster_file, "r") as descriptor:
-        for bidx in range(1, descriptor.count + 1):
-            img_structurre_band = descriptor.tags(
-                ns="IMAGE_STRUCTURE", bidx=bidx
-            )
-            if "NBITS" in img_structurre_band:
-                nbits.append(int(img_structurre_band["NBITS"]))
-
-    return nbits
+    return list(rasterio_get_metadata(raster_file)["nbits"])
 
 
 def rasterio_get_size(raster_file: str) -> Tuple[int, int]:
@@ -178,8 +346,7 @@ def rasterio_get_size(raster_file: str) -> Tuple[int, int]:
     :param raster_file: Image file
     :return: The size (width, height)
     """
-    with rio.open(raster_file, "r") as descriptor:
-        return (descriptor.width, descriptor.height)
+    return rasterio_get_metadata(raster_file)["size"]
 
 
 def rasterio_get_pixel_points(raster_file: str, terrain_points) -> list:
@@ -218,8 +385,7 @@ def rasterio_get_bounds(
 
     # get sign of resolution
     if apply_resolution_sign:
-        profile = rasterio_get_profile(raster_file)
-        transform = list(profile["transform"])
+        transform = list(rasterio_get_metadata(raster_file)["transform"])
         res_x = transform[0]
         res_y = transform[4]
         res_x /= abs(res_x)
@@ -228,8 +394,7 @@ def rasterio_get_bounds(
     else:
         res_signs = np.array([1, 1, 1, 1])
 
-    with rio.open(raster_file, "r") as descriptor:
-        return np.array(list(descriptor.bounds)) * res_signs
+    return np.array(rasterio_get_metadata(raster_file)["bounds"]) * res_signs
 
 
 def rasterio_get_epsg_code(
@@ -242,9 +407,7 @@ def rasterio_get_epsg_code(
     :return: epsg code
     """
 
-    with rio.open(raster_file, "r") as descriptor:
-        epsg_code = descriptor.crs
-        return epsg_code
+    return rasterio_get_metadata(raster_file)["crs"]
 
 
 def rasterio_get_list_min_max(raster_file: str) -> Tuple[int, int]:
@@ -301,8 +464,7 @@ def rasterio_get_transform(raster_file: str) -> Dict:
     :param raster_file: Image file
     :return: The transform of the given image
     """
-    with rio.open(raster_file, "r") as descriptor:
-        return descriptor.transform
+    return rasterio_get_metadata(raster_file)["transform"]
 
 
 def rasterio_get_epsg(raster_file: str) -> int:
@@ -312,11 +474,7 @@ def rasterio_get_epsg(raster_file: str) -> int:
     :param raster_file: Image file
     :return: The epsg of the given image
     """
-    epsg = None
-    with rio.open(raster_file, "r") as descriptor:
-        epsg = descriptor.crs.to_epsg()
-
-    return epsg
+    return rasterio_get_metadata(raster_file)["crs"].to_epsg()
 
 
 def rasterio_transform_epsg(file_name, new_epsg):
@@ -421,5 +579,4 @@ def get_descriptions_bands(raster_file: str) -> Dict:
     :param raster_file: Image file
     :return: The descriptions list of the given image
     """
-    with rio.open(raster_file, "r") as descriptor:
-        return descriptor.descriptions
+    return rasterio_get_metadata(raster_file)["descriptions"]
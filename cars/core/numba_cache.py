@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Numba cache module:
+contains functions managing the on-disk cache of compiled numba functions,
+and compiling CARS numba functions ahead of time
+"""
+
+# Standard imports
+import logging
+import os
+import platform
+import re
+import sys
+import time
+
+# Environment variable of numba cache directory
+NUMBA_CACHE_DIR = "NUMBA_CACHE_DIR"
+
+
+def get_cpu_name() -> str:
+    """
+    Get name of CPU model
+
+    :return: CPU name
+    """
+    cpu_name = None
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", encoding="utf-8") as cpu_info:
+            for line in cpu_info:
+                if line.startswith("model name"):
+                    cpu_name = line.split(":", 1)[1].strip()
+                    break
+
+    return cpu_name or platform.processor() or platform.machine()
+
+
+def get_numba_cache_dir(version: str) -> str:
+    """
+    Get numba cache directory of CARS version and CPU, in user cache
+
+    :param version: CARS version
+
+    :return: cache directory
+    """
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    cache_name = re.sub(
+        r"[^A-Za-z0-9_.-]+", "_", "{}-{}".format(version, get_cpu_name())
+    )
+
+    return os.path.join(cache_home, "cars", "numba", cache_name)
+
+
+def setup_numba_cache(version: str) -> str:
+    """
+    Set numba cache directory, unless already set by user.
+    numba reads its environment when imported: if numba is already
+    imported, its configuration is updated, for functions compiled after
+
+    :param version: CARS version
+
+    :return: cache directory
+    """
+    if not os.environ.get(NUMBA_CACHE_DIR):
+        os.environ[NUMBA_CACHE_DIR] = get_numba_cache_dir(version)
+
+    numba_config = getattr(sys.modules.get("numba"), "config", None)
+    if (
+        numba_config is not None
+        and numba_config.CACHE_DIR != os.environ[NUMBA_CACHE_DIR]
+    ):
+        logging.debug(
+            "numba imported before CARS: numba functions already "
+            "defined are not cached in {}".format(os.environ[NUMBA_CACHE_DIR])
+        )
+        numba_config.CACHE_DIR = os.environ[NUMBA_CACHE_DIR]
+
+    return os.environ[NUMBA_CACHE_DIR]
+
+
+def warmup() -> dict:
+    """
+    Run CARS numba functions on small inputs, with the types used by
+    pipelines: they are compiled and stored in cache, or loaded from cache
+
+    :return: duration of each function first run, in seconds
+    """
+    # Import applications only when warming up
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+
+    from cars.applications.dense_match_filling import fill_disp_tools
+    from cars.applications.dense_matching import dense_matching_tools
+    from cars.applications.rasterization import rasterization_tools
+
+    classif = np.zeros((1, 4, 4), dtype=bool)
+    mask = np.zeros((4, 4), dtype=bool)
+    disp = np.zeros((4, 4), dtype=np.float32)
+    disp_range = np.zeros((4, 4), dtype=np.int16)
+    weights = np.ones(16, dtype=np.float64)
+
+    functions = [
+        (
+            dense_matching_tools.estimate_right_grid_disp,
+            [(disp_range.astype(np.float64), disp_range.astype(np.float64))],
+        ),
+        (
+            dense_matching_tools.mask_left_classif_from_right_mask,
+            [(classif, mask, disp_range, disp_range)],
+        ),
+        (
+            dense_matching_tools.estimate_right_classif_on_left,
+            [(classif, disp, mask, 0, 1)],
+        ),
+        (fill_disp_tools.fill_disp_pandora, [(disp, mask, 8)]),
+        (
+            rasterization_tools.merge_data,
+            [
+                (
+                    np.zeros((1, 16), dtype=dtype),
+                    np.zeros((1, 16), dtype=dtype),
+                    weights,
+                    weights,
+                    0.0,
+                    0,
+                    np.issubdtype(dtype, np.integer),
+                )
+                for dtype in [np.float32, np.float64, np.uint8, np.uint16]
+            ],
+        ),
+    ]
+
+    durations = {}
+    for function, args_list in functions:
+        start_time = time.time()
+        for args in args_list:
+            try:
+                function(*args)
+            except Exception as exc:  # pylint: disable=broad-except
+                logging.warning(
+                    "Warmup of {} failed: {}".format(function.__name__, exc)
+                )
+        durations[function.__name__] = time.time() - start_time
+
+    return durations
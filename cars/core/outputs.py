@@ -22,7 +22,10 @@
 Outputs module:
 contains some CARS global shared general purpose output functions
 """
+
 # Standard imports
+import os
+import shutil
 from typing import Union
 
 # Third party imports
@@ -32,7 +35,9 @@ import pandas
 import rasterio as rio
 import xarray as xr
 from fiona.crs import from_epsg  # pylint: disable=no-name-in-module
+from rasterio.enums import Resampling
 from rasterio.profiles import DefaultGTiffProfile
+from rasterio.windows import Window
 from shapely.geometry import mapping
 
 # CARS imports
@@ -164,3 +169,285 @@ def rasterio_write_georaster(
 
         with rio.open(raster_file, "w", **profile) as new_descriptor:
             write_data(data, window=window, descriptor=new_descriptor)
+
+
+# Internal block size of Cloud Optimized GeoTIFF
+COG_BLOCKSIZE = 512
+
+
+def open_georaster_writer(
+    raster_file: str, profile: dict, cog=False, descriptions=None
+):
+    """
+    Open a raster file for writing, as a Cloud Optimized GeoTIFF if asked
+
+    :param raster_file: Image file
+    :param profile: rasterio profile
+    :param cog: write a Cloud Optimized GeoTIFF
+    :param descriptions: bands descriptions
+    :return: rasterio dataset or COGWriter
+    """
+    if cog:
+        return COGWriter(raster_file, profile, descriptions=descriptions)
+    descriptor = rio.open(raster_file, "w", **profile)
+    if descriptions is not None:
+        for idx, description in enumerate(descriptions):
+            descriptor.set_band_description(idx + 1, description)
+    return descriptor
+
+
+class COGWriter:
+    """
+    COGWriter
+
+    Write a Cloud Optimized GeoTIFF tile by tile, through the rasterio
+    dataset interface used by CARS savers.
+
+    The COG layout is reserved at creation: the full resolution IFD comes
+    first, followed by internal overviews IFDs, then by uncompressed
+    overviews blocks, smallest overview first. Full resolution blocks,
+    with the profile compression, are written after them. Each overview
+    level is updated in a temporary file from the written window, with
+    nearest sampling, as soon as tiles are written. At close, overview
+    levels are copied in place of their reserved blocks: the full
+    resolution raster is never read back.
+
+    Bands descriptions must be given at creation: changing them afterwards
+    moves the full resolution IFD at the end of the file, which is still a
+    valid tiled GeoTIFF with internal overviews, but not a COG anymore.
+    """
+
+    def __init__(
+        self,
+        raster_file: str,
+        profile: dict,
+        blocksize: int = COG_BLOCKSIZE,
+        descriptions=None,
+    ):
+        """
+        Init function of COGWriter
+
+        :param raster_file: Cloud Optimized GeoTIFF file to create
+        :param profile: rasterio profile
+        :param blocksize: size of internal blocks, power of 2
+        :param descriptions: bands descriptions
+        """
+        self.raster_file = raster_file
+        self.blocksize = blocksize
+        self.tmp_dir = raster_file + ".cog_tmp"
+        if not os.path.exists(self.tmp_dir):
+            os.makedirs(self.tmp_dir)
+
+        profile = dict(profile)
+        profile.update(
+            {
+                "driver": "GTiff",
+                "tiled": True,
+                "blockxsize": blocksize,
+                "blockysize": blocksize,
+            }
+        )
+        profile.pop("BIGTIFF", None)
+        self.profile = profile
+
+        # overview levels, until the overview fits in one block
+        factors = []
+        factor = 2
+        while max(profile["height"], profile["width"]) * 2 / factor > (
+            blocksize
+        ):
+            factors.append(factor)
+            factor *= 2
+
+        # temporary overview files, uncompressed as they are updated
+        # by windows not aligned with their blocks
+        overview_base_profile = dict(profile)
+        for option in ["compress", "interleave"]:
+            overview_base_profile.pop(option, None)
+        self.overviews = []
+        for factor in factors:
+            overview_profile = dict(overview_base_profile)
+            overview_profile["height"] = -(-profile["height"] // factor)
+            overview_profile["width"] = -(-profile["width"] // factor)
+            overview_profile["transform"] = profile[
+                "transform"
+            ] * rio.Affine.scale(factor)
+            self.overviews.append(
+                (
+                    factor,
+                    rio.open(
+                        os.path.join(
+                            self.tmp_dir, "overview_{}.tif".format(factor)
+                        ),
+                        "w+",
+                        **overview_profile,
+                    ),
+                )
+            )
+
+        # IFDs are written at creation, without any block
+        with rio.Env(
+            SPARSE_OK_OVERVIEW=True,
+            GDAL_TIFF_OVR_BLOCKSIZE=blocksize,
+            COMPRESS_OVERVIEW="NONE",
+        ), rio.open(
+            raster_file,
+            "w",
+            **profile,
+            BIGTIFF="IF_SAFER",
+            SPARSE_OK=True,
+        ) as descriptor:
+            if descriptions is not None:
+                for idx, description in enumerate(descriptions):
+                    if description is not None:
+                        descriptor.set_band_description(
+                            idx + 1, str(description)
+                        )
+            if len(factors) > 0:
+                descriptor.build_overviews(factors, Resampling.nearest)
+
+        # uncompressed overviews blocks are reserved, smallest first, so
+        # that they are filled in place at close
+        nodata = profile.get("nodata")
+        for level in reversed(range(len(factors))):
+            with rio.open(
+                raster_file, "r+", overview_level=level
+            ) as out_overview:
+                for _, window in out_overview.block_windows(1):
+                    out_overview.write(
+                        np.full(
+                            (profile["count"], window.height, window.width),
+                            0 if nodata is None else nodata,
+                            dtype=profile["dtype"],
+                        ),
+                        window=window,
+                    )
+
+        # full resolution blocks are written after overviews blocks
+        self.descriptor = rio.open(raster_file, "r+")
+
+    def __getattr__(self, name):
+        """
+        Get other attributes from full resolution dataset
+        """
+        # descriptor is not set until init opened it
+        if name == "descriptor":
+            raise AttributeError(name)
+        return getattr(self.descriptor, name)
+
+    def __enter__(self):
+        """
+        Enter context manager
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback_msg):
+        """
+        Exit context manager: assemble the COG
+        """
+        self.close()
+
+    def set_band_description(self, bidx: int, value: str):
+        """
+        Set band description
+
+        :param bidx: band index, starting at 1
+        :param value: description
+        """
+        # setting the same description keeps the IFD in place
+        if self.descriptor.descriptions[bidx - 1] != value:
+            self.descriptor.set_band_description(bidx, value)
+
+    def write(self, data: np.ndarray, indexes=None, window: Window = None):
+        """
+        Write data in full resolution raster and update overviews
+
+        :param data: data to write, 2D if indexes is an int, 3D otherwise
+        :param indexes: band indexes, starting at 1, all bands if None
+        :param window: window to write, whole raster if None
+        """
+        self.descriptor.write(data, indexes=indexes, window=window)
+
+        if indexes is None:
+            indexes = list(range(1, self.profile["count"] + 1))
+        if isinstance(indexes, int):
+            indexes = [indexes]
+            data = data[np.newaxis, ...]
+        if window is None:
+            window = Window(0, 0, self.profile["width"], self.profile["height"])
+
+        for factor, overview in self.overviews:
+            # overview pixel i is the full resolution pixel i * f + f // 2
+            row_start, row_stop = self.overview_range(
+                window.row_off, window.height, factor, overview.height
+            )
+            col_start, col_stop = self.overview_range(
+                window.col_off, window.width, factor, overview.width
+            )
+            if row_start >= row_stop or col_start >= col_stop:
+                continue
+            first_row = row_start * factor + factor // 2 - window.row_off
+            first_col = col_start * factor + factor // 2 - window.col_off
+            overview.write(
+                data[
+                    :,
+                    first_row : first_row + (row_stop - row_start) * factor,
+                    first_col : first_col + (col_stop - col_start) * factor,
+                ][:, ::factor, ::factor],
+                indexes=indexes,
+                window=Window(
+                    col_start,
+                    row_start,
+                    col_stop - col_start,
+                    row_stop - row_start,
+                ),
+            )
+
+    def write_band(self, bidx: int, data: np.ndarray, window: Window = None):
+        """
+        Write one band
+
+        :param bidx: band index, starting at 1
+        :param data: 2D data to write
+        :param window: window to write, whole raster if None
+        """
+        self.write(data, indexes=bidx, window=window)
+
+    @staticmethod
+    def overview_range(offset, size, factor, overview_size):
+        """
+        Get overview pixels sampled in [offset, offset + size[
+
+        :return: start and stop of overview pixels
+        """
+        start = max(0, -(-(int(offset) - factor // 2) // factor))
+        stop = min(
+            overview_size, -(-(int(offset + size) - factor // 2) // factor)
+        )
+        return start, stop
+
+    def close(self):
+        """
+        Close full resolution raster and copy overview levels in its
+        internal overviews
+        """
+        if self.descriptor.closed:
+            return
+
+        try:
+            self.descriptor.close()
+            for _, overview in self.overviews:
+                overview.close()
+
+            for level, (_, overview) in enumerate(self.overviews):
+                with rio.open(overview.name) as in_overview, rio.open(
+                    self.raster_file, "r+", overview_level=level
+                ) as out_overview:
+                    for _, window in out_overview.block_windows(1):
+                        out_overview.write(
+                            in_overview.read(window=window), window=window
+                        )
+        finally:
+            for _, overview in self.overviews:
+                overview.close()
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
@@ -734,6 +734,196 @@ def get_corresponding_tiles_row_col(
     )
 
 
+def get_corresponding_tiles(
+    terrain_tiling_grid: np.ndarray,
+    list_point_clouds: list,
+    list_epipolar_points_min: list,
+    list_epipolar_points_max: list,
+) -> Tuple[np.ndarray, List]:
+    """
+    This function allows to get required point clouds for all terrain
+    regions at once, with the same result as get_corresponding_tiles_row_col
+    called for each terrain tile.
+
+    Epipolar regions of all terrain tiles are computed with array
+    operations, then candidate epipolar tiles are the valid epipolar tile
+    indices lying in the [min, max) index interval of each epipolar region.
+
+    :param terrain_tiling_grid: terrain grid positions
+    :param list_point_clouds: list of epipolar point clouds
+    :param list_epipolar_points_min: list of epipolar points min, for each
+        terrain grid position
+    :param list_epipolar_points_max: list of epipolar points max, for each
+        terrain grid position
+
+    :return: Terrain regions grid (N, M, 4), with [xmin, ymin, xmax, ymax]
+             Corresponding tiles selected from delayed_point_clouds with
+             associated id, as a list of lists
+    """
+
+    # Terrain grid [row, j, :] = [xmin, xmax, ymin, ymax]
+    # terrain region = [xmin, ymin, xmax, ymax]
+    terrain_regions = terrain_tiling_grid[:, :, [0, 2, 1, 3]]
+
+    nb_rows, nb_cols = terrain_tiling_grid.shape[:2]
+    required_point_clouds = [
+        [[] for _ in range(nb_cols)] for _ in range(nb_rows)
+    ]
+
+    # For each stereo configuration
+    for pc_id, (
+        point_cloud,
+        epipolar_points_min,
+        epipolar_points_max,
+    ) in enumerate(
+        zip(  # noqa: B905
+            list_point_clouds,
+            list_epipolar_points_min,
+            list_epipolar_points_max,
+        )
+    ):
+        largest_epipolar_region = point_cloud.attributes[
+            "largest_epipolar_region"
+        ]
+        opt_epipolar_tile_size = point_cloud.attributes[
+            "opt_epipolar_tile_size"
+        ]
+        epi_grid_shape = point_cloud.tiling_grid.shape
+
+        epipolar_regions = get_epipolar_regions(
+            epipolar_points_min, epipolar_points_max, largest_epipolar_region
+        )
+
+        # Tiles covered by epipolar regions, including one tile margin,
+        # as in list_tiles
+        min_tile_idx = (
+            np.floor(
+                epipolar_regions[:, :, :2] / opt_epipolar_tile_size
+            ).astype(int)
+            - 1
+        )
+        max_tile_idx = (
+            np.ceil(epipolar_regions[:, :, 2:] / opt_epipolar_tile_size).astype(
+                int
+            )
+            + 1
+        )
+
+        # Valid epipolar tile indices along x and y, and position of
+        # index intervals in them
+        valid_idx_x = get_valid_tile_indices(
+            largest_epipolar_region[0],
+            largest_epipolar_region[2],
+            opt_epipolar_tile_size,
+            epi_grid_shape[1],
+        )
+        valid_idx_y = get_valid_tile_indices(
+            largest_epipolar_region[1],
+            largest_epipolar_region[3],
+            opt_epipolar_tile_size,
+            epi_grid_shape[0],
+        )
+        start_x = np.searchsorted(valid_idx_x, min_tile_idx[:, :, 0])
+        end_x = np.searchsorted(valid_idx_x, max_tile_idx[:, :, 0])
+        start_y = np.searchsorted(valid_idx_y, min_tile_idx[:, :, 1])
+        end_y = np.searchsorted(valid_idx_y, max_tile_idx[:, :, 1])
+
+        # Check if the epipolar regions contain any pixels to process
+        not_empty = np.logical_not(
+            np.logical_or(
+                epipolar_regions[:, :, 0] >= epipolar_regions[:, :, 2],
+                epipolar_regions[:, :, 1] >= epipolar_regions[:, :, 3],
+            )
+        )
+
+        for row, col in zip(*np.nonzero(not_empty)):  # noqa: B905
+            ids_x = valid_idx_x[start_x[row, col] : end_x[row, col]].tolist()
+            ids_y = valid_idx_y[start_y[row, col] : end_y[row, col]].tolist()
+            required_point_clouds[row][col].extend(
+                (point_cloud.tiles[id_y][id_x], pc_id)
+                for id_x in ids_x
+                for id_y in ids_y
+            )
+
+    return terrain_regions, required_point_clouds
+
+
+def get_epipolar_regions(
+    epipolar_points_min: np.ndarray,
+    epipolar_points_max: np.ndarray,
+    largest_epipolar_region: list,
+) -> np.ndarray:
+    """
+    Get epipolar regions corresponding to all terrain tiles, cropped
+    to largest epipolar region
+
+    :param epipolar_points_min: epipolar points min, for each
+        terrain grid position (transposed terrain grid)
+    :param epipolar_points_max: epipolar points max, for each
+        terrain grid position (transposed terrain grid)
+    :param largest_epipolar_region: largest epipolar region
+        [xmin, ymin, xmax, ymax]
+
+    :return: epipolar regions grid (N, M, 4), with [xmin, ymin, xmax, ymax]
+    """
+
+    # Epipolar points of the four corners of terrain tiles
+    corners = np.stack(
+        [
+            points[row_slice, col_slice]
+            for points in (epipolar_points_min, epipolar_points_max)
+            for row_slice, col_slice in (
+                (slice(None, -1), slice(None, -1)),
+                (slice(1, None), slice(None, -1)),
+                (slice(1, None), slice(1, None)),
+                (slice(None, -1), slice(1, None)),
+            )
+        ],
+        axis=0,
+    )
+
+    # Bounding region of corresponding cells, in terrain tiles order
+    epipolar_regions = np.concatenate(
+        (np.min(corners, axis=0), np.max(corners, axis=0)), axis=-1
+    ).transpose(1, 0, 2)
+
+    # Crop epipolar regions to largest region, as in crop
+    for idx in range(4):
+        epipolar_regions[:, :, idx] = np.fmin(
+            largest_epipolar_region[2 + idx % 2],
+            np.fmax(
+                largest_epipolar_region[idx % 2],
+                epipolar_regions[:, :, idx],
+            ),
+        )
+
+    return epipolar_regions
+
+
+def get_valid_tile_indices(
+    region_min: float, region_max: float, tile_size: int, nb_tiles: int
+) -> np.ndarray:
+    """
+    Get indices of tiles in tiling grid that are not empty once cropped
+    to region, along one axis
+
+    :param region_min: region min
+    :param region_max: region max
+    :param tile_size: tile size
+    :param nb_tiles: number of tiles in tiling grid
+
+    :return: sorted valid indices
+    """
+
+    indices = np.arange(nb_tiles)
+    tile_min = np.fmin(region_max, np.fmax(region_min, indices * tile_size))
+    tile_max = np.fmin(
+        region_max, np.fmax(region_min, (indices + 1) * tile_size)
+    )
+
+    return indices[tile_min < tile_max]
+
+
 def get_paired_regions_as_geodict(
     terrain_regions: List, epipolar_regions: List
 ) -> Tuple[Dict, Dict]:
@@ -435,7 +435,13 @@ class CarsDataset:
             self.tiles.append(tiles_row)
 
     def generate_descriptor(
-        self, future_result, file_name, tag=None, dtype=None, nodata=None
+        self,
+        future_result,
+        file_name,
+        tag=None,
+        dtype=None,
+        nodata=None,
+        cog=False,
     ):
         """
         Generate de rasterio descriptor for the given future result
@@ -452,27 +458,33 @@ class CarsDataset:
         :type dtype: str
         :param nodata: no data value
         :type nodata: float
+        :param cog: save as Cloud Optimized GeoTIFF
+        :type cog: bool
         """
 
         # Get profile from 1st finished future
-        new_profile = get_profile_for_tag_dataset(future_result, tag)
+        new_profile = generate_raster_profile(
+            future_result,
+            tag,
+            dtype,
+            nodata,
+            (
+                np.max(self.tiling_grid[:, :, 1]),
+                np.max(self.tiling_grid[:, :, 3]),
+            ),
+        )
 
-        if "width" not in new_profile or "height" not in new_profile:
-            logging.debug(
-                "CarsDataset doesn't have a profile, default is given"
+        if cog:
+            # overviews are updated tile by tile, COG is assembled at close
+            descriptor = outputs.COGWriter(
+                file_name,
+                new_profile,
+                descriptions=get_bands_description(future_result, tag),
+            )
+        else:
+            descriptor = rio.open(
+                file_name, "w+", **new_profile, BIGTIFF="IF_SAFER"
             )
-            new_profile = DefaultGTiffProfile(count=new_profile["count"])
-            new_profile["height"] = np.max(self.tiling_grid[:, :, 1])
-            new_profile["width"] = np.max(self.tiling_grid[:, :, 3])
-
-        # Change dtype
-        new_profile["dtype"] = dtype
-        if nodata is not None:
-            new_profile["nodata"] = nodata
-
-        descriptor = rio.open(
-            file_name, "w+", **new_profile, BIGTIFF="IF_SAFER"
-        )
 
         return descriptor
 
@@ -555,6 +567,42 @@ class CarsDataset:
             self.tiles.append(tiles_row)
 
 
+def generate_raster_profile(future_result, tag, dtype, nodata, default_shape):
+    """
+    Generate the rasterio profile of the file saving a tag of future results
+
+    :param future_result: Future result
+    :type future_result: xr.Dataset
+    :param tag: tag to save
+    :type tag: str
+    :param dtype: dtype
+    :type dtype: str
+    :param nodata: no data value
+    :type nodata: float
+    :param default_shape: raster (height, width), if future result
+        doesn't have a profile
+    :type default_shape: tuple(int)
+
+    :return: rasterio profile
+    :rtype: dict
+    """
+
+    new_profile = get_profile_for_tag_dataset(future_result, tag)
+
+    if "width" not in new_profile or "height" not in new_profile:
+        logging.debug("CarsDataset doesn't have a profile, default is given")
+        new_profile = DefaultGTiffProfile(count=new_profile["count"])
+        new_profile["height"] = default_shape[0]
+        new_profile["width"] = default_shape[1]
+
+    # Change dtype
+    new_profile["dtype"] = dtype
+    if nodata is not None:
+        new_profile["nodata"] = nodata
+
+    return new_profile
+
+
 def run_save_arrays(future_result, file_name, tag=None, descriptor=None):
     """
     Save future when arrived
@@ -1127,6 +1175,26 @@ def save_dataset(
         new_profile["width"] = data.shape[1]
         new_profile["dtype"] = "float32"
 
+    outputs.rasterio_write_georaster(
+        file_name,
+        data,
+        new_profile,
+        window=rio_window,
+        descriptor=descriptor,
+        bands_description=get_bands_description(dataset, tag),
+    )
+
+
+def get_bands_description(dataset, tag):
+    """
+    Get bands descriptions of given tag in dataset
+
+    :param dataset: dataset
+    :type dataset: xr.Dataset
+    :param tag: tag
+    :type tag: str
+    :return: bands descriptions, None if bands are not described
+    """
     bands_description = None
     if tag in (cst.EPI_CLASSIFICATION, cst.RASTER_CLASSIF):
         bands_description = dataset.coords[cst.BAND_CLASSIF].values
@@ -1137,14 +1205,7 @@ def save_dataset(
     if tag in (cst.EPI_FILLING, cst.RASTER_FILLING):
         bands_description = dataset.coords[cst.BAND_FILLING].values
 
-    outputs.rasterio_write_georaster(
-        file_name,
-        data,
-        new_profile,
-        window=rio_window,
-        descriptor=descriptor,
-        bands_description=bands_description,
-    )
+    return bands_description
 
 
 def create_tile_path(col: int, row: int, directory: str) -> str:
@@ -22,7 +22,6 @@
 Contains functions for array reconstructions and crop for multiple tiles
 """
 
-
 # Third party imports
 import numpy as np
 import xarray as xr
@@ -188,6 +187,34 @@ def reconstruct_data(tiles, window, overlap):  # noqa: C901
     return new_dataset, row_min - ol_row_min, col_min - ol_col_min
 
 
+def split_window(window):
+    """
+    Split window in 2x2 sub windows, sharing the base tile borders
+
+    :param window: window of base tile [row min, row max, col min col max]
+    :type window: list
+
+    :return: sub windows, row by row
+    :rtype: list(list)
+
+    """
+    row_min, row_max, col_min, col_max = [int(value) for value in window]
+    row_middle = (row_min + row_max) // 2
+    col_middle = (col_min + col_max) // 2
+
+    return [
+        [sub_row_min, sub_row_max, sub_col_min, sub_col_max]
+        for sub_row_min, sub_row_max in [
+            (row_min, row_middle),
+            (row_middle, row_max),
+        ]
+        for sub_col_min, sub_col_max in [
+            (col_min, col_middle),
+            (col_middle, col_max),
+        ]
+    ]
+
+
 def find_tile_dataset(corresponding_tiles, window):
     """
     Find the dataset corresponding to window, in the list of tiles.
@@ -21,8 +21,14 @@
 """
 Contains function to convert the point cloud dataframe to laz format:
 """
+
+import json
 import logging
+import os
+import shutil
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import laspy
 import laspy.file
@@ -32,6 +38,9 @@ from pyproj import CRS
 
 import cars.core.constants as cst
 
+# Number of points written at once in laz files
+LAZ_CHUNK_SIZE = 1000000
+
 
 def convert_pcl_to_laz(point_clouds, output_filename: str):
     """
@@ -157,29 +166,189 @@ def generate_prj_file(output_filename, epsg):
 
 
 def generate_laz(
-    output_filename, coordinates, las_color, arrays_pcl, arrays_color
+    output_filename,
+    coordinates,
+    las_color,
+    arrays_pcl,
+    arrays_color,
+    chunk_size=LAZ_CHUNK_SIZE,
 ):
     """
     Generate laz file from location and color arrays
+
+    Points are appended by chunks of chunk_size points, so that only one
+    chunk of las points is allocated at a time.
     """
     # Create laz image
     header = laspy.LasHeader(point_format=2)
     scale_factor = 0.01
     header.scales = [scale_factor, scale_factor, scale_factor]
-    laz = laspy.LasData(header)
     # fill X,Y,Z into laspy structure, convert to cm
     scale_multiplicator = 1 / scale_factor
-    for layer_index in range(arrays_pcl.shape[0]):
-        setattr(
-            laz,
-            [k for i, k in enumerate(coordinates) if i == layer_index][0],
-            scale_multiplicator * arrays_pcl[layer_index],
+    nb_points = arrays_pcl.shape[1]
+    with laspy.open(output_filename, mode="w", header=header) as writer:
+        for start in range(0, nb_points, chunk_size):
+            stop = min(start + chunk_size, nb_points)
+            points = laspy.ScaleAwarePointRecord.zeros(
+                stop - start, header=header
+            )
+            for layer_index, layer in enumerate(coordinates):
+                points[layer] = (
+                    scale_multiplicator * arrays_pcl[layer_index, start:stop]
+                )
+            if arrays_color is not None:
+                for color_index, layer in enumerate(las_color):
+                    points[layer] = arrays_color[color_index, start:stop]
+            writer.write_points(points)  # pylint: disable=E1101
+
+
+def merge_laz_files(laz_files, output_filename, nb_workers=4):
+    """
+    Merge laz files into one laz file, with a spatial index
+
+    Input files are appended along a Z-order curve of their centers, so that
+    neighbouring tiles are close in the merged file. The spatial index,
+    saved next to the merged file as json, gives the bounds and the points
+    range of each tile. Files are read by nb_workers threads, and at most
+    nb_workers files are loaded at a time. Csv tiles are not merged.
+
+    :param laz_files: laz files to merge, with the same point format
+    :param output_filename: merged laz file
+    :param nb_workers: number of reading threads
+    :return: spatial index: list of bounds, first point and number of points
+    """
+    headers = []
+    for laz_file in laz_files:
+        with laspy.open(laz_file) as reader:
+            headers.append(reader.header)
+
+    files_and_headers = [
+        (laz_file, header)
+        for laz_file, header in zip(laz_files, headers)
+        if header.point_count > 0
+    ]
+    if len(files_and_headers) == 0:
+        raise RuntimeError("No point to merge in laz files")
+
+    files_and_headers = [
+        files_and_headers[index]
+        for index in np.argsort(
+            z_order(
+                np.array(
+                    [
+                        (header.mins[:2] + header.maxs[:2]) / 2
+                        for _, header in files_and_headers
+                    ]
+                )
+            ),
+            kind="stable",
+        )
+    ]
+
+    ref_header = files_and_headers[0][1]
+    header = laspy.LasHeader(
+        point_format=ref_header.point_format, version=ref_header.version
+    )
+    header.scales = ref_header.scales
+    header.offsets = ref_header.offsets
+
+    spatial_index = []
+    nb_written_points = 0
+    with laspy.open(
+        output_filename, mode="w", header=header
+    ) as writer, ThreadPoolExecutor(max_workers=nb_workers) as executor:
+        pending = deque()
+        for laz_file, tile_header in files_and_headers:
+            pending.append(
+                (tile_header, executor.submit(read_laz_points, laz_file))
+            )
+            if len(pending) >= nb_workers:
+                nb_written_points = write_merged_points(
+                    writer, *pending.popleft(), nb_written_points, spatial_index
+                )
+        while pending:
+            nb_written_points = write_merged_points(
+                writer, *pending.popleft(), nb_written_points, spatial_index
+            )
+
+    with open(
+        os.path.splitext(output_filename)[0] + "_index.json",
+        "w",
+        encoding="utf8",
+    ) as index_file:
+        json.dump(spatial_index, index_file, indent=2)
+
+    # copy prj file of input tiles
+    ref_prj_file = files_and_headers[0][0] + ".prj"
+    if os.path.exists(ref_prj_file):
+        shutil.copy(ref_prj_file, output_filename + ".prj")
+
+    return spatial_index
+
+
+def read_laz_points(laz_file):
+    """
+    Read all points of a laz file
+
+    :param laz_file: laz file
+    :return: points record
+    """
+    with laspy.open(laz_file) as reader:
+        return reader.read_points(reader.header.point_count)
+
+
+def write_merged_points(
+    writer, tile_header, future_points, nb_written_points, spatial_index
+):
+    """
+    Append points of a tile to merged laz file and register them in index
+
+    :param writer: laspy writer of merged file
+    :param tile_header: header of tile
+    :param future_points: future of tile points record
+    :param nb_written_points: number of points already in merged file
+    :param spatial_index: spatial index to update
+    :return: number of points in merged file
+    """
+    points = future_points.result()
+    if not np.array_equal(
+        tile_header.scales, writer.header.scales
+    ) or not np.array_equal(tile_header.offsets, writer.header.offsets):
+        points.change_scaling(
+            scales=writer.header.scales, offsets=writer.header.offsets
         )
-    if arrays_color is not None:
-        for color_index in range(arrays_color.shape[0]):
-            setattr(
-                laz,
-                [k for i, k in enumerate(las_color) if i == color_index][0],
-                arrays_color[color_index],
+    writer.write_points(points)
+
+    spatial_index.append(
+        {
+            "mins": tile_header.mins.tolist(),
+            "maxs": tile_header.maxs.tolist(),
+            "first_point": nb_written_points,
+            "point_count": len(points),
+        }
+    )
+
+    return nb_written_points + len(points)
+
+
+def z_order(positions, nb_bits=16):
+    """
+    Compute Z-order (Morton) codes of 2D positions
+
+    :param positions: positions, of shape (N, 2)
+    :param nb_bits: number of bits per coordinate
+    :return: codes, of shape (N,)
+    """
+    mins = np.min(positions, axis=0)
+    extent = np.max(positions, axis=0) - mins
+    extent[extent == 0] = 1
+    cells = ((positions - mins) / extent * (2**nb_bits - 1)).astype(np.uint64)
+
+    codes = np.zeros(positions.shape[0], dtype=np.uint64)
+    for bit in range(nb_bits):
+        for axis in range(2):
+            codes |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << (
+                np.uint64(2 * bit + axis)
             )
-    laz.write(output_filename)
+
+    return codes
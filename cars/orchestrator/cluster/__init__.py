@@ -21,17 +21,33 @@
 """
 CARS cluster module init file
 """
+
 # flake8: noqa: F401
 
+# Standard imports
+import importlib
+
 # CARS imports
 from cars.orchestrator.cluster.abstract_cluster import AbstractCluster
 
-from . import (
-    abstract_dask_cluster,
-    dask_cluster_tools,
-    local_dask_cluster,
-    mp_cluster,
-    pbs_dask_cluster,
-    sequential_cluster,
-    slurm_dask_cluster,
-)
+# Clusters are imported when first used, in order to register them for
+# AbstractCluster factory: see AbstractCluster.lazy_modes
+SUBMODULES = [
+    "abstract_dask_cluster",
+    "dask_cluster_tools",
+    "local_dask_cluster",
+    "mp_cluster",
+    "pbs_dask_cluster",
+    "sequential_cluster",
+    "slurm_dask_cluster",
+    "threads_cluster",
+]
+
+
+def __getattr__(name):
+    """
+    Import cluster submodules on first access
+    """
+    if name in SUBMODULES:
+        return importlib.import_module("{}.{}".format(__name__, name))
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
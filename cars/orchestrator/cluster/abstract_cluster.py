@@ -23,14 +23,21 @@ Contains abstract function for Abstract Cluster
 """
 
 # Standard imports
+import importlib
 import logging
 import os
+import time
 from abc import ABCMeta, abstractmethod
 from typing import Dict
 
 # CARS imports
 from cars.conf.input_parameters import ConfigType
-from cars.orchestrator.cluster import log_wrapper
+from cars.orchestrator.cluster import (
+    log_wrapper,
+    task_retry,
+    task_threads,
+    tracing,
+)
 
 
 class AbstractCluster(metaclass=ABCMeta):
@@ -41,6 +48,17 @@ class AbstractCluster(metaclass=ABCMeta):
     # Available cluster modes to instanciate AbstractCluster subclasses.
     available_modes: Dict = {}
 
+    # Modules of CARS clusters, imported when their mode is first used
+    lazy_modes: Dict = {
+        "local_dask": "cars.orchestrator.cluster.local_dask_cluster",
+        "mp": "cars.orchestrator.cluster.mp_cluster",
+        "multiprocessing": "cars.orchestrator.cluster.mp_cluster",
+        "pbs_dask": "cars.orchestrator.cluster.pbs_dask_cluster",
+        "sequential": "cars.orchestrator.cluster.sequential_cluster",
+        "slurm_dask": "cars.orchestrator.cluster.slurm_dask_cluster",
+        "threads": "cars.orchestrator.cluster.threads_cluster",
+    }
+
     # Define abstract attributes
 
     # profiling config parameter: mode, loop_testing, memray
@@ -68,6 +86,12 @@ class AbstractCluster(metaclass=ABCMeta):
         else:
             cluster_mode = conf_cluster["mode"]
 
+        if (
+            cluster_mode not in cls.available_modes
+            and cluster_mode in cls.lazy_modes
+        ):
+            importlib.import_module(cls.lazy_modes[cluster_mode])
+
         if cluster_mode not in cls.available_modes:
             logging.error("No mode named {} registered".format(cluster_mode))
             raise KeyError("No mode named {} registered".format(cluster_mode))
@@ -113,6 +137,11 @@ class AbstractCluster(metaclass=ABCMeta):
         if not os.path.exists(self.worker_log_dir):
             os.makedirs(self.worker_log_dir)
 
+        # spans of tasks are traced in trace directory
+        self.trace_dir = tracing.get_trace_dir(out_dir)
+        if not os.path.exists(self.trace_dir):
+            os.makedirs(self.trace_dir)
+
         self.log_level = logging.getLogger().getEffectiveLevel()
         handlers = logging.getLogger().handlers
         for hand in handlers:
@@ -131,6 +160,13 @@ class AbstractCluster(metaclass=ABCMeta):
             self.profiling_logger.checked_conf_profiling
         )
 
+        # tiles are saved by main process, unless cluster saves them
+        # in workers
+        self.save_on_workers = False
+
+        # tasks declaring retry arguments run with them when retried
+        self.task_retry = task_retry.TaskRetry()
+
     @abstractmethod
     def get_delayed_type(self):
         """
@@ -166,12 +202,19 @@ class AbstractCluster(metaclass=ABCMeta):
 
         return self.checked_conf_cluster
 
-    def create_task(self, func, nout=1):
+    def create_task(self, func, nout=1, nb_threads=None, retry_kwargs=None):
         """
         Create task
 
         :param func: function
         :param nout: number of outputs
+        :param nb_threads: number of threads the task can use, given
+            within the threads budget of the cluster. Threads of tasks
+            not declaring it are left unchanged
+        :param retry_kwargs: key arguments of func replaced when the task
+            is retried by the orchestrator, after a timeout or the loss of
+            its worker. Tasks not declaring them are retried identically
+        :type retry_kwargs: dict
         """
 
         def create_task_builder(*argv, **kwargs):
@@ -188,9 +231,28 @@ class AbstractCluster(metaclass=ABCMeta):
                 additionnal_kwargs,
             ) = self.profiling_logger.get_func_args_plus(func)
 
-            return self.create_task_wrapped(wrapper_func, nout=nout)(
-                *argv, **kwargs, **additionnal_kwargs
+            additionnal_kwargs[tracing.FUN_TRACE_WRAPPER] = wrapper_func
+            additionnal_kwargs[tracing.TRACE_DIR] = self.trace_dir
+            additionnal_kwargs[tracing.TASK_CREATION_TIME] = time.time()
+            additionnal_kwargs[task_threads.FUN_THREADS_WRAPPER] = (
+                tracing.traced_function
             )
+            additionnal_kwargs[task_threads.TASK_NB_THREADS] = nb_threads
+            if retry_kwargs is not None:
+                additionnal_kwargs[task_threads.FUN_THREADS_WRAPPER] = (
+                    task_retry.retry_function
+                )
+                additionnal_kwargs[task_retry.FUN_RETRY_WRAPPER] = (
+                    tracing.traced_function
+                )
+                additionnal_kwargs[task_retry.TASK_RETRY] = (
+                    self.task_retry,
+                    retry_kwargs,
+                )
+
+            return self.create_task_wrapped(
+                task_threads.threads_function, nout=nout
+            )(*argv, **kwargs, **additionnal_kwargs)
 
         return create_task_builder
 
@@ -203,6 +265,21 @@ class AbstractCluster(metaclass=ABCMeta):
         :param nout: number of outputs
         """
 
+    def create_saving_task(self, delayed_obj, worker_saver):
+        """
+        Create task saving the result of a delayed in worker,
+        returning saving infos only
+
+        :param delayed_obj: delayed to save
+        :param worker_saver: saver of corresponding CarsDataset
+        :type worker_saver: WorkerCarsDatasetSaver
+        """
+        raise RuntimeError(
+            "Saving in workers not available with {}".format(
+                self.checked_conf_cluster["mode"]
+            )
+        )
+
     @abstractmethod
     def start_tasks(self, task_list):
         """
@@ -18,35 +18,55 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+# pylint: disable=too-many-lines
 """
 Contains abstract function for abstract dask Cluster
 """
 
 # Standard imports
+import asyncio
 import logging
 import os
 import time
+import uuid
 
 # Third party imports
 from abc import abstractmethod
+from collections import deque
+from functools import wraps
 
 import dask
-import numpy as np
 import psutil
 import xarray as xr
 import yaml
 from dask.config import global_config as global_dask_config
 from dask.config import set as dask_config_set
+from dask.core import get_dependencies, subs
 from dask.delayed import Delayed
 from dask.distributed import as_completed
 from dask.sizeof import sizeof as dask_sizeof
-from distributed.diagnostics.plugin import WorkerPlugin
+from dask.utils import key_split
+from distributed import Lock
+from distributed.diagnostics.plugin import SchedulerPlugin, WorkerPlugin
 from distributed.utils import CancelledError
 
 from cars.core import cars_logging
+from cars.core.utils import safe_makedirs
 
 # CARS imports
-from cars.orchestrator.cluster import abstract_cluster
+from cars.orchestrator.cluster import (
+    abstract_cluster,
+    memory_sampling,
+    speculative_execution,
+    task_threads,
+    tracing,
+)
+from cars.orchestrator.cluster.log_wrapper import warmup_worker
+
+# Refresh time while waiting for results, when copying straggler tasks
+SPECULATIVE_REFRESH_TIME = 0.5
+# Number of last finished tasks of a stage used for its median duration
+SPECULATIVE_MAX_SAMPLES = 100
 
 
 class AbstractDaskCluster(
@@ -71,9 +91,21 @@ class AbstractDaskCluster(
         self.task_timeout = self.checked_conf_cluster["task_timeout"]
         self.walltime = self.checked_conf_cluster["walltime"]
         self.use_memory_logger = self.checked_conf_cluster["use_memory_logger"]
+        self.memory_log_interval = self.checked_conf_cluster[
+            "memory_log_interval"
+        ]
         self.config_name = self.checked_conf_cluster["config_name"]
         self.profiling = self.checked_conf_cluster["profiling"]
         self.launch_worker = launch_worker
+        self.save_on_workers = self.checked_conf_cluster["save_on_workers"]
+        self.speculative_execution = self.checked_conf_cluster[
+            "speculative_execution"
+        ]
+        # computed delayed, by future key, to copy straggler tasks
+        self.computed_delayed = {}
+        self.speculative_stats = speculative_execution.SpeculativeStats()
+        # threads asked by tasks are capped by the CPUs of their worker
+        self.cpus_per_worker = self.get_cpus_per_worker()
 
         self.activate_dashboard = self.checked_conf_cluster[
             "activate_dashboard"
@@ -94,11 +126,22 @@ class AbstractDaskCluster(
             # Create cluster
             self.cluster, self.client = self.start_dask_cluster()
 
+            # Add plugin to load numba functions in workers
+            self.client.register_worker_plugin(
+                WorkerWarmup(self.worker_log_dir, self.log_level)
+            )
+
             # Add plugin to monitor memory of workers
             if self.use_memory_logger:
-                plugin = ComputeDSMMemoryLogger(self.out_dir)
+                plugin = ComputeDSMMemoryLogger(
+                    self.out_dir, interval=self.memory_log_interval
+                )
                 self.client.register_worker_plugin(plugin)
 
+            # Add plugin to record durations of finished tasks
+            if self.speculative_execution:
+                self.client.register_plugin(TaskDurationsRecorder())
+
     @abstractmethod
     def check_conf(self, conf):
         """
@@ -118,6 +161,15 @@ class AbstractDaskCluster(
         Start dask cluster
         """
 
+    def get_cpus_per_worker(self):
+        """
+        Get number of CPUs of a worker: jobqueue workers reserve one CPU
+
+        :return: number of CPUs
+        :rtype: int
+        """
+        return 1
+
     def create_task_wrapped(self, func, nout=1):
         """
         Create task
@@ -125,11 +177,45 @@ class AbstractDaskCluster(
         :param func: function
         :param nout: number of outputs
         """
-        return dask.delayed(
+        delayed_func = dask.delayed(
             cars_logging.wrap_logger(func, self.worker_log_dir, self.log_level),
             nout=nout,
         )
 
+        @wraps(func)
+        def dask_delayed_builder(*argv, **kwargs):
+            """
+            Create a dask delayed, with a key named after its stage
+
+            :param argv: args of func
+            :param kwargs: kwargs of func
+            """
+            stage = speculative_execution.get_task_stage(func, kwargs)
+            if kwargs.get(task_threads.TASK_NB_THREADS) is not None:
+                kwargs[task_threads.TASK_NB_THREADS] = min(
+                    kwargs[task_threads.TASK_NB_THREADS], self.cpus_per_worker
+                )
+            return delayed_func(
+                *argv,
+                dask_key_name="{}-{}".format(stage, uuid.uuid4().hex),
+                **kwargs
+            )
+
+        return dask_delayed_builder
+
+    def create_saving_task(self, delayed_obj, worker_saver):
+        """
+        Create task saving the result of a delayed in worker,
+        returning saving infos only
+
+        :param delayed_obj: delayed to save
+        :param worker_saver: saver of corresponding CarsDataset
+        :type worker_saver: WorkerCarsDatasetSaver
+        """
+        return self.create_task_wrapped(save_tile_on_worker)(
+            delayed_obj, worker_saver, self.trace_dir
+        )
+
     def get_delayed_type(self):
         """
         Get delayed type
@@ -143,7 +229,11 @@ class AbstractDaskCluster(
         :param task_list: task list
         """
 
-        return self.client.compute(task_list)
+        future_list = self.client.compute(task_list)
+        if self.speculative_execution:
+            for delayed_obj, future in zip(task_list, future_list):
+                self.computed_delayed[future.key] = delayed_obj
+        return future_list
 
     def scatter(self, data, broadcast=True):
         """
@@ -160,7 +250,18 @@ class AbstractDaskCluster(
         :param future_list: future_list list
         """
 
-        return DaskFutureIterator(future_list, timeout=timeout)
+        task_copier = None
+        if self.speculative_execution:
+            task_copier = DaskTaskCopier(
+                self.client,
+                self.computed_delayed,
+                future_list,
+                self.speculative_stats,
+            )
+
+        return DaskFutureIterator(
+            future_list, timeout=timeout, task_copier=task_copier
+        )
 
 
 class DaskFutureIterator:
@@ -169,17 +270,23 @@ class DaskFutureIterator:
     Only returns the actual results, delete the future after usage
     """
 
-    def __init__(self, future_list, timeout=None):  # pylint: disable=W0613
+    def __init__(
+        self, future_list, timeout=None, task_copier=None
+    ):  # pylint: disable=W0613
         # TODO: python 3.9: add timeout=timeout as parameter
         self.dask_a_c = as_completed(future_list, with_results=True)
         self.prev = None
+        self.task_copier = task_copier
 
     def __iter__(self):
         return self
 
     def __next__(self):
         try:
-            fut, res = self.dask_a_c.__next__()
+            if self.task_copier is None:
+                fut, res = self.dask_a_c.__next__()
+            else:
+                fut, res = self.task_copier.next_result(self.dask_a_c)
         except StopIteration as exception:
             if self.prev is not None:
                 self.prev.cancel()
@@ -198,6 +305,302 @@ class DaskFutureIterator:
         return res
 
 
+class DaskTaskCopier:
+    """
+    DaskTaskCopier
+
+    Copy straggler tasks on idle workers, once no task is waiting,
+    and keep the result of the first finished copy
+    """
+
+    def __init__(
+        self, client, computed_delayed, future_list, speculative_stats
+    ):
+        """
+        Init function of DaskTaskCopier
+
+        :param client: dask client
+        :param computed_delayed: computed delayed, by future key
+        :type computed_delayed: dict
+        :param future_list: futures of computed delayed
+        :param speculative_stats: numbers of copies and abandoned runs
+        :type speculative_stats: SpeculativeStats
+        """
+        self.client = client
+        self.speculative_stats = speculative_stats
+        self.computed_delayed = computed_delayed
+        self.pending_futures = {future.key: future for future in future_list}
+        # running tasks already copied
+        self.copied_tasks = set()
+        # copy by original future key, and original by copy future key
+        self.copies = {}
+        self.originals = {}
+        # futures whose other copy already finished
+        self.abandoned_keys = set()
+
+    def next_result(self, dask_a_c):
+        """
+        Get next finished future and its result, copying straggler tasks
+        while waiting
+
+        :param dask_a_c: iterator on futures
+        :type dask_a_c: as_completed
+
+        :return: future, result
+        """
+        while True:
+            while not dask_a_c.has_ready() and not dask_a_c.is_empty():
+                time.sleep(SPECULATIVE_REFRESH_TIME)
+                self.copy_straggler_tasks(dask_a_c)
+
+            fut, res = next(dask_a_c)
+            if fut.key in self.abandoned_keys:
+                # other copy already returned
+                self.abandoned_keys.discard(fut.key)
+                continue
+
+            # cancel other copy
+            if fut.key in self.originals:
+                logging.info("Copy {} finished first".format(fut.key))
+                other_fut = self.originals.pop(fut.key)
+                self.copies.pop(other_fut.key)
+            else:
+                other_fut = self.copies.pop(fut.key, None)
+                if other_fut is not None:
+                    self.originals.pop(other_fut.key)
+            if other_fut is not None:
+                self.abandoned_keys.add(other_fut.key)
+                self.speculative_stats.nb_abandoned += 1
+                other_fut.cancel()
+
+            original_key = fut.key if other_fut is None else other_fut.key
+            for key in (fut.key, original_key):
+                self.computed_delayed.pop(key, None)
+                self.pending_futures.pop(key, None)
+
+            return fut, res
+
+    def copy_straggler_tasks(self, dask_a_c):
+        """
+        Copy straggler tasks on idle workers, if no task is waiting
+
+        :param dask_a_c: iterator on futures
+        :type dask_a_c: as_completed
+        """
+        running_tasks, idle_workers = self.client.run_on_scheduler(
+            get_running_tasks
+        )
+        if len(idle_workers) == 0:
+            return
+
+        # reference duration of stage: median of finished tasks
+        stage_references = {}
+        elapsed_times = {}
+        for key, (stage, elapsed, reference) in running_tasks.items():
+            if key not in self.copied_tasks:
+                stage_references[stage] = reference
+                elapsed_times[key] = (stage, elapsed)
+        straggler_keys = speculative_execution.get_straggler_tasks(
+            elapsed_times, stage_references
+        )
+
+        for key in straggler_keys[: len(idle_workers)]:
+            self.copied_tasks.add(key)
+            copy_futures = self.copy_task(key, idle_workers)
+            if len(copy_futures) > 0:
+                logging.info("Copy straggler task {}".format(key))
+            for original_key, copy_future in copy_futures.items():
+                self.speculative_stats.nb_copies += 1
+                self.copies[original_key] = copy_future
+                self.originals[copy_future.key] = self.pending_futures[
+                    original_key
+                ]
+                dask_a_c.add(copy_future)
+
+    def copy_task(self, key, workers):
+        """
+        Copy running task and the pending computed delayed using it.
+        Tasks saving tiles in workers are not copied: files would be
+        written twice.
+
+        :param key: key of running task
+        :param workers: addresses of workers to run copy
+        :type workers: list
+
+        :return: futures of copies, by key of computed delayed
+        :rtype: dict
+        """
+        if is_saving_task(key):
+            return {}
+
+        copy_key = get_copy_key(key)
+        copy_list = []
+        for delayed_key, delayed_obj in self.computed_delayed.items():
+            if delayed_key not in self.pending_futures:
+                continue
+            graph = delayed_obj.__dask_graph__()
+            if is_saving_task(delayed_key) and key in get_dependencies(
+                graph, delayed_key
+            ):
+                # result of running task is saved in worker
+                return {}
+            if delayed_key == key:
+                copy_list.append(
+                    (
+                        delayed_key,
+                        Delayed(copy_key, {**graph, copy_key: graph[key]}),
+                    )
+                )
+            elif key in get_dependencies(graph, delayed_key):
+                # computed delayed using output of running task
+                copy_delayed_key = get_copy_key(delayed_key)
+                copy_graph = {
+                    **graph,
+                    copy_key: graph[key],
+                    copy_delayed_key: subs(graph[delayed_key], key, copy_key),
+                }
+                copy_list.append(
+                    (delayed_key, Delayed(copy_delayed_key, copy_graph))
+                )
+
+        copy_futures = {}
+        if len(copy_list) > 0:
+            futures = self.client.compute(
+                [copy_delayed for _, copy_delayed in copy_list],
+                workers=workers,
+                allow_other_workers=False,
+            )
+            for (delayed_key, _), future in zip(copy_list, futures):
+                copy_futures[delayed_key] = future
+
+        return copy_futures
+
+
+def get_copy_key(key):
+    """
+    Get key of the copy of a task
+
+    :param key: key of task
+    :type key: str or tuple
+
+    :return: key of copy
+    :rtype: str or tuple
+    """
+    if isinstance(key, tuple):
+        return (get_copy_key(key[0]),) + key[1:]
+    return "speculative-{}".format(key)
+
+
+def is_saving_task(key):
+    """
+    Check if task saves tiles in workers
+
+    :param key: key of task
+    :type key: str or tuple
+
+    :return: True if task saves tiles
+    :rtype: bool
+    """
+    return key_split(key) == save_tile_on_worker.__name__
+
+
+class TaskDurationsRecorder(SchedulerPlugin):
+    """
+    Scheduler plugin recording the compute durations of the last finished
+    tasks of each stage
+    """
+
+    name = "cars-task-durations"
+
+    def __init__(self):
+        """
+        Init function of TaskDurationsRecorder
+        """
+        self.stage_durations = {}
+
+    def transition(
+        self, key, start, finish, *args, stimulus_id=None, **kwargs
+    ):  # pylint: disable=W0613
+        """
+        Record compute duration of finished task
+
+        :param key: key of task
+        :param start: previous state of task
+        :param finish: new state of task
+        """
+        if start != "processing" or finish != "memory":
+            return
+        for startstop in kwargs.get("startstops", []):
+            if startstop["action"] == "compute":
+                self.stage_durations.setdefault(
+                    key_split(key), deque(maxlen=SPECULATIVE_MAX_SAMPLES)
+                ).append(startstop["stop"] - startstop["start"])
+
+
+def get_running_tasks(dask_scheduler=None):
+    """
+    Get tasks running on workers, and idle workers if no task is waiting.
+    Run on scheduler.
+
+    :param dask_scheduler: scheduler, given by dask
+
+    :return: stage, elapsed time and median duration of finished tasks of
+        stage (None if not enough tasks finished), by running task,
+        and addresses of idle workers
+    :rtype: dict, list
+    """
+    stage_medians = {}
+    if TaskDurationsRecorder.name in dask_scheduler.plugins:
+        stage_medians = speculative_execution.get_stage_medians(
+            dask_scheduler.plugins[TaskDurationsRecorder.name].stage_durations
+        )
+
+    running_tasks = {}
+    waiting = len(dask_scheduler.queued) + len(dask_scheduler.unrunnable) > 0
+    for worker_state in dask_scheduler.workers.values():
+        if len(worker_state.processing) > len(worker_state.executing):
+            waiting = True
+        for task_state, elapsed in worker_state.executing.items():
+            stage = task_state.prefix.name
+            running_tasks[task_state.key] = (
+                stage,
+                elapsed,
+                stage_medians.get(stage),
+            )
+
+    idle_workers = [] if waiting else list(dask_scheduler.idle)
+
+    return running_tasks, idle_workers
+
+
+def save_tile_on_worker(future_result, worker_saver, trace_dir=None):
+    """
+    Save tile in worker, with a dask lock per file
+
+    :param future_result: computed tile
+    :type future_result: xr.Dataset or pandas.DataFrame
+    :param worker_saver: saver of corresponding CarsDataset
+    :type worker_saver: WorkerCarsDatasetSaver
+    :param trace_dir: directory where saving is traced
+    :type trace_dir: str
+
+    :return: saving infos of tile
+    :rtype: CarsDict
+    """
+    if future_result is None:
+        return None
+
+    with tracing.trace_span(
+        trace_dir,
+        "save_tile_on_worker",
+        tracing.SAVE,
+        bytes_in=tracing.get_data_size(future_result),
+    ):
+        worker_saver.save(future_result, get_lock=Lock)
+
+    return worker_saver.get_saved_tile_info(future_result)
+
+
 def set_config():
     """
     Set particular DASK config such as:
@@ -274,25 +677,59 @@ def register_xarray():
         return total_size
 
 
+class WorkerWarmup(WorkerPlugin):
+    """
+    A subclass of WorkerPlugin loading numba functions in workers at their
+    startup, before their first task
+    """
+
+    def __init__(self, log_dir, log_level):
+        """
+        Constructor
+        :param log_dir: output directory of worker logs
+        :type log_dir: string
+        :param log_level: logging level of the worker logs
+        :type log_level: int
+        """
+        self.log_dir = log_dir
+        self.log_level = log_level
+
+    async def setup(self, worker):  # pylint: disable=W0236
+        """
+        Warm up worker, without blocking its event loop
+        :param worker: The worker to associate the plugin with
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, warmup_worker, self.log_dir, self.log_level
+        )
+
+
 class ComputeDSMMemoryLogger(WorkerPlugin):
     """A subclass of WorkerPlugin dedicated to monitoring workers memory
 
     This plugin enables two things:
 
-    - Additional dask log traces (for each worker internal state change):
+    - Additional dask log traces (at each sample of worker memory):
 
         - amount of tasks
         - associated memory
-    - A numpy data file with memory metrics and timing
+    - A data file with memory metrics and timing, to read with
+      memory_sampling.load_samples
+
+    Memory of data created is accounted incrementally on worker state
+    changes, and sampled at a fixed rate by a background thread.
     """
 
-    def __init__(self, outdir):
+    def __init__(self, outdir, interval=1.0):
         """
         Constructor
         :param outdir: output directory
         :type outdir: string
+        :param interval: time between two samples, in seconds
+        :type interval: float
         """
         self.outdir = outdir
+        self.interval = interval
 
     def setup(self, worker):
         """
@@ -305,67 +742,70 @@ class ComputeDSMMemoryLogger(WorkerPlugin):
         self.name = worker.name
         # Measure plugin registration time
         self.start_time = time.time()
-        # Data will hold the memory traces as numpy array
-        self.data = [[0, 0, 0, 0]]
+        self.process = psutil.Process(os.getpid())
+        # Size of data in worker memory, by task key
+        self.task_bytes = {}
+        self.total_in_memory = 0
+        # Samples [elapsed time, data created, number of tasks, process
+        # memory] are buffered, then appended to file by batches
+        log_dir = os.path.join(self.outdir, "dask_log")
+        safe_makedirs(log_dir)
+        self.samples = memory_sampling.SampleBuffer(
+            os.path.join(
+                log_dir,
+                "memory_" + repr(self.name) + memory_sampling.SAMPLES_EXTENSION,
+            ),
+            4,
+        )
+        self.sampler = memory_sampling.PeriodicSampler(
+            self.sample, self.interval
+        )
+        self.sampler.start()
 
     def transition(self, key, start, finish, **kwargs):
         """
-        Callback when worker changes internal state
+        Callback when worker changes internal state:
+        update memory of data created with the task changing state
         """
-        # TODO Pylint Exception : Inherited attributes outside __init__
-        # pylint: disable=attribute-defined-outside-init
+        if start == "memory":
+            self.total_in_memory -= self.task_bytes.pop(key, 0)
 
-        # Define cumulants
-        total_in_memory = 0
-        total_nbytes = 0
+        if finish == "memory":
+            task = self.worker.state.tasks.get(key)
+            if task is not None:
+                task_size = task.get_nbytes()
+                self.total_in_memory += task_size - self.task_bytes.get(key, 0)
+                self.task_bytes[key] = task_size
 
-        # Measure elapsed time for the state change
+    def sample(self):
+        """
+        Sample worker memory
+        """
         elapsed_time = time.time() - self.start_time
-
-        # Walk the worker known memory
-        for task_key in self.worker.state.tasks.keys():
-            task_size = self.worker.state.tasks[task_key].get_nbytes()
-
-            total_in_memory += task_size
-            total_nbytes += 1
+        total_in_memory = self.total_in_memory
+        nb_tasks = len(self.worker.state.tasks)
 
         # Use psutil to capture python process memory as well
-        process = psutil.Process(os.getpid())
-        process_memory = process.memory_info().rss
-
-        # Update data records
-        self.data = np.concatenate(
-            (
-                self.data,
-                np.array(
-                    [
-                        [
-                            elapsed_time,
-                            total_in_memory,
-                            total_nbytes,
-                            process_memory,
-                        ]
-                    ]
-                ),
-            )
+        process_memory = self.process.memory_info().rss
+
+        self.samples.append(
+            [elapsed_time, total_in_memory, nb_tasks, process_memory]
         )
-        # Convert nbytes size for logger
-        total_nbytes = float(total_nbytes) / 1000000
-        process_memory = float(process_memory) / 1000000
 
         # Log memory state
         logging.info(
-            "Memory report: data created = {} ({} Mb), "
+            "Memory report: data created = {} Mb ({} tasks), "
             "python process memory = {} Mb".format(
-                total_in_memory,
-                total_nbytes,
-                process_memory,
+                float(total_in_memory) / 1000000,
+                nb_tasks,
+                float(process_memory) / 1000000,
             )
         )
 
-        # Save data records in npy file
-        # TODO: Save only every x seconds ?
-        file = os.path.join(
-            self.outdir, "dask_log", "memory_" + repr(self.name) + ".npy"
-        )
-        np.save(file, self.data)
+    def teardown(self, worker):
+        """
+        Stop sampling and flush samples, when worker closes
+        :param worker: The worker the plugin is associated with
+        """
+        self.sampler.stop()
+        self.samples.flush()
@@ -21,6 +21,7 @@
 """
 Contains functions cluster conf checker
 """
+
 import time
 
 from json_checker import And, Checker, Or
@@ -48,6 +49,9 @@ def create_checker_schema(conf):
     # Overload conf
     overloaded_conf["mode"] = conf.get("mode", "unknowed_dask")
     overloaded_conf["use_memory_logger"] = conf.get("use_memory_logger", False)
+    overloaded_conf["memory_log_interval"] = conf.get(
+        "memory_log_interval", 1.0
+    )
     overloaded_conf["nb_workers"] = conf.get("nb_workers", 2)
     overloaded_conf["task_timeout"] = conf.get("task_timeout", 600)
     overloaded_conf["max_ram_per_worker"] = conf.get("max_ram_per_worker", 2000)
@@ -58,10 +62,15 @@ def create_checker_schema(conf):
     )
     overloaded_conf["python"] = conf.get("python", None)
     overloaded_conf["profiling"] = conf.get("profiling", {})
+    overloaded_conf["save_on_workers"] = conf.get("save_on_workers", False)
+    overloaded_conf["speculative_execution"] = conf.get(
+        "speculative_execution", False
+    )
 
     cluster_schema = {
         "mode": str,
         "use_memory_logger": bool,
+        "memory_log_interval": And(Or(float, int), lambda x: x > 0),
         "nb_workers": And(int, lambda x: x > 0),
         "task_timeout": And(int, lambda x: x > 0),
         "max_ram_per_worker": And(Or(float, int), lambda x: x > 0),
@@ -70,6 +79,8 @@ def create_checker_schema(conf):
         "activate_dashboard": bool,
         "profiling": dict,
         "python": Or(None, str),
+        "save_on_workers": bool,
+        "speculative_execution": bool,
     }
 
     return overloaded_conf, cluster_schema
@@ -29,7 +29,11 @@ import logging
 from dask.distributed import Client, LocalCluster
 
 # CARS imports
-from cars.orchestrator.cluster import abstract_cluster, abstract_dask_cluster
+from cars.orchestrator.cluster import (
+    abstract_cluster,
+    abstract_dask_cluster,
+    task_threads,
+)
 from cars.orchestrator.cluster.dask_cluster_tools import (
     check_configuration,
     create_checker_schema,
@@ -56,6 +60,16 @@ class LocalDaskCluster(abstract_dask_cluster.AbstractDaskCluster):
 
         return check_configuration(*create_checker_schema(conf))
 
+    def get_cpus_per_worker(self):
+        """
+        Get number of CPUs of a worker: CPUs of the node are shared
+        by local workers
+
+        :return: number of CPUs
+        :rtype: int
+        """
+        return max(1, task_threads.get_available_cpus() // self.nb_workers)
+
     def start_dask_cluster(self):
         """
         Start dask cluster
@@ -36,19 +36,19 @@ import time
 import uuid
 from abc import ABCMeta, abstractmethod
 from importlib import import_module
-from multiprocessing import Pipe
-from threading import Thread
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import psutil
-from json_checker import Checker
+from json_checker import And, Checker, Or
 
-from cars.core import cars_logging
+from cars.core import cars_logging, numba_cache
 from cars.core.utils import safe_makedirs
+from cars.orchestrator.cluster import memory_sampling
 
-THREAD_TIMEOUT = 2
+# Name of worker startup in profiling summary
+WORKER_STARTUP = "Worker startup"
 
 
 # pylint: disable=too-few-public-methods
@@ -135,6 +135,9 @@ class LogWrapper(AbstractLogWrapper):
         # call parent init
         super().__init__(conf_profiling, out_dir)
         self.loop_testing = self.checked_conf_profiling["loop_testing"]
+        self.sampling_interval = self.checked_conf_profiling[
+            "sampling_interval"
+        ]
 
     def check_conf(self, conf):
         """
@@ -158,8 +161,15 @@ class LogWrapper(AbstractLogWrapper):
         # Overload conf
         overloaded_conf["mode"] = conf.get("mode", "cars_profiling")
         overloaded_conf["loop_testing"] = conf.get("loop_testing", False)
+        overloaded_conf["sampling_interval"] = conf.get(
+            "sampling_interval", 0.2
+        )
 
-        cluster_schema = {"mode": str, "loop_testing": bool}
+        cluster_schema = {
+            "mode": str,
+            "loop_testing": bool,
+            "sampling_interval": And(Or(float, int), lambda x: x > 0),
+        }
 
         # Check conf
         checker = Checker(cluster_schema)
@@ -172,6 +182,7 @@ class LogWrapper(AbstractLogWrapper):
         new_kwarg = {
             "fun_log_wrapper": func,
             "loop_testing": self.loop_testing,
+            "sampling_interval": self.sampling_interval,
         }
 
         return fun, new_kwarg
@@ -300,16 +311,18 @@ def log_function(*argv, **kwargs):
     """
     func = kwargs["fun_log_wrapper"]
     loop_testing = kwargs["loop_testing"]
+    interval = kwargs["sampling_interval"]
     kwargs.pop("fun_log_wrapper")
     kwargs.pop("loop_testing")
+    kwargs.pop("sampling_interval")
 
     if loop_testing:
         # Profile
-        res = cars_profile(name=func.__name__ + "_looped", interval=0.2)(
+        res = cars_profile(name=func.__name__ + "_looped", interval=interval)(
             loop_function
         )(argv, kwargs, func)
     else:
-        res = cars_profile(interval=0.2)(func)(*argv, **kwargs)
+        res = cars_profile(interval=interval)(func)(*argv, **kwargs)
 
     return res
 
@@ -687,13 +700,16 @@ def generate_summary(out_dir, used_conf, clean_worker_logs=False):
     # Pie chart
 
     (name_task_workers, summary_workers) = filter_lists(
-        summary_names, summary_total_time, lambda name: "wrapper" in name
+        summary_names,
+        summary_total_time,
+        lambda name: "wrapper" in name or name == WORKER_STARTUP,
     )
 
     (name_task_main, summary_main) = filter_lists(
         summary_names,
         summary_total_time,
         lambda name: "wrapper" not in name
+        and name != WORKER_STARTUP
         and "pipeline" not in name
         and "Compute futures" not in name,
     )
@@ -840,47 +856,31 @@ def cars_profile(name=None, interval=0.1):
 
             memory_start = get_current_memory()
 
-            # Launch memory profiling thread
-            child_pipe, parent_pipe = Pipe()
-            thread_monitoring = CarsMemProf(
-                os.getpid(), child_pipe, interval=interval
-            )
-            thread_monitoring.start()
-            if parent_pipe.poll(THREAD_TIMEOUT):
-                parent_pipe.recv()
+            # Sample memory and cpu of process while running
+            sampler = memory_sampling.get_process_sampler(interval)
+            window_id = sampler.open_window()
 
-            res = func(*args, **kwargs)
+            try:
+                res = func(*args, **kwargs)
+            finally:
+                max_memory, max_cpu = sampler.close_window(window_id)
             total_time = time.time() - start_time
 
-            # end memprofiling monitoring
-            parent_pipe.send(0)
-            max_memory = None
-            max_cpu = None
-            if parent_pipe.poll(THREAD_TIMEOUT):
-                max_memory = parent_pipe.recv()
-            if parent_pipe.poll(THREAD_TIMEOUT):
-                max_cpu = parent_pipe.recv()
             memory_end = get_current_memory()
 
             func_name = name
             if name is None:
                 func_name = func.__name__.capitalize()
 
-            message = (
-                "CarsProfiling# %{}%: %{:.4f}% s Max ram : %{}% MiB"
-                " Start Ram: %{}% MiB, End Ram: %{}% MiB, "
-                " Max CPU usage: %{}%".format(
-                    func_name,
-                    total_time,
-                    max_memory,
-                    memory_start,
-                    memory_end,
-                    max_cpu,
-                )
+            add_profiling_entry(
+                func_name,
+                total_time,
+                max_memory,
+                memory_start,
+                memory_end,
+                max_cpu,
             )
 
-            cars_logging.add_profiling_message(message)
-
             return res
 
         return wrapper_cars_profile
@@ -888,56 +888,60 @@ def cars_profile(name=None, interval=0.1):
     return decorator_generator
 
 
-class CarsMemProf(Thread):
+def add_profiling_entry(
+    name, total_time, max_memory, memory_start, memory_end, max_cpu
+):
     """
-    CarsMemProf
+    Add profiling message of a run, gathered in profiling summary
+
+    :param name: name of run
+    :param total_time: duration of run, in seconds
+    :param max_memory: max memory during run, in MiB
+    :param memory_start: memory at start of run, in MiB
+    :param memory_end: memory at end of run, in MiB
+    :param max_cpu: max CPU usage during run, in %
+    """
+    message = (
+        "CarsProfiling# %{}%: %{:.4f}% s Max ram : %{}% MiB"
+        " Start Ram: %{}% MiB, End Ram: %{}% MiB, "
+        " Max CPU usage: %{}%".format(
+            name,
+            total_time,
+            max_memory,
+            memory_start,
+            memory_end,
+            max_cpu,
+        )
+    )
 
-    Profiling thread
-    """
+    cars_logging.add_profiling_message(message)
 
-    def __init__(self, pid, pipe, interval=0.1):
-        """
-        Init function of CarsMemProf
-        """
-        super().__init__()
-        self.pipe = pipe
-        self.interval = interval
-        self.cpu_interval = 0.1
-        self.process = psutil.Process(pid)
 
-    def run(self):
-        """
-        Run
-        """
+def warmup_worker(log_dir, log_level):
+    """
+    Initialize worker process: load CARS numba functions, compiled in cache
+    by previous workers or cars --warmup, and add worker startup time,
+    since process creation, to profiling summary
 
-        try:
-            max_mem = 0
-            max_cpu = 0
-
-            # tell parent profiling is ready
-            self.pipe.send(0)
-            stop = False
-            while True:
-                # Get memory
-                current_mem = self.process.memory_info().rss
-
-                if current_mem > max_mem:
-                    max_mem = current_mem
-
-                # Get cpu max
-                current_cpu = self.process.cpu_percent(
-                    interval=self.cpu_interval
-                )
-                if current_cpu > max_cpu:
-                    max_cpu = current_cpu
-
-                if stop:
-                    break
-                stop = self.pipe.poll(self.interval)
-
-            # Convert nbytes size for logger
-            self.pipe.send(float(max_mem) / 1000000)
-            self.pipe.send(max_cpu)
-
-        except BrokenPipeError:
-            logging.debug("broken pipe error in log wrapper ")
+    :param log_dir: output directory of worker logs
+    :param log_level: logging level of the worker logs
+    """
+    try:
+        cars_logging.setup_logging(
+            loglevel=log_level, log_dir=log_dir, in_worker=True
+        )
+        memory_start = get_current_memory()
+        numba_cache.warmup()
+        process = psutil.Process(os.getpid())
+        startup_time = time.time() - process.create_time()
+        memory_end = get_current_memory()
+        add_profiling_entry(
+            WORKER_STARTUP,
+            startup_time,
+            memory_end,
+            memory_start,
+            memory_end,
+            100 * sum(process.cpu_times()[:2]) / max(startup_time, 1e-6),
+        )
+    except Exception as exc:  # pylint: disable=broad-except
+        logging.warning("Worker warmup failed: {}".format(exc))
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Contains tools sampling memory of processes: a background thread samples
+at a fixed rate, and samples are buffered before being flushed to disk
+in batches.
+"""
+
+# Standard imports
+import itertools
+import os
+import threading
+import time
+
+# Third party imports
+import numpy as np
+import psutil
+
+# Number of samples kept in memory before being flushed to disk
+SAMPLES_BUFFER_SIZE = 1024
+
+# Extension of files of samples: sequence of numpy arrays, not a .npy file
+SAMPLES_EXTENSION = ".samples"
+
+# process sampler shared by profiled functions of current process
+PROCESS_SAMPLER = None
+PROCESS_SAMPLER_LOCK = threading.Lock()
+
+
+class SampleBuffer:
+    """
+    SampleBuffer
+
+    Preallocated buffer of samples, appended to file by batches
+    when full. The file, emptied at creation of the buffer, holds
+    a sequence of numpy arrays, to read with load_samples.
+    """
+
+    def __init__(self, file_path, nb_columns, size=SAMPLES_BUFFER_SIZE):
+        """
+        Init function of SampleBuffer
+
+        :param file_path: file samples are flushed to
+        :type file_path: str
+        :param nb_columns: number of values of a sample
+        :type nb_columns: int
+        :param size: number of samples kept in memory
+        :type size: int
+        """
+        self.file_path = file_path
+        # samples of a previous run are removed
+        with open(self.file_path, "wb"):
+            pass
+        self.samples = np.zeros((size, nb_columns), dtype=np.float64)
+        self.nb_samples = 0
+        self.lock = threading.Lock()
+
+    def append(self, sample):
+        """
+        Append sample, flushing buffer if full
+
+        :param sample: values of sample
+        :type sample: list
+        """
+        with self.lock:
+            self.samples[self.nb_samples] = sample
+            self.nb_samples += 1
+            if self.nb_samples == self.samples.shape[0]:
+                self._flush()
+
+    def flush(self):
+        """
+        Append buffered samples to file
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        """
+        Append buffered samples to file, lock being acquired
+        """
+        if self.nb_samples == 0:
+            return
+        with open(self.file_path, "ab") as file_desc:
+            np.save(file_desc, self.samples[: self.nb_samples])
+        self.nb_samples = 0
+
+
+def load_samples(file_path):
+    """
+    Load samples flushed by a SampleBuffer
+
+    :param file_path: file of samples
+    :type file_path: str
+
+    :return: samples, one per row, empty if no sample was flushed
+    :rtype: np.ndarray
+    """
+    chunks = []
+    if os.path.exists(file_path):
+        with open(file_path, "rb") as file_desc:
+            while True:
+                try:
+                    chunks.append(np.load(file_desc))
+                except EOFError:
+                    break
+
+    if len(chunks) == 0:
+        return np.zeros((0, 0), dtype=np.float64)
+
+    return np.concatenate(chunks)
+
+
+class PeriodicSampler(threading.Thread):
+    """
+    PeriodicSampler
+
+    Daemon thread calling a sampling function at a fixed rate,
+    until stopped
+    """
+
+    def __init__(self, sample_function, interval):
+        """
+        Init function of PeriodicSampler
+
+        :param sample_function: function called at each sample
+        :param interval: time between two samples, in seconds
+        :type interval: float
+        """
+        super().__init__(daemon=True)
+        self.sample_function = sample_function
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        """
+        Run
+        """
+        self.sample_function()
+        while not self.stop_event.wait(self.interval):
+            self.sample_function()
+
+    def stop(self):
+        """
+        Stop sampling, after a last sample
+        """
+        self.stop_event.set()
+        self.join()
+        self.sample_function()
+
+
+class ProcessSampler:
+    """
+    ProcessSampler
+
+    Sample resident memory and CPU usage of current process, keeping
+    their maxima over the windows opened by profiled functions
+    """
+
+    def __init__(self, interval):
+        """
+        Init function of ProcessSampler
+
+        :param interval: time between two samples, in seconds
+        :type interval: float
+        """
+        self.pid = os.getpid()
+        self.process = psutil.Process(self.pid)
+        # first call of cpu_percent initializes its measure
+        self.process.cpu_percent(None)
+        self.windows = {}
+        self.window_ids = itertools.count()
+        self.lock = threading.Lock()
+        self.thread = PeriodicSampler(self.sample, interval)
+        self.thread.start()
+
+    def sample(self):
+        """
+        Sample memory and CPU usage, updating maxima of open windows
+        """
+        rss = self.process.memory_info().rss
+        cpu = self.process.cpu_percent(None)
+        with self.lock:
+            for window in self.windows.values():
+                window["max_rss"] = max(window["max_rss"], rss)
+                window["max_cpu"] = max(window["max_cpu"], cpu)
+
+    def open_window(self):
+        """
+        Open a window, to get maxima of samples until it is closed
+
+        :return: id of window
+        :rtype: int
+        """
+        window = {
+            "max_rss": self.process.memory_info().rss,
+            "max_cpu": 0.0,
+            "cpu_time": sum(self.process.cpu_times()[:2]),
+            "time": time.time(),
+        }
+        with self.lock:
+            window_id = next(self.window_ids)
+            self.windows[window_id] = window
+
+        return window_id
+
+    def close_window(self, window_id):
+        """
+        Close window
+
+        :param window_id: id of window
+        :type window_id: int
+
+        :return: maximum resident memory in MB, maximum CPU usage in %
+        :rtype: tuple(float, float)
+        """
+        with self.lock:
+            window = self.windows.pop(window_id)
+
+        # mean CPU usage over the window, for windows shorter than interval
+        elapsed = time.time() - window["time"]
+        mean_cpu = 0.0
+        if elapsed > 0:
+            cpu_time = sum(self.process.cpu_times()[:2]) - window["cpu_time"]
+            mean_cpu = 100 * cpu_time / elapsed
+
+        max_rss = max(window["max_rss"], self.process.memory_info().rss)
+
+        return float(max_rss) / 1000000, max(window["max_cpu"], mean_cpu)
+
+
+def get_process_sampler(interval):
+    """
+    Get sampler of current process, started at first call and after fork.
+    The sampler runs at the smallest interval requested.
+
+    :param interval: time between two samples, in seconds
+    :type interval: float
+
+    :return: process sampler
+    :rtype: ProcessSampler
+    """
+    global PROCESS_SAMPLER  # pylint: disable=global-statement
+
+    with PROCESS_SAMPLER_LOCK:
+        if PROCESS_SAMPLER is None or PROCESS_SAMPLER.pid != os.getpid():
+            PROCESS_SAMPLER = ProcessSampler(interval)
+        elif interval < PROCESS_SAMPLER.thread.interval:
+            PROCESS_SAMPLER.thread.interval = interval
+
+    return PROCESS_SAMPLER
@@ -315,10 +315,6 @@ class MpFutureIterator:
         self.timeout = timeout
         self.past_time = time.time()
 
-        # update future list for cleaning
-        for future in future_list:
-            self.cluster.cl_future_list.append(future)
-
     def __iter__(self):
         """
         Iterate
@@ -36,6 +36,7 @@ import xarray as xr
 
 # CARS imports
 from cars.data_structures import cars_dataset, cars_dict
+from cars.orchestrator.cluster import speculative_execution, tracing
 from cars.orchestrator.cluster.mp_cluster.mp_tools import replace_data
 
 # Third party imports
@@ -73,6 +74,16 @@ class AbstractWrapper(metaclass=ABCMeta):
         :return: function to apply, overloaded key arguments
         """
 
+    def get_copy_kwargs(self, kwargs):
+        """
+        Get key arguments of a copy of a running task
+
+        :param kwargs: key arguments of running task
+
+        :return: key arguments of copy
+        """
+        return kwargs.copy()
+
     @abstractmethod
     def cleanup(self):
         """
@@ -159,6 +170,9 @@ class WrapperDisk(AbstractWrapper):
             os.makedirs(self.tmp_dir)
 
         self.current_object_id = 0
+        # negative ids for copies of tasks, not to collide with
+        # ids given in main thread
+        self.current_copy_id = 0
 
         # Create a thead pool for removing data
         self.removing_pool = ThreadPool(1)
@@ -222,6 +236,24 @@ class WrapperDisk(AbstractWrapper):
 
         return new_func, new_kwargs
 
+    def get_copy_kwargs(self, kwargs):
+        """
+        Get key arguments of a copy of a running task,
+        dumping its results with new ids
+
+        :param kwargs: key arguments of running task
+
+        :return: key arguments of copy
+        """
+        id_list = []
+        for _ in kwargs["id_list"]:
+            self.current_copy_id -= 1
+            id_list.append(self.current_copy_id)
+        new_kwargs = kwargs.copy()
+        new_kwargs["id_list"] = id_list
+
+        return new_kwargs
+
     def get_obj(self, obj):
         """
         Get Object
@@ -283,15 +315,22 @@ def disk_wrapper_fun(*argv, **kwargs):
             )
         ) from exc
 
+    trace_dir = kwargs.get(tracing.TRACE_DIR)
+    stage = speculative_execution.get_task_stage(func, kwargs)
+
     # load args
-    loaded_argv = load_args_or_kwargs(argv)
-    loaded_kwargs = load_args_or_kwargs(kwargs)
+    with tracing.trace_span(trace_dir, stage, tracing.LOAD):
+        loaded_argv = load_args_or_kwargs(argv)
+        loaded_kwargs = load_args_or_kwargs(kwargs)
 
     # call function
     res = func(*loaded_argv[:], **loaded_kwargs)
 
     if res is not None:
-        to_disk_res = dump(res, tmp_dir, id_list)
+        with tracing.trace_span(
+            trace_dir, stage, tracing.DUMP, bytes_out=tracing.get_data_size(res)
+        ):
+            to_disk_res = dump(res, tmp_dir, id_list)
     else:
         to_disk_res = res
 
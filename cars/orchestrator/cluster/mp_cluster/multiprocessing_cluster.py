@@ -21,6 +21,7 @@
 """
 Contains abstract function for multiprocessing Cluster
 """
+
 # pylint: disable=C0302
 
 import copy
@@ -47,8 +48,12 @@ from json_checker import And, Checker, Or
 from cars.core import cars_logging
 
 # CARS imports
-from cars.orchestrator.cluster import abstract_cluster
-from cars.orchestrator.cluster.log_wrapper import cars_profile
+from cars.orchestrator.cluster import (
+    abstract_cluster,
+    speculative_execution,
+    task_threads,
+)
+from cars.orchestrator.cluster.log_wrapper import cars_profile, warmup_worker
 from cars.orchestrator.cluster.mp_cluster import mp_factorizer, mp_wrapper
 from cars.orchestrator.cluster.mp_cluster.mp_objects import (
     FactorizedObject,
@@ -110,6 +115,16 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
         self.per_job_timeout = self.checked_conf_cluster["per_job_timeout"]
         self.profiling = self.checked_conf_cluster["profiling"]
         self.factorize_tasks = self.checked_conf_cluster["factorize_tasks"]
+        # threads shared by tasks, all available CPUs by default
+        self.max_threads = self.checked_conf_cluster["max_threads"]
+        if self.max_threads is None:
+            self.max_threads = max(
+                task_threads.get_available_cpus(), self.nb_workers
+            )
+        self.speculative_execution = self.checked_conf_cluster[
+            "speculative_execution"
+        ]
+        self.speculative_stats = speculative_execution.SpeculativeStats()
         # Set multiprocessing mode
         # forkserver is used, to allow OMP to be used in numba
         mp_mode = "spawn" if IS_WIN else "forkserver"
@@ -145,7 +160,8 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
             ctx_in_main.set_forkserver_preload(["cars", "cars.pipelines"])
             self.pool = ctx_in_main.Pool(
                 self.nb_workers,
-                initializer=freeze_support,
+                initializer=initialize_worker,
+                initargs=(self.worker_log_dir, self.log_level),
                 maxtasksperchild=self.max_tasks_per_worker,
             )
 
@@ -170,6 +186,9 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
                     self.cl_future_list,
                     self.nb_workers,
                     self.wrapper,
+                    task_threads.ThreadsBudget(self.max_threads),
+                    self.speculative_execution,
+                    self.speculative_stats,
                 ),
             )
             self.refresh_worker.daemon = True
@@ -218,6 +237,10 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
         overloaded_conf["dump_to_disk"] = conf.get("dump_to_disk", True)
         overloaded_conf["per_job_timeout"] = conf.get("per_job_timeout", 600)
         overloaded_conf["factorize_tasks"] = conf.get("factorize_tasks", True)
+        overloaded_conf["max_threads"] = conf.get("max_threads", None)
+        overloaded_conf["speculative_execution"] = conf.get(
+            "speculative_execution", False
+        )
         overloaded_conf["profiling"] = conf.get("profiling", {})
 
         cluster_schema = {
@@ -230,6 +253,8 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
             "per_job_timeout": Or(float, int),
             "profiling": dict,
             "factorize_tasks": bool,
+            "max_threads": Or(None, int),
+            "speculative_execution": bool,
         }
 
         # Check conf
@@ -326,6 +351,9 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
         if self.factorize_tasks:
             mp_factorizer.factorize_delayed(task_list)
         future_list = [self.rec_start(task, memorize) for task in task_list]
+        # keep results of futures until they are given by an iterator:
+        # futures can be iterated long after they are started
+        self.cl_future_list.extend(future_list)
         # signal that we reached the end of this batch
         self.queue.put("END_BATCH")
         return future_list
@@ -423,6 +451,9 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
         cl_future_list,
         nb_workers,
         wrapper_obj,
+        threads_budget,
+        speculative,
+        speculative_stats,
     ):
         """
         Refresh task cache
@@ -432,12 +463,22 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
         :param per_job_timeout: per job timeout
         :param cl_future_list: current future list used in iterator
         :param nb_workers:  number of workers
+        :param threads_budget: threads available for tasks
+        :param speculative: copy straggler tasks on idle workers
+        :param speculative_stats: numbers of copies and abandoned runs
         """
         thread = threading.current_thread()
 
         # initialize lists
         wait_list = {}
         in_progress_list = {}
+        in_progress_threads = {}
+        # stage, start time and launched task, by running job
+        in_progress_launch = {}
+        # copies of straggler jobs, and copies no longer needed
+        copy_list = {}
+        abandoned_copies = []
+        stage_durations = {}
         dependencies_list = {}
         done_task_results = {}
         job_ids_to_launch_prioritized = []
@@ -468,11 +509,28 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
             # check for ready results
             done_list = []
             next_priority_tasks = []
-            for job_id, job_id_progress in in_progress_list.items():
-                if job_id_progress.ready():
+            for job_id, job_id_original in in_progress_list.items():
+                job_id_progress = select_finished_copy(
+                    job_id_original, copy_list.get(job_id)
+                )
+                if job_id_progress is not None:
+                    if job_id in copy_list:
+                        job_id_copy = copy_list.pop(job_id)
+                        if job_id_progress is job_id_copy:
+                            logging.info(
+                                "Copy of job {} finished first".format(job_id)
+                            )
+                            abandoned_copies.append(job_id_original)
+                        else:
+                            abandoned_copies.append(job_id_copy)
+                        speculative_stats.nb_abandoned += 1
                     try:
                         res = job_id_progress.get(timeout=per_job_timeout)
                         success = True
+                        stage, start_time = in_progress_launch[job_id][:2]
+                        stage_durations.setdefault(stage, []).append(
+                            time.time() - start_time
+                        )
                     except:  # pylint: disable=W0702 # noqa: B001, E722
                         res = traceback.format_exc()
                         success = False
@@ -494,6 +552,8 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
             for job_id in done_list:
                 # delete
                 del in_progress_list[job_id]
+                del in_progress_launch[job_id]
+                threads_budget.release(in_progress_threads.pop(job_id))
                 # copy results to futures
                 # (they remove themselves from task_cache
                 task_cache[job_id].set(done_task_results[job_id])
@@ -535,11 +595,68 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
                 # replace jobs by real data
                 new_args = replace_job_by_data(args, done_task_results)
                 new_kw_args = replace_job_by_data(kw_args, done_task_results)
+                # give threads to task
+                nb_threads = 1
+                if new_kw_args.get(task_threads.TASK_NB_THREADS) is not None:
+                    nb_threads = threads_budget.acquire(
+                        new_kw_args[task_threads.TASK_NB_THREADS],
+                        nb_waiting_tasks=len(job_ids_to_launch_prioritized),
+                    )
+                    new_kw_args[task_threads.TASK_NB_THREADS] = nb_threads
+                else:
+                    threads_budget.acquire(1)
+                in_progress_threads[job_id] = nb_threads
                 # launch task
                 in_progress_list[job_id] = pool.apply_async(
                     func, args=new_args, kwds=new_kw_args
                 )
+                in_progress_launch[job_id] = (
+                    speculative_execution.get_task_stage(func, new_kw_args),
+                    time.time(),
+                    func,
+                    new_args,
+                    new_kw_args,
+                )
                 del wait_list[job_id]
+
+            # clean finished copies no longer needed
+            for abandoned in list(abandoned_copies):
+                if abandoned.ready():
+                    abandoned_copies.remove(abandoned)
+                    if abandoned.successful():
+                        wrapper_obj.cleanup_future_res(abandoned.get())
+
+            # copy straggler jobs on idle workers, once no job is waiting
+            nb_idle_workers = nb_workers - (
+                len(in_progress_list) + len(copy_list) + len(abandoned_copies)
+            )
+            if (
+                speculative
+                and len(job_ids_to_launch_prioritized) == 0
+                and nb_idle_workers > 0
+            ):
+                now = time.time()
+                running_jobs = {
+                    job_id: (launch[0], now - launch[1])
+                    for job_id, launch in in_progress_launch.items()
+                    if job_id not in copy_list
+                }
+                straggler_jobs = speculative_execution.get_straggler_tasks(
+                    running_jobs,
+                    speculative_execution.get_stage_medians(stage_durations),
+                )
+                for job_id in straggler_jobs[:nb_idle_workers]:
+                    logging.info("Copy straggler job {}".format(job_id))
+                    _, _, func, new_args, new_kw_args = in_progress_launch[
+                        job_id
+                    ]
+                    copy_list[job_id] = pool.apply_async(
+                        func,
+                        args=new_args,
+                        kwds=wrapper_obj.get_copy_kwargs(new_kw_args),
+                    )
+                    speculative_stats.nb_copies += 1
+
             # find done jobs that can be cleaned
             cleanable_jobid = []
 
@@ -624,6 +741,44 @@ class MultiprocessingCluster(abstract_cluster.AbstractCluster):
         return MpFutureIterator(future_list, self, timeout=timeout)
 
 
+def initialize_worker(log_dir, log_level):
+    """
+    Initialize pool worker, loading numba functions before its first task
+
+    :param log_dir: output directory of worker logs
+    :param log_level: logging level of the worker logs
+    """
+    freeze_support()
+    warmup_worker(log_dir, log_level)
+
+
+def select_finished_copy(original, job_copy):
+    """
+    Select finished run of a job, between original and its copy:
+    the first successful one, or the original if both failed
+
+    :param original: original run of job
+    :type original: AsyncResult
+    :param job_copy: copy of job, None if not copied
+    :type job_copy: AsyncResult
+
+    :return: finished run, None if job is not finished
+    :rtype: AsyncResult
+    """
+    if job_copy is None:
+        return original if original.ready() else None
+
+    ready_runs = [run for run in (original, job_copy) if run.ready()]
+    for run in ready_runs:
+        if run.successful():
+            return run
+    if len(ready_runs) == 2:
+        return original
+
+    # the only finished run failed: wait for the other one
+    return None
+
+
 def get_job_ids_from_futures(future_list):
     """
     Get list of jobs ids in future list
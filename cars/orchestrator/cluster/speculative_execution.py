@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Contains functions finding straggler tasks: tasks running much longer
+than the other tasks of their stage. Once no task is waiting, clusters copy
+them on idle workers and keep the first finished copy.
+"""
+
+# Third party imports
+import numpy as np
+
+# CARS imports
+from cars.orchestrator.cluster import task_threads
+
+# A task is a straggler when running longer than SPECULATIVE_RATIO times
+# the reference duration of its stage, and longer than
+# SPECULATIVE_MIN_ELAPSED seconds
+SPECULATIVE_RATIO = 2
+SPECULATIVE_MIN_ELAPSED = 1
+# Number of finished tasks of a stage needed to compute its median duration
+SPECULATIVE_MIN_SAMPLES = 3
+
+# Key arguments holding the function run by a task, most inner first
+STAGE_FUNCTION_KEYS = [
+    "fun_log_wrapper",
+    task_threads.FUN_THREADS_WRAPPER,
+    "log_fun",
+    "fun",
+]
+
+
+def get_task_stage(func, kwargs):
+    """
+    Get stage of task: name of the function run by task,
+    under the wrappers added by clusters
+
+    :param func: function of task
+    :param kwargs: key arguments of task
+    :type kwargs: dict
+
+    :return: stage name
+    :rtype: str
+    """
+    stage_function = func
+    for key in STAGE_FUNCTION_KEYS:
+        if callable(kwargs.get(key)):
+            stage_function = kwargs[key]
+            break
+
+    return getattr(stage_function, "__name__", repr(stage_function))
+
+
+def get_stage_medians(stage_durations, min_samples=SPECULATIVE_MIN_SAMPLES):
+    """
+    Get median duration of stages with enough finished tasks
+
+    :param stage_durations: durations of finished tasks, by stage
+    :type stage_durations: dict
+    :param min_samples: minimum number of finished tasks
+    :type min_samples: int
+
+    :return: median duration, by stage
+    :rtype: dict
+    """
+    return {
+        stage: float(np.median(durations))
+        for stage, durations in stage_durations.items()
+        if len(durations) >= min_samples
+    }
+
+
+def get_straggler_tasks(running_tasks, stage_references):
+    """
+    Get running tasks lasting longer than SPECULATIVE_RATIO times
+    the reference duration of their stage, the slowest first
+
+    :param running_tasks: stage and elapsed time of running tasks, by task
+    :type running_tasks: dict
+    :param stage_references: reference duration, by stage
+    :type stage_references: dict
+
+    :return: straggler tasks
+    :rtype: list
+    """
+    slowness = {}
+    for task, (stage, elapsed) in running_tasks.items():
+        reference = stage_references.get(stage)
+        if (
+            reference is not None
+            and reference > 0
+            and elapsed > SPECULATIVE_MIN_ELAPSED
+            and elapsed > SPECULATIVE_RATIO * reference
+        ):
+            slowness[task] = elapsed / reference
+
+    return sorted(slowness, key=slowness.get, reverse=True)
+
+
+class SpeculativeStats:  # pylint: disable=too-few-public-methods
+    """
+    SpeculativeStats: numbers of straggler tasks copied, and of runs
+    abandoned because the other run of their task finished first
+    """
+
+    def __init__(self):
+        """
+        Init function of SpeculativeStats
+        """
+        self.nb_copies = 0
+        self.nb_abandoned = 0
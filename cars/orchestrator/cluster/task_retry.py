@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Contains functions managing the retry of tasks: tasks may declare key
+arguments replacing theirs when they are retried, after a timeout or the
+loss of their worker, instead of being run again identically.
+"""
+
+# Key arguments added to tasks
+TASK_RETRY = "task_retry"
+FUN_RETRY_WRAPPER = "fun_retry_wrapper"
+
+
+class TaskRetry:  # pylint: disable=too-few-public-methods
+    """
+    TaskRetry
+
+    Retry state shared by the tasks created by a cluster. Tasks read it
+    when they are sent to workers: tasks started while retried is set run
+    with their retry key arguments.
+    """
+
+    def __init__(self):
+        """
+        Init function of TaskRetry
+        """
+        self.retried = False
+
+
+def retry_function(*argv, **kwargs):
+    """
+    Run function, with its retry key arguments if its task is retried
+
+    :param argv: args of func
+    :param kwargs: kwargs of func
+
+    :return: result of func
+    """
+    func = kwargs.pop(FUN_RETRY_WRAPPER)
+    task_retry, retry_kwargs = kwargs.pop(TASK_RETRY)
+
+    if task_retry.retried:
+        kwargs.update(retry_kwargs)
+
+    return func(*argv, **kwargs)
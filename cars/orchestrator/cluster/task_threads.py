@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Contains functions managing the number of threads used by tasks:
+each task declares a number of threads, and clusters give out threads
+from a CPU budget shared by all the tasks of the node.
+"""
+
+# Standard imports
+import multiprocessing as mp
+import os
+import platform
+import threading
+from contextlib import contextmanager
+
+# Third party imports
+import numba
+import rasterio as rio
+
+# Key arguments added to tasks
+TASK_NB_THREADS = "task_nb_threads"
+FUN_THREADS_WRAPPER = "fun_threads_wrapper"
+
+
+def get_available_cpus():
+    """
+    Get number of CPUs available for current process
+
+    :return: number of CPUs
+    :rtype: int
+    """
+    if platform.system().lower() == "windows":
+        return mp.cpu_count()
+    return len(os.sched_getaffinity(0))
+
+
+def threads_function(*argv, **kwargs):
+    """
+    Run function with the number of threads given to its task,
+    if task declares it
+
+    :param argv: args of func
+    :param kwargs: kwargs of func
+
+    :return: result of func
+    """
+    func = kwargs.pop(FUN_THREADS_WRAPPER)
+    nb_threads = kwargs.pop(TASK_NB_THREADS)
+
+    if nb_threads is None:
+        return func(*argv, **kwargs)
+
+    with task_threads(nb_threads):
+        res = func(*argv, **kwargs)
+
+    return res
+
+
+@contextmanager
+def task_threads(nb_threads):
+    """
+    Set number of threads used by numba parallel functions and GDAL
+    in current thread
+
+    :param nb_threads: number of threads
+    :type nb_threads: int
+    """
+    max_numba_threads = numba.config.NUMBA_NUM_THREADS  # pylint: disable=E1101
+    nb_numba_threads = max(1, min(nb_threads, max_numba_threads))
+    previous_numba_threads = numba.get_num_threads()
+    numba.set_num_threads(nb_numba_threads)
+    try:
+        with rio.Env(GDAL_NUM_THREADS=str(nb_threads)):
+            yield
+    finally:
+        numba.set_num_threads(previous_numba_threads)
+
+
+class ThreadsBudget:
+    """
+    ThreadsBudget
+
+    Number of threads available for tasks running on a node.
+    A task gets the threads it asks, within its share of the free threads:
+    many tasks waiting means one thread each, while the last tasks of a run
+    share all the cores.
+    """
+
+    def __init__(self, max_threads):
+        """
+        Init function of ThreadsBudget
+
+        :param max_threads: number of threads of the node
+        :type max_threads: int
+        """
+        self.max_threads = max_threads
+        self.used_threads = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, nb_threads, nb_waiting_tasks=0):
+        """
+        Give threads to a task
+
+        :param nb_threads: number of threads asked by task
+        :type nb_threads: int
+        :param nb_waiting_tasks: number of tasks waiting to be launched
+        :type nb_waiting_tasks: int
+
+        :return: number of threads given, at least 1
+        :rtype: int
+        """
+        with self.lock:
+            free_threads = self.max_threads - self.used_threads
+            share = free_threads // (nb_waiting_tasks + 1)
+            given_threads = max(1, min(nb_threads, share))
+            self.used_threads += given_threads
+        return given_threads
+
+    def release(self, nb_threads):
+        """
+        Give back threads of a finished task
+
+        :param nb_threads: number of threads given to task
+        :type nb_threads: int
+        """
+        with self.lock:
+            self.used_threads -= nb_threads
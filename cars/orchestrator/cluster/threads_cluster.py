@@ -0,0 +1,489 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Contains functions for threads cluster:
+tasks are run by a pool of threads of the main process
+"""
+
+# Standard imports
+import importlib
+import logging
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from functools import wraps
+
+# Third party imports
+import numba
+from json_checker import And, Checker, Or
+from rasterio.env import set_gdal_config
+
+# CARS imports
+from cars.orchestrator.cluster import abstract_cluster, task_threads
+from cars.orchestrator.cluster.mp_cluster.mp_tools import replace_data
+
+
+@abstract_cluster.AbstractCluster.register_subclass("threads")
+class ThreadsCluster(abstract_cluster.AbstractCluster):
+    """
+    ThreadsCluster
+
+    Tasks are run by threads of the main process: data are passed by
+    reference between tasks, without serialization.
+    Efficient when tasks mostly run code releasing the GIL
+    (numba, C extensions, rasterio I/O).
+    """
+
+    def __init__(self, conf_cluster, out_dir, launch_worker=True):
+        """
+        Init function of ThreadsCluster
+
+        :param conf_cluster: configuration for cluster
+
+        """
+        # call parent init
+        super().__init__(conf_cluster, out_dir, launch_worker=launch_worker)
+
+        # retrieve parameters
+        self.nb_workers = self.checked_conf_cluster["nb_workers"]
+        # threads shared by tasks, all available CPUs by default
+        self.max_threads = self.checked_conf_cluster["max_threads"]
+        if self.max_threads is None:
+            self.max_threads = max(
+                task_threads.get_available_cpus(), self.nb_workers
+            )
+        self.task_timeout = self.checked_conf_cluster["task_timeout"]
+        self.profiling = self.checked_conf_cluster["profiling"]
+        self.out_dir = out_dir
+        self.launch_worker = launch_worker
+
+        if self.launch_worker:
+            set_threads_settings(self.nb_workers)
+            self.pool = ThreadPoolExecutor(
+                max_workers=self.nb_workers, thread_name_prefix="cars_worker"
+            )
+            self.threads_budget = task_threads.ThreadsBudget(self.max_threads)
+            self.nb_waiting_tasks = 0
+            self.waiting_lock = threading.Lock()
+            # tasks still running after a timeout are not waited for
+            self.timed_out = False
+
+    def check_conf(self, conf):
+        """
+        Check configuration
+
+        :param conf: configuration to check
+        :type conf: dict
+
+        :return: overloaded configuration
+        :rtype: dict
+
+        """
+
+        # init conf
+        if conf is not None:
+            overloaded_conf = conf.copy()
+        else:
+            conf = {}
+            overloaded_conf = {}
+
+        available_cpu = task_threads.get_available_cpus()
+
+        # Overload conf
+        overloaded_conf["mode"] = conf.get("mode", "threads")
+        nb_workers = conf.get("nb_workers", 2)
+        overloaded_conf["nb_workers"] = min(available_cpu, nb_workers)
+        overloaded_conf["max_ram_per_worker"] = conf.get(
+            "max_ram_per_worker", 2000
+        )
+        overloaded_conf["max_threads"] = conf.get("max_threads", None)
+        overloaded_conf["task_timeout"] = conf.get("task_timeout", 600)
+        overloaded_conf["profiling"] = conf.get("profiling", {})
+
+        cluster_schema = {
+            "mode": str,
+            "nb_workers": And(int, lambda x: x > 0),
+            "max_ram_per_worker": And(Or(float, int), lambda x: x > 0),
+            "max_threads": Or(None, int),
+            "task_timeout": And(int, lambda x: x > 0),
+            "profiling": dict,
+        }
+
+        # Check conf
+        checker = Checker(cluster_schema)
+        checker.validate(overloaded_conf)
+
+        return overloaded_conf
+
+    def get_delayed_type(self):
+        """
+        Get delayed type
+        """
+        return ThreadDelayed
+
+    def cleanup(self):
+        """
+        Cleanup cluster: tasks still running after a timeout are not
+        waited for, they may never end
+
+        """
+        if self.launch_worker:
+            self.pool.shutdown(wait=not self.timed_out, cancel_futures=True)
+
+    def scatter(self, data, broadcast=True):  # pylint: disable=W0613
+        """
+        Distribute data through workers
+
+        :param data: task data
+        """
+        return data
+
+    def create_task_wrapped(self, func, nout=1):
+        """
+        Create task
+
+        :param func: function
+        :param nout: number of outputs
+        """
+
+        @wraps(func)
+        def thread_delayed_builder(*argv, **kwargs):
+            """
+            Create a ThreadDelayed builder
+
+            :param argv: args of func
+            :param kwargs: kwargs of func
+            """
+            delayed_task = ThreadDelayedTask(func, list(argv), kwargs)
+
+            if nout == 1:
+                return ThreadDelayed(delayed_task)
+
+            return tuple(
+                ThreadDelayed(delayed_task, return_index=idx)
+                for idx in range(nout)
+            )
+
+        return thread_delayed_builder
+
+    def start_tasks(self, task_list):
+        """
+        Start all tasks
+
+        :param task_list: task list
+        """
+        memorize = {}
+        return [
+            ThreadFuture(
+                self.rec_start(delayed.delayed_task, memorize),
+                delayed.return_index,
+            )
+            for delayed in task_list
+        ]
+
+    def rec_start(self, delayed_task, memorize):
+        """
+        Start task, once the tasks it depends on are done.
+        No worker thread is blocked waiting for a dependency.
+
+        :param delayed_task: task to start
+        :type delayed_task: ThreadDelayedTask
+        :param memorize: futures of tasks already started
+
+        :return: future of task
+        :rtype: concurrent.futures.Future
+        """
+        if delayed_task in memorize:
+            return memorize[delayed_task]
+
+        # start dependencies
+        dependencies = {}
+
+        def start_dependency(obj):
+            """
+            Start task of ThreadDelayed
+
+            :param obj: data
+            """
+            if isinstance(obj, ThreadDelayed):
+                dependencies[obj.delayed_task] = self.rec_start(
+                    obj.delayed_task, memorize
+                )
+            return obj
+
+        replace_data(delayed_task.args, start_dependency)
+        replace_data(delayed_task.kw_args, start_dependency)
+
+        task_future = Future()
+        memorize[delayed_task] = task_future
+
+        if len(dependencies) == 0:
+            self.submit(delayed_task, dependencies, task_future)
+            return task_future
+
+        # submit when last dependency is done
+        nb_remaining = [len(dependencies)]
+        lock = threading.Lock()
+
+        def dependency_done(_):
+            """
+            Submit task if all dependencies are done
+            """
+            with lock:
+                nb_remaining[0] -= 1
+                all_done = nb_remaining[0] == 0
+            if all_done:
+                self.submit(delayed_task, dependencies, task_future)
+
+        for dependency_future in dependencies.values():
+            dependency_future.add_done_callback(dependency_done)
+
+        return task_future
+
+    def submit(self, delayed_task, dependencies, task_future):
+        """
+        Submit task to pool
+
+        :param delayed_task: task to run
+        :type delayed_task: ThreadDelayedTask
+        :param dependencies: futures of tasks it depends on
+        :type dependencies: dict
+        :param task_future: future to fill with result
+        :type task_future: concurrent.futures.Future
+        """
+        with self.waiting_lock:
+            self.nb_waiting_tasks += 1
+        self.pool.submit(
+            self.run_task_in_budget, delayed_task, dependencies, task_future
+        )
+
+    def run_task_in_budget(self, delayed_task, dependencies, task_future):
+        """
+        Run task with the threads given by threads budget
+
+        :param delayed_task: task to run
+        :type delayed_task: ThreadDelayedTask
+        :param dependencies: futures of tasks it depends on
+        :type dependencies: dict
+        :param task_future: future to fill with result
+        :type task_future: concurrent.futures.Future
+        """
+        with self.waiting_lock:
+            self.nb_waiting_tasks -= 1
+            nb_waiting_tasks = self.nb_waiting_tasks
+
+        nb_threads = self.threads_budget.acquire(
+            delayed_task.kw_args.get(task_threads.TASK_NB_THREADS) or 1,
+            nb_waiting_tasks=nb_waiting_tasks,
+        )
+        try:
+            run_task(
+                delayed_task, dependencies, task_future, nb_threads=nb_threads
+            )
+        finally:
+            self.threads_budget.release(nb_threads)
+
+    def future_iterator(self, future_list, timeout=None):
+        """
+        Iterator, iterating on computed futures
+
+        :param future_list: future_list list
+        :param timeout: time to wait for next job
+        """
+        futures = {future.task_future: [] for future in future_list}
+        for future in future_list:
+            futures[future.task_future].append(future)
+
+        pending = set(futures.keys())
+        while len(pending) > 0:
+            done, pending = wait(
+                pending, timeout=timeout, return_when=FIRST_COMPLETED
+            )
+            if len(done) == 0:
+                self.timed_out = True
+                raise TimeoutError("No task completed before timeout")
+            for task_future in done:
+                for future in futures.pop(task_future):
+                    # release result once returned
+                    yield future.release()
+
+
+class ThreadDelayedTask:  # pylint: disable=too-few-public-methods
+    """
+    ThreadDelayedTask: function to run, with its arguments
+    """
+
+    def __init__(self, func, args, kw_args):
+        """
+        Init function of ThreadDelayedTask
+
+        :param func: function to run
+        :param args: args of function
+        :param kw_args: kwargs of function
+        """
+        self.func = func
+        self.args = args
+        self.kw_args = kw_args
+
+
+class ThreadDelayed:  # pylint: disable=too-few-public-methods
+    """
+    ThreadDelayed: output of a ThreadDelayedTask
+    """
+
+    def __init__(self, delayed_task, return_index=None):
+        """
+        Init function of ThreadDelayed
+
+        :param delayed_task: task computing the output
+        :type delayed_task: ThreadDelayedTask
+        :param return_index: index of output, None if single output
+        """
+        self.delayed_task = delayed_task
+        self.return_index = return_index
+
+
+class ThreadFuture:  # pylint: disable=too-few-public-methods
+    """
+    ThreadFuture: future of a ThreadDelayed
+    """
+
+    def __init__(self, task_future, return_index=None):
+        """
+        Init function of ThreadFuture
+
+        :param task_future: future of task
+        :type task_future: concurrent.futures.Future
+        :param return_index: index of output, None if single output
+        """
+        self.task_future = task_future
+        self.return_index = return_index
+
+    def release(self):
+        """
+        Get result, and release the task future
+
+        :return: result
+        """
+        res = get_output(self.task_future, self.return_index)
+        self.task_future = None
+        return res
+
+
+def get_output(task_future, return_index):
+    """
+    Get output of a done task
+
+    :param task_future: future of task
+    :type task_future: concurrent.futures.Future
+    :param return_index: index of output, None if single output
+
+    :return: output
+    """
+    res = task_future.result()
+    if return_index is not None:
+        res = res[return_index]
+    return res
+
+
+def run_task(delayed_task, dependencies, task_future, nb_threads=None):
+    """
+    Run task in worker thread, with outputs of its dependencies as inputs
+
+    :param delayed_task: task to run
+    :type delayed_task: ThreadDelayedTask
+    :param dependencies: futures of tasks it depends on
+    :type dependencies: dict
+    :param task_future: future to fill with result
+    :type task_future: concurrent.futures.Future
+    :param nb_threads: number of threads given to task
+    :type nb_threads: int
+    """
+    if not task_future.set_running_or_notify_cancel():
+        return
+
+    def get_data(obj):
+        """
+        Replace ThreadDelayed by its output
+
+        :param obj: data
+        """
+        if isinstance(obj, ThreadDelayed):
+            return get_output(dependencies[obj.delayed_task], obj.return_index)
+        return obj
+
+    try:
+        args = replace_data(delayed_task.args, get_data)
+        kw_args = replace_data(delayed_task.kw_args, get_data)
+        if (
+            nb_threads is not None
+            and kw_args.get(task_threads.TASK_NB_THREADS) is not None
+        ):
+            kw_args[task_threads.TASK_NB_THREADS] = nb_threads
+        task_future.set_result(delayed_task.func(*args, **kw_args))
+    except Exception as worker_error:  # pylint: disable=broad-except
+        logging.exception(worker_error, exc_info=True)
+        task_future.set_exception(worker_error)
+
+
+def set_threads_settings(nb_workers):
+    """
+    Adapt numba and GDAL settings to workers sharing the process:
+
+    - numba parallel functions are called concurrently by workers: a
+      threadsafe threading layer is needed. omp is used: tbb is threadsafe
+      but its pool, started by worker threads, hangs the process at exit
+    - GDAL block cache is shared by all workers: its size is the
+      cache of one worker, multiplied by the number of workers
+
+    :param nb_workers: number of worker threads
+    :type nb_workers: int
+    """
+
+    if "NUMBA_THREADING_LAYER" not in os.environ:
+        try:
+            current_layer = numba.threading_layer()
+        except ValueError:
+            # threading layer not launched yet
+            current_layer = None
+            try:
+                importlib.import_module("numba.np.ufunc.omppool")
+                numba.config.THREADING_LAYER = "omp"
+                current_layer = "omp"
+            except ImportError:
+                pass
+        if current_layer != "omp":
+            logging.warning(
+                "numba omp threading layer is not available: parallel "
+                "numba functions used by threads cluster may not be "
+                "threadsafe, or may hang the process at exit"
+            )
+
+    cache_max = os.environ.get("GDAL_CACHEMAX", "")
+    if cache_max.isdigit():
+        set_gdal_config(
+            "GDAL_CACHEMAX", int(cache_max) * 1024 * 1024 * nb_workers
+        )
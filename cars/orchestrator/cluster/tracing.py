@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Contains functions tracing tasks: each process appends the spans of its
+tasks (waiting, computing, loading, dumping, saving) to its own JSON lines
+file, merged at the end in a Chrome trace viewable with Perfetto.
+"""
+
+# Standard imports
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+# CARS imports
+from cars.orchestrator.cluster import memory_sampling, speculative_execution
+
+# Key arguments added to tasks
+FUN_TRACE_WRAPPER = "fun_trace_wrapper"
+TRACE_DIR = "trace_dir"
+TASK_CREATION_TIME = "task_creation_time"
+
+# Time between two samples of resident memory of tasks, in seconds
+RSS_SAMPLING_INTERVAL = 0.1
+
+# Trace files opened by current process, by path
+TRACE_FILES = {}
+TRACE_FILES_LOCK = threading.Lock()
+
+# Span categories
+WAIT = "wait"
+COMPUTE = "compute"
+LOAD = "load"
+DUMP = "dump"
+SAVE = "save"
+
+
+def get_trace_dir(out_dir):
+    """
+    Get directory of trace files of processes
+
+    :param out_dir: output directory
+    :type out_dir: str
+
+    :return: trace directory
+    :rtype: str
+    """
+    return os.path.join(out_dir, "logs", "trace")
+
+
+def traced_function(*argv, **kwargs):
+    """
+    Run function, tracing the time its task waited since its creation,
+    and its computation. Peak resident memory of the task is the maximum
+    of the process resident memory sampled while it runs.
+
+    :param argv: args of func
+    :param kwargs: kwargs of func
+
+    :return: result of func
+    """
+    func = kwargs.pop(FUN_TRACE_WRAPPER)
+    trace_dir = kwargs.pop(TRACE_DIR)
+    creation_time = kwargs.pop(TASK_CREATION_TIME)
+
+    stage = speculative_execution.get_task_stage(func, kwargs)
+    bytes_in = get_data_size(argv) + get_data_size(kwargs)
+
+    sampler = memory_sampling.get_process_sampler(RSS_SAMPLING_INTERVAL)
+    window_id = sampler.open_window()
+    start_time = time.time()
+    try:
+        res = func(*argv, **kwargs)
+    finally:
+        end_time = time.time()
+        peak_rss, _ = sampler.close_window(window_id)
+
+    write_events(
+        trace_dir,
+        [
+            create_event(stage, WAIT, creation_time, start_time),
+            create_event(
+                stage,
+                COMPUTE,
+                start_time,
+                end_time,
+                bytes_in=bytes_in,
+                bytes_out=get_data_size(res),
+                peak_rss_mb=peak_rss,
+            ),
+        ],
+    )
+
+    return res
+
+
+@contextmanager
+def trace_span(trace_dir, name, category, **span_args):
+    """
+    Trace span of code run in context
+
+    :param trace_dir: trace directory, nothing is traced if None
+    :type trace_dir: str
+    :param name: name of span
+    :type name: str
+    :param category: category of span
+    :type category: str
+    :param span_args: arguments of span
+    """
+    start_time = time.time()
+    try:
+        yield span_args
+    finally:
+        if trace_dir is not None:
+            write_events(
+                trace_dir,
+                [
+                    create_event(
+                        name, category, start_time, time.time(), **span_args
+                    )
+                ],
+            )
+
+
+def create_event(name, category, start_time, end_time, **span_args):
+    """
+    Create Chrome trace complete event, in current process and thread
+
+    :param name: name of span
+    :type name: str
+    :param category: category of span
+    :type category: str
+    :param start_time: start time of span, in seconds
+    :type start_time: float
+    :param end_time: end time of span, in seconds
+    :type end_time: float
+    :param span_args: arguments of span
+
+    :return: event
+    :rtype: dict
+    """
+    return {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": int(start_time * 1e6),
+        "dur": max(0, int((end_time - start_time) * 1e6)),
+        "pid": os.getpid(),
+        "tid": threading.get_native_id(),
+        "args": span_args,
+    }
+
+
+def write_events(trace_dir, events):
+    """
+    Append events to trace file of current process, kept open
+    for next events
+
+    :param trace_dir: trace directory
+    :type trace_dir: str
+    :param events: events
+    :type events: list(dict)
+    """
+    trace_file = os.path.join(
+        trace_dir, "trace-{}-{}.jsonl".format(socket.gethostname(), os.getpid())
+    )
+    lines = "".join(json.dumps(event) + "\n" for event in events)
+    try:
+        with TRACE_FILES_LOCK:
+            file_desc = TRACE_FILES.get(trace_file)
+            if file_desc is None:
+                # pylint: disable-next=consider-using-with
+                file_desc = open(trace_file, "a", encoding="utf-8")
+                TRACE_FILES[trace_file] = file_desc
+            file_desc.write(lines)
+            # events are readable by export, and kept if process is killed
+            file_desc.flush()
+    except OSError as exc:
+        logging.debug("Trace events not written: {}".format(exc))
+
+
+def close_trace_files(trace_dir):
+    """
+    Close trace files of trace directory opened by current process
+
+    :param trace_dir: trace directory
+    :type trace_dir: str
+    """
+    with TRACE_FILES_LOCK:
+        for trace_file in list(TRACE_FILES):
+            if os.path.dirname(trace_file) == trace_dir:
+                TRACE_FILES.pop(trace_file).close()
+
+
+def get_data_size(obj):
+    """
+    Get size of data held by object: arrays, datasets and dataframes,
+    possibly in lists, tuples or dicts
+
+    :param obj: object
+
+    :return: size in bytes
+    :rtype: int
+    """
+    size = 0
+    if isinstance(obj, (xr.Dataset, xr.DataArray, np.ndarray)):
+        size = int(obj.nbytes)
+    elif isinstance(obj, pd.DataFrame):
+        size = int(obj.memory_usage(index=False).sum())
+    elif isinstance(obj, (list, tuple)):
+        size = sum(get_data_size(item) for item in obj)
+    elif isinstance(obj, dict):
+        size = sum(get_data_size(item) for item in obj.values())
+
+    return size
+
+
+def export_chrome_trace(trace_dir, trace_file):
+    """
+    Merge trace files of processes in a Chrome trace file,
+    to open with Perfetto or chrome://tracing
+
+    :param trace_dir: trace directory
+    :type trace_dir: str
+    :param trace_file: Chrome trace file to write
+    :type trace_file: str
+    """
+    events = []
+    process_names = {}
+    for process_trace_file in sorted(
+        glob.glob(os.path.join(trace_dir, "trace-*.jsonl"))
+    ):
+        with open(process_trace_file, encoding="utf-8") as file_desc:
+            for line in file_desc:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # line of a process killed while writing
+                    continue
+                events.append(event)
+                process_names[event["pid"]] = os.path.basename(
+                    process_trace_file
+                )[len("trace-") : -len(".jsonl")]
+
+    if len(events) == 0:
+        logging.debug("No trace events in {}".format(trace_dir))
+        return
+
+    events.sort(key=lambda event: event["ts"])
+    for pid, process_name in process_names.items():
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": process_name},
+            }
+        )
+
+    with open(trace_file, "w", encoding="utf-8") as file_desc:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file_desc)
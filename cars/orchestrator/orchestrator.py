@@ -18,6 +18,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+# pylint: disable=too-many-lines
 """
 this module contains the orchestrator class
 """
@@ -34,16 +35,19 @@ import sys
 
 # Third party imports
 import tempfile
+import time
 import traceback
 
 import psutil
 from tqdm import tqdm
 
 # CARS imports
+from cars.core import inputs
 from cars.core.cars_logging import add_progress_message
 from cars.core.utils import safe_makedirs
 from cars.data_structures import cars_dataset
 from cars.orchestrator import achievement_tracker
+from cars.orchestrator.cluster import tracing
 from cars.orchestrator.cluster.abstract_cluster import AbstractCluster
 from cars.orchestrator.cluster.log_wrapper import cars_profile
 from cars.orchestrator.orchestrator_constants import (
@@ -137,6 +141,12 @@ class Orchestrator:
 
         self.orchestrator_conf = orchestrator_conf
 
+        # remove traces of a previous run
+        trace_dir = tracing.get_trace_dir(self.out_dir)
+        if self.launch_worker and os.path.exists(trace_dir):
+            tracing.close_trace_files(trace_dir)
+            shutil.rmtree(trace_dir)
+
         # init cluster
         self.cluster = AbstractCluster(  # pylint: disable=E0110
             orchestrator_conf, self.out_dir, launch_worker=self.launch_worker
@@ -187,6 +197,11 @@ class Orchestrator:
         # product index file
         self.product_index = {}
 
+        # delayed started by materialize, and futures of the ones
+        # not collected yet
+        self.started_delayed = {}
+        self.background_futures = {}
+
     def add_to_clean(self, tmp_dir):
         self.tmp_dir_list.append(tmp_dir)
 
@@ -209,6 +224,7 @@ class Orchestrator:
         cars_ds_name=None,
         optional_data=False,
         save_by_pair=False,
+        cog=False,
     ):
         """
         Save file to list in order to be saved later
@@ -222,6 +238,8 @@ class Orchestrator:
         :type optional_data: bool
         :param save_by_pair: True if data by pair
         :type save_by_pair: bool
+        :param cog: True if raster is saved as Cloud Optimized GeoTIFF
+        :type cog: bool
         """
 
         self.cars_ds_savers_registry.add_file_to_save(
@@ -232,6 +250,7 @@ class Orchestrator:
             nodata=nodata,
             optional_data=optional_data,
             save_by_pair=save_by_pair,
+            cog=cog,
         )
 
         # add name if exists
@@ -413,18 +432,28 @@ class Orchestrator:
             logging.info("Compute delayed ...")
             # Flatten to list
             if only_remaining_delayed is None:
-                delayed_objects = flatten_object(
-                    self.cars_ds_savers_registry.get_cars_datasets_list()
-                    + self.cars_ds_replacer_registry.get_cars_datasets_list()
-                    + self.cars_ds_compute_registry.get_cars_datasets_list(),
-                    self.cluster.get_delayed_type(),
+                delayed_objects = self.get_registered_delayed(
+                    excluded_ids=self.started_delayed
                 )
             else:
                 delayed_objects = only_remaining_delayed
 
+            # Save tiles in workers when possible
+            if self.cluster.save_on_workers:
+                delayed_objects = self.add_worker_saving(
+                    delayed_objects,
+                    clean_files=only_remaining_delayed is None
+                    and len(self.started_delayed) == 0,
+                )
+
             # Compute delayed
             future_objects = self.cluster.start_tasks(delayed_objects)
 
+            # Collect futures started in background by materialize
+            future_objects += list(self.background_futures.values())
+            self.background_futures = {}
+            self.started_delayed = {}
+
             # Save objects when they are computed
             logging.info("Wait for futures results ...")
             add_progress_message(
@@ -432,54 +461,9 @@ class Orchestrator:
                     " , ".join(list(set(self.cars_ds_names_info)))
                 )
             )
-            tqdm_message = "Tiles processing: "
-            # if loglevel > PROGRESS level tqdm display the data list
-            if logging.getLogger().getEffectiveLevel() > 21:
-                tqdm_message = "Processing Tiles: [ {} ] ...".format(
-                    " , ".join(list(set(self.cars_ds_names_info)))
-                )
-            pbar = tqdm(
-                total=len(future_objects),
-                desc=tqdm_message,
-                position=0,
-                leave=True,
-                file=sys.stdout,
-            )
             nb_tiles_computed = 0
-
             try:
-                for future_obj in self.cluster.future_iterator(
-                    future_objects, timeout=self.task_timeout
-                ):
-                    # get corresponding CarsDataset and save tile
-                    if future_obj is not None:
-
-                        # Apply function if exists
-                        final_function = None
-                        current_cars_ds = (
-                            self.cars_ds_savers_registry.get_cars_ds(future_obj)
-                        )
-                        if current_cars_ds is None:
-                            self.cars_ds_replacer_registry.get_cars_ds(
-                                future_obj
-                            )
-                        if current_cars_ds is not None:
-                            final_function = current_cars_ds.final_function
-                        if final_function is not None:
-                            future_obj = final_function(self, future_obj)
-                        # Save future if needs to
-                        self.cars_ds_savers_registry.save(future_obj)
-                        # Replace future in cars_ds if needs to
-                        self.cars_ds_replacer_registry.replace(future_obj)
-                        # notify tile profiler for new tile
-                        self.tile_profiler.add_tile(future_obj)
-                        # update achievement
-                        self.achievement_tracker.add_tile(future_obj)
-                        nb_tiles_computed += 1
-                    else:
-                        logging.debug("None tile: not saved")
-                    pbar.update()
-
+                nb_tiles_computed = self.save_computed_futures(future_objects)
             except TimeoutError:
                 logging.error("TimeOut")
 
@@ -494,9 +478,17 @@ class Orchestrator:
                 if only_remaining_delayed is None:
                     # First try
                     logging.error("Retry failed tasks ...")
+                    # tasks declaring retry arguments, such as dense
+                    # matching subdividing its tile, run with them
+                    task_retry = self.cluster.task_retry
+                    task_retry.retried = True
                     self.reset_cluster()
-                    del pbar
-                    self.compute_futures(only_remaining_delayed=remaining_tiles)
+                    try:
+                        self.compute_futures(
+                            only_remaining_delayed=remaining_tiles
+                        )
+                    finally:
+                        task_retry.retried = False
                 else:
                     # Second try
                     logging.error("Pipeline will pursue without these tiles")
@@ -518,6 +510,260 @@ class Orchestrator:
                 "orchestrator launch_worker is False, no metadata.json saved"
             )
 
+    def get_registered_delayed(self, excluded_ids=()):
+        """
+        Get delayed of all CarsDatasets registered in registries
+
+        :param excluded_ids: ids of delayed not to return
+        :type excluded_ids: dict or set
+
+        :return: list of delayed
+        """
+
+        return [
+            obj
+            for obj in flatten_object(
+                self.cars_ds_savers_registry.get_cars_datasets_list()
+                + self.cars_ds_replacer_registry.get_cars_datasets_list()
+                + self.cars_ds_compute_registry.get_cars_datasets_list(),
+                self.cluster.get_delayed_type(),
+            )
+            if id(obj) not in excluded_ids
+        ]
+
+    def save_computed_futures(self, future_objects):
+        """
+        Wait for futures, and save and replace them in their CarsDatasets
+        as soon as they are computed
+
+        :param future_objects: futures to wait for
+        :type future_objects: list
+
+        :return: number of tiles computed, not None
+        """
+
+        tqdm_message = "Tiles processing: "
+        # if loglevel > PROGRESS level tqdm display the data list
+        if logging.getLogger().getEffectiveLevel() > 21:
+            tqdm_message = "Processing Tiles: [ {} ] ...".format(
+                " , ".join(list(set(self.cars_ds_names_info)))
+            )
+        pbar = tqdm(
+            total=len(future_objects),
+            desc=tqdm_message,
+            position=0,
+            leave=True,
+            file=sys.stdout,
+        )
+        nb_tiles_computed = 0
+
+        wait_start_time = time.time()
+        for future_obj in self.cluster.future_iterator(
+            future_objects, timeout=self.task_timeout
+        ):
+            # trace time main process waited for result
+            tracing.write_events(
+                self.cluster.trace_dir,
+                [
+                    tracing.create_event(
+                        "future_iterator",
+                        tracing.WAIT,
+                        wait_start_time,
+                        time.time(),
+                    )
+                ],
+            )
+            # get corresponding CarsDataset and save tile
+            if future_obj is not None:
+                with tracing.trace_span(
+                    self.cluster.trace_dir,
+                    "save_future",
+                    tracing.SAVE,
+                    bytes_in=tracing.get_data_size(future_obj),
+                ):
+                    future_obj = self.save_future(future_obj)
+                nb_tiles_computed += 1
+            else:
+                logging.debug("None tile: not saved")
+            pbar.update()
+            wait_start_time = time.time()
+
+        pbar.close()
+
+        return nb_tiles_computed
+
+    def materialize(self, cars_ds_list):
+        """
+        Start computation of the tiles of given CarsDatasets, without
+        waiting for them: futures are returned, to be given to wait_futures.
+
+        Delayed of all other registered CarsDatasets are started at the
+        same time and keep running in background: they are collected at
+        next breakpoint.
+        CarsDatasets not registered are added to replace registry.
+
+        :param cars_ds_list: CarsDatasets to compute
+        :type cars_ds_list: list[CarsDataset]
+
+        :return: futures of the tiles of CarsDatasets
+        :rtype: list
+        """
+
+        if not self.launch_worker:
+            return []
+
+        registered_cars_ds = (
+            self.cars_ds_savers_registry.get_cars_datasets_list()
+            + self.cars_ds_replacer_registry.get_cars_datasets_list()
+            + self.cars_ds_compute_registry.get_cars_datasets_list()
+        )
+        for cars_ds in cars_ds_list:
+            if cars_ds not in registered_cars_ds:
+                self.add_to_replace_lists(cars_ds)
+
+        # Futures of tiles already started in background
+        requested_futures = []
+        requested_delayed = []
+        for obj in flatten_object(
+            cars_ds_list, self.cluster.get_delayed_type()
+        ):
+            if id(obj) in self.background_futures:
+                requested_futures.append(self.background_futures.pop(id(obj)))
+            elif id(obj) not in self.started_delayed:
+                requested_delayed.append(obj)
+
+        if len(requested_delayed) == 0:
+            return requested_futures
+
+        # Start requested delayed with all other registered delayed,
+        # for their common dependencies to be computed once
+        requested_ids = {id(obj) for obj in requested_delayed}
+        background_delayed = [
+            obj
+            for obj in self.get_registered_delayed(
+                excluded_ids=self.started_delayed
+            )
+            if id(obj) not in requested_ids
+        ]
+        delayed_objects = requested_delayed + background_delayed
+
+        # keep delayed alive while started, for their id to stay unique
+        for obj in delayed_objects:
+            self.started_delayed[id(obj)] = obj
+
+        # Save tiles in workers when possible
+        if self.cluster.save_on_workers:
+            delayed_objects = self.add_worker_saving(
+                delayed_objects,
+                clean_files=len(self.started_delayed) == len(delayed_objects),
+            )
+
+        future_objects = self.cluster.start_tasks(delayed_objects)
+
+        for obj, future in zip(  # noqa: B905
+            background_delayed, future_objects[len(requested_delayed) :]
+        ):
+            self.background_futures[id(obj)] = future
+
+        return requested_futures + future_objects[: len(requested_delayed)]
+
+    def wait_futures(self, future_objects):
+        """
+        Wait for futures returned by materialize, save and replace them in
+        their CarsDatasets.
+        If tiles are not computed before timeout, a breakpoint is run to
+        compute them again.
+
+        :param future_objects: futures returned by materialize
+        :type future_objects: list
+        """
+
+        if not self.launch_worker or len(future_objects) == 0:
+            return
+
+        try:
+            self.save_computed_futures(future_objects)
+        except TimeoutError:
+            logging.error("TimeOut")
+            self.breakpoint()
+        except Exception as exc:
+            # reset registries
+            self.reset_registries()
+            raise RuntimeError(traceback.format_exc()) from exc
+
+    def save_future(self, future_obj):
+        """
+        Save and replace computed future in its CarsDataset
+
+        :param future_obj: computed future
+        :type future_obj: xr.Dataset or pandas.DataFrame
+
+        :return: future, after final function of its CarsDataset
+        """
+
+        # Apply function if exists
+        final_function = None
+        current_cars_ds = self.cars_ds_savers_registry.get_cars_ds(future_obj)
+        if current_cars_ds is None:
+            self.cars_ds_replacer_registry.get_cars_ds(future_obj)
+        if current_cars_ds is not None:
+            final_function = current_cars_ds.final_function
+        if final_function is not None:
+            future_obj = final_function(self, future_obj)
+        # Save future if needs to
+        self.cars_ds_savers_registry.save(future_obj)
+        # Replace future in cars_ds if needs to
+        self.cars_ds_replacer_registry.replace(future_obj)
+        # notify tile profiler for new tile
+        self.tile_profiler.add_tile(future_obj)
+        # update achievement
+        self.achievement_tracker.add_tile(future_obj)
+
+        return future_obj
+
+    def add_worker_saving(self, delayed_objects, clean_files=True):
+        """
+        Replace delayed of CarsDatasets only saved by tasks also saving them
+        in workers: only saving infos are sent back to main process
+
+        :param delayed_objects: list of delayed to compute
+        :param clean_files: remove files remaining from a previous run
+
+        :return: list of delayed to compute
+        """
+
+        excluded_cars_ds_list = (
+            self.cars_ds_replacer_registry.get_cars_datasets_list()
+            + self.cars_ds_compute_registry.get_cars_datasets_list()
+        )
+        worker_savers = self.cars_ds_savers_registry.get_worker_savers(
+            excluded_cars_ds_list, clean_files=clean_files
+        )
+
+        # delayed used in main process must come back
+        excluded_delayed = {
+            id(obj)
+            for obj in flatten_object(
+                excluded_cars_ds_list, self.cluster.get_delayed_type()
+            )
+        }
+        saver_of_delayed = {}
+        for cars_ds, worker_saver in worker_savers.items():
+            for obj in flatten_object(
+                [cars_ds], self.cluster.get_delayed_type()
+            ):
+                if id(obj) not in excluded_delayed:
+                    saver_of_delayed[id(obj)] = worker_saver
+
+        return [
+            (
+                self.cluster.create_saving_task(obj, saver_of_delayed[id(obj)])
+                if id(obj) in saver_of_delayed
+                else obj
+            )
+            for obj in delayed_objects
+        ]
+
     def reset_cluster(self):
         """
         Reset Cluster
@@ -525,6 +771,8 @@ class Orchestrator:
         """
         if self.launch_worker:
             self.cluster.cleanup()
+        # close rasters kept open by main process and stopped workers
+        inputs.close_cached_rasters(ended_threads=True)
         self.cluster = AbstractCluster(  # pylint: disable=E0110
             self.orchestrator_conf,
             self.out_dir,
@@ -567,6 +815,10 @@ class Orchestrator:
         # reset cars_ds names infos
         self.cars_ds_names_info = []
 
+        # reset delayed started by materialize
+        self.started_delayed = {}
+        self.background_futures = {}
+
     @cars_profile(name="Compute futures")
     def breakpoint(self):
         """
@@ -616,6 +868,16 @@ class Orchestrator:
         if self.launch_worker:
             self.cluster.cleanup()
 
+            # merge traces of tasks
+            tracing.close_trace_files(self.cluster.trace_dir)
+            tracing.export_chrome_trace(
+                self.cluster.trace_dir,
+                os.path.join(self.out_dir, "logs", "trace.json"),
+            )
+
+        # close rasters kept open by main process and stopped workers
+        inputs.close_cached_rasters(ended_threads=True)
+
         # # clean tmp dir
         for tmp_dir in self.tmp_dir_list:
             if tmp_dir is not None and os.path.exists(tmp_dir):
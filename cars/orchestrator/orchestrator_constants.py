@@ -27,3 +27,4 @@ CARS_DATASET_KEY = "cars_ds_key"
 SAVING_INFO = "saving_info"
 CARS_DS_ROW = "cars_ds_row"
 CARS_DS_COL = "cars_ds_col"
+SAVED_ON_WORKER = "saved_on_worker"
@@ -24,11 +24,21 @@ This module contains the saver registry class
 
 
 # Standard imports
+import glob
 import logging
 import os
 import traceback
 
+# Third party imports
+import numpy as np
+import rasterio as rio
+
 # CARS imports
+from cars.data_structures import cars_dataset, cars_dict
+from cars.orchestrator.orchestrator_constants import (
+    SAVED_ON_WORKER,
+    SAVING_INFO,
+)
 from cars.orchestrator.registry.abstract_registry import (
     AbstractCarsDatasetRegistry,
 )
@@ -153,7 +163,11 @@ class CarsDatasetsRegistrySaver(AbstractCarsDatasetRegistry):
 
         if cars_ds_saver is not None:
             # save
-            if future_result is not None:
+            if future_result is not None and future_result.attrs.get(
+                SAVED_ON_WORKER, False
+            ):
+                logging.debug("Future result tile already saved by worker")
+            elif future_result is not None:
                 cars_ds_saver.save(future_result)
             else:
                 logging.debug("Future result tile is None -> not saved")
@@ -167,6 +181,7 @@ class CarsDatasetsRegistrySaver(AbstractCarsDatasetRegistry):
         nodata=None,
         optional_data=False,
         save_by_pair=False,
+        cog=False,
     ):
         """
         Add file corresponding to cars_dataset to registered_cars_datasets
@@ -185,6 +200,8 @@ class CarsDatasetsRegistrySaver(AbstractCarsDatasetRegistry):
         :type optional_data: bool
         :param save_by_pair:
         :type save_by_pair: bool
+        :param cog: True if raster is saved as Cloud Optimized GeoTIFF
+        :type cog: bool
         """
 
         if not self.cars_dataset_in_registry(cars_ds)[0]:
@@ -207,8 +224,43 @@ class CarsDatasetsRegistrySaver(AbstractCarsDatasetRegistry):
             nodata=nodata,
             optional_data=optional_data,
             save_by_pair=save_by_pair,
+            cog=cog,
         )
 
+    def get_worker_savers(self, excluded_cars_ds_list, clean_files=True):
+        """
+        Get savers of CarsDatasets that can be saved by workers:
+        not used in main process, without final function and not saved
+        as Cloud Optimized GeoTIFF.
+
+        :param excluded_cars_ds_list: CarsDatasets used in main process
+        :type excluded_cars_ds_list: list(CarsDataset)
+        :param clean_files: remove raster files remaining from a previous run
+        :type clean_files: bool
+
+        :return: worker saver of each CarsDataset
+        :rtype: dict(CarsDataset, WorkerCarsDatasetSaver)
+        """
+
+        worker_savers = {}
+        for obj in self.registered_cars_datasets_savers:
+            if (
+                obj.cars_ds in excluded_cars_ds_list
+                or obj.cars_ds.final_function is not None
+                or any(obj.cogs)
+            ):
+                continue
+            worker_savers[obj.cars_ds] = WorkerCarsDatasetSaver(obj)
+
+            if clean_files and obj.cars_ds.dataset_type == "arrays":
+                for file_name in obj.file_names:
+                    for old_file in glob.glob(
+                        get_saved_files_pattern(file_name)
+                    ):
+                        os.remove(old_file)
+
+        return worker_savers
+
     def cleanup(self):
         """
         Cleanup function.
@@ -220,6 +272,24 @@ class CarsDatasetsRegistrySaver(AbstractCarsDatasetRegistry):
             obj.cleanup()
 
 
+def get_saved_files_pattern(file_name):
+    """
+    Get pattern of the files saved for a registered file, in its directory:
+    confidence files are named after the confidence tags of tiles
+
+    :param file_name: registered file name
+    :type file_name: str
+
+    :return: glob pattern
+    :rtype: str
+    """
+    directory, base_name = os.path.split(file_name)
+    return os.path.join(
+        glob.escape(directory),
+        glob.escape(base_name).replace("confidence", "*confidence*"),
+    )
+
+
 class SingleCarsDatasetSaver:
     """
     SingleCarsDatasetSaver
@@ -227,6 +297,8 @@ class SingleCarsDatasetSaver:
     Structure managing the descriptors of each CarsDataset.
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     def __init__(self, obj_id, cars_ds):
         """
         Init function of SingleCarsDatasetSaver
@@ -243,6 +315,7 @@ class SingleCarsDatasetSaver:
         self.nodatas = []
         self.descriptors = []
         self.save_pc_by_pair_list = []
+        self.cogs = []
         self.already_seen = False
         self.count = 0
         self.folder_name = None
@@ -255,6 +328,7 @@ class SingleCarsDatasetSaver:
         nodata=None,
         optional_data=False,
         save_by_pair=False,
+        cog=False,
     ):
         """
         Add file to current CarsDatasetSaver
@@ -277,6 +351,7 @@ class SingleCarsDatasetSaver:
         self.nodatas.append(nodata)
         self.optional_data_list.append(optional_data)
         self.save_pc_by_pair_list.append(save_by_pair)
+        self.cogs.append(cog)
 
     def save(self, future_result):
         """
@@ -300,6 +375,7 @@ class SingleCarsDatasetSaver:
                                 tag=self.tags[count],
                                 dtype=self.dtypes[count],
                                 nodata=self.nodatas[count],
+                                cog=self.cogs[count],
                             )
                             self.descriptors.append(desc)
                         else:
@@ -381,10 +457,12 @@ class SingleCarsDatasetSaver:
                 ref_confidence_path = self.file_names[index]
                 confidence_dtype = self.dtypes[index]
                 confidence_nodatas = self.nodatas[index]
+                confidence_cog = self.cogs[index]
                 # delete the generic confidence registered values
                 self.tags.pop(index)
                 self.dtypes.pop(index)
                 self.nodatas.pop(index)
+                self.cogs.pop(index)
                 self.file_names.pop(index)
                 self.optional_data_list.pop(index)
 
@@ -397,6 +475,7 @@ class SingleCarsDatasetSaver:
                     )
                     self.dtypes.append(confidence_dtype)
                     self.nodatas.append(confidence_nodatas)
+                    self.cogs.append(confidence_cog)
 
     def cleanup(self):
         """
@@ -412,3 +491,142 @@ class SingleCarsDatasetSaver:
                 desc.close()
 
         # TODO merge point clouds ?
+
+
+class WorkerCarsDatasetSaver(SingleCarsDatasetSaver):
+    """
+    WorkerCarsDatasetSaver
+
+    Saving informations of a CarsDataset, sent to the workers to save
+    tiles where they are computed.
+    Writes in a file are serialized by a lock named after the file.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, cars_ds_saver):  # pylint: disable=W0231
+        """
+        Init function of WorkerCarsDatasetSaver
+
+        :param cars_ds_saver: saver of CarsDataset
+        :type cars_ds_saver: SingleCarsDatasetSaver
+        """
+        self.obj_id = cars_ds_saver.obj_id
+        # CarsDataset, with its delayed tiles, is not sent to workers
+        self.cars_ds = None
+        self.dataset_type = cars_ds_saver.cars_ds.dataset_type
+        tiling_grid = cars_ds_saver.cars_ds.tiling_grid
+        self.default_shape = (
+            np.max(tiling_grid[:, :, 1]),
+            np.max(tiling_grid[:, :, 3]),
+        )
+        self.file_names = list(cars_ds_saver.file_names)
+        self.optional_data_list = list(cars_ds_saver.optional_data_list)
+        self.tags = list(cars_ds_saver.tags)
+        self.dtypes = list(cars_ds_saver.dtypes)
+        self.nodatas = list(cars_ds_saver.nodatas)
+        self.cogs = list(cars_ds_saver.cogs)
+        self.descriptors = []
+        self.save_pc_by_pair_list = list(cars_ds_saver.save_pc_by_pair_list)
+        self.already_seen = False
+        self.count = 0
+        self.folder_name = None
+
+    def save(self, future_result, get_lock=None):
+        """
+        Save future result, in worker
+
+        :param future_result: xr.Dataset or pandas.DataFrame
+        :param get_lock: function returning the lock of a file name
+        """
+
+        try:
+            if self.dataset_type == "arrays":
+                if not self.already_seen:
+                    self.add_confidences(future_result)
+                    self.already_seen = True
+                for count, file_name in enumerate(self.file_names):
+                    if self.tags[count] in future_result.keys():
+                        with get_lock(file_name):
+                            self.save_tag(future_result, count)
+                    else:
+                        log_message = "{} is not consistent.".format(
+                            self.tags[count].capitalize()
+                        )
+                        if self.optional_data_list[count]:
+                            logging.debug(log_message)
+                        else:
+                            logging.warning(log_message)
+            elif self.dataset_type == "points":
+                os.makedirs(self.file_names[0], exist_ok=True)
+                get_position = (
+                    AbstractCarsDatasetRegistry.get_future_cars_dataset_position
+                )
+                row, col = get_position(future_result)
+                cars_dataset.run_save_points(
+                    future_result,
+                    os.path.join(self.file_names[0], "{}_{}".format(row, col)),
+                    overwrite=True,
+                    save_by_pair=self.save_pc_by_pair_list[0],
+                )
+            else:
+                logging.error(
+                    "Saving {} CarsDataset not implemeted".format(
+                        self.dataset_type
+                    )
+                )
+        except:  # pylint: disable=W0702 # noqa: B001, E722
+            logging.error(traceback.format_exc())
+            logging.error("Tile not saved")
+
+    def save_tag(self, future_result, count):
+        """
+        Write a tag of future result in its file, created if needed.
+        The lock of the file must be held.
+
+        :param future_result: xr.Dataset
+        :param count: index of file
+        """
+
+        file_name = self.file_names[count]
+        if os.path.exists(file_name):
+            descriptor = rio.open(file_name, "r+")
+        else:
+            descriptor = rio.open(
+                file_name,
+                "w+",
+                **cars_dataset.generate_raster_profile(
+                    future_result,
+                    self.tags[count],
+                    self.dtypes[count],
+                    self.nodatas[count],
+                    self.default_shape,
+                ),
+                BIGTIFF="IF_SAFER",
+            )
+        with descriptor:
+            cars_dataset.run_save_arrays(
+                future_result,
+                file_name,
+                tag=self.tags[count],
+                descriptor=descriptor,
+            )
+
+    @staticmethod
+    def get_saved_tile_info(future_result):
+        """
+        Get information of saved tile, sent back to main process
+
+        :param future_result: xr.Dataset or pandas.DataFrame
+
+        :return: saving infos of tile
+        :rtype: CarsDict
+        """
+
+        return cars_dict.CarsDict(
+            {},
+            attributes={
+                SAVING_INFO: future_result.attrs[SAVING_INFO],
+                SAVED_ON_WORKER: True,
+            },
+        )
@@ -22,5 +22,17 @@
 CARS pipelines module init file
 """
 
-# Imports needed in order to register pipeline for Pipeline factory
-from . import default  # noqa: F401
+# Pipelines are imported when first used, in order to register them for
+# Pipeline factory: see Pipeline.lazy_pipelines
+import importlib
+
+SUBMODULES = ["default"]
+
+
+def __getattr__(name):
+    """
+    Import pipeline submodules on first access
+    """
+    if name in SUBMODULES:
+        return importlib.import_module("{}.{}".format(__name__, name))
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
@@ -792,252 +792,297 @@ class DefaultPipeline(PipelineTemplate):
             self.epipolar_grid_generation_application.get_save_grids()
         )
 
-        for (
-            pair_key,
-            sensor_image_left,
-            sensor_image_right,
-        ) in self.list_sensor_pairs:
-
-            # initialize pairs for current pair
-            self.pairs[pair_key] = {}
-            self.pairs[pair_key]["sensor_image_left"] = sensor_image_left
-            self.pairs[pair_key]["sensor_image_right"] = sensor_image_right
-
-            # Run applications
-
-            # Run grid generation
-            # We generate grids with dem if it is provided.
-            # If not provided, grid are generated without dem and a dem
-            # will be generated, to use later for a new grid generation**
-            altitude_delta_min = inputs.get(sens_cst.INITIAL_ELEVATION, {}).get(
-                sens_cst.ALTITUDE_DELTA_MIN, None
-            )
-            altitude_delta_max = inputs.get(sens_cst.INITIAL_ELEVATION, {}).get(
-                sens_cst.ALTITUDE_DELTA_MAX, None
-            )
-
-            if inputs[sens_cst.INITIAL_ELEVATION][sens_cst.DEM_PATH] is None:
-                geom_plugin = self.geom_plugin_without_dem_and_geoid
-
-                if None not in (altitude_delta_min, altitude_delta_max):
-                    raise RuntimeError(
-                        "Dem path is mandatory for "
-                        "the use of altitude deltas"
-                    )
-            else:
-                geom_plugin = self.geom_plugin_with_dem_and_geoid
-
-            # Generate rectification grids
-            (
-                self.pairs[pair_key]["grid_left"],
-                self.pairs[pair_key]["grid_right"],
-            ) = self.epipolar_grid_generation_application.run(
-                self.pairs[pair_key]["sensor_image_left"],
-                self.pairs[pair_key]["sensor_image_right"],
-                geom_plugin,
-                orchestrator=self.cars_orchestrator,
-                pair_folder=os.path.join(
-                    self.dump_dir,
-                    "epipolar_grid_generation",
-                    "initial",
-                    pair_key,
-                ),
-                pair_key=pair_key,
-            )
+        # Geometry plugin of grid generation
+        # We generate grids with dem if it is provided.
+        # If not provided, grid are generated without dem and a dem
+        # will be generated, to use later for a new grid generation**
+        altitude_delta_min = inputs.get(sens_cst.INITIAL_ELEVATION, {}).get(
+            sens_cst.ALTITUDE_DELTA_MIN, None
+        )
+        altitude_delta_max = inputs.get(sens_cst.INITIAL_ELEVATION, {}).get(
+            sens_cst.ALTITUDE_DELTA_MAX, None
+        )
 
-            if self.quit_on_app("grid_generation"):
-                continue  # keep iterating over pairs, but don't go further
+        if inputs[sens_cst.INITIAL_ELEVATION][sens_cst.DEM_PATH] is None:
+            geom_plugin = self.geom_plugin_without_dem_and_geoid
 
-            # Run holes detection
-            # Get classif depending on which filling is used
-            # For now, 2 filling application can be used, and be configured
-            # with any order. the .1 will be performed before the .2
-            self.pairs[pair_key]["holes_classif"] = []
-            self.pairs[pair_key]["holes_poly_margin"] = 0
-            add_classif = False
-            if self.dense_match_filling_1.used_method == "plane":
-                self.pairs[pair_key][
-                    "holes_classif"
-                ] += self.dense_match_filling_1.get_classif()
-                self.pairs[pair_key]["holes_poly_margin"] = max(
-                    self.pairs[pair_key]["holes_poly_margin"],
-                    self.dense_match_filling_1.get_poly_margin(),
-                )
-                add_classif = True
-            if self.dense_match_filling_2.used_method == "plane":
-                self.pairs[pair_key][
-                    "holes_classif"
-                ] += self.dense_match_filling_2.get_classif()
-                self.pairs[pair_key]["holes_poly_margin"] = max(
-                    self.pairs[pair_key]["holes_poly_margin"],
-                    self.dense_match_filling_2.get_poly_margin(),
+            if None not in (altitude_delta_min, altitude_delta_max):
+                raise RuntimeError(
+                    "Dem path is mandatory for the use of altitude deltas"
                 )
-                add_classif = True
+        else:
+            geom_plugin = self.geom_plugin_with_dem_and_geoid
+
+        # Pairs are processed by batches of pairs in flight: tasks of all
+        # pairs of a batch are started together, and main process steps of
+        # each pair run as soon as its sifts are computed, keeping the
+        # cluster busy with the tasks of the next pairs
+        max_pairs_in_flight = self.used_conf[ADVANCED][
+            adv_cst.MAX_PAIRS_IN_FLIGHT
+        ]
+        for batch_start in range(
+            0, len(self.list_sensor_pairs), max_pairs_in_flight
+        ):
+            pairs_in_flight = []
+            for (
+                pair_key,
+                sensor_image_left,
+                sensor_image_right,
+            ) in self.list_sensor_pairs[
+                batch_start : batch_start + max_pairs_in_flight
+            ]:
 
-            self.pairs[pair_key]["holes_bbox_left"] = []
-            self.pairs[pair_key]["holes_bbox_right"] = []
+                # initialize pairs for current pair
+                self.pairs[pair_key] = {}
+                self.pairs[pair_key]["sensor_image_left"] = sensor_image_left
+                self.pairs[pair_key]["sensor_image_right"] = sensor_image_right
 
-            if self.used_conf[ADVANCED][
-                adv_cst.USE_EPIPOLAR_A_PRIORI
-            ] is False or (len(self.pairs[pair_key]["holes_classif"]) > 0):
-                # Run resampling only if needed:
-                # no a priori or needs to detect holes
+                # Run applications
 
-                # Run epipolar resampling
+                # Generate rectification grids
                 (
-                    self.pairs[pair_key]["epipolar_image_left"],
-                    self.pairs[pair_key]["epipolar_image_right"],
-                ) = self.resampling_application.run(
-                    self.pairs[pair_key]["sensor_image_left"],
-                    self.pairs[pair_key]["sensor_image_right"],
                     self.pairs[pair_key]["grid_left"],
                     self.pairs[pair_key]["grid_right"],
+                ) = self.epipolar_grid_generation_application.run(
+                    self.pairs[pair_key]["sensor_image_left"],
+                    self.pairs[pair_key]["sensor_image_right"],
+                    geom_plugin,
                     orchestrator=self.cars_orchestrator,
                     pair_folder=os.path.join(
-                        self.dump_dir, "resampling", "initial", pair_key
+                        self.dump_dir,
+                        "epipolar_grid_generation",
+                        "initial",
+                        pair_key,
                     ),
                     pair_key=pair_key,
-                    margins_fun=self.sparse_mtch_app.get_margins_fun(),
-                    tile_width=None,
-                    tile_height=None,
-                    add_color=False,
-                    add_classif=add_classif,
                 )
 
-                if self.quit_on_app("resampling"):
+                if self.quit_on_app("grid_generation"):
                     continue  # keep iterating over pairs, but don't go further
 
-                # Generate the holes polygons in epipolar images
-                # They are only generated if dense_match_filling
-                # applications are used later
-                (
-                    self.pairs[pair_key]["holes_bbox_left"],
-                    self.pairs[pair_key]["holes_bbox_right"],
-                ) = self.hole_detection_app.run(
-                    self.pairs[pair_key]["epipolar_image_left"],
-                    self.pairs[pair_key]["epipolar_image_right"],
-                    classification=self.pairs[pair_key]["holes_classif"],
-                    margin=self.pairs[pair_key]["holes_poly_margin"],
-                    orchestrator=self.cars_orchestrator,
-                    pair_folder=os.path.join(
-                        self.dump_dir, "hole_detection", pair_key
-                    ),
-                    pair_key=pair_key,
-                )
+                # Run holes detection
+                # Get classif depending on which filling is used
+                # For now, 2 filling application can be used, and be configured
+                # with any order. the .1 will be performed before the .2
+                self.pairs[pair_key]["holes_classif"] = []
+                self.pairs[pair_key]["holes_poly_margin"] = 0
+                add_classif = False
+                if self.dense_match_filling_1.used_method == "plane":
+                    self.pairs[pair_key][
+                        "holes_classif"
+                    ] += self.dense_match_filling_1.get_classif()
+                    self.pairs[pair_key]["holes_poly_margin"] = max(
+                        self.pairs[pair_key]["holes_poly_margin"],
+                        self.dense_match_filling_1.get_poly_margin(),
+                    )
+                    add_classif = True
+                if self.dense_match_filling_2.used_method == "plane":
+                    self.pairs[pair_key][
+                        "holes_classif"
+                    ] += self.dense_match_filling_2.get_classif()
+                    self.pairs[pair_key]["holes_poly_margin"] = max(
+                        self.pairs[pair_key]["holes_poly_margin"],
+                        self.dense_match_filling_2.get_poly_margin(),
+                    )
+                    add_classif = True
 
-                if self.quit_on_app("hole_detection"):
-                    continue  # keep iterating over pairs, but don't go further
+                self.pairs[pair_key]["holes_bbox_left"] = []
+                self.pairs[pair_key]["holes_bbox_right"] = []
 
-            if self.used_conf[ADVANCED][adv_cst.USE_EPIPOLAR_A_PRIORI] is False:
-                # Run epipolar sparse_matching application
-                (
-                    self.pairs[pair_key]["epipolar_matches_left"],
-                    _,
-                ) = self.sparse_mtch_app.run(
-                    self.pairs[pair_key]["epipolar_image_left"],
-                    self.pairs[pair_key]["epipolar_image_right"],
-                    self.pairs[pair_key]["grid_left"].attributes[
-                        "disp_to_alt_ratio"
-                    ],
-                    orchestrator=self.cars_orchestrator,
-                    pair_folder=os.path.join(
-                        self.dump_dir, "sparse_matching", pair_key
-                    ),
-                    pair_key=pair_key,
-                )
-
-            # Run cluster breakpoint to compute sifts: force computation
-            self.cars_orchestrator.breakpoint()
+                if self.used_conf[ADVANCED][
+                    adv_cst.USE_EPIPOLAR_A_PRIORI
+                ] is False or (len(self.pairs[pair_key]["holes_classif"]) > 0):
+                    # Run resampling only if needed:
+                    # no a priori or needs to detect holes
 
-            # Run grid correction application
-            if self.used_conf[ADVANCED][adv_cst.USE_EPIPOLAR_A_PRIORI] is False:
-                # Estimate grid correction if no epipolar a priori
-                # Filter and save matches
-                self.pairs[pair_key]["matches_array"] = (
-                    self.sparse_mtch_app.filter_matches(
-                        self.pairs[pair_key]["epipolar_matches_left"],
+                    # Run epipolar resampling
+                    (
+                        self.pairs[pair_key]["epipolar_image_left"],
+                        self.pairs[pair_key]["epipolar_image_right"],
+                    ) = self.resampling_application.run(
+                        self.pairs[pair_key]["sensor_image_left"],
+                        self.pairs[pair_key]["sensor_image_right"],
                         self.pairs[pair_key]["grid_left"],
                         self.pairs[pair_key]["grid_right"],
                         orchestrator=self.cars_orchestrator,
+                        pair_folder=os.path.join(
+                            self.dump_dir, "resampling", "initial", pair_key
+                        ),
                         pair_key=pair_key,
+                        margins_fun=self.sparse_mtch_app.get_margins_fun(),
+                        tile_width=None,
+                        tile_height=None,
+                        add_color=False,
+                        add_classif=add_classif,
+                    )
+
+                    if self.quit_on_app("resampling"):
+                        continue  # keep iterating over pairs, don't go further
+
+                    # Generate the holes polygons in epipolar images
+                    # They are only generated if dense_match_filling
+                    # applications are used later
+                    (
+                        self.pairs[pair_key]["holes_bbox_left"],
+                        self.pairs[pair_key]["holes_bbox_right"],
+                    ) = self.hole_detection_app.run(
+                        self.pairs[pair_key]["epipolar_image_left"],
+                        self.pairs[pair_key]["epipolar_image_right"],
+                        classification=self.pairs[pair_key]["holes_classif"],
+                        margin=self.pairs[pair_key]["holes_poly_margin"],
+                        orchestrator=self.cars_orchestrator,
+                        pair_folder=os.path.join(
+                            self.dump_dir, "hole_detection", pair_key
+                        ),
+                        pair_key=pair_key,
+                    )
+
+                    if self.quit_on_app("hole_detection"):
+                        continue  # keep iterating over pairs, don't go further
+
+                if (
+                    self.used_conf[ADVANCED][adv_cst.USE_EPIPOLAR_A_PRIORI]
+                    is False
+                ):
+                    # Run epipolar sparse_matching application
+                    (
+                        self.pairs[pair_key]["epipolar_matches_left"],
+                        _,
+                    ) = self.sparse_mtch_app.run(
+                        self.pairs[pair_key]["epipolar_image_left"],
+                        self.pairs[pair_key]["epipolar_image_right"],
+                        self.pairs[pair_key]["grid_left"].attributes[
+                            "disp_to_alt_ratio"
+                        ],
+                        orchestrator=self.cars_orchestrator,
                         pair_folder=os.path.join(
                             self.dump_dir, "sparse_matching", pair_key
                         ),
-                        save_matches=(self.sparse_mtch_app.get_save_matches()),
+                        pair_key=pair_key,
                     )
-                )
-                # Compute grid correction
-                (
-                    self.pairs[pair_key]["grid_correction_coef"],
-                    self.pairs[pair_key]["corrected_matches_array"],
-                    self.pairs[pair_key]["corrected_matches_cars_ds"],
-                    _,
-                    _,
-                ) = grid_correction.estimate_right_grid_correction(
-                    self.pairs[pair_key]["matches_array"],
-                    self.pairs[pair_key]["grid_right"],
-                    initial_cars_ds=self.pairs[pair_key][
-                        "epipolar_matches_left"
-                    ],
-                    save_matches=save_matches,
-                    pair_folder=os.path.join(
-                        self.dump_dir, "grid_correction", "initial", pair_key
-                    ),
-                    pair_key=pair_key,
-                    orchestrator=self.cars_orchestrator,
-                )
-                # Correct grid right
-                self.pairs[pair_key]["corrected_grid_right"] = (
-                    grid_correction.correct_grid(
-                        self.pairs[pair_key]["grid_right"],
+
+                pairs_in_flight.append(pair_key)
+
+            if len(pairs_in_flight) == 0:
+                continue
+
+            if self.used_conf[ADVANCED][adv_cst.USE_EPIPOLAR_A_PRIORI]:
+                # Run cluster breakpoint to compute tasks of pairs in flight:
+                # force computation
+                self.cars_orchestrator.breakpoint()
+
+            for pair_key in pairs_in_flight:
+                # Run grid correction application
+                if (
+                    self.used_conf[ADVANCED][adv_cst.USE_EPIPOLAR_A_PRIORI]
+                    is False
+                ):
+                    # Only wait for sifts of current pair: tasks of the
+                    # other pairs in flight keep running in background
+                    self.cars_orchestrator.wait_futures(
+                        self.cars_orchestrator.materialize(
+                            [self.pairs[pair_key]["epipolar_matches_left"]]
+                        )
+                    )
+                    # Estimate grid correction if no epipolar a priori
+                    # Filter and save matches
+                    self.pairs[pair_key]["matches_array"] = (
+                        self.sparse_mtch_app.filter_matches(
+                            self.pairs[pair_key]["epipolar_matches_left"],
+                            self.pairs[pair_key]["grid_left"],
+                            self.pairs[pair_key]["grid_right"],
+                            orchestrator=self.cars_orchestrator,
+                            pair_key=pair_key,
+                            pair_folder=os.path.join(
+                                self.dump_dir, "sparse_matching", pair_key
+                            ),
+                            save_matches=(
+                                self.sparse_mtch_app.get_save_matches()
+                            ),
+                        )
+                    )
+                    # Compute grid correction
+                    (
                         self.pairs[pair_key]["grid_correction_coef"],
-                        save_corrected_grid,
-                        os.path.join(
+                        self.pairs[pair_key]["corrected_matches_array"],
+                        self.pairs[pair_key]["corrected_matches_cars_ds"],
+                        _,
+                        _,
+                    ) = grid_correction.estimate_right_grid_correction(
+                        self.pairs[pair_key]["matches_array"],
+                        self.pairs[pair_key]["grid_right"],
+                        initial_cars_ds=self.pairs[pair_key][
+                            "epipolar_matches_left"
+                        ],
+                        save_matches=save_matches,
+                        pair_folder=os.path.join(
                             self.dump_dir,
                             "grid_correction",
                             "initial",
                             pair_key,
                         ),
+                        pair_key=pair_key,
+                        orchestrator=self.cars_orchestrator,
+                    )
+                    # Correct grid right
+                    self.pairs[pair_key]["corrected_grid_right"] = (
+                        grid_correction.correct_grid(
+                            self.pairs[pair_key]["grid_right"],
+                            self.pairs[pair_key]["grid_correction_coef"],
+                            save_corrected_grid,
+                            os.path.join(
+                                self.dump_dir,
+                                "grid_correction",
+                                "initial",
+                                pair_key,
+                            ),
+                        )
                     )
-                )
 
-                self.pairs[pair_key]["corrected_grid_left"] = self.pairs[
-                    pair_key
-                ]["grid_left"]
+                    self.pairs[pair_key]["corrected_grid_left"] = self.pairs[
+                        pair_key
+                    ]["grid_left"]
 
-                # Triangulate matches
-                self.pairs[pair_key]["triangulated_matches"] = (
-                    dem_generation_tools.triangulate_sparse_matches(
-                        self.pairs[pair_key]["sensor_image_left"],
-                        self.pairs[pair_key]["sensor_image_right"],
-                        self.pairs[pair_key]["grid_left"],
-                        self.pairs[pair_key]["corrected_grid_right"],
-                        self.pairs[pair_key]["corrected_matches_array"],
-                        geom_plugin,
+                    # Triangulate matches
+                    self.pairs[pair_key]["triangulated_matches"] = (
+                        dem_generation_tools.triangulate_sparse_matches(
+                            self.pairs[pair_key]["sensor_image_left"],
+                            self.pairs[pair_key]["sensor_image_right"],
+                            self.pairs[pair_key]["grid_left"],
+                            self.pairs[pair_key]["corrected_grid_right"],
+                            self.pairs[pair_key]["corrected_matches_array"],
+                            geom_plugin,
+                        )
                     )
-                )
 
-                # filter triangulated_matches
-                matches_filter_knn = (
-                    self.sparse_mtch_app.get_matches_filter_knn()
-                )
-                matches_filter_dev_factor = (
-                    self.sparse_mtch_app.get_matches_filter_dev_factor()
-                )
-                self.pairs[pair_key]["filtered_triangulated_matches"] = (
-                    sparse_mtch_tools.filter_point_cloud_matches(
-                        self.pairs[pair_key]["triangulated_matches"],
-                        matches_filter_knn=matches_filter_knn,
-                        matches_filter_dev_factor=matches_filter_dev_factor,
+                    # filter triangulated_matches
+                    matches_filter_knn = (
+                        self.sparse_mtch_app.get_matches_filter_knn()
+                    )
+                    matches_filter_dev_factor = (
+                        self.sparse_mtch_app.get_matches_filter_dev_factor()
+                    )
+                    self.pairs[pair_key]["filtered_triangulated_matches"] = (
+                        sparse_mtch_tools.filter_point_cloud_matches(
+                            self.pairs[pair_key]["triangulated_matches"],
+                            matches_filter_knn=matches_filter_knn,
+                            matches_filter_dev_factor=matches_filter_dev_factor,
+                        )
                     )
-                )
 
-                self.triangulated_matches_list.append(
-                    self.pairs[pair_key]["filtered_triangulated_matches"]
-                )
+                    self.triangulated_matches_list.append(
+                        self.pairs[pair_key]["filtered_triangulated_matches"]
+                    )
 
-                if self.quit_on_app("sparse_matching"):
-                    continue  # keep iterating over pairs, but don't go further
+                    if self.quit_on_app("sparse_matching"):
+                        continue  # keep iterating over pairs, don't go further
+
+            if (
+                self.used_conf[ADVANCED][adv_cst.USE_EPIPOLAR_A_PRIORI]
+                is False
+            ):
+                # Collect remaining tasks of pairs in flight
+                self.cars_orchestrator.breakpoint()
 
         # Clean grids at the end of processing if required. Note that this will
         # also clean refined grids
@@ -1096,6 +1141,7 @@ class DefaultPipeline(PipelineTemplate):
                 dem_generation_output_dir,
                 inputs[sens_cst.INITIAL_ELEVATION][sens_cst.GEOID],
                 dem_roi_to_use=self.dem_generation_roi,
+                orchestrator=self.cars_orchestrator,
             )
             # Same geometry plugin if we use exogenous dem
             # as initial elevation always used before if provided
@@ -1990,6 +2036,7 @@ class DefaultPipeline(PipelineTemplate):
             filling_file_name=filling_file_name,
             color_dtype=self.color_type,
             dump_dir=rasterization_dump_dir,
+            cog=self.used_conf[OUTPUT][out_cst.COG],
         )
 
         # Cleaning: don't keep terrain bbox if save_intermediate_data
@@ -2252,3 +2299,13 @@ class DefaultPipeline(PipelineTemplate):
                     self.rasterize_point_cloud()
 
             self.final_cleanup()
+
+        # point cloud tiles are all saved once orchestrator is closed
+        if (
+            self.save_output_point_cloud
+            and self.used_conf[OUTPUT][out_cst.MERGE_POINT_CLOUD]
+        ):
+            output_parameters.merge_point_cloud_product(
+                os.path.join(self.out_dir, out_cst.POINT_CLOUD_DIRECTORY),
+                nb_workers=self.used_conf[ORCHESTRATOR].get("nb_workers", 1),
+            )
@@ -24,7 +24,7 @@ CARS module containing functions to check advanced parameters configuration
 """
 
 import numpy as np
-from json_checker import Checker, Or
+from json_checker import And, Checker, Or
 
 from cars.pipelines.parameters import advanced_parameters_constants as adv_cst
 from cars.pipelines.pipeline_constants import ADVANCED
@@ -55,6 +55,10 @@ def check_advanced_parameters(conf, check_epipolar_a_priori=True):
 
     overloaded_conf[adv_cst.MERGING] = conf.get(adv_cst.MERGING, False)
 
+    overloaded_conf[adv_cst.MAX_PAIRS_IN_FLIGHT] = conf.get(
+        adv_cst.MAX_PAIRS_IN_FLIGHT, 4
+    )
+
     if check_epipolar_a_priori:
         # Check conf use_epipolar_a_priori
         overloaded_conf[adv_cst.USE_EPIPOLAR_A_PRIORI] = conf.get(
@@ -74,6 +78,7 @@ def check_advanced_parameters(conf, check_epipolar_a_priori=True):
         adv_cst.DEBUG_WITH_ROI: bool,
         adv_cst.MERGING: bool,
         adv_cst.SAVE_INTERMEDIATE_DATA: bool,
+        adv_cst.MAX_PAIRS_IN_FLIGHT: And(int, lambda x: x > 0),
     }
     if check_epipolar_a_priori:
         schema[adv_cst.USE_EPIPOLAR_A_PRIORI] = bool
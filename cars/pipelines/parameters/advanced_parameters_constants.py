@@ -32,6 +32,8 @@ EPIPOLAR_A_PRIORI = "epipolar_a_priori"
 
 MERGING = "merging"
 
+MAX_PAIRS_IN_FLIGHT = "max_pairs_in_flight"
+
 # inner epipolar a priori constants
 GRID_CORRECTION = "grid_correction"
 DISPARITY_RANGE = "disparity_range"
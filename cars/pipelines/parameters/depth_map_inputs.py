@@ -188,6 +188,27 @@ def check_depth_maps_inputs(conf, config_json_dir=None):
             "relative path are not transformed to absolute paths"
         )
 
+    # Read metadata of all depth maps in parallel, once
+    depth_map_files = []
+    for depth_map in overloaded_conf[depth_map_cst.DEPTH_MAPS].values():
+        depth_map_files.extend(
+            depth_map[tag]
+            for tag in [
+                cst.X,
+                cst.Y,
+                cst.Z,
+                cst.POINT_CLOUD_MSK,
+                cst.POINT_CLOUD_CLR_KEY_ROOT,
+                cst.POINT_CLOUD_CLASSIF_KEY_ROOT,
+                cst.POINT_CLOUD_FILLING_KEY_ROOT,
+            ]
+        )
+        if depth_map[cst.POINT_CLOUD_CONFIDENCE_KEY_ROOT]:
+            depth_map_files.extend(
+                depth_map[cst.POINT_CLOUD_CONFIDENCE_KEY_ROOT].values()
+            )
+    inputs.prefetch_rasters_metadata(depth_map_files)
+
     for depth_map_key in conf[depth_map_cst.DEPTH_MAPS]:
         # check sizes
         check_input_size(
@@ -31,6 +31,8 @@ OUT_GEOID = "geoid"
 EPSG = "epsg"
 RESOLUTION = "resolution"
 SAVE_BY_PAIR = "save_by_pair"
+COG = "cog"
+MERGE_POINT_CLOUD = "merge_point_cloud"
 AUXILIARY = "auxiliary"
 
 # Auxiliary keys
@@ -44,3 +46,5 @@ AUX_CONTRIBUTING_PAIR = "contributing_pair"
 
 # Output tree constants
 DSM_DIRECTORY = "dsm"
+POINT_CLOUD_DIRECTORY = "point_cloud"
+MERGED_POINT_CLOUD_FILENAME = "point_cloud.laz"
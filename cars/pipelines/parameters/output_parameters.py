@@ -31,6 +31,7 @@ from pyproj import CRS
 
 import cars.core.constants as cst
 from cars.core.utils import safe_makedirs
+from cars.data_structures import dataframe_converter
 from cars.pipelines.parameters import output_constants
 
 
@@ -78,6 +79,14 @@ def check_output_parameters(conf):
         output_constants.SAVE_BY_PAIR, False
     )
 
+    overloaded_conf[output_constants.COG] = overloaded_conf.get(
+        output_constants.COG, False
+    )
+
+    overloaded_conf[output_constants.MERGE_POINT_CLOUD] = overloaded_conf.get(
+        output_constants.MERGE_POINT_CLOUD, False
+    )
+
     # Load auxiliary and subfields
     overloaded_conf[output_constants.AUXILIARY] = overloaded_conf.get(
         output_constants.AUXILIARY, {}
@@ -123,6 +132,8 @@ def check_output_parameters(conf):
         output_constants.EPSG: Or(int, None),
         output_constants.RESOLUTION: Or(int, float),
         output_constants.SAVE_BY_PAIR: bool,
+        output_constants.COG: bool,
+        output_constants.MERGE_POINT_CLOUD: bool,
         output_constants.AUXILIARY: dict,
     }
     checker_output = Checker(output_schema)
@@ -201,3 +212,43 @@ def intialize_product_index(orchestrator, product_levels, input_pairs):
             }
 
     orchestrator.update_index(index)
+
+
+def merge_point_cloud_product(point_cloud_dir, nb_workers=4):
+    """
+    Merge laz tiles of each directory of the point cloud product
+    (one directory by pair if saved by pair) into one laz file.
+    Csv tiles are not merged.
+
+    :param point_cloud_dir: point cloud product directory
+    :type point_cloud_dir: str
+    :param nb_workers: number of threads reading tiles
+    :type nb_workers: int
+
+    :return: merged laz files
+    :rtype: list
+    """
+    merged_files = []
+    for directory, _, file_names in sorted(os.walk(point_cloud_dir)):
+        laz_files = sorted(
+            os.path.join(directory, file_name)
+            for file_name in file_names
+            if file_name.endswith(".laz")
+            and file_name != output_constants.MERGED_POINT_CLOUD_FILENAME
+        )
+        if len(laz_files) == 0:
+            continue
+
+        merged_file = os.path.join(
+            directory, output_constants.MERGED_POINT_CLOUD_FILENAME
+        )
+        try:
+            dataframe_converter.merge_laz_files(
+                laz_files, merged_file, nb_workers=nb_workers
+            )
+        except RuntimeError as error:
+            logging.warning("{} not merged: {}".format(directory, error))
+            continue
+        merged_files.append(merged_file)
+
+    return merged_files
@@ -25,8 +25,8 @@ Used for full_res and low_res pipelines
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-import rasterio as rio
 from json_checker import Checker, Or
 
 # CARS imports
@@ -175,6 +175,20 @@ def sensors_check_inputs(conf, config_json_dir=None):  # noqa: C901
             "relative path are not transformed to absolute paths"
         )
 
+    # Read metadata of all images in parallel, once
+    inputs.prefetch_rasters_metadata(
+        [
+            sensor_image[tag]
+            for sensor_image in overloaded_conf[sens_cst.SENSORS].values()
+            for tag in [
+                sens_cst.INPUT_IMG,
+                sens_cst.INPUT_MSK,
+                sens_cst.INPUT_COLOR,
+                sens_cst.INPUT_CLASSIFICATION,
+            ]
+        ]
+    )
+
     # check datat type of pairs images
     for key1, key2 in overloaded_conf[sens_cst.PAIRING]:
         compare_image_type(
@@ -240,17 +254,22 @@ def check_geometry_plugin(conf_inputs, conf_advanced, conf_geom_plugin):
                     conf_advanced[adv_cst.TERRAIN_A_PRIORI][adv_cst.DEM_MEDIAN]
                 )
 
-    # Check products consistency with this plugin
+    # Check products consistency with this plugin, in parallel threads
     overloaded_conf_inputs = conf_inputs.copy()
-    for sensor_key, sensor_image in conf_inputs[sens_cst.SENSORS].items():
-        sensor = sensor_image[sens_cst.INPUT_IMG]
-        geomodel = sensor_image[sens_cst.INPUT_GEO_MODEL]
-        (
-            sensor,
-            geomodel,
-        ) = geom_plugin_without_dem_and_geoid.check_product_consistency(
-            sensor, geomodel
+    sensor_keys = list(conf_inputs[sens_cst.SENSORS].keys())
+    with ThreadPoolExecutor() as executor:
+        checked_products = list(
+            executor.map(
+                lambda sensor_image: (
+                    geom_plugin_without_dem_and_geoid.check_product_consistency(
+                        sensor_image[sens_cst.INPUT_IMG],
+                        sensor_image[sens_cst.INPUT_GEO_MODEL],
+                    )
+                ),
+                conf_inputs[sens_cst.SENSORS].values(),
+            )
         )
+    for sensor_key, (sensor, geomodel) in zip(sensor_keys, checked_products):
         overloaded_conf_inputs[sens_cst.SENSORS][sensor_key][
             sens_cst.INPUT_IMG
         ] = sensor
@@ -449,21 +468,17 @@ def check_input_data(image, color):
     :type color: str
     """
 
-    with rio.open(image) as img_reader:
-        trans = img_reader.transform
-        if trans.e < 0:
-            logging.warning(
-                "{} seems to have an incoherent pixel size. "
-                "Input images has to be in sensor geometry.".format(image)
-            )
+    if inputs.rasterio_get_transform(image).e < 0:
+        logging.warning(
+            "{} seems to have an incoherent pixel size. "
+            "Input images has to be in sensor geometry.".format(image)
+        )
 
-    with rio.open(color) as img_reader:
-        trans = img_reader.transform
-        if trans.e < 0:
-            logging.warning(
-                "{} seems to have an incoherent pixel size. "
-                "Input images has to be in sensor geometry.".format(image)
-            )
+    if inputs.rasterio_get_transform(color).e < 0:
+        logging.warning(
+            "{} seems to have an incoherent pixel size. "
+            "Input images has to be in sensor geometry.".format(image)
+        )
 
 
 def get_initial_elevation(config):
@@ -23,6 +23,7 @@
 This module contains class pipeline factory.
 """
 
+import importlib
 import logging
 from typing import Dict, Union
 
@@ -39,6 +40,10 @@ class Pipeline:
     # pipelines
     available_pipeline = {}
 
+    # Dict (pipeline_name:str, module:str) containing CARS pipelines,
+    # whose module is imported when the pipeline is first used
+    lazy_pipelines = {"default": "cars.pipelines.default"}
+
     def __new__(
         cls,
         pipeline_name: str,
@@ -76,6 +81,9 @@ class Pipeline:
         """
 
         pipeline = None
+        if name not in cls.available_pipeline and name in cls.lazy_pipelines:
+            importlib.import_module(cls.lazy_pipelines[name])
+
         try:
             pipeline_class = cls.available_pipeline[name]
 
@@ -95,7 +103,9 @@ class Pipeline:
         Print all registered pipelines
         """
 
-        for pipeline_name in cls.available_pipeline:
+        for pipeline_name in sorted(
+            set(cls.available_pipeline) | set(cls.lazy_pipelines)
+        ):
             print(pipeline_name)
 
     @classmethod
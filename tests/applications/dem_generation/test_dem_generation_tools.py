@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/applications/dem_generation/dem_generation_tools.py
+"""
+
+# Third party imports
+import pytest
+
+# CARS imports
+from cars.applications.dem_generation import dem_generation_tools as dgt
+
+
+@pytest.mark.unit_tests
+def test_get_dichotomic_ranges():
+    """
+    Test ranges follow the dichotomy splits
+    """
+    assert dgt.get_dichotomic_ranges(0, 7, 0) == [(0, 7)]
+    assert dgt.get_dichotomic_ranges(0, 7, 1) == [(0, 3), (3, 7)]
+    assert dgt.get_dichotomic_ranges(0, 7, 2) == [
+        (0, 1),
+        (1, 3),
+        (3, 5),
+        (5, 7),
+    ]
+    # ranges of one element are not split anymore
+    assert dgt.get_dichotomic_ranges(0, 3, 3) == [(0, 1), (1, 2), (2, 3)]
+
+
+@pytest.mark.unit_tests
+def test_get_tiling_depth():
+    """
+    Test tiling depth is the first depth with tiles smaller than tile size
+    """
+    assert dgt.get_tiling_depth(100, 30, 100) == 0
+    assert dgt.get_tiling_depth(100, 30, 99) == 1
+    assert dgt.get_tiling_depth(100, 30, 25) == 2
+    assert dgt.get_tiling_depth(3, 1000, 1) == 10
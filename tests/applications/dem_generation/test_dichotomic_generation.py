@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/applications/dem_generation/dichotomic_generation.py
+"""
+
+# Standard imports
+import os
+import tempfile
+
+# Third party imports
+import numpy as np
+import pandas
+import pytest
+import rasterio
+
+# CARS imports
+from cars.applications.application import Application
+from cars.orchestrator import orchestrator
+
+# CARS Tests imports
+from ...helpers import get_geoid_path, temporary_dir
+
+
+def generate_matches():
+    """
+    Generate matches on a smooth terrain, with a hole
+    """
+    rng = np.random.default_rng(0)
+    x_values = rng.uniform(5.0, 5.1, 5000)
+    y_values = rng.uniform(44.0, 44.08, 5000)
+    in_hole = (
+        (x_values > 5.04)
+        & (x_values < 5.05)
+        & (y_values > 44.03)
+        & (y_values < 44.04)
+    )
+    x_values = x_values[~in_hole]
+    y_values = y_values[~in_hole]
+    z_values = (
+        500
+        + 200 * np.sin(40 * x_values) * np.cos(30 * y_values)
+        + rng.normal(0, 5, x_values.size)
+    )
+    matches = pandas.DataFrame({"x": x_values, "y": y_values, "z": z_values})
+    matches.attrs["epsg"] = 4326
+
+    return matches
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("mode", ["sequential", "multiprocessing"])
+def test_dichotomic_generation_tiled(mode):
+    """
+    Test tiled dem generation is identical to dem generation in one tile
+    """
+    dems = {}
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        for tile_size in [1000, 25]:
+            conf = {
+                "method": "dichotomic",
+                "margin": 1000,
+                "min_number_matches": 30,
+                "tile_size": tile_size,
+            }
+            application = Application("dem_generation", cfg=conf)
+            output_dir = os.path.join(directory, str(tile_size))
+            os.makedirs(output_dir)
+            orchestrator_conf = {"mode": mode}
+            if mode == "multiprocessing":
+                orchestrator_conf.update(
+                    {"nb_workers": 2, "max_ram_per_worker": 500}
+                )
+            with orchestrator.Orchestrator(
+                orchestrator_conf=orchestrator_conf,
+                out_dir=os.path.join(directory, "out_" + str(tile_size)),
+            ) as cars_orchestrator:
+                dem = application.run(
+                    [generate_matches()],
+                    output_dir,
+                    get_geoid_path(),
+                    orchestrator=cars_orchestrator,
+                )
+            assert (dem.shape == (1, 1)) == (tile_size == 1000)
+
+            dems[tile_size] = {}
+            for key in ["dem_median", "dem_min", "dem_max"]:
+                with rasterio.open(dem.attributes[key + "_path"]) as in_dem:
+                    dems[tile_size][key] = in_dem.read(1)
+                    hole_center = in_dem.index(5.045, 44.035)
+
+    for key, values in dems[1000].items():
+        np.testing.assert_array_equal(values, dems[25][key])
+
+    # hole is filled, and min < median < max
+    assert dems[1000]["dem_median"][hole_center] > 200
+    assert np.all(dems[1000]["dem_min"] < dems[1000]["dem_median"])
+    assert np.all(dems[1000]["dem_max"] > dems[1000]["dem_median"])
@@ -29,11 +29,16 @@ import pytest
 import xarray as xr
 
 from cars.applications.dense_matching import dense_matching_tools
+from cars.applications.dense_matching.census_mccnn_sgm import (
+    CensusMccnnSgm,
+    compute_disparity_tile,
+)
 
 # CARS imports
 from cars.core import constants as cst
 from cars.core import constants_disparity as cst_disp
 from cars.core import inputs
+from cars.data_structures import cars_dataset
 
 # CARS Tests imports
 from tests.helpers import (
@@ -85,6 +90,136 @@ def test_optimal_tile_size():
     )
 
 
+@pytest.mark.unit_tests
+def test_tile_memory():
+    """
+    Test tile_memory_pandora_plugin_libsgm function,
+    consistent with optimal_tile_size function
+    """
+    disp = 61
+    mem = 313
+
+    tile_size = dense_matching_tools.optimal_tile_size_pandora_plugin_libsgm(
+        0, disp, min_tile_size=0, max_tile_size=1000, max_ram_per_worker=mem
+    )
+
+    assert (
+        dense_matching_tools.tile_memory_pandora_plugin_libsgm(
+            tile_size, tile_size + disp, 0, disp
+        )
+        <= mem
+    )
+    assert (
+        dense_matching_tools.tile_memory_pandora_plugin_libsgm(
+            2 * tile_size, 2 * tile_size + disp, 0, disp
+        )
+        > mem
+    )
+
+
+@pytest.mark.unit_tests
+def test_crop_epipolar_tile():
+    """
+    Test crop_epipolar_tile function on ventoux dataset
+    """
+    left_input = xr.open_dataset(
+        absolute_data_path("input/intermediate_results/data1_ref_left.nc")
+    )
+
+    # roi is [420 200 530 320], roi with margins is [387 180 564 340]
+    cropped = dense_matching_tools.crop_epipolar_tile(
+        left_input, [420, 260, 475, 320], [50, 10, 10, 10]
+    )
+
+    np.testing.assert_array_equal(
+        cropped.attrs[cst.ROI_WITH_MARGINS], [387, 250, 485, 330]
+    )
+    np.testing.assert_array_equal(cropped.attrs[cst.ROI], [420, 260, 475, 320])
+    np.testing.assert_array_equal(
+        cropped.attrs[cst.EPI_MARGINS], [-33, -10, 10, 10]
+    )
+    np.testing.assert_array_equal(cropped[cst.ROW].values, range(250, 330))
+    np.testing.assert_array_equal(cropped[cst.COL].values, range(387, 485))
+    np.testing.assert_array_equal(
+        cropped[cst.EPI_IMAGE].values,
+        left_input[cst.EPI_IMAGE].values[70:150, 0:98],
+    )
+
+
+@pytest.mark.unit_tests
+def test_compute_disparity_subdivided():
+    """
+    Test subdivided tile on ventoux dataset gives the disparity
+    of the whole tile, but on sub tile borders
+    """
+    left_input = xr.open_dataset(
+        absolute_data_path("input/intermediate_results/data1_ref_left.nc")
+    )
+    right_input = xr.open_dataset(
+        absolute_data_path("input/intermediate_results/data1_ref_right.nc")
+    )
+
+    # Pandora configuration
+    corr_cfg = corr_conf_defaut()
+    corr_cfg = create_corr_conf(corr_cfg, left_input, right_input)
+
+    grid_right = cars_dataset.CarsDataset("arrays")
+    grid_right.attributes = {
+        "epipolar_size_x": 612,
+        "epipolar_size_y": 612,
+        "disp_to_alt_ratio": None,
+    }
+    disp_range_grid = CensusMccnnSgm().generate_disparity_grids(
+        None, grid_right, None, dmin=-13, dmax=14
+    )
+
+    output = compute_disparity_tile(
+        left_input.copy(deep=True),
+        right_input.copy(deep=True),
+        corr_cfg,
+        disp_range_grid,
+    )
+
+    # tile exceeds memory: computed as 2x2 sub tiles
+    subdivided_output = compute_disparity_tile(
+        left_input.copy(deep=True),
+        right_input.copy(deep=True),
+        corr_cfg,
+        disp_range_grid,
+        max_ram_per_worker=1,
+    )
+
+    np.testing.assert_allclose(
+        subdivided_output.attrs[cst.ROI], np.array([420, 200, 530, 320])
+    )
+    assert list(subdivided_output.keys()) == list(output.keys())
+    np.testing.assert_array_equal(
+        subdivided_output[cst.ROW].values, output[cst.ROW].values
+    )
+    np.testing.assert_array_equal(
+        subdivided_output[cst.COL].values, output[cst.COL].values
+    )
+    np.testing.assert_array_equal(
+        subdivided_output[cst_disp.VALID].values, output[cst_disp.VALID].values
+    )
+    same_disparity = np.isclose(
+        subdivided_output[cst_disp.MAP].values,
+        output[cst_disp.MAP].values,
+        atol=1.0e-3,
+    )
+    assert np.mean(same_disparity) > 0.99
+
+    # tile retried after a timeout: computed as 2x2 sub tiles
+    forced_output = compute_disparity_tile(
+        left_input.copy(deep=True),
+        right_input.copy(deep=True),
+        corr_cfg,
+        disp_range_grid,
+        force_subdivision=True,
+    )
+    xr.testing.assert_identical(forced_output, subdivided_output)
+
+
 @pytest.mark.unit_tests
 def test_get_max_disp_from_opt_tile_size():
     """
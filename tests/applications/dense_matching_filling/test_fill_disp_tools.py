@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2023 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/applications/dense_match_filling/fill_disp_tools.py
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+from shapely.geometry import box
+
+# CARS imports
+from cars.applications.dense_match_filling import fill_disp_tools
+
+
+@pytest.mark.unit_tests
+def test_merge_intersecting_polygones():
+    """
+    Test merge of holes: chains of intersecting holes are merged together
+    """
+    holes = [
+        box(0, 0, 2, 2),
+        box(10, 10, 11, 11),
+        box(3, 0, 5, 2),
+        box(1, 1, 4, 1.5),
+        box(20, 0, 21, 1),
+        box(10.5, 10.5, 12, 12),
+    ]
+
+    merged = fill_disp_tools.merge_intersecting_polygones(holes)
+
+    assert len(merged) == 3
+    assert merged[0].equals(
+        box(0, 0, 2, 2).union(box(3, 0, 5, 2)).union(holes[3])
+    )
+    assert merged[1].equals(box(10, 10, 11, 11).union(holes[5]))
+    assert merged[2].equals(holes[4])
+    assert not fill_disp_tools.merge_intersecting_polygones([])
+
+
+@pytest.mark.unit_tests
+def test_get_corresponding_holes_and_tiles():
+    """
+    Test matching of holes with tiles
+    """
+
+    class DisparityMap:  # pylint: disable=too-few-public-methods
+        """
+        Minimal disparity map CarsDataset
+        """
+
+        tiling_grid = np.array(
+            [
+                [[0, 10, 0, 10], [0, 10, 10, 20]],
+                [[10, 20, 0, 10], [10, 20, 10, 20]],
+            ]
+        )
+        overlaps = np.zeros((2, 2, 4))
+
+        def __getitem__(self, key):
+            return key
+
+    tiles_polygones = {
+        (row, col): box(tile[2], tile[0], tile[3], tile[1])
+        for row, tiles_row in enumerate(DisparityMap.tiling_grid)
+        for col, tile in enumerate(tiles_row)
+    }
+    holes = [box(12, 2, 14, 4), box(30, 30, 31, 31), box(8, 12, 9, 13)]
+
+    corresponding_holes = fill_disp_tools.get_corresponding_holes(
+        tiles_polygones[(0, 1)], holes
+    )
+    assert corresponding_holes == [holes[0]]
+
+    corresponding_tiles = fill_disp_tools.get_corresponding_tiles(
+        tiles_polygones, holes, DisparityMap()
+    )
+    assert [tile[2] for tile in corresponding_tiles] == [(0, 1), (1, 0)]
+    assert not fill_disp_tools.get_corresponding_tiles(
+        tiles_polygones, [], DisparityMap()
+    )
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("nb_directions", [8, 16])
+def test_find_all_valid_neighbors(nb_directions):
+    """
+    Test find_all_valid_neighbors against per pixel find_valid_neighbors
+    """
+    rng = np.random.default_rng(0)
+    disp = rng.normal(0, 5, (37, 53)).astype(np.float32)
+    disp[rng.random(disp.shape) < 0.05] = 0
+    disp[rng.random(disp.shape) < 0.02] = np.nan
+    msk_fill_disp = rng.random(disp.shape) < 0.3
+    msk_fill_disp[10:25, 5:30] = True
+
+    # same directions as fill_disp_pandora: [row, col], counterclockwise
+    step = 0.5 if nb_directions == 16 else 1.0
+    angles = np.arange(nb_directions) * 2 * np.pi / nb_directions
+    dirs = np.stack([-np.sin(angles), np.cos(angles)], axis=1)
+    dirs = np.round(dirs / np.max(np.abs(dirs), axis=1)[:, None] / step) * step
+
+    (
+        pix_cols,
+        pix_rows,
+        valid_neighbors,
+    ) = fill_disp_tools.find_all_valid_neighbors(
+        dirs, disp, msk_fill_disp, nb_directions
+    )
+
+    assert len(pix_cols) == np.sum(msk_fill_disp)
+    for col, row, neighbors in zip(pix_cols, pix_rows, valid_neighbors):
+        np.testing.assert_array_equal(
+            neighbors,
+            fill_disp_tools.find_valid_neighbors(
+                dirs, disp, msk_fill_disp, row, col, nb_directions
+            ),
+        )
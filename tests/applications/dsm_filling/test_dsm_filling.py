@@ -79,6 +79,10 @@ def test_fill_dsm():
             os.path.join(save_dir_noroi, output_constants.DSM_DIRECTORY)
         )
         os.makedirs(os.path.join(save_dir_roi, output_constants.DSM_DIRECTORY))
+        save_dir_tiled = os.path.join(directory, "save_dir_tiled")
+        os.makedirs(
+            os.path.join(save_dir_tiled, output_constants.DSM_DIRECTORY)
+        )
 
         input_dsm_noroi = os.path.join(
             save_dir_noroi, output_constants.DSM_DIRECTORY, "dsm.tif"
@@ -88,6 +92,10 @@ def test_fill_dsm():
         )
         shutil.copyfile(input_dsm_base, input_dsm_noroi)
         shutil.copyfile(input_dsm_base, input_dsm_roi)
+        input_dsm_tiled = os.path.join(
+            save_dir_tiled, output_constants.DSM_DIRECTORY, "dsm.tif"
+        )
+        shutil.copyfile(input_dsm_base, input_dsm_tiled)
 
         inputs = input_data["inputs"]
 
@@ -159,3 +167,27 @@ def test_fill_dsm():
                 "ref_output/dsm_filling_dsm_filled_gizeh_crop_roi.tif"
             ),
         )
+
+        # third test with an roi, processed by small windows
+        dsm_filling_application = Application(
+            "dsm_filling", {"activated": True, "tile_size": 128}
+        )
+        _ = dsm_filling_application.run(
+            orchestrator=None,
+            initial_elevation=geometry_plugin,
+            dsm_path=input_dsm_tiled,
+            roi_polys=roi_poly,
+            roi_epsg=roi_epsg,
+            output_geoid=False,
+            filling_file_name=None,
+            dump_dir=dump_dir,
+        )
+
+        assert_same_images(
+            input_dsm_tiled,
+            absolute_data_path(
+                "ref_output/dsm_filling_dsm_filled_gizeh_crop_roi.tif"
+            ),
+        )
+        # filled dsm replaced the input dsm, no temporary file is left
+        assert os.listdir(os.path.dirname(input_dsm_tiled)) == ["dsm.tif"]
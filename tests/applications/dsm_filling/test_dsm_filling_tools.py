@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/applications/dsm_filling/dsm_filling_tools.py
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+
+# CARS imports
+from cars.applications.dsm_filling import dsm_filling_tools as dft
+
+
+@pytest.mark.unit_tests
+def test_generate_windows():
+    """
+    Test windows cover the raster once
+    """
+    coverage = np.zeros((250, 130), dtype=int)
+    for window in dft.generate_windows(250, 130, 100):
+        assert window.height <= 100 and window.width <= 100
+        coverage[window.toslices()] += 1
+
+    assert np.all(coverage == 1)
+
+
+@pytest.mark.unit_tests
+def test_upsample_coarse_grid():
+    """
+    Test bilinear upsampling of a coarse grid is exact on a bilinear function
+    """
+
+    def bilinear(rows, cols):
+        return 2 + 0.5 * rows - 0.25 * cols + 0.01 * rows * cols
+
+    node_rows = dft.get_coarse_nodes(10, 45, 8)
+    node_cols = dft.get_coarse_nodes(20, 17, 8)
+    assert node_rows[0] == 10 and node_rows[-1] == 54
+    assert node_cols[0] == 20 and node_cols[-1] == 36
+
+    rows = 10 + np.arange(45)
+    cols = 20 + np.arange(17)
+    values = dft.upsample_coarse_grid(
+        bilinear(node_rows[:, np.newaxis], node_cols[np.newaxis, :]),
+        node_rows,
+        node_cols,
+        rows,
+        cols,
+    )
+
+    np.testing.assert_allclose(
+        values, bilinear(rows[:, np.newaxis], cols[np.newaxis, :])
+    )
+
+    # one pixel window
+    node_rows = dft.get_coarse_nodes(3, 1, 8)
+    np.testing.assert_array_equal(node_rows, [3])
+    np.testing.assert_allclose(
+        dft.upsample_coarse_grid(
+            np.array([[1.0, 3.0]]), node_rows, node_cols[[0, -1]], [3], cols
+        ),
+        [1 + 2 * (cols - 20) / 16],
+    )
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2023 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/applications/hole_detection/hole_detection_tools.py
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+from shapely.geometry import box
+
+# CARS imports
+from cars.applications.hole_detection import hole_detection_tools
+
+
+@pytest.mark.unit_tests
+def test_get_roi_coverage_as_poly_with_margins():
+    """
+    Test masked regions envelopes, with and without margin
+    """
+    msk_values = np.zeros((30, 40), dtype=bool)
+    msk_values[2:5, 3:6] = True
+    msk_values[5, 5] = True
+    msk_values[20:22, 30:35] = True
+    msk_values[20, 10] = True
+
+    # bounding boxes of regions, (row, col) coordinates
+    bboxes = hole_detection_tools.get_roi_coverage_as_poly_with_margins(
+        msk_values, row_offset=100, col_offset=200
+    )
+    assert len(bboxes) == 3
+    assert bboxes[0].equals(box(102, 203, 106, 206))
+
+    # regions closer than twice the margin are merged, boxes are clipped
+    bboxes = hole_detection_tools.get_roi_coverage_as_poly_with_margins(
+        msk_values, margin=3
+    )
+    assert len(bboxes) == 3
+    assert bboxes[0].equals(box(0, 0, 9, 9))
+    assert bboxes[2].equals(box(17, 27, 25, 38))
+
+    # exact polygons are pixel outlines
+    polygons = hole_detection_tools.get_roi_coverage_as_poly_with_margins(
+        msk_values, exact_polygons=True
+    )
+    assert len(polygons) == 3
+    assert polygons[0].area == 10
+    assert polygons[0].envelope.equals(box(2, 3, 6, 6))
+
+    assert not hole_detection_tools.get_roi_coverage_as_poly_with_margins(
+        np.zeros((5, 5), dtype=bool), margin=3
+    )
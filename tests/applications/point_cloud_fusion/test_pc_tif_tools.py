@@ -23,6 +23,8 @@ Test module for cars/steps/pc_tif_tools.py
 """
 
 import os
+import shutil
+import tempfile
 
 # Third party imports
 import numpy as np
@@ -35,15 +37,20 @@ from cars.core import constants as cst
 from cars.core import tiling
 from cars.orchestrator import orchestrator
 
-from ...helpers import absolute_data_path
+from ...helpers import absolute_data_path, temporary_dir
 
 
-def generate_test_inputs():
+def generate_test_inputs(directory=None):
     """
-    Helper function for generating input
+    Helper function for generating input, copied in directory if given
+    (bounds indexes are written next to depth maps)
     """
 
     path_pc = absolute_data_path("input/depth_map_gizeh")
+    if directory is not None:
+        path_pc = shutil.copytree(
+            path_pc, os.path.join(directory, "depth_map_gizeh")
+        )
 
     data = {
         cst.X: os.path.join(path_pc, "X.tif"),
@@ -63,6 +70,59 @@ def generate_test_inputs():
     return data
 
 
+def write_synthetic_depth_map(directory):
+    """
+    Helper function writing a small depth map in longitude, latitude,
+    with invalid points
+    """
+    rows, cols = np.mgrid[0:12, 0:12]
+    lon = 31.13 + cols * 1e-5
+    lat = 29.97 - rows * 1e-5
+    lon[0:4, 0:4] = np.nan
+    lat[0:4, 0:4] = np.nan
+    layers = {
+        cst.X: lon[np.newaxis],
+        cst.Y: lat[np.newaxis],
+        cst.Z: 100.0 + rows[np.newaxis] + cols,
+        cst.POINT_CLOUD_CLASSIF_KEY_ROOT: np.stack([rows % 2, cols % 2]).astype(
+            np.uint8
+        ),
+        "confidence1": (rows * cols)[np.newaxis].astype(np.float32),
+    }
+    paths = {}
+    for name, layer_data in layers.items():
+        paths[name] = os.path.join(directory, "{}.tif".format(name))
+        with rio.open(
+            paths[name],
+            "w",
+            driver="GTiff",
+            width=12,
+            height=12,
+            count=layer_data.shape[0],
+            dtype=layer_data.dtype,
+        ) as descriptor:
+            descriptor.write(layer_data)
+            if name == cst.POINT_CLOUD_CLASSIF_KEY_ROOT:
+                descriptor.descriptions = ["water", "vegetation"]
+
+    data = {
+        cst.X: paths[cst.X],
+        cst.Y: paths[cst.Y],
+        cst.Z: paths[cst.Z],
+        cst.POINT_CLOUD_CLR_KEY_ROOT: None,
+        cst.POINT_CLOUD_CLASSIF_KEY_ROOT: paths[
+            cst.POINT_CLOUD_CLASSIF_KEY_ROOT
+        ],
+        cst.POINT_CLOUD_CONFIDENCE_KEY_ROOT: {
+            "confidence1": paths["confidence1"]
+        },
+        cst.POINT_CLOUD_MSK: None,
+        cst.PC_EPSG: 4326,
+    }
+
+    return data
+
+
 @pytest.mark.unit_tests
 def test_create_polygon_from_list_points():
     """
@@ -145,102 +205,206 @@ def test_transform_input_pc_and_metrics():
 
     # test transform_input_pc
 
-    data_tif = generate_test_inputs()
-    list_epi_pc = {"pc_0": data_tif, "pc_1": data_tif}
-
-    with orchestrator.Orchestrator(
-        orchestrator_conf={"mode": "sequential"}
-    ) as cars_orchestrator:
-        (
-            terrain_bbox,
-            list_epipolar_point_clouds_by_tiles,
-        ) = pc_tif_tools.transform_input_pc(
-            list_epi_pc,
-            32636,
-            epipolar_tile_size=200,
-            orchestrator=cars_orchestrator,
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        data_tif = generate_test_inputs(directory)
+        list_epi_pc = {"pc_0": data_tif, "pc_1": data_tif}
+
+        with orchestrator.Orchestrator(
+            orchestrator_conf={"mode": "sequential"}
+        ) as cars_orchestrator:
+            (
+                terrain_bbox,
+                list_epipolar_point_clouds_by_tiles,
+            ) = pc_tif_tools.transform_input_pc(
+                list_epi_pc,
+                32636,
+                epipolar_tile_size=200,
+                orchestrator=cars_orchestrator,
+            )
+
+        assert terrain_bbox == [
+            319796.54507901485,
+            3317678.368442808,
+            320316.9220161168,
+            3318157.187469204,
+        ]
+
+        assert len(list_epipolar_point_clouds_by_tiles) == 2
+
+        assert list_epipolar_point_clouds_by_tiles[0].shape == (5, 5)
+
+        # tes compute_max_nb_point_clouds
+
+        nb_max_nb_pc = pc_tif_tools.compute_max_nb_point_clouds(
+            list_epipolar_point_clouds_by_tiles
         )
 
-    assert terrain_bbox == [
-        319796.54507901485,
-        3317678.368442808,
-        320316.9220161168,
-        3318157.187469204,
-    ]
+        assert nb_max_nb_pc == 2
 
-    assert len(list_epipolar_point_clouds_by_tiles) == 2
+        # test compute_average_distance
+        average_dist = pc_tif_tools.compute_average_distance(
+            list_epipolar_point_clouds_by_tiles
+        )
 
-    assert list_epipolar_point_clouds_by_tiles[0].shape == (5, 5)
+        assert int(100 * average_dist) / 100 == 0.46
 
-    # tes compute_max_nb_point_clouds
 
-    nb_max_nb_pc = pc_tif_tools.compute_max_nb_point_clouds(
-        list_epipolar_point_clouds_by_tiles
-    )
+@pytest.mark.unit_tests
+def test_transform_input_pc_and_correspondance():
+    """
+    test transform_input_pc
+    test get_tiles_corresponding_tiles_tif
+    """
 
-    assert nb_max_nb_pc == 2
+    # test transform_input_pc
 
-    # test compute_average_distance
-    average_dist = pc_tif_tools.compute_average_distance(
-        list_epipolar_point_clouds_by_tiles
-    )
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        data_tif = generate_test_inputs(directory)
+        list_epi_pc = {"pc_0": data_tif, "pc_1": data_tif}
+
+        with orchestrator.Orchestrator(
+            orchestrator_conf={"mode": "sequential"}
+        ) as cars_orchestrator:
+            (
+                terrain_bbox,
+                list_epipolar_point_clouds_by_tiles,
+            ) = pc_tif_tools.transform_input_pc(
+                list_epi_pc,
+                32636,
+                epipolar_tile_size=200,
+                orchestrator=cars_orchestrator,
+            )
+
+        # Test correspondances
+        # Compute bounds and terrain grid
+        [xmin, ymin, xmax, ymax] = terrain_bbox
+
+        # terrain tile size
+        optimal_terrain_tile_width = 200
+
+        # Split terrain bounding box in pieces
+        terrain_tiling_grid = tiling.generate_tiling_grid(
+            xmin,
+            ymin,
+            xmax,
+            ymax,
+            optimal_terrain_tile_width,
+            optimal_terrain_tile_width,
+        )
+
+        with orchestrator.Orchestrator(
+            orchestrator_conf={"mode": "sequential"}
+        ) as cars_orchestrator:
+            corresponding_tiles = pc_tif_tools.get_corresponding_tiles_tif(
+                terrain_tiling_grid,
+                list_epipolar_point_clouds_by_tiles,
+                margins=0,
+                orchestrator=cars_orchestrator,
+            )
 
-    assert int(100 * average_dist) / 100 == 0.46
+        assert len(corresponding_tiles[0, 0]["required_point_clouds"]) == 8
+        assert len(corresponding_tiles[1, 0]["required_point_clouds"]) == 14
+        assert len(corresponding_tiles[2, 2]["required_point_clouds"]) == 8
+        assert len(corresponding_tiles[1, 2]["required_point_clouds"]) == 12
 
 
 @pytest.mark.unit_tests
-def test_transform_input_pc_and_correspondance():
+def test_generate_pc_wrapper_window():
     """
-    test transform_input_pc
-    test get_tiles_corresponding_tiles_tif
+    test generate_pc_wrapper reads all layers of window
     """
 
-    # test transform_input_pc
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        data_tif = write_synthetic_depth_map(directory)
+        window = rio.windows.Window.from_slices((2, 7), (4, 12))
 
-    data_tif = generate_test_inputs()
-    list_epi_pc = {"pc_0": data_tif, "pc_1": data_tif}
+        for _ in range(2):
+            xr_cloud = pc_tif_tools.generate_pc_wrapper(
+                data_tif, window, cloud_id=0, list_cloud_ids=["pc_0"]
+            )
 
-    with orchestrator.Orchestrator(
-        orchestrator_conf={"mode": "sequential"}
-    ) as cars_orchestrator:
-        (
-            terrain_bbox,
-            list_epipolar_point_clouds_by_tiles,
-        ) = pc_tif_tools.transform_input_pc(
-            list_epi_pc,
-            32636,
-            epipolar_tile_size=200,
-            orchestrator=cars_orchestrator,
+        with rio.open(data_tif[cst.X]) as descriptor:
+            data_x = descriptor.read(1, window=window)
+        with rio.open(data_tif[cst.POINT_CLOUD_CLASSIF_KEY_ROOT]) as descriptor:
+            data_classif = descriptor.read(window=window)
+
+        np.testing.assert_array_equal(xr_cloud[cst.X].values, data_x)
+        np.testing.assert_array_equal(
+            xr_cloud[cst.EPI_CLASSIFICATION].values, data_classif
+        )
+        assert list(xr_cloud.coords[cst.BAND_CLASSIF].values) == [
+            "water",
+            "vegetation",
+        ]
+        assert xr_cloud["confidence1"].shape == (5, 8)
+        np.testing.assert_array_equal(
+            xr_cloud[cst.POINT_CLOUD_CORR_MSK].values,
+            ~np.isnan(data_x) * 255,
         )
+        assert xr_cloud.attrs["epsg"] == 4326
 
-    # Test correspondances
-    # Compute bounds and terrain grid
-    [xmin, ymin, xmax, ymax] = terrain_bbox
-
-    # terrain tile size
-    optimal_terrain_tile_width = 200
-
-    # Split terrain bounding box in pieces
-    terrain_tiling_grid = tiling.generate_tiling_grid(
-        xmin,
-        ymin,
-        xmax,
-        ymax,
-        optimal_terrain_tile_width,
-        optimal_terrain_tile_width,
-    )
 
-    with orchestrator.Orchestrator(
-        orchestrator_conf={"mode": "sequential"}
-    ) as cars_orchestrator:
-        corresponding_tiles = pc_tif_tools.get_corresponding_tiles_tif(
-            terrain_tiling_grid,
-            list_epipolar_point_clouds_by_tiles,
-            margins=0,
-            orchestrator=cars_orchestrator,
-        )
+@pytest.mark.unit_tests
+def test_get_bounds_index(monkeypatch):
+    """
+    test get_bounds computes bounds by windows, saved in bounds index
+    next to the depth map and reused by transform_input_pc
+    """
 
-    assert len(corresponding_tiles[0, 0]["required_point_clouds"]) == 8
-    assert len(corresponding_tiles[1, 0]["required_point_clouds"]) == 14
-    assert len(corresponding_tiles[2, 2]["required_point_clouds"]) == 8
-    assert len(corresponding_tiles[1, 2]["required_point_clouds"]) == 12
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        data_tif = write_synthetic_depth_map(directory)
+        list_epi_pc = {"pc_0": data_tif}
+
+        full_x_y_min_max = pc_tif_tools.get_min_max_band(
+            data_tif[cst.X], data_tif[cst.Y], data_tif[cst.Z], 4326, 32636
+        )
+        expected_bbox = [
+            full_x_y_min_max[0],
+            full_x_y_min_max[2],
+            full_x_y_min_max[1],
+            full_x_y_min_max[3],
+        ]
+
+        terrain_bbox = pc_tif_tools.get_bounds(list_epi_pc, 32636, tile_size=4)
+        assert np.allclose(terrain_bbox, expected_bbox)
+        assert os.path.exists(os.path.join(directory, "x_bounds_index.json"))
+
+        # window with only invalid points
+        windows_bounds = pc_tif_tools.load_windows_bounds(data_tif, 32636)
+        assert len(windows_bounds) == 9
+        assert np.all(np.isnan(windows_bounds["0_4_0_4"][0:2]))
+
+        # bounds are read from index
+        def fail_get_min_max_band(*args, **kwargs):
+            raise RuntimeError("bounds must be read from index")
+
+        monkeypatch.setattr(
+            pc_tif_tools, "get_min_max_band", fail_get_min_max_band
+        )
+        assert pc_tif_tools.get_bounds(
+            list_epi_pc, 32636, tile_size=4
+        ) == pytest.approx(terrain_bbox)
+
+        with orchestrator.Orchestrator(
+            orchestrator_conf={"mode": "sequential"}
+        ) as cars_orchestrator:
+            (
+                transformed_bbox,
+                list_epipolar_point_clouds_by_tiles,
+            ) = pc_tif_tools.transform_input_pc(
+                list_epi_pc,
+                32636,
+                epipolar_tile_size=4,
+                orchestrator=cars_orchestrator,
+            )
+        assert transformed_bbox == pytest.approx(terrain_bbox)
+        assert list_epipolar_point_clouds_by_tiles[0].attributes[
+            "xmin"
+        ] == pytest.approx(terrain_bbox[0])
+
+        # index is outdated when depth map is rewritten
+        monkeypatch.undo()
+        with rio.open(data_tif[cst.Z], "r+") as descriptor:
+            descriptor.write(np.zeros((1, 12, 12)))
+        os.utime(data_tif[cst.Z], ns=(0, 0))
+        assert pc_tif_tools.load_windows_bounds(data_tif, 32636) == {}
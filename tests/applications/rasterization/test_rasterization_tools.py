@@ -32,10 +32,16 @@ from __future__ import absolute_import
 import numpy as np
 import pandas
 import pytest
+
+# cars-rasterize
+import rasterize as crasterize  # pylint:disable=E0401
 import xarray as xr
 
 from cars.applications.point_cloud_fusion import mapping_to_terrain_tiles
-from cars.applications.rasterization import rasterization_tools
+from cars.applications.rasterization import (
+    rasterization_tools,
+    simple_gaussian,
+)
 
 # CARS imports
 from cars.core import constants as cst
@@ -673,6 +679,88 @@ def test_simple_rasterization_multiple_datasets_with_source_map():
     )
     assert_same_datasets(raster, raster_ref, atol=1.0e-10, rtol=1.0e-10)
 
+    # terrain region retried after a timeout: rasterized as 2x2 sub regions
+    subdivided_raster = simple_gaussian.compute_subdivided_rasterization(
+        cloud,
+        resolution,
+        epsg,
+        xstart,
+        ystart,
+        xsize,
+        ysize,
+        sigma=sigma,
+        radius=radius,
+        source_pc_names=source_pc_names,
+    )
+    assert_same_datasets(
+        subdivided_raster, raster_ref, atol=1.0e-10, rtol=1.0e-10
+    )
+
+
+@pytest.mark.unit_tests
+def test_compute_source_pc_bit_raster():
+    """
+    Test compute_source_pc_bit_raster against the binary source rasters
+    computed by crasterize.pc_to_dsm on one band per source point cloud
+    """
+    rng = np.random.default_rng(0)
+    nb_points = 300
+    number_of_pc = 11
+    resolution = 0.5
+    x_size = 8
+    y_size = 9
+    x_start = 0.0
+    y_start = y_size * resolution
+
+    points = np.vstack(
+        [
+            rng.uniform(0, x_size * resolution, nb_points),
+            rng.uniform(0, y_size * resolution, nb_points),
+        ]
+    )
+    global_id = rng.integers(0, number_of_pc, nb_points)
+
+    for radius in [0, 1, 3]:
+        # Reference: one float band per source point cloud
+        values = np.vstack(
+            [
+                (global_id == pc_id).astype(float)
+                for pc_id in range(number_of_pc)
+            ]
+        )
+        ref, *_ = crasterize.pc_to_dsm(
+            points,
+            values,
+            np.ones((1, nb_points)),
+            x_start,
+            y_start,
+            x_size,
+            y_size,
+            resolution,
+            float(radius),
+            resolution,
+        )
+        ref = np.nan_to_num(np.ceil(ref), nan=0).reshape((-1, number_of_pc))
+
+        packed = rasterization_tools.compute_source_pc_bit_raster(
+            points,
+            global_id,
+            number_of_pc,
+            x_start,
+            y_start,
+            x_size,
+            y_size,
+            resolution,
+            radius,
+        )
+        assert packed.shape == (2, x_size * y_size)
+        assert packed.dtype == np.uint8
+
+        source_pc = rasterization_tools.unpack_source_pc_bit_raster(
+            packed, number_of_pc
+        )
+        np.testing.assert_array_equal(source_pc.T, ref)
+
 
 # Mask interpolation tests
 
@@ -761,3 +849,97 @@ def test_mask_interp_case1(
     res = res[::-1, :]
 
     assert np.allclose(msk, res)
+
+
+@pytest.mark.unit_tests
+def test_update_data():
+    """
+    Test update_data with all merging methods, on multi-band data
+    """
+    weights = np.array([[0.0, 1.0], [3.0, 0.0]])
+    old_weights = np.array([[[0.0, 3.0], [0.0, 2.0]]], dtype=np.float32)
+
+    old_data = np.array(
+        [[[9.0, 4.0], [9.0, 2.0]], [[9.0, 0.0], [9.0, 1.0]]], dtype=np.float32
+    )
+    current_data = np.array(
+        [[[5.0, 8.0], [6.0, 5.0]], [[5.0, 1.0], [0.0, 5.0]]], dtype=np.float32
+    )
+
+    # basic: weighted mean of valid data
+    new_data = rasterization_tools.update_data(
+        old_data, current_data.copy(), weights, old_weights, -1, "basic"
+    )
+    assert new_data.dtype == np.float32
+    np.testing.assert_allclose(
+        new_data,
+        [[[-1.0, 5.0], [6.0, 2.0]], [[-1.0, 0.25], [0.0, 1.0]]],
+    )
+
+    # sum
+    new_data = rasterization_tools.update_data(
+        old_data, current_data.copy(), weights, old_weights, -1, "sum"
+    )
+    np.testing.assert_allclose(
+        new_data,
+        [[[-1.0, 12.0], [6.0, 2.0]], [[-1.0, 1.0], [0.0, 1.0]]],
+    )
+
+    # bool, with integer data
+    new_data = rasterization_tools.update_data(
+        old_data.astype(np.uint8),
+        current_data.astype(np.uint8),
+        weights,
+        old_weights,
+        255,
+        "bool",
+    )
+    assert new_data.dtype == np.uint8
+    np.testing.assert_array_equal(
+        new_data,
+        [[[255, 1], [1, 2]], [[255, 1], [0, 1]]],
+    )
+
+    # no old data: current data is returned
+    assert (
+        rasterization_tools.update_data(
+            None, current_data, weights, None, -1, "basic"
+        )
+        is current_data
+    )
+
+
+@pytest.mark.unit_tests
+def test_rasterization_plan():
+    """
+    Test RasterizationPlan layers selection
+    """
+    cloud = pandas.DataFrame(
+        columns=[
+            cst.X,
+            cst.Y,
+            cst.Z,
+            "color_R",
+            "color_G",
+            "classif_water",
+            "classif_cloud",
+            "mask",
+            "filling_zeros",
+        ]
+    )
+
+    # All layers computed
+    bands = rasterization_tools.RasterizationPlan().get_bands(cloud)
+    assert bands["hgt"] == [cst.Z]
+    assert bands["color"] == ["color_R", "color_G"]
+    assert bands["classif"] == ["classif_water", "classif_cloud"]
+    assert bands["msk"] == ["mask"]
+    assert bands["filling"] == ["filling_zeros"]
+    assert not bands["confidences"]
+
+    # Only dsm and classification: color is always rasterized
+    plan = rasterization_tools.RasterizationPlan(["dsm", "classif"])
+    assert not plan.source_pc
+    bands = plan.get_bands(cloud)
+    assert list(bands.keys()) == ["hgt", "color", "classif"]
+    assert bands["classif"] == ["classif_water", "classif_cloud"]
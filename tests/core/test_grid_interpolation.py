@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/core/grid_interpolation.py
+"""
+
+# Third party imports
+import numpy as np
+import pytest
+from scipy.interpolate import RegularGridInterpolator
+
+# CARS imports
+from cars.core import grid_interpolation
+
+
+def create_grid(step):
+    """
+    Create grid of positions mapped by a distorted affine transformation,
+    from origin (10, 20)
+    """
+    rows, cols = np.mgrid[0:21, 0:31]
+    pos_x = 10 + cols * step
+    pos_y = 20 + rows * step
+    grid = np.stack(
+        [
+            100 + 1.02 * pos_x + 0.05 * pos_y + 2e-5 * pos_x * pos_y,
+            50 - 0.03 * pos_x + 0.98 * pos_y + 1e-5 * pos_x**2,
+        ],
+        axis=-1,
+    )
+    return grid, pos_x[0, :], pos_y[:, 0]
+
+
+@pytest.mark.unit_tests
+def test_bilinear_interpolation():
+    """
+    Test bilinear interpolation, compared to scipy
+    """
+    step = 30
+    grid, pos_x, pos_y = create_grid(step)
+    rng = np.random.default_rng(0)
+    points_x = rng.uniform(pos_x[0], pos_x[-1], 100)
+    points_y = rng.uniform(pos_y[0], pos_y[-1], 100)
+
+    values = grid_interpolation.bilinear_interpolation(
+        grid, (10, 20), (step, step), points_x, points_y
+    )
+    ref_values = RegularGridInterpolator((pos_y, pos_x), grid)(
+        np.stack([points_y, points_x], axis=-1)
+    )
+    np.testing.assert_allclose(values, ref_values, rtol=1e-10)
+
+    # nodes
+    np.testing.assert_allclose(
+        grid_interpolation.bilinear_interpolation(
+            grid, (10, 20), (step, step), [pos_x[3]], [pos_y[5]]
+        )[0],
+        grid[5, 3],
+    )
+
+    # outside grid
+    values = grid_interpolation.bilinear_interpolation(
+        grid, (10, 20), (step, step), [0, pos_x[-1] + 1, 50], [50, 50, np.nan]
+    )
+    assert np.all(np.isnan(values))
+    values = grid_interpolation.bilinear_interpolation(
+        grid, (10, 20), (step, step), [0], [50], extrapolate=True
+    )
+    assert not np.any(np.isnan(values))
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("step", [30, 10])
+def test_inverse_bilinear_interpolation(step):
+    """
+    Test inverse of bilinear interpolation
+    """
+    grid, pos_x, pos_y = create_grid(step)
+    rng = np.random.default_rng(0)
+    points_x = rng.uniform(pos_x[0], pos_x[-1], 1000)
+    points_y = rng.uniform(pos_y[0], pos_y[-1], 1000)
+    # outside grid, and nan
+    points_x = np.append(points_x, [0, 50])
+    points_y = np.append(points_y, [50, np.nan])
+
+    values = grid_interpolation.bilinear_interpolation(
+        grid, (10, 20), (step, step), points_x, points_y, extrapolate=True
+    )
+    inv_x, inv_y = grid_interpolation.inverse_bilinear_interpolation(
+        grid, (10, 20), (step, step), values[:, 0], values[:, 1]
+    )
+
+    np.testing.assert_allclose(inv_x[:-2], points_x[:-2], atol=1e-6)
+    np.testing.assert_allclose(inv_y[:-2], points_y[:-2], atol=1e-6)
+    assert np.all(np.isnan(inv_x[-2:]))
+    assert np.all(np.isnan(inv_y[-2:]))
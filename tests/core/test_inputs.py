@@ -22,15 +22,24 @@
 Test module for cars/core/inputs.py
 """
 
+# Standard imports
+import os
+import shutil
+import tempfile
+import threading
+
 # Third party imports
+import numpy as np
 import pytest
+import rasterio as rio
 from shapely.geometry import Polygon
 
 # CARS imports
 from cars.core import inputs
+from cars.orchestrator import orchestrator
 
 # CARS Tests imports
-from ..helpers import absolute_data_path
+from ..helpers import absolute_data_path, temporary_dir
 
 
 @pytest.mark.unit_tests
@@ -50,6 +59,87 @@ def test_rasterio_can_open():
     assert not inputs.rasterio_can_open(not_existing)
 
 
+@pytest.mark.unit_tests
+def test_rasterio_get_metadata():
+    """
+    Test metadata of rasters are read once, and again when file changes
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        image = os.path.join(directory, "left_image.tif")
+        shutil.copy(
+            absolute_data_path("input/phr_ventoux/left_image.tif"), image
+        )
+        mask = os.path.join(directory, "mask.tif")
+        with rio.open(
+            mask, "w", driver="GTiff", width=3, height=2, count=2, dtype="uint8"
+        ) as descriptor:
+            descriptor.write(np.zeros((2, 2, 3), dtype=np.uint8))
+
+        inputs.prefetch_rasters_metadata([image, None, mask, image])
+        metadata = inputs.rasterio_get_metadata(image)
+        assert inputs.rasterio_get_metadata(image) is metadata
+        with rio.open(image) as descriptor:
+            assert metadata["size"] == (descriptor.width, descriptor.height)
+            assert inputs.rasterio_get_transform(image) == descriptor.transform
+
+        assert inputs.rasterio_get_size(mask) == (3, 2)
+        assert inputs.rasterio_get_nb_bands(mask) == 2
+        assert inputs.rasterio_get_image_type(mask) == "uint8"
+        assert len(inputs.rasterio_get_nbits(mask)) == 0
+
+        # rewritten file
+        with rio.open(
+            mask,
+            "w",
+            driver="GTiff",
+            width=4,
+            height=2,
+            count=1,
+            dtype="uint8",
+            nbits=1,
+        ) as descriptor:
+            descriptor.write(np.zeros((1, 2, 4), dtype=np.uint8))
+        assert inputs.rasterio_get_size(mask) == (4, 2)
+        assert inputs.rasterio_get_nbits(mask) == [1]
+
+
+@pytest.mark.unit_tests
+def test_rasterio_open_cached():
+    """
+    Test rasters are kept open for next reads, and opened again when file
+    changes
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        mask = os.path.join(directory, "mask.tif")
+        with rio.open(
+            mask, "w", driver="GTiff", width=3, height=2, count=1, dtype="uint8"
+        ) as descriptor:
+            descriptor.write(np.ones((1, 2, 3), dtype=np.uint8))
+            descriptor.descriptions = ["valid"]
+
+        with inputs.rasterio_open_cached(mask) as descriptor:
+            first_descriptor = descriptor
+            assert descriptor.read(1).sum() == 6
+        with inputs.rasterio_open_cached(mask) as descriptor:
+            assert descriptor is first_descriptor
+            assert not descriptor.closed
+        assert inputs.get_descriptions_bands(mask) == ("valid",)
+
+        # rewritten file
+        with rio.open(
+            mask, "w", driver="GTiff", width=3, height=2, count=1, dtype="uint8"
+        ) as descriptor:
+            descriptor.write(np.zeros((1, 2, 3), dtype=np.uint8))
+        os.utime(mask, ns=(0, 0))
+        with inputs.rasterio_open_cached(mask) as descriptor:
+            assert descriptor is not first_descriptor
+            assert first_descriptor.closed
+            assert descriptor.read(1).sum() == 0
+
+        inputs.close_cached_rasters()
+        assert descriptor.closed
+
+
 @pytest.mark.unit_tests
 def test_fix_shapely():
     """
@@ -88,3 +178,39 @@ def test_read_vector():
     with pytest.raises(Exception) as read_error:
         inputs.read_vector("test.shp")
     assert str(read_error.value) == "Impossible to read test.shp file"
+
+
+@pytest.mark.unit_tests
+def test_close_cached_rasters():
+    """
+    Test rasters kept open by ended threads and main thread are closed
+    at orchestrator exit
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        mask = os.path.join(directory, "mask.tif")
+        with rio.open(
+            mask, "w", driver="GTiff", width=3, height=2, count=1, dtype="uint8"
+        ) as descriptor:
+            descriptor.write(np.ones((1, 2, 3), dtype=np.uint8))
+
+        descriptors = []
+
+        def read_mask():
+            """
+            Read mask with cached dataset
+            """
+            with inputs.rasterio_open_cached(mask) as descriptor:
+                descriptors.append(descriptor)
+
+        with orchestrator.Orchestrator(
+            orchestrator_conf={"mode": "sequential"}, out_dir=directory
+        ):
+            thread = threading.Thread(target=read_mask)
+            thread.start()
+            thread.join()
+            read_mask()
+            assert len(descriptors) == 2
+            assert descriptors[0] is not descriptors[1]
+            assert not any(descriptor.closed for descriptor in descriptors)
+
+        assert all(descriptor.closed for descriptor in descriptors)
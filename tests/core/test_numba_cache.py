@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/core/numba_cache.py
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numba
+import pytest
+
+# CARS imports
+from cars.core import numba_cache
+
+
+@pytest.mark.unit_tests
+def test_numba_cache_dir(monkeypatch):
+    """
+    Test numba cache directory, by version and CPU
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/cache")
+    monkeypatch.setattr(numba.config, "CACHE_DIR", "")
+    cache_dir = numba_cache.get_numba_cache_dir("1.2.3")
+    assert os.path.dirname(cache_dir) == "/tmp/cache/cars/numba"
+    assert os.path.basename(cache_dir).startswith("1.2.3-")
+    assert " " not in cache_dir
+
+    # directory set by user is kept
+    monkeypatch.setenv(numba_cache.NUMBA_CACHE_DIR, "/tmp/user_cache")
+    assert numba_cache.setup_numba_cache("1.2.3") == "/tmp/user_cache"
+    monkeypatch.setenv(numba_cache.NUMBA_CACHE_DIR, "")
+    assert numba_cache.setup_numba_cache("1.2.3") == cache_dir
+
+    # numba imported before CARS uses the same directory
+    assert numba.config.CACHE_DIR == cache_dir  # pylint: disable=E1101
+
+
+@pytest.mark.unit_tests
+def test_warmup():
+    """
+    Test warmup of CARS numba functions
+    """
+    durations = numba_cache.warmup()
+
+    assert set(durations) == {
+        "estimate_right_grid_disp",
+        "mask_left_classif_from_right_mask",
+        "estimate_right_classif_on_left",
+        "fill_disp_pandora",
+        "merge_data",
+    }
+    # functions are compiled once per process
+    assert all(duration < 0.1 for duration in numba_cache.warmup().values())
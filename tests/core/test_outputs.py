@@ -24,12 +24,16 @@ Test module for cars/core/outputs.py
 
 # Standard imports
 import os
+import struct
 import tempfile
 
 # Third party imports
 import fiona
+import numpy as np
 import pytest
+import rasterio as rio
 import xarray as xr
+from rasterio.windows import Window
 from shapely.geometry import Polygon, shape
 
 # CARS imports
@@ -73,3 +77,134 @@ def test_write_ply():
         absolute_data_path("input/intermediate_results/points_ref.nc")
     )
     outputs.write_ply(os.path.join(temporary_dir(), "test.ply"), points)
+
+
+@pytest.mark.unit_tests
+def test_cog_writer():
+    """
+    Test COGWriter: tile writes produce a COG with sampled overviews
+    """
+    height, width = 1300, 1100
+    data = np.random.default_rng(0).random((2, height, width))
+    data = data.astype(np.float32)
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "width": width,
+        "height": height,
+        "count": 2,
+        "crs": "EPSG:32631",
+        "transform": rio.Affine(0.5, 0, 1000, 0, -0.5, 2000),
+        "nodata": -32768,
+    }
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        path_to_file = os.path.join(directory, "dsm.tif")
+        with outputs.open_georaster_writer(
+            path_to_file, profile, cog=True, descriptions=["hgt", None]
+        ) as writer:
+            # same description as at creation, as set by savers on each tile
+            writer.set_band_description(1, "hgt")
+            for row in range(0, height, 300):
+                for col in range(0, width, 400):
+                    window = Window(
+                        col, row, min(400, width - col), min(300, height - row)
+                    )
+                    writer.write(
+                        data[
+                            :,
+                            row : row + window.height,
+                            col : col + window.width,
+                        ],
+                        window=window,
+                    )
+
+        assert os.listdir(directory) == ["dsm.tif"]
+
+        with rio.open(path_to_file) as cog:
+            assert cog.profile["tiled"]
+            assert cog.block_shapes == [(512, 512), (512, 512)]
+            assert cog.overviews(1) == [2, 4]
+            assert cog.descriptions == ("hgt", None)
+            assert cog.nodata == -32768
+            np.testing.assert_array_equal(cog.read(), data)
+            overview = cog.read(out_shape=(2, (height + 1) // 2, width // 2))
+            np.testing.assert_array_equal(overview, data[:, 1::2, 1::2])
+        with rio.open(path_to_file, overview_level=1) as overview:
+            np.testing.assert_array_equal(
+                overview.read(), data[:, 2::4, 2::4]
+            )
+
+        # overviews are internal
+        assert os.listdir(directory) == ["dsm.tif"]
+
+        # COG layout: full resolution IFD first, then overviews IFDs, then
+        # overviews blocks from the smallest one, then full resolution blocks
+        layout = read_tiff_layout(path_to_file)
+        assert len(layout) == 3
+        ifd_offsets = [ifd_offset for ifd_offset, _ in layout]
+        data_offsets = [data_offset for _, data_offset in layout]
+        assert ifd_offsets == sorted(ifd_offsets)
+        assert data_offsets == sorted(data_offsets, reverse=True)
+        assert max(ifd_offsets) < min(data_offsets)
+
+    # attributes of a writer not initialized are not searched in descriptor
+    assert not hasattr(outputs.COGWriter.__new__(outputs.COGWriter), "closed")
+
+
+def read_tiff_layout(path_to_file):
+    """
+    Read TIFF or BigTIFF IFDs chain
+
+    :return: list of IFD offset and first block offset, in chain order
+    """
+    with open(path_to_file, "rb") as tiff_file:
+        header = tiff_file.read(16)
+        byte_order = "<" if header[:2] == b"II" else ">"
+        if struct.unpack(byte_order + "H", header[2:4])[0] == 43:
+            count_format, offset_format, entry_format = "Q", "Q", "HHQ8s"
+            offset = struct.unpack(byte_order + "Q", header[8:16])[0]
+        else:
+            count_format, offset_format, entry_format = "H", "I", "HHI4s"
+            offset = struct.unpack(byte_order + "I", header[4:8])[0]
+        count_size = struct.calcsize(byte_order + count_format)
+        offset_size = struct.calcsize(byte_order + offset_format)
+        entry_size = struct.calcsize(byte_order + entry_format)
+        value_formats = {3: "H", 4: "I", 16: "Q"}
+
+        layout = []
+        while offset != 0:
+            tiff_file.seek(offset)
+            nb_entries = struct.unpack(
+                byte_order + count_format, tiff_file.read(count_size)
+            )[0]
+            entries = tiff_file.read(nb_entries * entry_size)
+            next_offset = struct.unpack(
+                byte_order + offset_format, tiff_file.read(offset_size)
+            )[0]
+            block_offsets = []
+            for idx in range(nb_entries):
+                tag, value_type, count, value = struct.unpack(
+                    byte_order + entry_format,
+                    entries[idx * entry_size : (idx + 1) * entry_size],
+                )
+                # TileOffsets
+                if tag != 324:
+                    continue
+                values_format = byte_order + value_formats[value_type] * count
+                values_size = struct.calcsize(values_format)
+                if values_size > len(value):
+                    tiff_file.seek(
+                        struct.unpack(byte_order + offset_format, value)[0]
+                    )
+                    value = tiff_file.read(values_size)
+                block_offsets = struct.unpack(
+                    values_format, value[:values_size]
+                )
+            # sparse blocks have a null offset
+            layout.append(
+                (offset, min(filter(None, block_offsets), default=None))
+            )
+            offset = next_offset
+
+    return layout
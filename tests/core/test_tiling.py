@@ -340,6 +340,81 @@ def test_tiles_pairing(
                         pass
 
 
+@pytest.mark.unit_tests
+def test_get_corresponding_tiles():
+    """
+    Test get_corresponding_tiles gives the same tiles as
+    get_corresponding_tiles_row_col, for each terrain tile
+    """
+    rng = np.random.default_rng(0)
+    terrain_tiling_grid = tiling.generate_tiling_grid(0, 0, 950, 620, 100, 100)
+    nb_rows, nb_cols = terrain_tiling_grid.shape[:2]
+
+    list_point_clouds = []
+    list_points_min = []
+    list_points_max = []
+    for largest_epipolar_region, epipolar_tile_size in [
+        ([0, 0, 700, 500], 150),
+        ([0, 0, 1000, 1100], 230),
+    ]:
+        point_cloud = cars_dataset.CarsDataset("arrays")
+        point_cloud.tiling_grid = tiling.generate_tiling_grid(
+            *largest_epipolar_region, epipolar_tile_size, epipolar_tile_size
+        )
+        # identify tiles by their position
+        point_cloud.tiles = [
+            [(row, col) for col in range(point_cloud.shape[1])]
+            for row in range(point_cloud.shape[0])
+        ]
+        point_cloud.attributes["largest_epipolar_region"] = (
+            largest_epipolar_region
+        )
+        point_cloud.attributes["opt_epipolar_tile_size"] = epipolar_tile_size
+        list_point_clouds.append(point_cloud)
+
+        # epipolar positions of terrain grid, partly outside epipolar region
+        terrain_grid = tiling.transform_four_layers_to_two_layers_grid(
+            terrain_tiling_grid, terrain=True
+        )
+        points_min = (
+            0.9 * terrain_grid - 50 + rng.normal(0, 20, terrain_grid.shape)
+        )
+        points_max = points_min + rng.uniform(0, 60, terrain_grid.shape)
+        list_points_min.append(points_min)
+        list_points_max.append(points_max)
+
+    terrain_regions, required_point_clouds = tiling.get_corresponding_tiles(
+        terrain_tiling_grid,
+        list_point_clouds,
+        list_points_min,
+        list_points_max,
+    )
+
+    assert terrain_regions.shape == (nb_rows, nb_cols, 4)
+    for row in range(nb_rows):
+        for col in range(nb_cols):
+            (
+                terrain_region,
+                required_point_clouds_row_col,
+                __,
+                list_indexes_row_col,
+            ) = tiling.get_corresponding_tiles_row_col(
+                terrain_tiling_grid,
+                row,
+                col,
+                list_point_clouds,
+                list_points_min,
+                list_points_max,
+            )
+            assert list(terrain_regions[row, col]) == terrain_region
+            assert (
+                required_point_clouds[row][col] == required_point_clouds_row_col
+            )
+            assert [
+                list(tile) for tile, _ in required_point_clouds[row][col]
+            ] == list_indexes_row_col
+
+
 @pytest.mark.unit_tests
 def test_filter_simplices_on_the_edges():
     """
@@ -169,3 +169,35 @@ def test_crop_data():
     np.testing.assert_allclose(
         cropped4["disp"].values, tile4["disp"].values * 2
     )
+
+
+@pytest.mark.unit_tests
+def test_split_window():
+    """
+    Test split_window, and reconstruct_data of sub windows
+    """
+    window = [10, 51, 20, 60]
+    sub_windows = corresponding_tiles_tools.split_window(window)
+
+    assert sub_windows == [
+        [10, 30, 20, 40],
+        [10, 30, 40, 60],
+        [30, 51, 20, 40],
+        [30, 51, 40, 60],
+    ]
+
+    no_overlap = [0, 0, 0, 0]
+    corresponding_tiles = [
+        (sub_window, no_overlap, generate_dataset(sub_window, no_overlap))
+        for sub_window in sub_windows
+    ]
+    new_dataset, row_min, col_min = corresponding_tiles_tools.reconstruct_data(
+        corresponding_tiles, sub_windows[0], no_overlap
+    )
+
+    expected_dataset = generate_dataset(window, no_overlap)
+    np.testing.assert_allclose(
+        new_dataset["disp"].values, expected_dataset["disp"].values
+    )
+    assert row_min == 10
+    assert col_min == 20
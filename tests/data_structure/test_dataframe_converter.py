@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/data_structure/dataframe_converter.py
+"""
+
+# Standard imports
+import os
+import tempfile
+
+# Third party imports
+import laspy
+import numpy as np
+import pytest
+
+# CARS imports
+from cars.data_structures import dataframe_converter
+
+# CARS Tests import
+from tests.helpers import temporary_dir
+
+
+@pytest.mark.unit_tests
+def test_generate_and_merge_laz():
+    """
+    Test chunked las writing and merge of tiles with spatial index
+    """
+    rng = np.random.default_rng(0)
+    coordinates = ["X", "Y", "Z"]
+    las_color = ["red", "green", "blue"]
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        tile_files = []
+        tile_points = []
+        for row in range(2):
+            for col in range(2):
+                nb_points = 250 + 10 * (2 * row + col)
+                arrays_pcl = np.stack(
+                    [
+                        rng.uniform(col * 100, (col + 1) * 100, nb_points),
+                        rng.uniform(row * 100, (row + 1) * 100, nb_points),
+                        rng.uniform(0, 50, nb_points),
+                    ]
+                )
+                arrays_color = rng.uniform(0, 255, (3, nb_points))
+                tile_file = os.path.join(
+                    directory, "{}_{}.las".format(row, col)
+                )
+                dataframe_converter.generate_laz(
+                    tile_file,
+                    coordinates,
+                    las_color,
+                    arrays_pcl,
+                    arrays_color,
+                    chunk_size=100,
+                )
+                tile_files.append(tile_file)
+                tile_points.append(laspy.read(tile_file).points.array)
+
+                # all chunks are written
+                assert len(tile_points[-1]) == nb_points
+                np.testing.assert_array_equal(
+                    tile_points[-1]["X"], (100 * arrays_pcl[0]).astype(int)
+                )
+
+        merged_file = os.path.join(directory, "merged.las")
+        spatial_index = dataframe_converter.merge_laz_files(
+            list(reversed(tile_files)), merged_file, nb_workers=2
+        )
+
+        assert os.path.exists(os.path.join(directory, "merged_index.json"))
+        merged_points = laspy.read(merged_file).points.array
+        assert len(merged_points) == sum(len(pts) for pts in tile_points)
+
+        # tiles follow the Z-order curve
+        assert [entry["point_count"] for entry in spatial_index] == [
+            len(pts) for pts in tile_points
+        ]
+        for entry, points in zip(spatial_index, tile_points):
+            first = entry["first_point"]
+            np.testing.assert_array_equal(
+                merged_points[first : first + entry["point_count"]], points
+            )
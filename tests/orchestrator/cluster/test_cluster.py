@@ -26,7 +26,10 @@ Test module for cars/orchestrator/cluster/cluster.py
 # Standard imports
 from __future__ import absolute_import
 
+import subprocess
+import sys
 import tempfile
+import time
 
 import numpy as np
 
@@ -148,6 +151,8 @@ conf_mp = {"mode": "mp", "dump_to_disk": False}
 
 conf_local_dask = {"mode": "local_dask"}
 
+conf_threads = {"mode": "threads", "nb_workers": 2}
+
 conf_pbs_dask = {
     "mode": "pbs_dask",
     "nb_workers": 2,
@@ -165,7 +170,9 @@ conf_slurm_dask = {
 
 
 @pytest.mark.unit_tests
-@pytest.mark.parametrize("conf", [conf_sequential, conf_local_dask, conf_mp])
+@pytest.mark.parametrize(
+    "conf", [conf_sequential, conf_local_dask, conf_mp, conf_threads]
+)
 def test_tasks_pipeline(conf):
     """
     Test full distributed pipeline with task creation and execution
@@ -184,6 +191,150 @@ def test_slurm_tasks_pipeline():
     pipeline_step_by_step(conf_slurm_dask)
 
 
+def step_identity(data):
+    """
+    Return input
+    """
+    return data
+
+
+def step_failure(data):
+    """
+    Raise an error
+    """
+    raise ValueError("Failure of {}".format(data))
+
+
+@pytest.mark.unit_tests
+def test_threads_cluster():
+    """
+    Test threads cluster: data are shared by reference between tasks,
+    and errors of tasks are raised when iterating on futures
+    """
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        cluster = abstract_cluster.AbstractCluster(  # pylint: disable=E0110
+            conf_threads, directory
+        )
+
+        data = np.ones((3, 4))
+        delayed_1a, delayed_1b = cluster.create_task(step1_mp, nout=2)("a")
+        delayed_identity = cluster.create_task(step_identity)(
+            cluster.create_task(step_identity)(data)
+        )
+        delayed_list = [delayed_1b, delayed_identity, delayed_1a]
+
+        futures_results = list(
+            cluster.future_iterator(cluster.start_tasks(delayed_list))
+        )
+        assert len(futures_results) == 3
+        assert "a_step1a" in futures_results
+        assert "a_step1b" in futures_results
+        assert any(res is data for res in futures_results)
+
+        delayed_failure = cluster.create_task(step_identity)(
+            cluster.create_task(step_failure)("a")
+        )
+        with pytest.raises(ValueError, match="Failure of a"):
+            list(
+                cluster.future_iterator(cluster.start_tasks([delayed_failure]))
+            )
+
+        cluster.cleanup()
+
+
+def step_sleep(duration):
+    """
+    Sleep and return duration
+    """
+    time.sleep(duration)
+    return duration
+
+
+@pytest.mark.unit_tests
+def test_threads_cluster_timeout():
+    """
+    Test threads cluster timeout is the longest wait between two tasks,
+    and cleanup does not wait for tasks after a timeout
+    """
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        cluster = abstract_cluster.AbstractCluster(  # pylint: disable=E0110
+            {"mode": "threads", "nb_workers": 2, "task_timeout": 100},
+            directory,
+        )
+        assert cluster.checked_conf_cluster["task_timeout"] == 100
+
+        # 3 rounds of 1s tasks, longer than timeout in total
+        delayed_list = [cluster.create_task(step_sleep)(1) for _ in range(6)]
+        futures_results = list(
+            cluster.future_iterator(
+                cluster.start_tasks(delayed_list), timeout=2
+            )
+        )
+        assert futures_results == [1] * 6
+
+        delayed_list = [cluster.create_task(step_sleep)(5)]
+        with pytest.raises(TimeoutError):
+            list(
+                cluster.future_iterator(
+                    cluster.start_tasks(delayed_list), timeout=1
+                )
+            )
+
+        start = time.time()
+        cluster.cleanup()
+        assert time.time() - start < 4
+
+
+@pytest.mark.unit_tests
+def test_threads_cluster_numba_exit():
+    """
+    Test process using numba parallel functions in threads cluster workers
+    exits
+    """
+    script = """
+import sys
+import tempfile
+
+import numba
+import numpy as np
+
+from cars.orchestrator.cluster import abstract_cluster
+
+
+@numba.njit(parallel=True)
+def double(arr):
+    out = np.empty_like(arr)
+    for idx in numba.prange(arr.shape[0]):
+        out[idx] = 2 * arr[idx]
+    return out
+
+
+def step_double(size):
+    numba.set_num_threads(1)
+    return double(np.ones(size)).sum()
+
+
+with tempfile.TemporaryDirectory(dir=sys.argv[1]) as directory:
+    cluster = abstract_cluster.AbstractCluster(
+        {"mode": "threads", "nb_workers": 2}, directory
+    )
+    delayed_list = [cluster.create_task(step_double)(100) for _ in range(4)]
+    print(list(cluster.future_iterator(cluster.start_tasks(delayed_list))))
+    cluster.cleanup()
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script, temporary_dir()],
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[200.0, 200.0, 200.0, 200.0]"
+
+
 def step1_array(data):
     """
     Step 1
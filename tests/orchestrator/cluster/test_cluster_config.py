@@ -44,6 +44,8 @@ conf_mp = {
     "dump_to_disk": True,
     "per_job_timeout": 600,
     "factorize_tasks": True,
+    "max_threads": 4,
+    "speculative_execution": False,
     "profiling": {"mode": "cars_profiling", "loop_testing": True},
 }
 
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/orchestrator/cluster/memory_sampling.py
+"""
+
+# Standard imports
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Third party imports
+import numpy as np
+import pytest
+
+# CARS imports
+from cars.orchestrator.cluster import memory_sampling
+from cars.orchestrator.cluster.abstract_dask_cluster import (
+    ComputeDSMMemoryLogger,
+)
+
+# CARS Tests imports
+from ...helpers import temporary_dir
+
+
+@pytest.mark.unit_tests
+def test_sample_buffer():
+    """
+    Test samples flushed by batches, then loaded
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        file_path = os.path.join(directory, "memory.samples")
+        # nothing flushed
+        assert memory_sampling.load_samples(file_path).size == 0
+        samples = memory_sampling.SampleBuffer(file_path, 2, size=4)
+        assert memory_sampling.load_samples(file_path).size == 0
+
+        for index in range(6):
+            samples.append([index, 2 * index])
+        # first batch flushed, when buffer was full
+        assert samples.nb_samples == 2
+        np.testing.assert_array_equal(
+            memory_sampling.load_samples(file_path)[:, 0], np.arange(4)
+        )
+
+        samples.flush()
+        loaded = memory_sampling.load_samples(file_path)
+
+        # samples of a previous run are removed
+        samples = memory_sampling.SampleBuffer(file_path, 2, size=4)
+        samples.append([10, 20])
+        samples.flush()
+        reloaded = memory_sampling.load_samples(file_path)
+
+    np.testing.assert_array_equal(loaded[:, 0], np.arange(6))
+    np.testing.assert_array_equal(loaded[:, 1], 2 * np.arange(6))
+    np.testing.assert_array_equal(reloaded, [[10, 20]])
+
+
+@pytest.mark.unit_tests
+def test_process_sampler():
+    """
+    Test maximum memory of process sampled during window
+    """
+    sampler = memory_sampling.get_process_sampler(0.01)
+    # sampler shared in process, at smallest interval
+    assert memory_sampling.get_process_sampler(1) is sampler
+    assert sampler.thread.interval <= 0.01
+
+    window_id = sampler.open_window()
+    start_memory, _ = sampler.close_window(sampler.open_window())
+
+    data = np.ones(50 * 2**20, dtype=np.uint8)
+    time.sleep(0.1)
+    del data
+
+    max_memory, max_cpu = sampler.close_window(window_id)
+    assert max_memory > start_memory + 40
+    assert max_cpu >= 0
+    assert not sampler.windows
+
+
+class FakeTask:  # pylint: disable=too-few-public-methods
+    """
+    Task in worker state
+    """
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def get_nbytes(self):
+        """
+        Get size of task data
+        """
+        return self.nbytes
+
+
+@pytest.mark.unit_tests
+def test_dask_memory_logger():
+    """
+    Test memory of data accounted on transitions, and sampled
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        os.makedirs(os.path.join(directory, "dask_log"))
+        worker = SimpleNamespace(name=0, state=SimpleNamespace(tasks={}))
+        plugin = ComputeDSMMemoryLogger(directory, interval=0.01)
+        plugin.setup(worker)
+
+        worker.state.tasks = {"a": FakeTask(100), "b": FakeTask(20)}
+        plugin.transition("a", "executing", "memory")
+        plugin.transition("b", "flight", "memory")
+        assert plugin.total_in_memory == 120
+        worker.state.tasks.pop("a")
+        plugin.transition("a", "memory", "released")
+        assert plugin.total_in_memory == 20
+        time.sleep(0.1)
+
+        plugin.teardown(worker)
+        samples = memory_sampling.load_samples(
+            os.path.join(directory, "dask_log", "memory_0.samples")
+        )
+
+    assert samples.shape[1] == 4
+    assert samples.shape[0] > 2
+    # last sample after teardown
+    assert samples[-1, 1] == 20
+    assert samples[-1, 2] == 1
+    assert np.all(np.diff(samples[:, 0]) >= 0)
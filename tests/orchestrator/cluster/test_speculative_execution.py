@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/orchestrator/cluster/speculative_execution.py
+"""
+
+# Standard imports
+import os
+import tempfile
+import time
+
+# Third party imports
+import dask
+import numpy as np
+import pytest
+import xarray as xr
+
+# CARS imports
+from cars.orchestrator.cluster import (
+    abstract_cluster,
+    abstract_dask_cluster,
+    speculative_execution,
+)
+from cars.orchestrator.cluster.mp_cluster import multiprocessing_cluster
+
+# CARS Tests imports
+from ...helpers import temporary_dir
+
+# Duration of the first run of the straggler tile
+STRAGGLER_DURATION = 60
+
+
+def compute_tile(tile_id, straggler_file):
+    """
+    Compute tile: first run of tile 0 is a straggler
+
+    :param tile_id: id of tile
+    :param straggler_file: file created by first run of tile 0
+    """
+    if tile_id == 0 and not os.path.exists(straggler_file):
+        with open(straggler_file, "w", encoding="utf-8"):
+            pass
+        time.sleep(STRAGGLER_DURATION)
+    else:
+        time.sleep(0.1)
+
+    return xr.Dataset(
+        {"data": (["row"], np.full(2, tile_id))}, attrs={"tile_id": tile_id}
+    )
+
+
+@pytest.mark.unit_tests
+def test_get_task_stage():
+    """
+    Test stage of task found under wrappers
+    """
+    kwargs = {
+        "fun": multiprocessing_cluster.replace_job_by_data,
+        "fun_log_wrapper": compute_tile,
+    }
+    assert (
+        speculative_execution.get_task_stage(time.sleep, kwargs)
+        == "compute_tile"
+    )
+    assert speculative_execution.get_task_stage(time.sleep, {}) == "sleep"
+
+
+@pytest.mark.unit_tests
+def test_get_straggler_tasks():
+    """
+    Test straggler tasks, compared to median of their stage
+    """
+    stage_durations = {"matching": [1, 2, 10], "filling": [1, 1]}
+    stage_medians = speculative_execution.get_stage_medians(stage_durations)
+    # not enough finished tasks for filling
+    assert stage_medians == {"matching": 2}
+
+    running_tasks = {
+        "tile_0": ("matching", 5),
+        "tile_1": ("matching", 3),
+        "tile_2": ("matching", 9),
+        "tile_3": ("filling", 10),
+    }
+    assert speculative_execution.get_straggler_tasks(
+        running_tasks, stage_medians
+    ) == ["tile_2", "tile_0"]
+
+
+class FakeAsyncResult:
+    """
+    Finished or running job, as returned by pool.apply_async
+    """
+
+    def __init__(self, ready, success=True):
+        self._ready = ready
+        self.success = success
+
+    def ready(self):
+        """
+        Return whether job is finished
+        """
+        return self._ready
+
+    def successful(self):
+        """
+        Return whether job succeeded
+        """
+        return self.success
+
+
+@pytest.mark.unit_tests
+def test_select_finished_copy():
+    """
+    Test first successful run of a copied job is kept
+    """
+    running = FakeAsyncResult(False)
+    succeeded = FakeAsyncResult(True)
+    failed = FakeAsyncResult(True, success=False)
+    other_failed = FakeAsyncResult(True, success=False)
+
+    select = multiprocessing_cluster.select_finished_copy
+    assert select(running, None) is None
+    assert select(failed, None) is failed
+    assert select(running, succeeded) is succeeded
+    assert select(failed, succeeded) is succeeded
+    # wait for the other run
+    assert select(running, failed) is None
+    assert select(failed, other_failed) is failed
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("mode", ["multiprocessing", "local_dask"])
+def test_speculative_execution(mode, monkeypatch):
+    """
+    Test copy of a straggler tile finishes before original
+
+    :param mode: cluster mode
+    """
+
+    # PBS dask : function can't be imported from test module
+    def compute_tile_dask(tile_id, straggler_file):
+        """
+        Compute tile cluster mode dask
+        """
+        return compute_tile(tile_id, straggler_file)
+
+    # two workers are needed to run copy
+    monkeypatch.setattr(multiprocessing_cluster.mp, "cpu_count", lambda: 2)
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        cluster = abstract_cluster.AbstractCluster(  # pylint: disable=E0110
+            {"mode": mode, "nb_workers": 2, "speculative_execution": True},
+            directory,
+        )
+        func = compute_tile_dask if "dask" in mode else compute_tile
+        straggler_file = os.path.join(directory, "straggler")
+        delayed_list = [
+            cluster.create_task(func)(tile_id, straggler_file)
+            for tile_id in range(8)
+        ]
+
+        futures = cluster.start_tasks(delayed_list)
+        tile_ids = [
+            res.attrs["tile_id"] for res in cluster.future_iterator(futures)
+        ]
+        assert os.path.exists(straggler_file)
+        assert sorted(tile_ids) == list(range(8))
+        # only straggler is copied, and its first run is abandoned
+        speculative_stats = cluster.speculative_stats  # pylint: disable=E1101
+        assert speculative_stats.nb_copies == 1
+        assert speculative_stats.nb_abandoned == 1
+
+        cluster.cleanup()
+
+
+class FakeFuture:  # pylint: disable=too-few-public-methods
+    """
+    Future of a computed delayed
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+
+@pytest.mark.unit_tests
+def test_saving_tasks_not_copied():
+    """
+    Test tasks whose results are saved in workers are not copied
+    """
+    tile = dask.delayed(compute_tile)(
+        0, "straggler", dask_key_name="compute_tile-{}".format("0" * 32)
+    )
+    saving = dask.delayed(abstract_dask_cluster.save_tile_on_worker)(
+        tile, None, dask_key_name="save_tile_on_worker-{}".format("1" * 32)
+    )
+    assert abstract_dask_cluster.is_saving_task(saving.key)
+    assert not abstract_dask_cluster.is_saving_task(tile.key)
+
+    task_copier = abstract_dask_cluster.DaskTaskCopier(
+        None,
+        {saving.key: saving},
+        [FakeFuture(saving.key)],
+        speculative_execution.SpeculativeStats(),
+    )
+    assert not task_copier.copy_task(tile.key, ["worker"])
+    assert not task_copier.copy_task(saving.key, ["worker"])
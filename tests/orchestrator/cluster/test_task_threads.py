@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/orchestrator/cluster/task_threads.py
+"""
+
+# Standard imports
+import tempfile
+
+# Third party imports
+import dask
+import numba
+import pytest
+from rasterio.env import get_gdal_config
+
+# CARS imports
+from cars.core import cars_logging
+from cars.orchestrator.cluster import abstract_cluster, task_threads
+
+# CARS Tests imports
+from ...helpers import temporary_dir
+
+
+@pytest.mark.unit_tests
+def test_threads_budget():
+    """
+    Test threads given to tasks within budget
+    """
+    budget = task_threads.ThreadsBudget(8)
+
+    # many waiting tasks: one thread each
+    assert budget.acquire(8, nb_waiting_tasks=10) == 1
+    # last tasks share free threads
+    assert budget.acquire(8, nb_waiting_tasks=1) == 3
+    assert budget.acquire(2) == 2
+    assert budget.used_threads == 6
+    # no more threads than asked
+    assert budget.acquire(1) == 1
+    budget.release(2)
+    assert budget.acquire(8) == 3
+    # at least one thread
+    assert budget.acquire(8) == 1
+    assert budget.used_threads == 9
+
+
+def get_nb_threads():
+    """
+    Get number of threads used by numba and GDAL in task
+    """
+    return numba.get_num_threads(), get_gdal_config("GDAL_NUM_THREADS")
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("mode", ["sequential", "threads"])
+def test_task_nb_threads(mode, monkeypatch):
+    """
+    Test number of threads set in task, and restored after task,
+    threads of tasks not declaring threads are left unchanged
+    """
+    numba_threads_calls = []
+    set_num_threads = numba.set_num_threads
+
+    def record_set_num_threads(nb_threads):
+        numba_threads_calls.append(nb_threads)
+        set_num_threads(nb_threads)
+
+    monkeypatch.setattr(
+        task_threads.numba, "set_num_threads", record_set_num_threads
+    )
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        cluster = abstract_cluster.AbstractCluster(  # pylint: disable=E0110
+            (
+                {"mode": mode, "max_threads": 2}
+                if mode == "threads"
+                else {"mode": mode}
+            ),
+            directory,
+        )
+        previous_nb_threads = numba.get_num_threads()
+
+        nb_threads = min(
+            2, numba.config.NUMBA_NUM_THREADS  # pylint: disable=E1101
+        )
+        delayed = cluster.create_task(get_nb_threads, nb_threads=2)()
+        results = list(cluster.future_iterator(cluster.start_tasks([delayed])))
+        assert results == [(nb_threads, 2)]
+
+        assert len(numba_threads_calls) == 2
+
+        delayed = cluster.create_task(get_nb_threads)()
+        results = list(cluster.future_iterator(cluster.start_tasks([delayed])))
+        assert results[0][1] == 1
+        assert len(numba_threads_calls) == 2
+
+        assert numba.get_num_threads() == previous_nb_threads
+
+        cluster.cleanup()
+
+
+@pytest.mark.unit_tests
+def test_dask_task_nb_threads(monkeypatch):
+    """
+    Test threads of dask tasks capped by CPUs of their worker
+    """
+    monkeypatch.setattr(task_threads, "get_available_cpus", lambda: 8)
+    # tasks are computed in main process: keep its logging
+    monkeypatch.setattr(cars_logging, "setup_logging", lambda **_: None)
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        cluster = abstract_cluster.AbstractCluster(  # pylint: disable=E0110
+            {"mode": "local_dask", "nb_workers": 2},
+            directory,
+            launch_worker=False,
+        )
+        assert cluster.cpus_per_worker == 4  # pylint: disable=E1101
+
+        delayed = cluster.create_task(get_nb_threads, nb_threads=8)()
+        assert dask.compute(delayed, scheduler="synchronous")[0][1] == 4
+
+        delayed = cluster.create_task(get_nb_threads, nb_threads=2)()
+        assert dask.compute(delayed, scheduler="synchronous")[0][1] == 2
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/orchestrator/cluster/tracing.py
+"""
+
+# Standard imports
+import json
+import os
+import tempfile
+import time
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+# CARS imports
+from cars.orchestrator.cluster import abstract_cluster, tracing
+
+# CARS Tests imports
+from ...helpers import temporary_dir
+
+
+def compute_tile(tile_id):
+    """
+    Compute tile
+
+    :param tile_id: id of tile
+    """
+    return xr.Dataset(
+        {"data": (["row"], np.full(100, tile_id, dtype=np.float64))},
+        attrs={"tile_id": tile_id},
+    )
+
+
+def allocate_memory(size_mb):
+    """
+    Allocate memory during task
+
+    :param size_mb: memory to allocate, in MB
+    """
+    data = np.ones(size_mb * 1000000, dtype=np.uint8)
+    time.sleep(0.3)
+    return int(data[0])
+
+
+def read_trace(trace_file):
+    """
+    Read events of Chrome trace file, by category
+    """
+    with open(trace_file, encoding="utf-8") as file_desc:
+        events = json.load(file_desc)["traceEvents"]
+
+    events_by_category = {}
+    for event in events:
+        events_by_category.setdefault(event.get("cat"), []).append(event)
+
+    return events_by_category
+
+
+@pytest.mark.unit_tests
+def test_get_data_size():
+    """
+    Test size of data held by objects
+    """
+    array = np.zeros((10, 10), dtype=np.float32)
+    dataset = xr.Dataset({"data": (["row", "col"], array)})
+    dataframe = pd.DataFrame({"x": np.zeros(10), "y": np.zeros(10)})
+
+    assert tracing.get_data_size(array) == 400
+    assert tracing.get_data_size(dataset) == 400
+    assert tracing.get_data_size(dataframe) == 160
+    assert tracing.get_data_size((dataset, [dataframe, None])) == 560
+    assert tracing.get_data_size({"a": array, "b": "other"}) == 400
+
+
+@pytest.mark.unit_tests
+def test_trace_span():
+    """
+    Test spans written and exported in Chrome trace
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        with tracing.trace_span(directory, "saving", tracing.SAVE, bytes_in=2):
+            time.sleep(0.01)
+        tracing.traced_function(
+            1,
+            **{
+                tracing.FUN_TRACE_WRAPPER: compute_tile,
+                tracing.TRACE_DIR: directory,
+                tracing.TASK_CREATION_TIME: time.time() - 1,
+            },
+        )
+
+        trace_file = os.path.join(directory, "trace.json")
+        tracing.close_trace_files(directory)
+        tracing.export_chrome_trace(directory, trace_file)
+        events = read_trace(trace_file)
+
+    [save_event] = events[tracing.SAVE]
+    assert save_event["name"] == "saving"
+    assert save_event["args"] == {"bytes_in": 2}
+    assert save_event["dur"] >= 10000
+
+    [wait_event] = events[tracing.WAIT]
+    assert wait_event["name"] == "compute_tile"
+    assert wait_event["dur"] >= 1e6
+
+    [compute_event] = events[tracing.COMPUTE]
+    assert compute_event["name"] == "compute_tile"
+    assert compute_event["ts"] >= wait_event["ts"] + wait_event["dur"]
+    assert compute_event["args"]["bytes_in"] == 0
+    assert compute_event["args"]["bytes_out"] == 800
+    assert compute_event["args"]["peak_rss_mb"] > 0
+
+    # process name metadata
+    [metadata_event] = events[None]
+    assert metadata_event["ph"] == "M"
+    assert metadata_event["pid"] == os.getpid()
+
+
+@pytest.mark.unit_tests
+def test_traced_peak_rss():
+    """
+    Test peak resident memory traced by task, not by process
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        for size_mb in [200, 1]:
+            tracing.traced_function(
+                size_mb,
+                **{
+                    tracing.FUN_TRACE_WRAPPER: allocate_memory,
+                    tracing.TRACE_DIR: directory,
+                    tracing.TASK_CREATION_TIME: time.time(),
+                },
+            )
+
+        trace_file = os.path.join(directory, "trace.json")
+        tracing.close_trace_files(directory)
+        assert all(
+            os.path.dirname(trace_file) != directory
+            for trace_file in tracing.TRACE_FILES
+        )
+        tracing.export_chrome_trace(directory, trace_file)
+        events = read_trace(trace_file)
+
+    big_task, small_task = [
+        event["args"]["peak_rss_mb"] for event in events[tracing.COMPUTE]
+    ]
+    assert big_task > small_task + 150
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("mode", ["sequential", "multiprocessing"])
+def test_cluster_tracing(mode):
+    """
+    Test tasks of cluster traced
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        cluster = abstract_cluster.AbstractCluster(  # pylint: disable=E0110
+            {"mode": mode}, directory
+        )
+        delayed_list = [
+            cluster.create_task(compute_tile)(tile_id) for tile_id in range(4)
+        ]
+        futures = cluster.start_tasks(delayed_list)
+        tile_ids = [
+            res.attrs["tile_id"] for res in cluster.future_iterator(futures)
+        ]
+        cluster.cleanup()
+
+        trace_file = os.path.join(directory, "trace.json")
+        tracing.export_chrome_trace(cluster.trace_dir, trace_file)
+        events = read_trace(trace_file)
+
+    assert sorted(tile_ids) == list(range(4))
+    assert len(events[tracing.COMPUTE]) == 4
+    assert len(events[tracing.WAIT]) == 4
+    for event in events[tracing.COMPUTE]:
+        assert event["name"] == "compute_tile"
+        assert event["args"]["bytes_out"] == 800
+
+    if mode == "multiprocessing":
+        # results are dumped to disk by workers
+        assert len(events[tracing.DUMP]) == 4
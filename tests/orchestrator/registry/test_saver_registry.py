@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/orchestrator/registry/saver_registry.py
+"""
+
+# Standard imports
+import glob
+import os
+import tempfile
+import threading
+from collections import defaultdict
+
+# Third party imports
+import numpy as np
+import pytest
+import rasterio as rio
+import xarray as xr
+
+# CARS imports
+from cars.core import tiling
+from cars.data_structures import cars_dataset
+from cars.orchestrator import orchestrator
+from cars.orchestrator.orchestrator_constants import (
+    CARS_DATASET_KEY,
+    CARS_DS_COL,
+    CARS_DS_ROW,
+    SAVED_ON_WORKER,
+    SAVING_INFO,
+)
+from cars.orchestrator.registry import saver_registry
+
+# CARS Tests imports
+from ...helpers import temporary_dir
+
+
+def generate_tiles(cars_ds):
+    """
+    Generate tiles of an arrays CarsDataset, with overlaps
+    """
+    tiles = []
+    for row in range(cars_ds.shape[0]):
+        for col in range(cars_ds.shape[1]):
+            row_min, row_max, col_min, col_max = cars_ds.tiling_grid[row, col]
+            values = (
+                np.arange(
+                    (row_max - row_min + 2) * (col_max - col_min),
+                    dtype=np.float32,
+                ).reshape(-1, int(col_max - col_min))
+                + 100 * (row + 1)
+                + col
+            )
+            tile = xr.Dataset(
+                {"data": (["row", "col"], values)},
+                coords={
+                    "row": np.arange(values.shape[0]),
+                    "col": np.arange(values.shape[1]),
+                },
+            )
+            cars_dataset.fill_dataset(
+                tile,
+                saving_info={
+                    CARS_DATASET_KEY: "id",
+                    CARS_DS_ROW: row,
+                    CARS_DS_COL: col,
+                },
+                window={
+                    "row_min": int(row_min),
+                    "row_max": int(row_max),
+                    "col_min": int(col_min),
+                    "col_max": int(col_max),
+                },
+                overlaps={"up": 1, "down": 1, "left": 0, "right": 0},
+                profile={},
+            )
+            tiles.append(tile)
+    return tiles
+
+
+@pytest.mark.unit_tests
+def test_worker_saver():
+    """
+    Test tiles saved by worker savers, with a lock per file, are the same
+    as tiles saved by the main process saver
+    """
+    cars_ds = cars_dataset.CarsDataset("arrays")
+    cars_ds.tiling_grid = tiling.generate_tiling_grid(0, 0, 20, 30, 10, 15)
+    tiles = generate_tiles(cars_ds)
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        main_file = os.path.join(directory, "main.tif")
+        worker_file = os.path.join(directory, "worker.tif")
+
+        # Save in main process
+        main_saver = saver_registry.SingleCarsDatasetSaver("id", cars_ds)
+        main_saver.add_file(main_file, tag="data", dtype="float32", nodata=-1)
+        for tile in tiles:
+            main_saver.save(tile)
+        main_saver.cleanup()
+
+        # Save in workers
+        saver = saver_registry.SingleCarsDatasetSaver("id", cars_ds)
+        saver.add_file(worker_file, tag="data", dtype="float32", nodata=-1)
+        worker_saver = saver_registry.WorkerCarsDatasetSaver(saver)
+        assert worker_saver.cars_ds is None
+
+        locks = defaultdict(threading.Lock)
+        threads = [
+            threading.Thread(
+                target=worker_saver.save,
+                args=(tile,),
+                kwargs={"get_lock": locks.__getitem__},
+            )
+            for tile in tiles
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert list(locks.keys()) == [worker_file]
+
+        saved_info = worker_saver.get_saved_tile_info(tiles[-1])
+        assert saved_info.attrs[SAVED_ON_WORKER]
+        assert saved_info.attrs[SAVING_INFO] == tiles[-1].attrs[SAVING_INFO]
+
+        with rio.open(main_file) as main_desc, rio.open(
+            worker_file
+        ) as worker_desc:
+            assert worker_desc.profile == main_desc.profile
+            assert np.all(worker_desc.read() >= 100)
+            np.testing.assert_array_equal(worker_desc.read(), main_desc.read())
+
+
+@pytest.mark.unit_tests
+def test_get_saved_files_pattern():
+    """
+    Test only files of the directory of a registered file are removed
+    """
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        confidence_dir = os.path.join(directory, "confidence_dir")
+        other_dir = os.path.join(directory, "other_dir")
+        saved_files = [
+            os.path.join(confidence_dir, "confidence.tif"),
+            os.path.join(confidence_dir, "confidence_from_ambiguity.tif"),
+        ]
+        unrelated_files = [
+            os.path.join(confidence_dir, "data.tif"),
+            os.path.join(other_dir, "confidence.tif"),
+        ]
+        for file_name in saved_files + unrelated_files:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            with open(file_name, "w", encoding="utf-8"):
+                pass
+
+        pattern = saver_registry.get_saved_files_pattern(saved_files[0])
+        assert sorted(glob.glob(pattern)) == sorted(saved_files)
+        pattern = saver_registry.get_saved_files_pattern(unrelated_files[0])
+        assert glob.glob(pattern) == [unrelated_files[0]]
+
+
+def fill_saving_info(tile, saving_info=None):
+    """
+    Set saving info of tile
+    """
+    tile.attrs[SAVING_INFO] = saving_info
+    return tile
+
+
+@pytest.mark.unit_tests
+def test_save_on_workers_local_dask():
+    """
+    Test tiles saved in dask workers are the same as tiles saved by the
+    main process, files remaining from a previous run are replaced
+    """
+    cars_ds_ref = cars_dataset.CarsDataset("arrays")
+    cars_ds_ref.tiling_grid = tiling.generate_tiling_grid(0, 0, 20, 30, 10, 15)
+    tiles = generate_tiles(cars_ds_ref)
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        main_file = os.path.join(directory, "main.tif")
+        main_saver = saver_registry.SingleCarsDatasetSaver("id", cars_ds_ref)
+        main_saver.add_file(main_file, tag="data", dtype="float32", nodata=-1)
+        for tile in tiles:
+            main_saver.save(tile)
+        main_saver.cleanup()
+
+        # file of a previous run, with another size
+        worker_file = os.path.join(directory, "worker.tif")
+        with rio.open(
+            worker_file,
+            "w",
+            driver="GTiff",
+            width=2,
+            height=2,
+            count=1,
+            dtype="float32",
+        ) as descriptor:
+            descriptor.write(np.zeros((1, 2, 2), dtype=np.float32))
+
+        conf = {"mode": "local_dask", "nb_workers": 2, "save_on_workers": True}
+        with orchestrator.Orchestrator(
+            orchestrator_conf=conf, out_dir=directory
+        ) as cars_orchestrator:
+            cars_ds = cars_dataset.CarsDataset("arrays")
+            cars_ds.tiling_grid = cars_ds_ref.tiling_grid
+            cars_orchestrator.add_to_save_lists(
+                worker_file, "data", cars_ds, dtype="float32", nodata=-1
+            )
+            saving_info = cars_orchestrator.get_saving_infos([cars_ds])[0]
+            for idx, tile in enumerate(tiles):
+                row, col = divmod(idx, cars_ds.shape[1])
+                cars_ds[row, col] = cars_orchestrator.cluster.create_task(
+                    fill_saving_info
+                )(
+                    tile,
+                    saving_info=orchestrator.update_saving_infos(
+                        saving_info, row=row, col=col
+                    ),
+                )
+            cars_orchestrator.breakpoint()
+
+        with rio.open(main_file) as main_desc, rio.open(
+            worker_file
+        ) as worker_desc:
+            assert worker_desc.shape == main_desc.shape
+            np.testing.assert_array_equal(worker_desc.read(), main_desc.read())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2020 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of CARS
+# (see https://github.com/CNES/cars).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for cars/orchestrator/orchestrator.py
+"""
+
+# Standard imports
+import tempfile
+import time
+
+# Third party imports
+import numpy as np
+import pytest
+import xarray as xr
+
+# CARS imports
+from cars.core import tiling
+from cars.data_structures import cars_dataset
+from cars.orchestrator import orchestrator
+
+# CARS Tests imports
+from ..helpers import temporary_dir
+
+
+def generate_tile(value, saving_info=None):
+    """
+    Generate a tile filled with value
+    """
+    tile = xr.Dataset(
+        {"data": (["row", "col"], np.full((2, 2), value))},
+        coords={"row": np.arange(2), "col": np.arange(2)},
+    )
+    cars_dataset.fill_dataset(tile, saving_info=saving_info)
+    return tile
+
+
+def generate_tile_or_sleep(
+    value, duration, saving_info=None, force_subdivision=False
+):
+    """
+    Generate a tile filled with value, opposite if subdivided.
+    Tiles with an odd value sleep for duration first, unless subdivided
+    """
+    if force_subdivision:
+        return generate_tile(-value, saving_info=saving_info)
+    if value % 2 == 1:
+        time.sleep(duration)
+    return generate_tile(value, saving_info=saving_info)
+
+
+def create_cars_ds(cars_orchestrator, value):
+    """
+    Create a CarsDataset of 1x2 tiles, replaced by orchestrator
+    """
+    cars_ds = cars_dataset.CarsDataset("arrays")
+    cars_ds.tiling_grid = tiling.generate_tiling_grid(0, 0, 2, 4, 2, 2)
+    cars_orchestrator.add_to_replace_lists(cars_ds)
+    [saving_info] = cars_orchestrator.get_saving_infos([cars_ds])
+    for col in range(cars_ds.shape[1]):
+        cars_ds[0, col] = cars_orchestrator.cluster.create_task(
+            generate_tile, nout=1
+        )(
+            value + col,
+            saving_info=orchestrator.update_saving_infos(
+                saving_info, row=0, col=col
+            ),
+        )
+    return cars_ds
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("mode", ["sequential", "multiprocessing"])
+def test_materialize(mode):
+    """
+    Test only materialized CarsDatasets are replaced by wait_futures,
+    other registered ones are computed in background and collected
+    at breakpoint
+    """
+    conf = {"mode": mode}
+    if mode == "multiprocessing":
+        conf.update({"nb_workers": 2, "max_ram_per_worker": 500})
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        with orchestrator.Orchestrator(
+            orchestrator_conf=conf, out_dir=directory
+        ) as cars_orchestrator:
+            delayed_type = cars_orchestrator.cluster.get_delayed_type()
+            first_cars_ds = create_cars_ds(cars_orchestrator, 10)
+            second_cars_ds = create_cars_ds(cars_orchestrator, 20)
+            third_cars_ds = create_cars_ds(cars_orchestrator, 30)
+
+            futures = cars_orchestrator.materialize([first_cars_ds])
+            assert len(futures) == 2
+            assert len(cars_orchestrator.background_futures) == 4
+            cars_orchestrator.wait_futures(futures)
+
+            assert first_cars_ds[0, 0]["data"].values[0, 0] == 10
+            assert first_cars_ds[0, 1]["data"].values[0, 0] == 11
+            assert isinstance(second_cars_ds[0, 0], delayed_type)
+
+            # Tiles already started in background are not started again
+            futures = cars_orchestrator.materialize([second_cars_ds])
+            assert len(futures) == 2
+            assert len(cars_orchestrator.background_futures) == 2
+            cars_orchestrator.wait_futures(futures)
+
+            assert second_cars_ds[0, 1]["data"].values[0, 0] == 21
+            assert isinstance(third_cars_ds[0, 0], delayed_type)
+
+            # Remaining tiles are collected at breakpoint
+            cars_orchestrator.breakpoint()
+
+            assert len(cars_orchestrator.background_futures) == 0
+            assert third_cars_ds[0, 0]["data"].values[0, 0] == 30
+            assert third_cars_ds[0, 1]["data"].values[0, 0] == 31
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize(
+    "mode,task_timeout", [("threads", 1), ("multiprocessing", 20)]
+)
+def test_retry_timed_out_tasks(mode, task_timeout):
+    """
+    Test tasks timed out are retried with their retry arguments,
+    tasks not declaring them are retried identically
+    """
+    conf = {"mode": mode, "nb_workers": 2, "task_timeout": task_timeout}
+    if mode == "multiprocessing":
+        conf["max_ram_per_worker"] = 500
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        with orchestrator.Orchestrator(
+            orchestrator_conf=conf, out_dir=directory
+        ) as cars_orchestrator:
+            cars_ds = cars_dataset.CarsDataset("arrays")
+            cars_ds.tiling_grid = tiling.generate_tiling_grid(0, 0, 2, 4, 2, 2)
+            cars_orchestrator.add_to_replace_lists(cars_ds)
+            saving_info = cars_orchestrator.get_saving_infos([cars_ds])[0]
+            # odd tile times out, even tile is retried identically
+            # if it is computed after it
+            for col, retry_kwargs in enumerate(
+                [None, {"force_subdivision": True}]
+            ):
+                cars_ds[0, col] = cars_orchestrator.cluster.create_task(
+                    generate_tile_or_sleep, retry_kwargs=retry_kwargs
+                )(
+                    10 + col,
+                    5 * task_timeout,
+                    saving_info=orchestrator.update_saving_infos(
+                        saving_info, row=0, col=col
+                    ),
+                )
+            task_retry = cars_orchestrator.cluster.task_retry
+
+            cars_orchestrator.breakpoint()
+
+            # timed out tile is subdivided on retry
+            assert cars_ds[0, 0]["data"].values[0, 0] == 10
+            assert cars_ds[0, 1]["data"].values[0, 0] == -11
+            assert not task_retry.retried
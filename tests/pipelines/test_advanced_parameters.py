@@ -68,7 +68,12 @@ def test_advanced_parameters_minimal():
 
     config = {"debug_with_roi": True}
 
-    advanced_parameters.check_advanced_parameters(config)
+    overloaded_config = advanced_parameters.check_advanced_parameters(config)
+    assert overloaded_config["max_pairs_in_flight"] == 4
+
+    config["max_pairs_in_flight"] = 0
+    with pytest.raises(Exception):
+        advanced_parameters.check_advanced_parameters(config)
 
 
 @pytest.mark.unit_tests
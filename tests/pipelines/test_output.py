@@ -25,9 +25,12 @@ Test pipeline output
 import os
 import tempfile
 
+import laspy
+import numpy as np
 import pytest
 
-from cars.pipelines.parameters import output_parameters
+from cars.data_structures import dataframe_converter
+from cars.pipelines.parameters import output_constants, output_parameters
 
 from ..helpers import temporary_dir
 
@@ -71,3 +74,71 @@ def test_output_minimal():
         print(f"config {config}")
         overload = output_parameters.check_output_parameters(config)
         print(overload)
+
+
+@pytest.mark.unit_tests
+def test_merge_point_cloud_product():
+    """
+    Test laz tiles of point cloud product merged by pair
+    """
+
+    with tempfile.TemporaryDirectory(dir=temporary_dir()) as directory:
+        config = {
+            "directory": os.path.join(directory, "outdir"),
+            "product_level": "point_cloud",
+            "merge_point_cloud": True,
+        }
+        overload = output_parameters.check_output_parameters(config)
+        assert overload[output_constants.MERGE_POINT_CLOUD] is True
+
+        point_cloud_dir = os.path.join(
+            overload[output_constants.OUT_DIRECTORY],
+            output_constants.POINT_CLOUD_DIRECTORY,
+        )
+        rng = np.random.default_rng(0)
+        nb_points = {}
+        for pair in ["one_two", "one_three"]:
+            pair_dir = os.path.join(point_cloud_dir, pair)
+            os.makedirs(pair_dir)
+            nb_points[pair] = 0
+            for tile in ["0_0", "0_1"]:
+                arrays_pcl = rng.uniform(0, 100, (3, 50))
+                dataframe_converter.generate_laz(
+                    os.path.join(pair_dir, tile + ".laz"),
+                    ["X", "Y", "Z"],
+                    ["red", "green", "blue"],
+                    arrays_pcl,
+                    None,
+                )
+                nb_points[pair] += arrays_pcl.shape[1]
+            # csv tiles are not merged
+            with open(
+                os.path.join(pair_dir, "0_0.csv"), "w", encoding="utf8"
+            ) as csv_file:
+                csv_file.write("x,y,z\n")
+
+        merged_files = output_parameters.merge_point_cloud_product(
+            point_cloud_dir, nb_workers=2
+        )
+
+        assert len(merged_files) == 2
+        for pair, count in nb_points.items():
+            merged_file = os.path.join(
+                point_cloud_dir,
+                pair,
+                output_constants.MERGED_POINT_CLOUD_FILENAME,
+            )
+            assert merged_file in merged_files
+            assert laspy.read(merged_file).header.point_count == count
+
+        # merged files are not merged again
+        merged_files = output_parameters.merge_point_cloud_product(
+            point_cloud_dir, nb_workers=2
+        )
+        for pair, count in nb_points.items():
+            merged_file = os.path.join(
+                point_cloud_dir,
+                pair,
+                output_constants.MERGED_POINT_CLOUD_FILENAME,
+            )
+            assert laspy.read(merged_file).header.point_count == count
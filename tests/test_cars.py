@@ -24,6 +24,8 @@ Test module for cars/cars.py
 
 # Standard imports
 import argparse
+import subprocess
+import sys
 import tempfile
 
 # Third party imports
@@ -50,6 +52,45 @@ def test_cars_parser():
     assert isinstance(parser, argparse.ArgumentParser)
     assert parser.prog == "cars"
 
+    args = parser.parse_args(["--warmup"])
+    assert args.warmup
+    assert args.conf is None
+
+
+@pytest.mark.unit_tests
+def test_cli_import_time():
+    """
+    Test cars command line interface is imported within budget, without
+    heavy modules, only needed to run pipelines
+    """
+    heavy_modules = ["dask", "numba", "pandora", "rasterio", "xarray"]
+    budget = 1.0  # seconds
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys, cars.cars; "
+            "print([mod for mod in {} if mod in sys.modules])".format(
+                heavy_modules
+            ),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
+    # cumulative import time of cars.cars, in microseconds
+    import_times = [
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.split("|")[-1].strip() == "cars.cars"
+    ]
+    assert import_times[0] * 1e-6 < budget
+
 
 @pytest.mark.unit_tests
 def test_main_no_argument():
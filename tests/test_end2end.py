@@ -36,6 +36,7 @@ import tempfile
 from shutil import copy2  # noqa: F401 # pylint: disable=unused-import
 
 # Third party imports
+import laspy
 import pyproj
 import pytest
 import rasterio
@@ -507,6 +508,8 @@ def test_end2end_ventoux_unique():
                 "dump_to_disk": True,
                 "per_job_timeout": 600,
                 "factorize_tasks": True,
+                "max_threads": None,
+                "speculative_execution": False,
             }
         }
 
@@ -2156,6 +2159,8 @@ def test_end2end_use_epipolar_a_priori():
                 "dump_to_disk": True,
                 "per_job_timeout": 600,
                 "factorize_tasks": True,
+                "max_threads": None,
+                "speculative_execution": False,
             }
         }
 
@@ -2456,6 +2461,7 @@ def test_end2end_ventoux_full_output_no_elevation():
                 "classification": True,
                 "contributing_pair": True,
             },
+            "merge_point_cloud": True,
         }
 
         input_config["applications"].update(application_config)
@@ -2798,6 +2804,19 @@ def test_end2end_ventoux_full_output_no_elevation():
                 }
             }
 
+        # laz tiles are merged
+        merged_point_cloud = laspy.read(
+            os.path.join(
+                out_dir, "point_cloud", "left_right", "point_cloud.laz"
+            )
+        )
+        assert merged_point_cloud.header.point_count == sum(
+            laspy.read(
+                os.path.join(out_dir, "point_cloud", tile_file)
+            ).header.point_count
+            for tile_file in point_cloud_index["left_right"].values()
+        )
+
 
 @pytest.mark.end2end_tests
 def test_end2end_ventoux_with_color():